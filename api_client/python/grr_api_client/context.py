@@ -36,13 +36,28 @@ class GrrApiContext(object):
       handler_name: str,
       args: Any,
   ) -> Iterator[message.Message]:
-    """Generates iterator pages."""
+    """Generates iterator pages.
+
+    Pages are requested by offset, unless the handler returns continuation
+    tokens: then every following page is requested using the token returned
+    with the previous one, which keeps the cost of deep pages constant.
+
+    Args:
+      handler_name: Name of the API handler to call.
+      args: Handler arguments. Must have `offset` and `count` fields.
+
+    Yields:
+      Result protos, one per page.
+    """
     offset = args.offset
+    continuation_token = None
 
     while True:
       args_copy = utils.CopyProto(args)
       args_copy.offset = offset
       args_copy.count = self.connector.page_size
+      if continuation_token is not None:
+        args_copy.continuation_token = continuation_token
       result = self.connector.SendRequest(handler_name, args_copy)
 
       if result is None:
@@ -57,6 +72,13 @@ class GrrApiContext(object):
       if not result.items:
         break
 
+      if utils.HasContinuationToken(result):
+        continuation_token = result.continuation_token
+      elif continuation_token is not None:
+        # The previous page was read using a token and this one did not come
+        # with a new one: there are no more results.
+        break
+
       offset += self.connector.page_size
 
   def SendIteratorRequest(
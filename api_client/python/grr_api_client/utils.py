@@ -84,6 +84,14 @@ def MapItemsIterator(
   )
 
 
+def HasContinuationToken(result: message.Message) -> bool:
+  """Checks whether an API result carries a continuation token."""
+  if "continuation_token" not in result.DESCRIPTOR.fields_by_name:
+    return False
+
+  return result.HasField("continuation_token")
+
+
 class BinaryChunkIterator:
   """Iterator object for binary streams."""
 
@@ -12,6 +12,7 @@ from google.protobuf import timestamp_pb2
 from google.protobuf import type_pb2
 from google.protobuf import wrappers_pb2
 from grr_api_client import utils
+from grr_response_proto.api import hunt_pb2
 
 
 class MessageToFlatDictTest(absltest.TestCase):
@@ -59,6 +60,20 @@ class MessageToFlatDictTest(absltest.TestCase):
     self.assertEqual(dct, {"value": 1337 * 2})
 
 
+class HasContinuationTokenTest(absltest.TestCase):
+
+  def testResultWithoutTokenField(self):
+    self.assertFalse(utils.HasContinuationToken(empty_pb2.Empty()))
+
+  def testResultWithUnsetToken(self):
+    result = hunt_pb2.ApiListHuntResultsResult()
+    self.assertFalse(utils.HasContinuationToken(result))
+
+  def testResultWithSetToken(self):
+    result = hunt_pb2.ApiListHuntResultsResult(continuation_token="foo")
+    self.assertTrue(utils.HasContinuationToken(result))
+
+
 class GetCrowdstrikeDecodedBlobTest(absltest.TestCase):
 
   def _CrowdstrikeEncode(self, data) -> bytes:
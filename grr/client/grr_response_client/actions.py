@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 """This file contains common grr jobs."""
 
+import contextlib
 import gc
 import logging
 import pdb
+import threading
+import time
 import traceback
-from typing import NamedTuple
+from typing import Iterator, NamedTuple, Optional
 
 from absl import flags
 import psutil
@@ -41,18 +44,151 @@ class _CpuUsed(NamedTuple):
   sys_time: float
 
 
+class _ThreadCpuTimes(NamedTuple):
+  user: float
+  system: float
+
+
+def _CurrentThreadCpuTimes() -> _ThreadCpuTimes:
+  """Returns the CPU times of the calling thread."""
+  thread_id = threading.get_native_id()
+  for thread in psutil.Process().threads():
+    if thread.id == thread_id:
+      return _ThreadCpuTimes(thread.user_time, thread.system_time)
+
+  # Not all platforms report threads by their native ids.
+  return _ThreadCpuTimes(time.thread_time(), 0.0)
+
+
+class _ActionSlotState(threading.local):
+  """State of the action slot the current thread runs actions in."""
+
+  active = False
+  cpu_budget = None
+
+
+_action_slot = _ActionSlotState()
+
+
+@contextlib.contextmanager
+def ActionSlot(cpu_budget: Optional["CpuBudget"] = None) -> Iterator[None]:
+  """Runs actions in the calling thread as one of concurrent action slots.
+
+  Actions running in a slot are charged for the CPU time of their own thread
+  only (instead of the whole process), since other actions may be running at
+  the same time. They are also throttled to fit the given CPU budget shared by
+  all the slots.
+
+  Args:
+    cpu_budget: A CPU budget shared by all the action slots (if any).
+
+  Yields:
+    Nothing.
+  """
+  _action_slot.active = True
+  _action_slot.cpu_budget = cpu_budget
+  try:
+    yield
+  finally:
+    _action_slot.active = False
+    _action_slot.cpu_budget = None
+
+
+class CpuBudget(object):
+  """A CPU budget of the client process shared by concurrent actions.
+
+  The CPU usage of the whole process is measured over a window of wall time.
+  Actions that report progress while the process is over budget are put to
+  sleep until the average usage falls back within the budget.
+  """
+
+  # Length of the window the CPU usage is averaged over.
+  _WINDOW = 10.0
+
+  # Longest uninterrupted sleep, actions heartbeat in between.
+  _MAX_SLEEP = 1.0
+
+  def __init__(self, cpu_fraction: float):
+    """Initializes the budget.
+
+    Args:
+      cpu_fraction: Maximum CPU usage of the process as a fraction of a single
+        core, e.g. 0.5 for half of a core.
+    """
+    if cpu_fraction <= 0:
+      raise ValueError(f"Invalid CPU budget: {cpu_fraction}")
+
+    self._cpu_fraction = cpu_fraction
+    self._proc = psutil.Process()
+    self._lock = threading.Lock()
+    self._window_start = time.monotonic()
+    self._window_cpu_start = self._ProcessCpuTime()
+
+  def _ProcessCpuTime(self) -> float:
+    cpu_times = self._proc.cpu_times()
+    return (
+        cpu_times.user
+        + cpu_times.system
+        + communication.TotalServerCpuTime()
+        + communication.TotalServerSysTime()
+    )
+
+  def _Overuse(self) -> float:
+    """Returns time (in seconds) to wait to get back within the budget."""
+    with self._lock:
+      now = time.monotonic()
+      cpu_time = self._ProcessCpuTime()
+      elapsed = now - self._window_start
+      used = cpu_time - self._window_cpu_start
+
+      if elapsed > self._WINDOW:
+        # Carry over the overuse (but not the savings) to the next window.
+        overuse = max(0.0, used - elapsed * self._cpu_fraction)
+        self._window_start = now
+        self._window_cpu_start = cpu_time - overuse
+        elapsed = 0.0
+        used = overuse
+
+    return used / self._cpu_fraction - elapsed
+
+  def Throttle(self, heartbeat) -> None:
+    """Sleeps while the process is over budget.
+
+    Args:
+      heartbeat: A function called between consecutive sleeps.
+    """
+    while True:
+      overuse = self._Overuse()
+      if overuse <= 0:
+        return
+
+      time.sleep(min(overuse, self._MAX_SLEEP))
+      heartbeat()
+
+
 class _CpuTimes:
-  """Accounting of used CPU time."""
+  """Accounting of used CPU time.
+
+  Within an action slot, only the CPU time of the calling thread is accounted,
+  since other actions may run at the same time. The CPU time used by the
+  unprivileged servers is accounted in both cases.
+  """
 
   def __init__(self):
     self.proc = psutil.Process()
-    self.cpu_start = self.proc.cpu_times()
+    self.per_thread = _action_slot.active
+    self.cpu_start = self._CpuTimes()
     self.unprivileged_cpu_start = communication.TotalServerCpuTime()
     self.unprivileged_sys_start = communication.TotalServerSysTime()
 
+  def _CpuTimes(self):
+    if self.per_thread:
+      return _CurrentThreadCpuTimes()
+    return self.proc.cpu_times()
+
   @property
   def cpu_used(self) -> _CpuUsed:
-    end = self.proc.cpu_times()
+    end = self._CpuTimes()
     unprivileged_cpu_end = communication.TotalServerCpuTime()
     unprivileged_sys_end = communication.TotalServerSysTime()
     return _CpuUsed(
@@ -105,6 +241,11 @@ class ActionPlugin(object):
   # Authentication Required for this Action:
   _authentication_required = True
 
+  # Whether the action may run for a long time and use a lot of resources. At
+  # most `Client.heavy_action_slots` heavy actions run concurrently, so that
+  # they do not starve cheap actions of action slots.
+  heavy = False
+
   __abstract = True  # pylint: disable=invalid-name
 
   _PROGRESS_THROTTLE_INTERVAL = rdfvalue.Duration.From(2, rdfvalue.SECONDS)
@@ -132,6 +273,7 @@ class ActionPlugin(object):
     self.cpu_limit = rdf_flows.GrrMessage().cpu_limit
     self.start_time = None
     self.runtime_limit = None
+    self._last_progress_time = rdfvalue.RDFDatetime.FromSecondsSinceEpoch(0)
 
   def Execute(self, message):
     """This function parses the RDFValue from the server.
@@ -350,7 +492,7 @@ class ActionPlugin(object):
       RuntimeExceededError: Runtime limit exceeded.
     """
     now = rdfvalue.RDFDatetime.Now()
-    time_since_last_progress = now - ActionPlugin.last_progress_time
+    time_since_last_progress = now - self._last_progress_time
 
     if time_since_last_progress <= self._PROGRESS_THROTTLE_INTERVAL:
       return
@@ -362,15 +504,23 @@ class ActionPlugin(object):
           )
       )
 
-    ActionPlugin.last_progress_time = now
+    self._last_progress_time = now
 
-    self.grr_worker.Heartbeat()
+    # Heartbeats are throttled across all actions, limits are checked for
+    # every action (concurrent actions would skip each other's checks
+    # otherwise).
+    if now - ActionPlugin.last_progress_time > self._PROGRESS_THROTTLE_INTERVAL:
+      ActionPlugin.last_progress_time = now
+      self.grr_worker.Heartbeat()
 
     used_cpu = self.cpu_times.total_cpu_used
 
     if used_cpu > self.cpu_limit:
       raise CPUExceededError("Action exceeded cpu limit.")
 
+    if _action_slot.cpu_budget is not None:
+      _action_slot.cpu_budget.Throttle(self.grr_worker.Heartbeat)
+
   def SyncTransactionLog(self):
     """This flushes the transaction log.
 
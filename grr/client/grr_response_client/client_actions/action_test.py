@@ -6,6 +6,8 @@ import contextlib
 import os
 import platform
 import stat
+import threading
+import time
 import unittest
 from unittest import mock
 
@@ -255,6 +257,101 @@ class ActionTest(client_test_lib.EmptyActionTest):
           worker.SendClientAlert.call_args[0][0], "Cpu limit exceeded."
       )
 
+  def testCPUAccountingInActionSlotIsPerThread(self):
+    pcputimes = collections.namedtuple("pcputimes", ["user", "system"])
+    pthread = collections.namedtuple(
+        "pthread", ["id", "user_time", "system_time"]
+    )
+    thread_cpu_time = 1.0
+
+    class FakeProcess(object):
+
+      def __init__(self, pid=None):
+        del pid  # Unused.
+
+      def cpu_times(self):  # pylint: disable=invalid-name
+        # Other actions use a lot of CPU at the same time.
+        return pcputimes(1000.0, 1000.0)
+
+      def threads(self):  # pylint: disable=invalid-name
+        return [
+            pthread(threading.get_native_id(), thread_cpu_time, 0.5),
+            pthread(threading.get_native_id() + 1, 500.0, 500.0),
+        ]
+
+    class _ProgressAction(ProgressAction):
+
+      def Run(self, *args):
+        nonlocal thread_cpu_time
+        thread_cpu_time = 3.0
+
+    with contextlib.ExitStack() as stack:
+      stack.enter_context(mock.patch.object(psutil, "Process", FakeProcess))
+      stack.enter_context(
+          mock.patch.object(communication, "TotalServerCpuTime", lambda: 0)
+      )
+      stack.enter_context(
+          mock.patch.object(communication, "TotalServerSysTime", lambda: 0)
+      )
+
+      with actions.ActionSlot():
+        action = _ProgressAction(mock.MagicMock())
+        action.SendReply = mock.MagicMock()
+        action.Execute(rdf_flows.GrrMessage(name="ProgressAction"))
+
+    cpu_time_used = action.SendReply.call_args[0][0].cpu_time_used
+    self.assertAlmostEqual(cpu_time_used.user_cpu_time, 2.0)
+    self.assertAlmostEqual(cpu_time_used.system_cpu_time, 0.0)
+
+  def testCpuBudgetThrottlesWhenOverBudget(self):
+    now = 0.0
+    cpu_time = 0.0
+    sleeps = []
+
+    class FakeProcess(object):
+
+      def __init__(self, pid=None):
+        del pid  # Unused.
+
+      def cpu_times(self):  # pylint: disable=invalid-name
+        return collections.namedtuple("pcputimes", ["user", "system"])(
+            cpu_time, 0.0
+        )
+
+    def Sleep(duration):
+      nonlocal now
+      sleeps.append(duration)
+      now += duration
+
+    with contextlib.ExitStack() as stack:
+      stack.enter_context(mock.patch.object(psutil, "Process", FakeProcess))
+      stack.enter_context(
+          mock.patch.object(communication, "TotalServerCpuTime", lambda: 0)
+      )
+      stack.enter_context(
+          mock.patch.object(communication, "TotalServerSysTime", lambda: 0)
+      )
+      stack.enter_context(mock.patch.object(time, "monotonic", lambda: now))
+      stack.enter_context(mock.patch.object(time, "sleep", Sleep))
+
+      budget = actions.CpuBudget(0.5)
+      heartbeat = mock.MagicMock()
+
+      now = 1.0
+      cpu_time = 0.25
+      budget.Throttle(heartbeat)
+      self.assertEmpty(sleeps)
+
+      now = 2.0
+      cpu_time = 2.0
+      budget.Throttle(heartbeat)
+      self.assertEqual(sleeps, [1.0, 1.0])
+      self.assertEqual(heartbeat.call_count, 2)
+
+  def testCpuBudgetRaisesOnInvalidFraction(self):
+    with self.assertRaises(ValueError):
+      actions.CpuBudget(0)
+
   @unittest.skipIf(
       platform.system() == "Windows", "os.statvfs is not available on Windows"
   )
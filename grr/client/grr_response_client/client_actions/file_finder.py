@@ -28,6 +28,7 @@ class FileFinderOS(actions.ActionPlugin):
 
   in_rdfvalue = rdf_file_finder.FileFinderArgs
   out_rdfvalues = [rdf_file_finder.FileFinderResult]
+  heavy = True
 
   def Run(self, args: rdf_file_finder.FileFinderArgs):
     if args.pathtype != rdf_paths.PathSpec.PathType.OS:
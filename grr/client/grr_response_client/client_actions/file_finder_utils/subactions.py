@@ -135,7 +135,9 @@ class DownloadAction(Action):
     max_size = self.opts.max_size
     chunk_size = self.opts.chunk_size
 
-    uploader = uploading.TransferStoreUploader(self.flow, chunk_size=chunk_size)
+    uploader = uploading.TransferStoreUploader(
+        self.flow, chunk_size=chunk_size, digests_only=self.opts.dedup_chunks
+    )
     return uploader.UploadFilePath(filepath, amount=max_size)
 
 
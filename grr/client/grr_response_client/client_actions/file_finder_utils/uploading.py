@@ -21,18 +21,22 @@ class TransferStoreUploader(object):
 
   _TRANSFER_STORE_SESSION_ID = rdfvalue.SessionID(flow_name="TransferStore")
 
-  def __init__(self, action, chunk_size=None):
+  def __init__(self, action, chunk_size=None, digests_only=False):
     """Initializes the uploader.
 
     Args:
       action: A parent action that creates the uploader. Used to communicate
         with the parent flow.
       chunk_size: A number of (uncompressed) bytes per a chunk.
+      digests_only: If set, chunks are only hashed and described but not sent
+        to the transfer store. The server then requests the chunks it does not
+        have yet separately.
     """
     chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
 
     self._action = action
     self._streamer = streaming.Streamer(chunk_size=chunk_size)
+    self._digests_only = digests_only
 
   def UploadFilePath(self, filepath, offset=0, amount=None):
     """Uploads chunks of a file on a given path to the transfer store flow.
@@ -68,11 +72,17 @@ class TransferStoreUploader(object):
 
   def _UploadChunkStream(self, chunk_stream):
     chunks = []
+    # The server uses the digest of the whole stream to finalize the file
+    # without reading all the uploaded chunks back.
+    sha256 = hashlib.sha256()
     for chunk in chunk_stream:
       chunks.append(self._UploadChunk(chunk))
+      sha256.update(chunk.data)
 
     return rdf_client_fs.BlobImageDescriptor(
-        chunks=chunks, chunk_size=self._streamer.chunk_size
+        chunks=chunks,
+        chunk_size=self._streamer.chunk_size,
+        sha256=sha256.digest(),
     )
 
   def _UploadChunk(self, chunk):
@@ -84,10 +94,11 @@ class TransferStoreUploader(object):
     Returns:
       A `BlobImageChunkDescriptor` object.
     """
-    blob = _CompressedDataBlob(chunk)
+    if not self._digests_only:
+      blob = _CompressedDataBlob(chunk)
 
-    self._action.ChargeBytesToSession(len(chunk.data))
-    self._action.SendReply(blob, session_id=self._TRANSFER_STORE_SESSION_ID)
+      self._action.ChargeBytesToSession(len(chunk.data))
+      self._action.SendReply(blob, session_id=self._TRANSFER_STORE_SESSION_ID)
 
     return rdf_client_fs.BlobImageChunkDescriptor(
         digest=hashlib.sha256(chunk.data).digest(),
@@ -25,6 +25,7 @@ class UploaderTest(absltest.TestCase):
 
       self.assertEmpty(blobdesc.chunks)
       self.assertEqual(blobdesc.chunk_size, 3)
+      self.assertEqual(blobdesc.sha256, Sha256(b""))
 
   def testSingleChunk(self):
     action = FakeAction()
@@ -77,6 +78,31 @@ class UploaderTest(absltest.TestCase):
       self.assertEqual(blobdesc.chunks[3].offset, 9)
       self.assertEqual(blobdesc.chunks[3].length, 1)
       self.assertEqual(blobdesc.chunks[3].digest, Sha256(b"0"))
+      self.assertEqual(blobdesc.sha256, Sha256(b"1234567890"))
+
+  def testDigestsOnly(self):
+    action = FakeAction()
+    uploader = uploading.TransferStoreUploader(
+        action, chunk_size=3, digests_only=True
+    )
+
+    with temp.AutoTempFilePath() as temp_filepath:
+      with io.open(temp_filepath, "wb") as temp_file:
+        temp_file.write(b"1234567")
+
+      blobdesc = uploader.UploadFilePath(temp_filepath)
+
+      self.assertEqual(action.charged_bytes, 0)
+      self.assertEmpty(action.messages)
+
+      self.assertLen(blobdesc.chunks, 3)
+      self.assertEqual(blobdesc.chunk_size, 3)
+      self.assertEqual(blobdesc.chunks[0].digest, Sha256(b"123"))
+      self.assertEqual(blobdesc.chunks[1].digest, Sha256(b"456"))
+      self.assertEqual(blobdesc.chunks[2].offset, 6)
+      self.assertEqual(blobdesc.chunks[2].length, 1)
+      self.assertEqual(blobdesc.chunks[2].digest, Sha256(b"7"))
+      self.assertEqual(blobdesc.sha256, Sha256(b"1234567"))
 
   def testLimitedAmount(self):
     action = FakeAction()
@@ -150,7 +150,9 @@ class DownloadAction(Action):
     chunk_size = self._opts.chunk_size
 
     uploader = uploading.TransferStoreUploader(
-        self._action, chunk_size=chunk_size
+        self._action,
+        chunk_size=chunk_size,
+        digests_only=self._opts.dedup_chunks,
     )
     return uploader.UploadFile(fd, amount=max_size)
 
@@ -41,6 +41,7 @@ class CollectLargeFileAction(actions.ActionPlugin):
 
   in_rdfvalue = rdf_large_file.CollectLargeFileArgs
   out_rdfvalues = [rdf_large_file.CollectLargeFileResult]
+  heavy = True
 
   def Run(self, args: rdf_large_file.CollectLargeFileArgs) -> None:
     for result in CollectLargeFile(args):
@@ -562,6 +562,7 @@ class YaraProcessScan(actions.ActionPlugin):
 
   in_rdfvalue = rdf_memory.YaraProcessScanRequest
   out_rdfvalues = [rdf_memory.YaraProcessScanResponse]
+  heavy = True
 
   # We don't want individual response messages to get too big so we send
   # multiple responses for 100 processes each.
@@ -836,6 +837,7 @@ class YaraProcessDump(actions.ActionPlugin):
 
   in_rdfvalue = rdf_memory.YaraProcessDumpArgs
   out_rdfvalues = [rdf_memory.YaraProcessDumpResponse]
+  heavy = True
 
   def _SaveMemDumpToFile(
       self,
@@ -19,6 +19,7 @@ class Find(actions.ActionPlugin):
 
   in_rdfvalue = rdf_client_fs.FindSpec
   out_rdfvalues = [rdf_client_fs.FindSpec, rdf_client_fs.StatEntry]
+  heavy = True
 
   # The filesystem we are limiting ourselves to, if cross_devs is false.
   filesystem_id = None
@@ -194,6 +195,7 @@ class Grep(actions.ActionPlugin):
 
   in_rdfvalue = rdf_client_fs.GrepSpec
   out_rdfvalues = [rdf_client.BufferReference]
+  heavy = True
 
   def FindRegex(self, regex, data):
     """Search the data for a hit."""
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""Benchmarks for the timeline client action walking a large tree."""
+
+from collections.abc import Iterator
+import os
+import stat as stat_mode
+
+from absl import app
+
+from grr_response_client.client_actions import timeline
+from grr_response_core.lib.rdfvalues import mig_timeline
+from grr_response_core.lib.rdfvalues import timeline as rdf_timeline
+from grr_response_core.lib.util import statx
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+
+def _RecursiveWalk(root: bytes) -> Iterator[rdf_timeline.TimelineEntry]:
+  """The original recursive `os.listdir`-based walk, used as a baseline."""
+  dev = os.lstat(root).st_dev
+
+  def Recurse(path: bytes) -> Iterator[rdf_timeline.TimelineEntry]:
+    try:
+      stat = statx.Get(path)
+    except OSError:
+      return
+
+    yield rdf_timeline.TimelineEntry.FromStatx(path, stat)
+
+    if not stat_mode.S_ISDIR(stat.mode) or stat.dev != dev:
+      return
+
+    try:
+      childnames = os.listdir(path)
+    except OSError:
+      childnames = []
+
+    for childname in childnames:
+      for entry in Recurse(os.path.join(path, childname)):
+        yield entry
+
+  return Recurse(root)
+
+
+class TimelineWalkBenchmark(benchmark_test_lib.AverageMicroBenchmarks):
+  """Benchmarks walking and serializing a synthetic directory tree."""
+
+  REPEATS = 3
+
+  # The tree has `_FANOUT` directories on each of `_DEPTH` levels, every one
+  # of them with `_FILES_PER_DIRECTORY` files.
+  _FANOUT = 8
+  _DEPTH = 3
+  _FILES_PER_DIRECTORY = 16
+
+  def setUp(self):
+    super().setUp()
+
+    self.root = os.path.join(self.temp_dir, "tree").encode("utf-8")
+    self._CreateTree(self.root, self._DEPTH)
+
+  def _CreateTree(self, path: bytes, depth: int) -> None:
+    os.makedirs(path, exist_ok=True)
+    for i in range(self._FILES_PER_DIRECTORY):
+      with open(os.path.join(path, b"file%d" % i), "wb") as filedesc:
+        filedesc.write(b"x" * i)
+
+    if depth > 0:
+      for i in range(self._FANOUT):
+        self._CreateTree(os.path.join(path, b"dir%d" % i), depth - 1)
+
+  def testWalk(self):
+    """Walks the tree with and without threads."""
+
+    def RecursiveWalk():
+      return sum(1 for _ in _RecursiveWalk(self.root))
+
+    def IterativeWalk():
+      return sum(1 for _ in timeline.Walk(self.root))
+
+    def ParallelWalk():
+      return sum(1 for _ in timeline.Walk(self.root, max_workers=4))
+
+    self.TimeIt(RecursiveWalk, "Recursive walk (baseline)")
+    self.TimeIt(IterativeWalk, "Iterative walk")
+    self.TimeIt(ParallelWalk, "Iterative walk, 4 threads")
+
+  def testWalkAndSerialize(self):
+    """Walks the tree producing serialized timeline entry batches."""
+
+    def RecursiveWalkAndSerialize():
+      entries = (
+          mig_timeline.ToProtoTimelineEntry(entry)
+          for entry in _RecursiveWalk(self.root)
+      )
+      return sum(
+          len(batch)
+          for batch in rdf_timeline.SerializeTimelineEntryStream(entries)
+      )
+
+    def ParallelWalkAndSerialize():
+      # pylint: disable=protected-access
+      entries = (
+          timeline._TimelineEntryProto(path, stat)
+          for path, stat in timeline._WalkStatx(self.root, max_workers=4)
+      )
+      # pylint: enable=protected-access
+      return sum(
+          len(batch)
+          for batch in rdf_timeline.SerializeTimelineEntryStream(entries)
+      )
+
+    self.TimeIt(RecursiveWalkAndSerialize, "Recursive walk (baseline)")
+    self.TimeIt(ParallelWalkAndSerialize, "Iterative walk, 4 threads")
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
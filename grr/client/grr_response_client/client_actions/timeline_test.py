@@ -11,8 +11,10 @@ import time
 from absl.testing import absltest
 
 from grr_response_client.client_actions import timeline
+from grr_response_core.lib.rdfvalues import mig_timeline
 from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 from grr_response_core.lib.rdfvalues import timeline as rdf_timeline
+from grr_response_core.lib.util import statx
 from grr_response_core.lib.util import temp
 from grr.test_lib import client_test_lib
 from grr.test_lib import skip
@@ -255,6 +257,52 @@ class WalkTest(absltest.TestCase):
       self.assertEqual(paths[0], os.path.join(dirpath, "foo"))
       self.assertEqual(paths[1], os.path.join(dirpath, "foo", "bar"))
 
+  def testParallelWalkPreservesOrder(self):
+    with temp.AutoTempDirPath(remove_non_empty=True) as root_dirpath:
+      for i in range(8):
+        for j in range(8):
+          dirpath = os.path.join(root_dirpath, f"dir{i}", f"dir{j}")
+          os.makedirs(dirpath)
+          _Touch(os.path.join(dirpath, "file"))
+
+      root = root_dirpath.encode("utf-8")
+      sequential_entries = list(timeline.Walk(root))
+      parallel_entries = list(timeline.Walk(root, max_workers=4))
+
+      self.assertLen(sequential_entries, 1 + 8 + 8 * 8 * 2)
+      self.assertEqual(
+          [entry.path for entry in parallel_entries],
+          [entry.path for entry in sequential_entries],
+      )
+
+  def testParallelWalkStopsEarly(self):
+    with temp.AutoTempDirPath(remove_non_empty=True) as root_dirpath:
+      for i in range(16):
+        os.makedirs(os.path.join(root_dirpath, f"dir{i}", "foo"))
+
+      entries = timeline.Walk(root_dirpath.encode("utf-8"), max_workers=4)
+      next(entries)
+      next(entries)
+
+      # Closing the walk should not wait for the whole tree to be listed.
+      entries.close()
+
+  def testTimelineEntryProtoMatchesRDFValue(self):
+    with temp.AutoTempFilePath() as filepath:
+      _Touch(filepath, content=b"foobar")
+      path = filepath.encode("utf-8")
+      stat = statx.Get(path)
+
+    entry = rdf_timeline.TimelineEntry.FromStatx(path, stat)
+    # pylint: disable=protected-access
+    entry_proto = timeline._TimelineEntryProto(path, stat)
+    # pylint: enable=protected-access
+
+    self.assertEqual(
+        entry_proto.SerializeToString(),
+        mig_timeline.ToProtoTimelineEntry(entry).SerializeToString(),
+    )
+
 
 class GetFilesystemType(absltest.TestCase):
 
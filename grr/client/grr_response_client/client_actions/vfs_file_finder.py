@@ -23,6 +23,7 @@ class VfsFileFinder(actions.ActionPlugin):
 
   in_rdfvalue = rdf_file_finder.FileFinderArgs
   out_rdfvalues = [rdf_file_finder.FileFinderResult]
+  heavy = True
 
   def Run(self, args: rdf_file_finder.FileFinderArgs):
     action = self._ParseAction(args)
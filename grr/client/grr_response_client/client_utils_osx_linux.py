@@ -94,8 +94,11 @@ class TransactionLog(object):
 
   max_log_size = 100000000
 
-  def __init__(self, logfile=None):
+  def __init__(self, logfile=None, slot=0):
     self.logfile = logfile or config.CONFIG["Client.transaction_log_file"]
+    # Concurrently running actions keep their own logs next to the first one.
+    if slot:
+      self.logfile = "%s.%d" % (self.logfile, slot)
 
   def Write(self, grr_message):
     """Write the message into the transaction log."""
@@ -276,8 +276,10 @@ class Kernel32(object):
 class TransactionLog(object):
   """A class to manage a transaction log for client processing."""
 
-  def __init__(self):
+  def __init__(self, slot=0):
     self._synced = True
+    # Concurrently running actions keep their own logs next to the first one.
+    self._value_name = "Transaction%d" % slot if slot else "Transaction"
 
   def Write(self, grr_message):
     """Write the message into the transaction log.
@@ -288,7 +290,11 @@ class TransactionLog(object):
     grr_message = grr_message.SerializeToBytes()
     try:
       winreg.SetValueEx(
-          _GetServiceKey(), "Transaction", 0, winreg.REG_BINARY, grr_message
+          _GetServiceKey(),
+          self._value_name,
+          0,
+          winreg.REG_BINARY,
+          grr_message,
       )
       self._synced = False
     except OSError:
@@ -302,7 +308,7 @@ class TransactionLog(object):
   def Clear(self):
     """Wipes the transaction log."""
     try:
-      winreg.DeleteValue(_GetServiceKey(), "Transaction")
+      winreg.DeleteValue(_GetServiceKey(), self._value_name)
       self._synced = False
     except OSError:
       pass
@@ -310,7 +316,9 @@ class TransactionLog(object):
   def Get(self):
     """Return a GrrMessage instance from the transaction log or None."""
     try:
-      value, reg_type = winreg.QueryValueEx(_GetServiceKey(), "Transaction")
+      value, reg_type = winreg.QueryValueEx(
+          _GetServiceKey(), self._value_name
+      )
     except OSError:
       return
 
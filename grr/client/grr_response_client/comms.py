@@ -24,11 +24,150 @@ from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_core.lib.rdfvalues import protodict as rdf_protodict
 
 
+class ActionSlots(object):
+  """Runs client actions concurrently in a bounded number of slots.
+
+  Every slot runs one action at a time, in a thread of its own and with a
+  transaction log of its own. Actions of the same flow run one after another
+  in the order they were submitted, and at most `num_heavy_slots` heavy
+  actions run at the same time, so that cheap actions are not stuck behind
+  long-running ones.
+
+  At most `max_pending` submitted messages wait for a slot, `Submit` blocks
+  once there are more, so that the bounded input queue of the worker keeps
+  throttling the messages fetched from the server.
+  """
+
+  def __init__(
+      self,
+      handler,
+      transaction_logs,
+      num_heavy_slots,
+      cpu_budget=None,
+      max_pending=None,
+  ):
+    """Initializes the slots.
+
+    Args:
+      handler: A function handling a message, accepting the message and the
+        transaction log to use.
+      transaction_logs: Transaction logs of the slots, one per slot.
+      num_heavy_slots: Maximum number of heavy actions running concurrently.
+      cpu_budget: An `actions.CpuBudget` shared by all the slots (if any).
+      max_pending: Maximum number of messages waiting for a slot. Defaults to
+        the number of slots.
+    """
+    self._handler = handler
+    self._transaction_logs = transaction_logs
+    self._num_heavy_slots = num_heavy_slots
+    self._cpu_budget = cpu_budget
+    if max_pending is None:
+      max_pending = len(transaction_logs)
+    self._max_pending = max(1, max_pending)
+
+    self._lock = threading.Lock()
+    self._idle = threading.Condition(self._lock)
+    self._pending_space = threading.Condition(self._lock)
+    self._free_slots = list(range(len(transaction_logs)))
+    self._num_running_heavy = 0
+    self._busy_sessions = set()
+    self._pending = collections.deque()
+
+  def Submit(self, message, heavy=False):
+    """Runs the message as soon as a slot is available.
+
+    Blocks while `max_pending` messages are already waiting for a slot.
+
+    Args:
+      message: A message to handle.
+      heavy: Whether the message runs a heavy action.
+    """
+    with self._lock:
+      self._pending_space.wait_for(
+          lambda: len(self._pending) < self._max_pending
+      )
+      self._pending.append((message, heavy))
+      self._StartPending()
+
+  def _StartPending(self):
+    """Starts pending messages that can run. Lock must be held."""
+    skipped = collections.deque()
+    blocked_sessions = set()
+
+    while self._pending and self._free_slots:
+      message, heavy = self._pending.popleft()
+      session_id = str(message.session_id)
+
+      if (
+          session_id in self._busy_sessions
+          or session_id in blocked_sessions
+          or (heavy and self._num_running_heavy >= self._num_heavy_slots)
+      ):
+        # Later messages of the same flow must not overtake this one.
+        blocked_sessions.add(session_id)
+        skipped.append((message, heavy))
+        continue
+
+      slot = self._free_slots.pop(0)
+      self._busy_sessions.add(session_id)
+      if heavy:
+        self._num_running_heavy += 1
+
+      thread = threading.Thread(
+          target=self._Run,
+          args=(slot, message, heavy),
+          name="ActionSlot%d" % slot,
+      )
+      thread.daemon = True
+      thread.start()
+
+    skipped.extend(self._pending)
+    self._pending = skipped
+
+  def _Run(self, slot, message, heavy):
+    try:
+      with actions.ActionSlot(self._cpu_budget):
+        self._handler(message, self._transaction_logs[slot])
+    finally:
+      with self._lock:
+        self._free_slots.append(slot)
+        self._free_slots.sort()
+        self._busy_sessions.discard(str(message.session_id))
+        if heavy:
+          self._num_running_heavy -= 1
+
+        self._StartPending()
+        self._pending_space.notify_all()
+        self._idle.notify_all()
+
+  def NumRunning(self):
+    """Returns the number of actions currently running."""
+    with self._lock:
+      return len(self._transaction_logs) - len(self._free_slots)
+
+  def WaitUntilIdle(self, timeout=None):
+    """Waits until all submitted messages are handled.
+
+    Args:
+      timeout: Maximum time (in seconds) to wait for.
+
+    Returns:
+      True if all submitted messages were handled, False on timeout.
+    """
+    with self._idle:
+      return self._idle.wait_for(
+          lambda: not self._pending
+          and len(self._free_slots) == len(self._transaction_logs),
+          timeout=timeout,
+      )
+
+
 class GRRClientWorker(threading.Thread):
   """This client worker runs the main loop in another thread.
 
   The client which uses this worker is not blocked while queuing messages to be
-  worked on. There is only a single working thread though.
+  worked on. Messages are handled on the worker thread one at a time, unless
+  `Client.action_slots` allows actions to run concurrently (see `ActionSlots`).
 
   The overall effect is that the HTTP client is not blocked waiting for actions
   to be executed, and at the same time, the client working thread is not blocked
@@ -43,11 +182,15 @@ class GRRClientWorker(threading.Thread):
     # A reference to the parent client that owns us.
     self.client = client
 
-    self._is_active = False
+    self._num_active = 0
 
     self.proc = psutil.Process()
 
+    num_slots = max(1, config.CONFIG["Client.action_slots"])
     self.transaction_log = client_utils.TransactionLog()
+    self._transaction_logs = [self.transaction_log] + [
+        client_utils.TransactionLog(slot=slot) for slot in range(1, num_slots)
+    ]
 
     def HeartBeatStub():
       pass
@@ -71,6 +214,24 @@ class GRRClientWorker(threading.Thread):
           heart_beat_cb=self.heart_beat_cb,
       )
 
+    self._action_slots = None
+    if num_slots > 1:
+      # Keep at least one slot for cheap actions.
+      num_heavy_slots = min(
+          max(1, config.CONFIG["Client.heavy_action_slots"]), num_slots - 1
+      )
+      cpu_budget = None
+      if config.CONFIG["Client.action_slots_cpu_budget"] > 0:
+        cpu_budget = actions.CpuBudget(
+            config.CONFIG["Client.action_slots_cpu_budget"]
+        )
+      self._action_slots = ActionSlots(
+          self._HandleMessageSafely,
+          self._transaction_logs,
+          num_heavy_slots=num_heavy_slots,
+          cpu_budget=cpu_budget,
+      )
+
     self.daemon = True
 
   def QueueResponse(self, message, blocking=True):
@@ -107,7 +268,8 @@ class GRRClientWorker(threading.Thread):
     return self._out_queue.Size()
 
   def SyncTransactionLog(self):
-    self.transaction_log.Sync()
+    for transaction_log in self._transaction_logs:
+      transaction_log.Sync()
 
   def Heartbeat(self):
     if self.heart_beat_cb:
@@ -188,16 +350,22 @@ class GRRClientWorker(threading.Thread):
           "Action exceeded network send limit."
       )
 
-  def HandleMessage(self, message):
+  def HandleMessage(self, message, transaction_log=None):
     """Entry point for processing jobs.
 
     Args:
         message: The GrrMessage that was delivered from the server.
+        transaction_log: The transaction log to record the message in. The
+          log of the first action slot is used if not specified.
 
     Raises:
         RuntimeError: The client action requested was not found.
     """
-    self._is_active = True
+    if transaction_log is None:
+      transaction_log = self.transaction_log
+
+    with self.lock:
+      self._num_active += 1
     try:
       action_cls = client_actions.REGISTRY.get(message.name)
       if action_cls is None:
@@ -206,20 +374,41 @@ class GRRClientWorker(threading.Thread):
       action = action_cls(grr_worker=self)
 
       # Write the message to the transaction log.
-      self.transaction_log.Write(message)
+      transaction_log.Write(message)
 
       # Heartbeat so we have the full period to work on this message.
       action.Progress()
       action.Execute(message)
 
       # If we get here without exception, we can remove the transaction.
-      self.transaction_log.Clear()
+      transaction_log.Clear()
     finally:
-      self._is_active = False
+      with self.lock:
+        self._num_active -= 1
+
+  def _HandleMessageSafely(self, message, transaction_log):
+    """Handles the message, reporting errors to the server."""
+    try:
+      self.HandleMessage(message, transaction_log)
+      # Catch any errors and keep going here
+    except Exception as e:  # pylint: disable=broad-except
+      logging.warning("%s", e)
+      self.SendReply(
+          rdf_flows.GrrStatus(
+              status=rdf_flows.GrrStatus.ReturnedStatus.GENERIC_ERROR,
+              error_message=utils.SmartUnicode(e),
+          ),
+          request_id=message.request_id,
+          response_id=1,
+          session_id=message.session_id,
+          message_type=rdf_flows.GrrMessage.Type.STATUS,
+      )
+      if flags.FLAGS.pdb_post_mortem:
+        pdb.post_mortem()
 
   def IsActive(self):
     """Returns True if worker is currently handling a message."""
-    return self._is_active
+    return self._num_active > 0
 
   def SendClientAlert(self, msg):
     self.SendReply(
@@ -244,22 +433,23 @@ class GRRClientWorker(threading.Thread):
     # is anything in the transaction log we assume its there because we crashed
     # last time and let the server know.
 
-    last_request = self.transaction_log.Get()
-    if last_request:
-      status = rdf_flows.GrrStatus(
-          status=rdf_flows.GrrStatus.ReturnedStatus.CLIENT_KILLED,
-          error_message="Client killed during transaction",
-      )
+    for transaction_log in self._transaction_logs:
+      last_request = transaction_log.Get()
+      if last_request:
+        status = rdf_flows.GrrStatus(
+            status=rdf_flows.GrrStatus.ReturnedStatus.CLIENT_KILLED,
+            error_message="Client killed during transaction",
+        )
 
-      self.SendReply(
-          status,
-          request_id=last_request.request_id,
-          response_id=1,
-          session_id=last_request.session_id,
-          message_type=rdf_flows.GrrMessage.Type.STATUS,
-      )
+        self.SendReply(
+            status,
+            request_id=last_request.request_id,
+            response_id=1,
+            session_id=last_request.session_id,
+            message_type=rdf_flows.GrrMessage.Type.STATUS,
+        )
 
-    self.transaction_log.Clear()
+      transaction_log.Clear()
 
     # Inform the server that we started.
     action = admin.SendStartupInfo(grr_worker=self)
@@ -278,23 +468,12 @@ class GRRClientWorker(threading.Thread):
         if message is None:
           break
 
-        try:
-          self.HandleMessage(message)
-          # Catch any errors and keep going here
-        except Exception as e:  # pylint: disable=broad-except
-          logging.warning("%s", e)
-          self.SendReply(
-              rdf_flows.GrrStatus(
-                  status=rdf_flows.GrrStatus.ReturnedStatus.GENERIC_ERROR,
-                  error_message=utils.SmartUnicode(e),
-              ),
-              request_id=message.request_id,
-              response_id=1,
-              session_id=message.session_id,
-              message_type=rdf_flows.GrrMessage.Type.STATUS,
-          )
-          if flags.FLAGS.pdb_post_mortem:
-            pdb.post_mortem()
+        if self._action_slots is None:
+          self._HandleMessageSafely(message, self.transaction_log)
+        else:
+          action_cls = client_actions.REGISTRY.get(message.name)
+          heavy = action_cls is not None and action_cls.heavy
+          self._action_slots.Submit(message, heavy=heavy)
 
     except Exception as e:  # pylint: disable=broad-except
       logging.error("Exception outside of the processing loop: %r", e)
@@ -1,10 +1,14 @@
 #!/usr/bin/env python
 """Test for client comms."""
 
+import threading
+import time
+
 from absl import app
 
 from grr_response_client import comms
 from grr_response_core.lib import rdfvalue
+from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr.test_lib import test_lib
 
 
@@ -25,6 +29,124 @@ class GRRClientWorkerTest(test_lib.GRRBaseTest):
     self.assertEqual(messages[0].payload, rdfvalue.RDFDatetime(0))
 
 
+def _Message(flow_name, name="Foo"):
+  return rdf_flows.GrrMessage(
+      session_id=rdfvalue.FlowSessionID(flow_name=flow_name), name=name
+  )
+
+
+class ActionSlotsTest(test_lib.GRRBaseTest):
+  """Tests the ActionSlots class."""
+
+  def testRunsActionsConcurrently(self):
+    barrier = threading.Barrier(2, timeout=10)
+    errors = []
+
+    def Handler(message, transaction_log):
+      del message, transaction_log  # Unused.
+      try:
+        barrier.wait()
+      except threading.BrokenBarrierError as e:
+        errors.append(e)
+
+    slots = comms.ActionSlots(Handler, [None, None], num_heavy_slots=1)
+    slots.Submit(_Message("Flow1"))
+    slots.Submit(_Message("Flow2"))
+
+    self.assertTrue(slots.WaitUntilIdle(timeout=10))
+    self.assertEmpty(errors)
+
+  def testRunsActionsOfSameFlowInOrder(self):
+    events = []
+
+    def Handler(message, transaction_log):
+      del transaction_log  # Unused.
+      events.append(("start", message.name))
+      time.sleep(0.01)
+      events.append(("end", message.name))
+
+    slots = comms.ActionSlots(Handler, [None, None, None], num_heavy_slots=1)
+    for name in ["Foo", "Bar", "Baz"]:
+      slots.Submit(_Message("Flow1", name=name))
+
+    self.assertTrue(slots.WaitUntilIdle(timeout=10))
+    self.assertEqual(
+        events,
+        [
+            ("start", "Foo"),
+            ("end", "Foo"),
+            ("start", "Bar"),
+            ("end", "Bar"),
+            ("start", "Baz"),
+            ("end", "Baz"),
+        ],
+    )
+
+  def testLightActionsDoNotWaitForHeavyActions(self):
+    release_heavy = threading.Event()
+    light_done = threading.Event()
+    started = []
+
+    def Handler(message, transaction_log):
+      del transaction_log  # Unused.
+      started.append(message.name)
+      if message.name == "Light":
+        light_done.set()
+      else:
+        release_heavy.wait(timeout=10)
+
+    slots = comms.ActionSlots(Handler, [None, None, None], num_heavy_slots=1)
+    slots.Submit(_Message("Flow1", name="Heavy1"), heavy=True)
+    slots.Submit(_Message("Flow2", name="Heavy2"), heavy=True)
+    slots.Submit(_Message("Flow3", name="Light"))
+
+    self.assertTrue(light_done.wait(timeout=10))
+    self.assertNotIn("Heavy2", started)
+    self.assertEqual(slots.NumRunning(), 1)
+
+    release_heavy.set()
+    self.assertTrue(slots.WaitUntilIdle(timeout=10))
+    self.assertCountEqual(started, ["Heavy1", "Heavy2", "Light"])
+
+  def testUsesTransactionLogOfSlot(self):
+    transaction_logs = []
+
+    def Handler(message, transaction_log):
+      del message  # Unused.
+      transaction_logs.append(transaction_log)
+
+    slots = comms.ActionSlots(Handler, ["log0", "log1"], num_heavy_slots=1)
+    slots.Submit(_Message("Flow1"))
+
+    self.assertTrue(slots.WaitUntilIdle(timeout=10))
+    self.assertEqual(transaction_logs, ["log0"])
+
+  def testSubmitBlocksWhenTooManyMessagesArePending(self):
+    release = threading.Event()
+
+    def Handler(message, transaction_log):
+      del message, transaction_log  # Unused.
+      release.wait(timeout=10)
+
+    slots = comms.ActionSlots(
+        Handler, [None], num_heavy_slots=1, max_pending=1
+    )
+    slots.Submit(_Message("Flow1"))
+    slots.Submit(_Message("Flow2"))
+
+    submit_thread = threading.Thread(
+        target=lambda: slots.Submit(_Message("Flow3"))
+    )
+    submit_thread.start()
+    submit_thread.join(timeout=0.1)
+    self.assertTrue(submit_thread.is_alive())
+
+    release.set()
+    submit_thread.join(timeout=10)
+    self.assertFalse(submit_thread.is_alive())
+    self.assertTrue(slots.WaitUntilIdle(timeout=10))
+
+
 def main(argv):
   test_lib.main(argv)
 
@@ -157,6 +157,38 @@ config_lib.DEFINE_string(
     "The file where we write the agent transaction log.",
 )
 
+config_lib.DEFINE_integer(
+    "Client.action_slots",
+    default=1,
+    help=(
+        "Number of client actions that can run concurrently. With a single "
+        "slot, actions run one after another. Actions of the same flow "
+        "always run one after another."
+    ),
+)
+
+config_lib.DEFINE_integer(
+    "Client.heavy_action_slots",
+    default=1,
+    help=(
+        "Number of long-running, resource-heavy client actions (such as "
+        "FileFinderOS, Timeline or YaraProcessScan) that can run "
+        "concurrently. At least one slot is always kept for other actions. "
+        "Only used when Client.action_slots is greater than 1."
+    ),
+)
+
+config_lib.DEFINE_float(
+    "Client.action_slots_cpu_budget",
+    default=1.0,
+    help=(
+        "Maximum CPU usage of the client, as a fraction of a single core, "
+        "while actions run concurrently. Actions are slowed down to stay "
+        "within the budget. Set to 0 to disable. Only used when "
+        "Client.action_slots is greater than 1."
+    ),
+)
+
 config_lib.DEFINE_integer(
     "Network.api", 3, "The version of the network protocol the client "
     "uses.")
@@ -3,6 +3,7 @@
 
 
 from grr_response_core.lib import config_lib
+from grr_response_core.lib import rdfvalue
 
 config_lib.DEFINE_integer("Datastore.maximum_blob_size", 512 * 1024,
                           "Maximum blob size we may store in the datastore.")
@@ -10,9 +11,52 @@ config_lib.DEFINE_integer("Datastore.maximum_blob_size", 512 * 1024,
 config_lib.DEFINE_string("Blobstore.implementation", "DbBlobStore",
                          "Blob storage subsystem to use.")
 
+config_lib.DEFINE_bool(
+    "Blobstore.arrival_notifications",
+    default=True,
+    help=(
+        "If true, threads waiting for blobs are woken up as soon as the blobs "
+        "are written, instead of only finding them on the next poll of the "
+        "blob store. Blobs written by other processes (e.g. the frontends) "
+        "are signalled through the relational database, which is polled by "
+        "one thread per process while blobs are awaited."
+    ),
+)
+
 config_lib.DEFINE_string("Database.implementation", "",
                          "Relational database system to use.")
 
+config_lib.DEFINE_bool(
+    "Database.profiling_enabled",
+    default=False,
+    help=(
+        "If true, every database call is timed and tagged with its caller "
+        "(flow class, hunt id or API method). Slow calls are written to the "
+        "database together with their SQL statements and can be listed "
+        "through the root API. The option applies per process: only calls of "
+        "server processes that have it enabled are recorded, but the calls "
+        "of all processes are listed by the API of any of them."
+    ),
+)
+config_lib.DEFINE_float(
+    "Database.profiling_slow_call_threshold",
+    default=1.0,
+    help=(
+        "Duration (in seconds) above which a profiled database call is "
+        "considered slow. Only used when Database.profiling_enabled is true."
+    ),
+)
+config_lib.DEFINE_integer(
+    "Database.profiling_max_stored_slow_calls",
+    default=100,
+    help=(
+        "Number of the most recent slow database calls to keep in the "
+        "database. The limit is shared by all server processes, so a busy "
+        "process can push out the calls of the others. Only used when "
+        "Database.profiling_enabled is true."
+    ),
+)
+
 # MySQL configuration.
 config_lib.DEFINE_string("Mysql.host", "localhost",
                          "The MySQL server hostname.")
@@ -50,6 +94,35 @@ config_lib.DEFINE_integer(
     help="The maximum number of flow-processing worker threads.",
 )
 
+config_lib.DEFINE_string(
+    "Mysql.replica_host",
+    default="",
+    help="The hostname of a read replica of the MySQL server. If set, readonly "
+    "queries that do not need to observe the latest writes (e.g. reading hunt "
+    "results) are sent to the replica. Other settings (database, credentials, "
+    "SSL) are the same as for the primary server.")
+
+config_lib.DEFINE_integer(
+    "Mysql.replica_port", 0,
+    "The MySQL read replica port. If 0, Mysql.port is used.")
+
+config_lib.DEFINE_integer(
+    "Mysql.replica_conn_pool_max",
+    default=10,
+    help="The maximum number of open connections to the read replica.")
+
+config_lib.DEFINE_integer(
+    "Mysql.replica_max_lag",
+    default=5,
+    help="Maximum replication lag of the read replica, in seconds. Queries are "
+    "sent to the primary server while the replica lags behind more.")
+
+config_lib.DEFINE_integer(
+    "Mysql.replica_lag_check_interval",
+    default=10,
+    help="How often the replication lag of the read replica is checked, in "
+    "seconds.")
+
 config_lib.DEFINE_string(
     "Mysql.migrations_dir", "%(grr_response_server/databases/mysql_migrations@"
     "grr-response-server|resource)", "Folder with MySQL migrations files.")
@@ -121,3 +194,138 @@ config_lib.DEFINE_string(
         "Only used when Blobstore.implementation is GCSBlobStore."
     ),
 )
+
+# Filesystem blobstore config
+config_lib.DEFINE_string(
+    "Blobstore.filesystem.root_path",
+    default="",
+    help=(
+        "Directory to store blobs in. Only used when Blobstore.implementation "
+        "is FilesystemBlobStore."
+    ),
+)
+config_lib.DEFINE_integer(
+    "Blobstore.filesystem.shard_levels",
+    default=2,
+    help=(
+        "Number of nested shard directories (named after two hex digits of "
+        "the blob id each) to spread the blob files across. Only used when "
+        "Blobstore.implementation is FilesystemBlobStore."
+    ),
+)
+config_lib.DEFINE_bool(
+    "Blobstore.filesystem.fsync",
+    default=True,
+    help=(
+        "If true, blobs are flushed to disk before a write is acknowledged. "
+        "Directories are synced once per written batch of blobs. Only used "
+        "when Blobstore.implementation is FilesystemBlobStore."
+    ),
+)
+
+# Caching blobstore config
+config_lib.DEFINE_string(
+    "Blobstore.caching.delegate_implementation",
+    default="DbBlobStore",
+    help=(
+        "Blob store to cache the blobs of. Only used when "
+        "Blobstore.implementation is CachingBlobStore."
+    ),
+)
+config_lib.DEFINE_integer(
+    "Blobstore.caching.memory_cache_size",
+    default=256 * 1024 * 1024,
+    help=(
+        "Max total size (in bytes) of blobs cached in memory. Only used when "
+        "Blobstore.implementation is CachingBlobStore."
+    ),
+)
+config_lib.DEFINE_string(
+    "Blobstore.caching.disk_cache_path",
+    default="",
+    help=(
+        "Directory to cache blobs in, in addition to the in-memory cache. "
+        "Blobs are not cached on disk if empty. Only used when "
+        "Blobstore.implementation is CachingBlobStore."
+    ),
+)
+config_lib.DEFINE_integer(
+    "Blobstore.caching.disk_cache_size",
+    default=10 * 1024 * 1024 * 1024,
+    help=(
+        "Max total size (in bytes) of blobs cached on disk. Only used when "
+        "Blobstore.implementation is CachingBlobStore."
+    ),
+)
+config_lib.DEFINE_semantic_value(
+    rdfvalue.Duration,
+    "Blobstore.caching.negative_cache_ttl",
+    default="1s",
+    help=(
+        "Time for which blobs reported missing are remembered. Blobs written "
+        "by other processes may be reported missing for that long. Set to 0s "
+        "to disable. Only used when Blobstore.implementation is "
+        "CachingBlobStore."
+    ),
+)
+config_lib.DEFINE_integer(
+    "Blobstore.caching.bloom_filter_capacity",
+    default=1000000,
+    help=(
+        "Number of missing blobs remembered in the Bloom filter. Only used "
+        "when Blobstore.implementation is CachingBlobStore."
+    ),
+)
+config_lib.DEFINE_float(
+    "Blobstore.caching.bloom_filter_error_rate",
+    default=0.001,
+    help=(
+        "False positive rate of the Bloom filter of missing blobs. Only used "
+        "when Blobstore.implementation is CachingBlobStore."
+    ),
+)
+
+# Compressing blobstore config
+config_lib.DEFINE_string(
+    "Blobstore.compression.delegate_implementation",
+    default="DbBlobStore",
+    help=(
+        "Blob store to write compressed blobs to. Only used when "
+        "Blobstore.implementation is CompressingBlobStore."
+    ),
+)
+config_lib.DEFINE_integer(
+    "Blobstore.compression.level",
+    default=6,
+    help=(
+        "Zlib compression level (1-9, 0 stores blobs uncompressed). Only used "
+        "when Blobstore.implementation is CompressingBlobStore."
+    ),
+)
+config_lib.DEFINE_integer(
+    "Blobstore.compression.min_size",
+    default=512,
+    help=(
+        "Blobs smaller than that (in bytes) are stored uncompressed. Only "
+        "used when Blobstore.implementation is CompressingBlobStore."
+    ),
+)
+config_lib.DEFINE_float(
+    "Blobstore.compression.max_entropy",
+    default=7.5,
+    help=(
+        "Blobs with a higher estimated entropy (in bits per byte, at most 8) "
+        "are considered compressed or encrypted already and are stored "
+        "uncompressed. Only used when Blobstore.implementation is "
+        "CompressingBlobStore."
+    ),
+)
+config_lib.DEFINE_float(
+    "Blobstore.compression.min_savings",
+    default=0.1,
+    help=(
+        "Blobs are stored uncompressed unless compression saves at least "
+        "that fraction of their size. Only used when Blobstore.implementation "
+        "is CompressingBlobStore."
+    ),
+)
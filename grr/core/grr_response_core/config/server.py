@@ -38,6 +38,18 @@ config_lib.DEFINE_integer(
     "Worker.queue_shards", 5, "Queue notifications will be sharded across "
     "this number of datastore subjects.")
 
+config_lib.DEFINE_integer(
+    "Worker.processes", 1,
+    "Number of worker processes to run. If greater than 1, the worker starts "
+    "a supervisor process running this many worker processes, each with its "
+    "own database connections and flow processing threads. Every process "
+    "needs its own monitoring port (see Monitoring.http_port_max).")
+
+config_lib.DEFINE_integer(
+    "Worker.drain_timeout", 600,
+    "Time (in seconds) worker processes have to finish processing flows "
+    "after being asked to stop, before they are killed.")
+
 config_lib.DEFINE_list("Frontend.well_known_flows", [], "Unused, Deprecated.")
 
 # Smtp settings.
@@ -297,6 +309,12 @@ config_lib.DEFINE_integer(
     help="Maximum number of client ids to place in a single Fleetspeak "
     "ListClients() API request.")
 
+config_lib.DEFINE_integer(
+    "Server.fleetspeak_send_parallelism",
+    default=16,
+    help="Maximum number of concurrent InsertMessage() calls a server process "
+    "makes when sending batches of messages to Fleetspeak.")
+
 config_lib.DEFINE_bool(
     "Server.fleetspeak_cps_enabled",
     default=False,
@@ -345,6 +363,18 @@ config_lib.DEFINE_boolean(
     "Server.grr_binaries_readonly", False,
     "When set to True, uploaded GRR binaries can't be deleted or overwritten.")
 
+config_lib.DEFINE_bool(
+    "Server.verify_uploaded_file_contents",
+    default=False,
+    help=(
+        "If true, hashes of downloaded files are always computed by reading "
+        "the file contents back from the blob store. Otherwise, files whose "
+        "SHA-256 digest reported by the client is already known with the "
+        "same blobs are finalized without reading the blobs. Reported "
+        "digests are never trusted for contents that are not known yet."
+    ),
+)
+
 config_lib.DEFINE_boolean(
     name="Interrogate.collect_crowdstrike_agent_id",
     default=False,
@@ -404,3 +434,22 @@ config_lib.DEFINE_string(
     default=None,
     help="An UTF-8 encoded Ed25519 encryption key to sign commands.",
 )
+
+config_lib.DEFINE_integer(
+    "Export.conversion_threads",
+    default=4,
+    help=(
+        "Number of threads a server process uses to convert flow results to "
+        "export-friendly messages. If 0, flow results are converted serially "
+        "in the exporting thread."
+    ),
+)
+
+config_lib.DEFINE_integer(
+    "Export.max_in_flight_batches",
+    default=4,
+    help=(
+        "Maximum number of batches of flow results a single export converts "
+        "concurrently. Bounds the memory used by the conversion."
+    ),
+)
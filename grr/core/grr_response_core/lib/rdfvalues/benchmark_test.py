@@ -3,11 +3,15 @@
 
 from absl import app
 
+from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import type_info
 from grr_response_core.lib.rdfvalues import client as rdf_client
+from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
+from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_proto import jobs_pb2
 from grr_response_proto import knowledge_base_pb2
+from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
 from grr.test_lib import benchmark_test_lib
 from grr.test_lib import test_lib
 
@@ -370,6 +374,84 @@ class RDFValueBenchmark(benchmark_test_lib.AverageMicroBenchmarks):
     self.TimeIt(RDFStructDecodeEncode)
     self.TimeIt(ProtoDecodeEncode)
 
+  def _TimeProtoToRDFConversion(self, rdf_cls, proto, field):
+    """Compares proto to RDF conversion with a serialize-parse round trip."""
+
+    def SerializeAndParse():
+      rdf = rdf_cls.FromSerializedBytes(proto.SerializeToString())
+      self.assertTrue(rdf.HasField(field))
+
+    def FromPrimitiveProto():
+      rdf = rdf_cls.FromPrimitiveProto(proto)
+      self.assertTrue(rdf.HasField(field))
+
+    self.assertEqual(
+        rdf_cls.FromPrimitiveProto(proto),
+        rdf_cls.FromSerializedBytes(proto.SerializeToString()),
+    )
+
+    name = rdf_cls.__name__
+    self.TimeIt(SerializeAndParse, "%s serialize and parse" % name)
+    self.TimeIt(FromPrimitiveProto, "%s from primitive proto" % name)
+
+  def testFlowResponseFromProto(self):
+    response = rdf_flow_objects.FlowResponse(
+        client_id="C.1234567890123456",
+        flow_id="ABCDEF12",
+        request_id=1,
+        response_id=2,
+        payload=rdf_client_fs.StatEntry(st_size=1024, st_mode=0o644),
+        timestamp=rdfvalue.RDFDatetime.FromSecondsSinceEpoch(42),
+    )
+    self._TimeProtoToRDFConversion(
+        rdf_flow_objects.FlowResponse,
+        response.AsPrimitiveProto(),
+        "request_id",
+    )
+
+  def testFlowRequestFromProto(self):
+    request = rdf_flow_objects.FlowRequest(
+        client_id="C.1234567890123456",
+        flow_id="ABCDEF12",
+        request_id=1,
+        next_state="ProcessResponses",
+        nr_responses_expected=10,
+        needs_processing=True,
+    )
+    self._TimeProtoToRDFConversion(
+        rdf_flow_objects.FlowRequest,
+        request.AsPrimitiveProto(),
+        "request_id",
+    )
+
+  def testFlowFromProto(self):
+    flow = rdf_flow_objects.Flow(
+        client_id="C.1234567890123456",
+        flow_id="ABCDEF12",
+        flow_class_name="FileFinder",
+        creator="test",
+        next_request_to_process=1,
+        network_bytes_sent=1024,
+        create_time=rdfvalue.RDFDatetime.FromSecondsSinceEpoch(42),
+    )
+    self._TimeProtoToRDFConversion(
+        rdf_flow_objects.Flow,
+        flow.AsPrimitiveProto(),
+        "flow_id",
+    )
+
+  def testGrrMessageFromProto(self):
+    message = rdf_flows.GrrMessage(
+        session_id="aff4:/C.1234567890123456/flows/ABCDEF12",
+        name="GetFileStat",
+        request_id=1,
+        response_id=1,
+        payload=rdf_client_fs.StatEntry(st_size=1024, st_mode=0o644),
+    )
+    self._TimeProtoToRDFConversion(
+        rdf_flows.GrrMessage, message.AsPrimitiveProto(), "request_id"
+    )
+
 
 def main(argv):
   # Run the full test suite
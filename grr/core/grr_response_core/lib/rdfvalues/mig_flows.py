@@ -11,7 +11,7 @@ def ToProtoGrrMessage(rdf: rdf_flows.GrrMessage) -> jobs_pb2.GrrMessage:
 
 
 def ToRDFGrrMessage(proto: jobs_pb2.GrrMessage) -> rdf_flows.GrrMessage:
-  return rdf_flows.GrrMessage.FromSerializedBytes(proto.SerializeToString())
+  return rdf_flows.GrrMessage.FromPrimitiveProto(proto)
 
 
 def ToProtoGrrStatus(rdf: rdf_flows.GrrStatus) -> jobs_pb2.GrrStatus:
@@ -19,7 +19,7 @@ def ToProtoGrrStatus(rdf: rdf_flows.GrrStatus) -> jobs_pb2.GrrStatus:
 
 
 def ToRDFGrrStatus(proto: jobs_pb2.GrrStatus) -> rdf_flows.GrrStatus:
-  return rdf_flows.GrrStatus.FromSerializedBytes(proto.SerializeToString())
+  return rdf_flows.GrrStatus.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowProcessingRequest(
@@ -31,9 +31,7 @@ def ToProtoFlowProcessingRequest(
 def ToRDFFlowProcessingRequest(
     proto: flows_pb2.FlowProcessingRequest,
 ) -> rdf_flows.FlowProcessingRequest:
-  return rdf_flows.FlowProcessingRequest.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flows.FlowProcessingRequest.FromPrimitiveProto(proto)
 
 
 def ToProtoNotification(rdf: rdf_flows.Notification) -> jobs_pb2.Notification:
@@ -41,7 +39,7 @@ def ToProtoNotification(rdf: rdf_flows.Notification) -> jobs_pb2.Notification:
 
 
 def ToRDFNotification(proto: jobs_pb2.Notification) -> rdf_flows.Notification:
-  return rdf_flows.Notification.FromSerializedBytes(proto.SerializeToString())
+  return rdf_flows.Notification.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowNotification(
@@ -53,9 +51,7 @@ def ToProtoFlowNotification(
 def ToRDFFlowNotification(
     proto: jobs_pb2.FlowNotification,
 ) -> rdf_flows.FlowNotification:
-  return rdf_flows.FlowNotification.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flows.FlowNotification.FromPrimitiveProto(proto)
 
 
 def ToProtoPackedMessageList(
@@ -67,9 +63,7 @@ def ToProtoPackedMessageList(
 def ToRDFPackedMessageList(
     proto: jobs_pb2.PackedMessageList,
 ) -> rdf_flows.PackedMessageList:
-  return rdf_flows.PackedMessageList.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flows.PackedMessageList.FromPrimitiveProto(proto)
 
 
 def ToProtoMessageList(rdf: rdf_flows.MessageList) -> jobs_pb2.MessageList:
@@ -77,7 +71,7 @@ def ToProtoMessageList(rdf: rdf_flows.MessageList) -> jobs_pb2.MessageList:
 
 
 def ToRDFMessageList(proto: jobs_pb2.MessageList) -> rdf_flows.MessageList:
-  return rdf_flows.MessageList.FromSerializedBytes(proto.SerializeToString())
+  return rdf_flows.MessageList.FromPrimitiveProto(proto)
 
 
 def ToProtoCipherProperties(
@@ -89,9 +83,7 @@ def ToProtoCipherProperties(
 def ToRDFCipherProperties(
     proto: jobs_pb2.CipherProperties,
 ) -> rdf_flows.CipherProperties:
-  return rdf_flows.CipherProperties.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flows.CipherProperties.FromPrimitiveProto(proto)
 
 
 def ToProtoCipherMetadata(
@@ -103,7 +95,7 @@ def ToProtoCipherMetadata(
 def ToRDFCipherMetadata(
     proto: jobs_pb2.CipherMetadata,
 ) -> rdf_flows.CipherMetadata:
-  return rdf_flows.CipherMetadata.FromSerializedBytes(proto.SerializeToString())
+  return rdf_flows.CipherMetadata.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowLog(rdf: rdf_flows.FlowLog) -> jobs_pb2.FlowLog:
@@ -111,7 +103,7 @@ def ToProtoFlowLog(rdf: rdf_flows.FlowLog) -> jobs_pb2.FlowLog:
 
 
 def ToRDFFlowLog(proto: jobs_pb2.FlowLog) -> rdf_flows.FlowLog:
-  return rdf_flows.FlowLog.FromSerializedBytes(proto.SerializeToString())
+  return rdf_flows.FlowLog.FromPrimitiveProto(proto)
 
 
 def ToProtoHttpRequest(rdf: rdf_flows.HttpRequest) -> jobs_pb2.HttpRequest:
@@ -119,7 +111,7 @@ def ToProtoHttpRequest(rdf: rdf_flows.HttpRequest) -> jobs_pb2.HttpRequest:
 
 
 def ToRDFHttpRequest(proto: jobs_pb2.HttpRequest) -> rdf_flows.HttpRequest:
-  return rdf_flows.HttpRequest.FromSerializedBytes(proto.SerializeToString())
+  return rdf_flows.HttpRequest.FromPrimitiveProto(proto)
 
 
 def ToProtoClientCommunication(
@@ -131,9 +123,7 @@ def ToProtoClientCommunication(
 def ToRDFClientCommunication(
     proto: jobs_pb2.ClientCommunication,
 ) -> rdf_flows.ClientCommunication:
-  return rdf_flows.ClientCommunication.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flows.ClientCommunication.FromPrimitiveProto(proto)
 
 
 def ToProtoEmptyFlowArgs(
@@ -145,4 +135,4 @@ def ToProtoEmptyFlowArgs(
 def ToRDFEmptyFlowArgs(
     proto: flows_pb2.EmptyFlowArgs,
 ) -> rdf_flows.EmptyFlowArgs:
-  return rdf_flows.EmptyFlowArgs.FromSerializedBytes(proto.SerializeToString())
+  return rdf_flows.EmptyFlowArgs.FromPrimitiveProto(proto)
@@ -109,6 +109,11 @@ def _SerializeEntries(entries):
   return b"".join(output)
 
 
+def _IsMapField(field_desc) -> bool:
+  message_type = field_desc.message_type
+  return message_type is not None and message_type.GetOptions().map_entry
+
+
 def ReadIntoObject(buff, index, value_obj, length=0):
   """Reads all tags until the next end group and store in the value_obj."""
   raw_data = value_obj.GetRawData()
@@ -277,6 +282,22 @@ class ProtoType(type_info.TypeInfoObject):
     """
     raise NotImplementedError
 
+  def ConvertFromProtoValue(self, value):
+    """Convert a value of a protobuf message field into the wire format.
+
+    This is used to build RDFProtoStructs directly from protobuf messages
+    without serializing and re-parsing the whole message. The python format is
+    then decoded lazily from the wire format, as if the field was parsed.
+
+    Args:
+      value: A value of the corresponding field as returned by the protobuf
+        library.
+
+    Returns:
+      The parameter encoded in the wire format representation.
+    """
+    return self.ConvertToWireFormat(value)
+
   def _FormatDescriptionComment(self):
     result = "".join(["\n  // %s\n" % x for x in self.description.splitlines()])
     return result
@@ -374,6 +395,12 @@ class ProtoString(ProtoType):
     value = value.encode("utf8")
     return (self.encoded_tag, VarintEncode(len(value)), value)
 
+  def ConvertFromProtoValue(self, value):
+    # The underlying protobuf field may as well be declared as `bytes`.
+    if isinstance(value, bytes):
+      return (self.encoded_tag, VarintEncode(len(value)), value)
+    return self.ConvertToWireFormat(value)
+
   def Definition(self):
     """Return a string with the definition of this field."""
     return self._FormatDescriptionComment() + self._FormatField()
@@ -420,6 +447,12 @@ class ProtoBinary(ProtoType):
   def ConvertToWireFormat(self, value):
     return (self.encoded_tag, VarintEncode(len(value)), value)
 
+  def ConvertFromProtoValue(self, value):
+    # The underlying protobuf field may as well be declared as `string`.
+    if isinstance(value, str):
+      value = value.encode("utf8")
+    return self.ConvertToWireFormat(value)
+
   def Definition(self):
     """Return a string with the definition of this field."""
     return self._FormatDescriptionComment() + self._FormatField()
@@ -857,6 +890,11 @@ class ProtoEmbedded(ProtoType):
     output = _SerializeEntries(_GetOrderedEntries(value.GetRawData()))
     return (self.encoded_tag, VarintEncode(len(output)), output)
 
+  def ConvertFromProtoValue(self, value):
+    """The nested protobuf message is embedded as its serialized form."""
+    data = value.SerializeToString()
+    return (self.encoded_tag, VarintEncode(len(data)), data)
+
   def LateBind(self, target=None):
     """Late binding callback.
 
@@ -965,6 +1003,14 @@ class ProtoDynamicEmbedded(ProtoType):
     data = serialization.ToBytes(value)
     return (self.encoded_tag, VarintEncode(len(data)), data)
 
+  def ConvertFromProtoValue(self, value):
+    """The field is either a bytes field or a `google.protobuf.Any` message."""
+    if isinstance(value, bytes):
+      data = value
+    else:
+      data = value.SerializeToString()
+    return (self.encoded_tag, VarintEncode(len(data)), data)
+
   def Validate(self, value, container=None):
     if self._type is None:
       return value
@@ -1116,6 +1162,10 @@ class ProtoAnyValue(ProtoType):
     data = value.SerializeToBytes()
     return (self.encoded_tag, VarintEncode(len(data)), data)
 
+  def ConvertFromProtoValue(self, value):
+    data = value.SerializeToString()
+    return (self.encoded_tag, VarintEncode(len(data)), data)
+
 
 class RepeatedFieldHelper(abc.Sequence):
   """A helper for the RDFProto to handle repeated fields.
@@ -1555,6 +1605,10 @@ class ProtoRDFValue(ProtoType):
         value.SerializeToWireFormat()
     )
 
+  def ConvertFromProtoValue(self, value):
+    # Protobuf messages store the value in its primitive wire representation.
+    return self.primitive_desc.ConvertFromProtoValue(value)
+
   def Copy(self, field_number=None):
     """Returns descriptor copy, optionally changing field number."""
     new_args = self._kwargs.copy()
@@ -2071,6 +2125,53 @@ class RDFProtoStruct(RDFStruct):
       result.ParseFromString(self.SerializeToBytes())
       return result
 
+  @classmethod
+  def FromPrimitiveProto(cls, proto):
+    """Creates an instance from an old style protocol buffer object.
+
+    Unlike `FromSerializedBytes(proto.SerializeToString())`, this does not
+    encode the whole message just to split it into fields again. Every set
+    field of the protobuf message is converted into its wire format directly
+    (nested messages are serialized by the protobuf library) and, as with
+    parsing, decoded into the python format only when accessed.
+
+    Args:
+      proto: A protobuf message of the `protobuf` type of this class.
+
+    Returns:
+      An instance of this class.
+    """
+    if cls.protobuf is None or proto.DESCRIPTOR is not cls.protobuf.DESCRIPTOR:
+      return cls.FromSerializedBytes(proto.SerializeToString())
+
+    instance = cls()
+    raw_data = instance.GetRawData()
+    for field_desc, value in proto.ListFields():
+      type_info_obj = cls.type_infos.get(field_desc.name)
+      if (
+          type_info_obj is None
+          or type_info_obj.late_bound
+          or field_desc.is_extension
+          or _IsMapField(field_desc)
+      ):
+        # Only the wire format parser knows how to preserve such fields.
+        return cls.FromSerializedBytes(proto.SerializeToString())
+
+      if type_info_obj.__class__ is ProtoList:
+        delegate = type_info_obj.delegate
+        wrapped_list = instance.Get(type_info_obj.name).wrapped_list
+        for item in value:
+          wrapped_list.append((None, delegate.ConvertFromProtoValue(item)))
+      else:
+        raw_data[type_info_obj.name] = (
+            None,
+            type_info_obj.ConvertFromProtoValue(value),
+            type_info_obj,
+        )
+
+    instance.dirty = True
+    return instance
+
   def AsDict(self):
     result = {}
     for desc in self.type_infos:
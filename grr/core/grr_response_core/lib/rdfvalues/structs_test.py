@@ -19,6 +19,7 @@ from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_core.lib.rdfvalues import paths as rdf_paths
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
 from grr_response_core.lib.rdfvalues import test_base as rdf_test_base
+from grr_response_proto import jobs_pb2
 from grr_response_proto import tests_pb2
 from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
 from grr.test_lib import test_lib
@@ -1052,6 +1053,65 @@ class GenericRDFProtoTest(test_lib.GRRBaseTest):
     sample = rdf_flows.GrrStatus()
     self.assertEqual(sample.status, rdf_flows.GrrStatus.ReturnedStatus.OK)
 
+  def testFromPrimitiveProtoMatchesParsing(self):
+    status = rdf_flows.GrrStatus(
+        status=rdf_flows.GrrStatus.ReturnedStatus.IOERROR,
+        error_message="Grüezi",
+        backtrace="foo",
+    )
+    message = rdf_flows.GrrMessage(
+        session_id="aff4:/C.1234567890123456/flows/ABCDEF",
+        request_id=42,
+        response_id=3,
+        name="Foo",
+        payload=status,
+        type=rdf_flows.GrrMessage.Type.STATUS,
+        timestamp=rdfvalue.RDFDatetime.FromSecondsSinceEpoch(42),
+    )
+    proto = message.AsPrimitiveProto()
+
+    converted = rdf_flows.GrrMessage.FromPrimitiveProto(proto)
+
+    self.assertEqual(converted, message)
+    self.assertEqual(converted.payload, status)
+    self.assertEqual(converted.SerializeToBytes(), proto.SerializeToString())
+
+  def testFromPrimitiveProtoWithRepeatedAndDynamicFields(self):
+    response = rdf_flow_objects.FlowResponse(
+        client_id="C.1234567890123456",
+        flow_id="ABCDEF",
+        request_id=1,
+        response_id=2,
+        payload=rdf_client_network.Interface(
+            mac_address=b"\x00\x01",
+            addresses=[
+                rdf_client_network.NetworkAddress(
+                    human_readable_address="127.0.0.1"
+                ),
+                rdf_client_network.NetworkAddress(
+                    human_readable_address="1.2.3.4"
+                ),
+            ],
+        ),
+    )
+    proto = response.AsPrimitiveProto()
+
+    converted = rdf_flow_objects.FlowResponse.FromPrimitiveProto(proto)
+
+    self.assertEqual(converted, response)
+    self.assertEqual(
+        converted.payload.addresses[1].human_readable_address, "1.2.3.4"
+    )
+    self.assertEqual(converted.SerializeToBytes(), proto.SerializeToString())
+
+  def testFromPrimitiveProtoOfDifferentTypeFallsBackToParsing(self):
+    proto = jobs_pb2.GrrMessage(session_id="foo", request_id=1)
+
+    converted = TestStruct.FromPrimitiveProto(proto)
+
+    self.assertEqual(converted.foobar, "foo")
+    self.assertEqual(converted.int, 1)
+
 
 class EnumNamedValueTest(absltest.TestCase):
 
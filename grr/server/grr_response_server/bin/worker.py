@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 """This is a backend analysis worker which will be deployed on the server."""
 
+import signal
+import sys
+
 from absl import app
 from absl import flags
 
@@ -10,6 +13,7 @@ from grr_response_core.config import server as config_server
 from grr_response_server import fleetspeak_connector
 from grr_response_server import server_startup
 from grr_response_server import worker_lib
+from grr_response_server import worker_supervisor
 
 
 _VERSION = flags.DEFINE_bool(
@@ -19,6 +23,19 @@ _VERSION = flags.DEFINE_bool(
     help="Print the GRR worker version number and exit immediately.",
 )
 
+_WORKER_PROCESS_INDEX = flags.DEFINE_integer(
+    "worker_process_index",
+    default=None,
+    help=(
+        "Index of a worker process run by the worker supervisor. Set by the "
+        "supervisor when Worker.processes is greater than 1."
+    ),
+)
+
+
+def _WorkerProcessCommand(index: int) -> list[str]:
+  return [sys.executable] + sys.argv + [f"--worker_process_index={index}"]
+
 
 def main(argv):
   """Main."""
@@ -35,6 +52,19 @@ def main(argv):
   # Initialise flows and config_lib
   server_startup.Init()
 
+  # Drain gracefully (finishing the work in progress) when asked to stop.
+  signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+  num_processes = config.CONFIG["Worker.processes"]
+  if num_processes > 1 and _WORKER_PROCESS_INDEX.value is None:
+    supervisor = worker_supervisor.WorkerSupervisor(
+        _WorkerProcessCommand,
+        num_processes,
+        drain_timeout=config.CONFIG["Worker.drain_timeout"],
+    )
+    supervisor.Run()
+    return
+
   fleetspeak_connector.Init()
 
   worker_obj = worker_lib.GRRWorker()
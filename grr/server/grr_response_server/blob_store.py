@@ -2,9 +2,14 @@
 """The blob store abstraction."""
 
 import abc
+from collections.abc import Callable, Collection, Iterator, Mapping
+import contextlib
+import logging
+import threading
 import time
 from typing import Dict, Iterable, List, Optional
 
+from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.util import precondition
 from grr_response_core.stats import metrics
@@ -24,11 +29,232 @@ BLOB_STORE_POLL_HIT_ITERATION = metrics.Event(
     "blob_store_poll_hit_iteration", bins=[1, 2, 5, 10, 20, 50]
 )
 
+# Blob stores are polled for missing blobs with a truncated exponential
+# backoff, starting with the first and doubling up to the second interval.
+_BLOB_POLL_INTERVAL = rdfvalue.Duration.From(1, rdfvalue.SECONDS)
+_BLOB_MAX_POLL_INTERVAL = rdfvalue.Duration.From(10, rdfvalue.SECONDS)
+
+# How often the cross-process blob arrival signal is checked (by a single
+# thread per process, only while there are threads waiting for blobs).
+_BLOB_ARRIVAL_CHECK_INTERVAL = rdfvalue.Duration.From(
+    250, rdfvalue.MILLISECONDS
+)
+
+# Number of shards blob arrivals are signalled in. Blobs are assigned to the
+# shards by the prefix of their ids, so that writes of unrelated blobs wake up
+# only a fraction of the waiting threads.
+BLOB_ARRIVAL_SHARDS = 16
+
 
 class BlobStoreTimeoutError(Exception):
   """An exception class raised when certain blob store operation times out."""
 
 
+def BlobArrivalShard(blob_id: models_blobs.BlobID) -> int:
+  """Returns the blob arrival signal shard of the given blob."""
+  return bytes(blob_id)[0] % BLOB_ARRIVAL_SHARDS
+
+
+class BlobArrivalNotifier(object):
+  """Wakes up threads waiting for blobs when these are written.
+
+  Arrivals are counted per shard of blob ids. Threads waiting for blobs wait
+  on a shared condition until the count of one of their shards changes.
+
+  Blobs written in the current process are counted right away. Blobs written
+  by other processes (e.g. by the `BlobHandler` running on the frontends) are
+  signalled through a cross-process channel, usually backed by the relational
+  database: writers bump per-shard generation numbers, which a single thread
+  per process reads while there are threads waiting for blobs.
+  """
+
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self._arrived = threading.Condition(self._lock)
+    # Number of arrivals per shard seen by this process.
+    self._arrivals = [0] * BLOB_ARRIVAL_SHARDS
+    self._generation = 0
+    self._num_waiters = 0
+
+    self._signal: Optional[Callable[[Collection[int]], None]] = None
+    self._read_generations: Optional[Callable[[], Mapping[int, int]]] = None
+    self._poller: Optional[threading.Thread] = None
+    # Cross-process generations read last, None if they are not being polled.
+    self._generations: Optional[Mapping[int, int]] = None
+
+  def SetChannel(
+      self,
+      signal: Optional[Callable[[Collection[int]], None]],
+      read_generations: Optional[Callable[[], Mapping[int, int]]],
+  ) -> None:
+    """Sets the channel signalling blob writes to other processes.
+
+    Args:
+      signal: A function signalling other processes that blobs of the given
+        shards were written.
+      read_generations: A function returning a mapping of shards to numbers
+        that change whenever blobs of the shard are signalled as written by
+        any process.
+    """
+    with self._lock:
+      self._signal = signal
+      self._read_generations = read_generations
+      self._generations = None
+      self._arrived.notify_all()
+
+  def _ReadGenerations(self) -> Optional[Mapping[int, int]]:
+    """Reads the cross-process generations, returns None on failure."""
+    read_generations = self._read_generations
+    if read_generations is None:
+      return None
+
+    try:
+      return read_generations()
+    except Exception as e:  # pylint: disable=broad-except
+      logging.warning("Failed to read the blob arrival generations: %s", e)
+      return None
+
+  def _Poll(self) -> None:
+    """Turns cross-process generation changes into arrivals in this process."""
+    while True:
+      with self._arrived:
+        while not self._num_waiters or self._read_generations is None:
+          # Changes signalled while nobody waits need not be tracked.
+          self._generations = None
+          self._arrived.wait()
+
+      generations = self._ReadGenerations()
+
+      with self._arrived:
+        if generations is not None:
+          if self._generations is None:
+            # Blobs signalled since the generations were last read (if ever)
+            # went unnoticed, so they might have arrived in any shard.
+            changed = range(BLOB_ARRIVAL_SHARDS)
+          else:
+            changed = set(
+                shard % BLOB_ARRIVAL_SHARDS
+                for shard in set(generations) | set(self._generations)
+                if generations.get(shard) != self._generations.get(shard)
+            )
+          self._generations = generations
+          self._Arrive(changed)
+
+      time.sleep(_BLOB_ARRIVAL_CHECK_INTERVAL.ToFractional(rdfvalue.SECONDS))
+
+  def _Arrive(self, shards: Iterable[int]) -> None:
+    """Counts arrivals in the given shards, must be called holding the lock."""
+    arrived = False
+    for shard in shards:
+      self._arrivals[shard] += 1
+      arrived = True
+
+    if arrived:
+      self._generation += 1
+      if self._num_waiters:
+        self._arrived.notify_all()
+
+  def Generation(self) -> int:
+    """Returns a number that changes whenever blobs may have been written.
+
+    Blobs written by other processes are only noticed while threads in this
+    process wait for blobs.
+    """
+    with self._lock:
+      return self._generation
+
+  def Publish(self, blob_ids: Iterable[models_blobs.BlobID]) -> None:
+    """Notifies waiters that given blobs have been written."""
+    shards = sorted(set(BlobArrivalShard(blob_id) for blob_id in blob_ids))
+    if not shards:
+      return
+
+    signal = self._signal
+    if signal is not None:
+      try:
+        signal(shards)
+      except Exception as e:  # pylint: disable=broad-except
+        # Waiters in other processes still find the blobs by polling.
+        logging.warning("Failed to signal blob arrivals: %s", e)
+
+    with self._arrived:
+      self._Arrive(shards)
+
+  @contextlib.contextmanager
+  def Subscribe(
+      self,
+      blob_ids: Iterable[models_blobs.BlobID],
+  ) -> Iterator[Callable[[float], bool]]:
+    """Subscribes to notifications about given blobs.
+
+    Args:
+      blob_ids: Identifiers of the blobs to wait for.
+
+    Yields:
+      A function waiting for at most the given number of seconds until blobs
+      of the same shards as the given ones are written. It returns True if
+      they were written since the subscription or since it last returned.
+    """
+    shards = set(BlobArrivalShard(blob_id) for blob_id in blob_ids)
+
+    with self._arrived:
+      seen = {shard: self._arrivals[shard] for shard in shards}
+      self._num_waiters += 1
+
+      if self._read_generations is not None:
+        if self._poller is None:
+          self._poller = threading.Thread(
+              target=self._Poll, name="BlobArrivalPoller", daemon=True
+          )
+          self._poller.start()
+        self._arrived.notify_all()
+
+    def Arrived() -> bool:
+      return any(self._arrivals[shard] != seen[shard] for shard in shards)
+
+    def Wait(timeout: float) -> bool:
+      with self._arrived:
+        arrived = self._arrived.wait_for(Arrived, timeout=timeout)
+        for shard in shards:
+          seen[shard] = self._arrivals[shard]
+        return arrived
+
+    try:
+      yield Wait
+    finally:
+      with self._arrived:
+        self._num_waiters -= 1
+
+
+# Global notifier for blobs written in this process.
+BLOB_ARRIVALS = BlobArrivalNotifier()
+
+
+@contextlib.contextmanager
+def _BlobArrivalWaiter(
+    blob_ids: Iterable[models_blobs.BlobID],
+) -> Iterator[Callable[[rdfvalue.Duration], None]]:
+  """Yields a function sleeping until one of the blobs may have been written.
+
+  The yielded function sleeps for at most the given duration. It returns early
+  if blobs sharing the arrival signal shard with one of the given blobs are
+  written by any process. If blob arrival notifications are disabled, it
+  always sleeps for the whole duration.
+
+  Args:
+    blob_ids: Identifiers of the blobs to wait for.
+
+  Yields:
+    A function accepting the maximum duration of the sleep.
+  """
+  if not config.CONFIG["Blobstore.arrival_notifications"]:
+    yield lambda duration: time.sleep(duration.ToFractional(rdfvalue.SECONDS))
+    return
+
+  with BLOB_ARRIVALS.Subscribe(blob_ids) as wait:
+    yield lambda duration: wait(duration.ToFractional(rdfvalue.SECONDS))
+
+
 class BlobStore(metaclass=abc.ABCMeta):
   """The blob store base class."""
 
@@ -154,30 +380,33 @@ class BlobStore(metaclass=abc.ABCMeta):
     remaining_ids = set(blob_ids)
     results = {blob_id: None for blob_id in remaining_ids}
     start = rdfvalue.RDFDatetime.Now()
-    # TODO: Implement truncated exponential backoff.
-    sleep_dur = rdfvalue.Duration.From(1, rdfvalue.SECONDS)
+    # Blob writes wake the waiter up early, the backoff bounds the number of
+    # polls if they are not signalled (or are signalled for other blobs).
+    sleep_dur = _BLOB_POLL_INTERVAL
     poll_num = 0
 
-    while remaining_ids:
-      cur_blobs = self.ReadBlobs(list(remaining_ids))
-      now = rdfvalue.RDFDatetime.Now()
-      elapsed = now - start
-      poll_num += 1
-
-      for blob_id, blob in cur_blobs.items():
-        if blob is None:
-          continue
-        results[blob_id] = blob
-        remaining_ids.remove(blob_id)
-        BLOB_STORE_POLL_HIT_LATENCY.RecordEvent(
-            elapsed.ToFractional(rdfvalue.SECONDS)
-        )
-        BLOB_STORE_POLL_HIT_ITERATION.RecordEvent(poll_num)
-
-      if not remaining_ids or elapsed + sleep_dur >= timeout:
-        break
-
-      time.sleep(sleep_dur.ToFractional(rdfvalue.SECONDS))
+    with _BlobArrivalWaiter(remaining_ids) as wait:
+      while remaining_ids:
+        cur_blobs = self.ReadBlobs(list(remaining_ids))
+        now = rdfvalue.RDFDatetime.Now()
+        elapsed = now - start
+        poll_num += 1
+
+        for blob_id, blob in cur_blobs.items():
+          if blob is None:
+            continue
+          results[blob_id] = blob
+          remaining_ids.remove(blob_id)
+          BLOB_STORE_POLL_HIT_LATENCY.RecordEvent(
+              elapsed.ToFractional(rdfvalue.SECONDS)
+          )
+          BLOB_STORE_POLL_HIT_ITERATION.RecordEvent(poll_num)
+
+        if not remaining_ids or elapsed >= timeout:
+          break
+
+        wait(min(sleep_dur, timeout - elapsed))
+        sleep_dur = min(sleep_dur * 2, _BLOB_MAX_POLL_INTERVAL)
 
     return results
 
@@ -214,36 +443,37 @@ class BlobStore(metaclass=abc.ABCMeta):
     """
     remaining_blob_ids = set(blob_ids)
 
-    # TODO: See a TODO comment in `RunAndWaitForBlobs`.
-    sleep_duration = rdfvalue.Duration.From(1, rdfvalue.SECONDS)
+    # See a comment in `ReadAndWaitForBlobs`.
+    sleep_duration = _BLOB_POLL_INTERVAL
 
     start_time = rdfvalue.RDFDatetime.Now()
     ticks = 0
 
-    while True:
-      blob_id_exists = self.CheckBlobsExist(remaining_blob_ids)
+    with _BlobArrivalWaiter(remaining_blob_ids) as wait:
+      while True:
+        blob_id_exists = self.CheckBlobsExist(remaining_blob_ids)
 
-      elapsed = rdfvalue.RDFDatetime.Now() - start_time
-      elapsed_secs = elapsed.ToFractional(rdfvalue.SECONDS)
-      ticks += 1
+        elapsed = rdfvalue.RDFDatetime.Now() - start_time
+        elapsed_secs = elapsed.ToFractional(rdfvalue.SECONDS)
+        ticks += 1
 
-      for blob_id, exists in blob_id_exists.items():
-        if not exists:
-          continue
+        for blob_id, exists in blob_id_exists.items():
+          if not exists:
+            continue
 
-        remaining_blob_ids.remove(blob_id)
+          remaining_blob_ids.remove(blob_id)
 
-        BLOB_STORE_POLL_HIT_LATENCY.RecordEvent(elapsed_secs)
-        BLOB_STORE_POLL_HIT_ITERATION.RecordEvent(ticks)
+          BLOB_STORE_POLL_HIT_LATENCY.RecordEvent(elapsed_secs)
+          BLOB_STORE_POLL_HIT_ITERATION.RecordEvent(ticks)
 
-      if not remaining_blob_ids:
-        break
+        if not remaining_blob_ids:
+          break
 
-      if elapsed + sleep_duration >= timeout:
-        raise BlobStoreTimeoutError()
+        if elapsed >= timeout:
+          raise BlobStoreTimeoutError()
 
-      sleep_duration_secs = sleep_duration.ToFractional(rdfvalue.SECONDS)
-      time.sleep(sleep_duration_secs)
+        wait(min(sleep_duration, timeout - elapsed))
+        sleep_duration = min(sleep_duration * 2, _BLOB_MAX_POLL_INTERVAL)
 
 
 class BlobStoreValidationWrapper(BlobStore):
@@ -258,14 +488,18 @@ class BlobStoreValidationWrapper(BlobStore):
       blobs_data: Iterable[bytes],
   ) -> List[models_blobs.BlobID]:
     precondition.AssertIterableType(blobs_data, bytes)
-    return self.delegate.WriteBlobsWithUnknownHashes(blobs_data)
+    blob_ids = self.delegate.WriteBlobsWithUnknownHashes(blobs_data)
+    BLOB_ARRIVALS.Publish(blob_ids)
+    return blob_ids
 
   def WriteBlobWithUnknownHash(
       self,
       blob_data: bytes,
   ) -> models_blobs.BlobID:
     precondition.AssertType(blob_data, bytes)
-    return self.delegate.WriteBlobWithUnknownHash(blob_data)
+    blob_id = self.delegate.WriteBlobWithUnknownHash(blob_data)
+    BLOB_ARRIVALS.Publish([blob_id])
+    return blob_id
 
   def ReadBlob(
       self,
@@ -286,7 +520,8 @@ class BlobStoreValidationWrapper(BlobStore):
       blob_id_data_map: Dict[models_blobs.BlobID, bytes],
   ) -> None:
     precondition.AssertDictType(blob_id_data_map, models_blobs.BlobID, bytes)
-    return self.delegate.WriteBlobs(blob_id_data_map)
+    self.delegate.WriteBlobs(blob_id_data_map)
+    BLOB_ARRIVALS.Publish(blob_id_data_map.keys())
 
   def ReadBlobs(
       self, blob_ids: Iterable[models_blobs.BlobID]
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""Tests for blob store utilities."""
+
+import threading
+from unittest import mock
+
+from absl import app
+from absl.testing import absltest
+
+from grr_response_core.lib import rdfvalue
+from grr_response_server import blob_store
+from grr_response_server.models import blobs as models_blobs
+from grr.test_lib import test_lib
+
+
+def _BlobIDInShard(shard: int, index: int = 0) -> models_blobs.BlobID:
+  return models_blobs.BlobID(bytes([shard, index]) + b"\x00" * 30)
+
+
+class BlobArrivalNotifierTest(absltest.TestCase):
+
+  def testNotifiesSubscribersOfWrittenBlobs(self):
+    notifier = blob_store.BlobArrivalNotifier()
+    foo_id = _BlobIDInShard(0)
+    bar_id = _BlobIDInShard(1)
+
+    with notifier.Subscribe([foo_id]) as foo_wait:
+      with notifier.Subscribe([foo_id, bar_id]) as foo_bar_wait:
+        notifier.Publish([bar_id])
+
+        self.assertFalse(foo_wait(0))
+        self.assertTrue(foo_bar_wait(0))
+        self.assertFalse(foo_bar_wait(0))
+
+        notifier.Publish([foo_id])
+
+        self.assertTrue(foo_wait(0))
+
+  def testNotifiesSubscribersOfBlobsInTheSameShard(self):
+    notifier = blob_store.BlobArrivalNotifier()
+
+    with notifier.Subscribe([_BlobIDInShard(0, 0)]) as wait:
+      notifier.Publish([_BlobIDInShard(0, 1)])
+      self.assertTrue(wait(0))
+
+  def testWakesUpWaitingSubscribers(self):
+    notifier = blob_store.BlobArrivalNotifier()
+    blob_id = _BlobIDInShard(0)
+    results = []
+
+    with notifier.Subscribe([blob_id]) as wait:
+      thread = threading.Thread(target=lambda: results.append(wait(60)))
+      thread.start()
+
+      notifier.Publish([blob_id])
+
+      thread.join(timeout=10)
+      self.assertFalse(thread.is_alive())
+
+    self.assertEqual(results, [True])
+
+  def testGenerationChangesOnPublish(self):
+    notifier = blob_store.BlobArrivalNotifier()
+    generation = notifier.Generation()
+
+    notifier.Publish([])
+    self.assertEqual(notifier.Generation(), generation)
+
+    notifier.Publish([_BlobIDInShard(0)])
+    self.assertNotEqual(notifier.Generation(), generation)
+
+  def testPublishingWithoutSubscribersDoesNotFail(self):
+    notifier = blob_store.BlobArrivalNotifier()
+    notifier.Publish([_BlobIDInShard(0)])
+
+  def testSignalsShardsToOtherProcessesOnPublish(self):
+    notifier = blob_store.BlobArrivalNotifier()
+    signals = []
+
+    notifier.SetChannel(signals.append, dict)
+
+    notifier.Publish([_BlobIDInShard(3), _BlobIDInShard(1), _BlobIDInShard(3)])
+    notifier.Publish([])
+
+    self.assertEqual(signals, [[1, 3]])
+
+  @mock.patch.object(
+      blob_store,
+      "_BLOB_ARRIVAL_CHECK_INTERVAL",
+      rdfvalue.Duration.From(10, rdfvalue.MILLISECONDS),
+  )
+  def testNotifiesSubscribersOfShardsSignalledByOtherProcesses(self):
+    notifier = blob_store.BlobArrivalNotifier()
+    generations = {}
+
+    notifier.SetChannel(None, lambda: dict(generations))
+
+    with notifier.Subscribe([_BlobIDInShard(0)]) as foo_wait:
+      with notifier.Subscribe([_BlobIDInShard(1)]) as bar_wait:
+        # Subscribers are woken up once the generations were first read.
+        self.assertTrue(foo_wait(10))
+        bar_wait(0)
+
+        generations[1] = 1
+
+        self.assertTrue(bar_wait(10))
+        self.assertFalse(foo_wait(0.1))
+
+  def testChannelErrorsDoNotFailPublishing(self):
+    notifier = blob_store.BlobArrivalNotifier()
+    blob_id = _BlobIDInShard(0)
+
+    def Fail(*args):
+      del args  # Unused.
+      raise RuntimeError("Database is down")
+
+    notifier.SetChannel(Fail, Fail)
+
+    with notifier.Subscribe([blob_id]) as wait:
+      notifier.Publish([blob_id])
+      self.assertTrue(wait(0))
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
@@ -32,6 +32,21 @@ class BlobStoreTestMixin(stats_test_lib.StatsTestMixin, metaclass=abc.ABCMeta):
 
   def setUp(self):
     super().setUp()
+    # Most of the tests below simulate the flow of time by mocking `time.sleep`
+    # and cover the polling. Arrival notifications are enabled explicitly by
+    # the tests covering them.
+    config_overrider = test_lib.ConfigOverrider(
+        {"Blobstore.arrival_notifications": False}
+    )
+    config_overrider.Start()
+    self.addCleanup(config_overrider.Stop)
+    # The polling tests expect the blob store to be polled once a second.
+    backoff_patcher = mock.patch.object(
+        blob_store, "_BLOB_MAX_POLL_INTERVAL", blob_store._BLOB_POLL_INTERVAL
+    )
+    backoff_patcher.start()
+    self.addCleanup(backoff_patcher.stop)
+
     bs, cleanup = self.CreateBlobStore()
     if cleanup is not None:
       self.addCleanup(cleanup)
@@ -327,6 +342,146 @@ class BlobStoreTestMixin(stats_test_lib.StatsTestMixin, metaclass=abc.ABCMeta):
       with self.assertRaises(blob_store.BlobStoreTimeoutError):
         timeline.Run(rdfvalue.Duration.From(1, rdfvalue.MINUTES))
 
+  def testWaitForBlobsBacksOffWhenPolling(self):
+    blob_ids = [models_blobs.BlobID.Of(b"foo")]
+    time_mock = test_lib.FakeTime(10)
+    sleeps = []
+
+    def sleep(secs):
+      time_mock.time += secs
+      sleeps.append(secs)
+
+    with mock.patch.object(
+        blob_store,
+        "_BLOB_MAX_POLL_INTERVAL",
+        rdfvalue.Duration.From(4, rdfvalue.SECONDS),
+    ):
+      with time_mock, mock.patch.object(time, "sleep", sleep):
+        with self.assertRaises(blob_store.BlobStoreTimeoutError):
+          self.blob_store.WaitForBlobs(
+              blob_ids, timeout=rdfvalue.Duration.From(12, rdfvalue.SECONDS)
+          )
+
+    # The last sleep is cut short by the timeout.
+    self.assertEqual(sleeps, [1, 2, 4, 4, 1])
+
+  def _StartWaiting(self, wait_fn, check_mock):
+    """Runs `wait_fn` in a thread, returning once it polled the blob store."""
+    thread = threading.Thread(target=wait_fn, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 10
+    while not check_mock.called:
+      self.assertLess(time.time(), deadline)
+      time.sleep(0.01)
+
+    return thread
+
+  @mock.patch.object(
+      blob_store,
+      "_BLOB_POLL_INTERVAL",
+      rdfvalue.Duration.From(1, rdfvalue.HOURS),
+  )
+  def testWaitForBlobsIsWokenUpWhenBlobsAreWritten(self):
+    foo_blob = b"foo"
+    blob_ids = [models_blobs.BlobID.Of(foo_blob)]
+    timeout = rdfvalue.Duration.From(2, rdfvalue.HOURS)
+
+    # Without a cross-process channel, the waiting thread is only woken up by
+    # blobs written in this process.
+    notifier = blob_store.BlobArrivalNotifier()
+
+    with test_lib.ConfigOverrider({"Blobstore.arrival_notifications": True}):
+      with mock.patch.object(blob_store, "BLOB_ARRIVALS", notifier):
+        with mock.patch.object(
+            self.blob_store,
+            "CheckBlobsExist",
+            wraps=self.blob_store.CheckBlobsExist,
+        ) as check_mock:
+          thread = self._StartWaiting(
+              lambda: self.blob_store.WaitForBlobs(blob_ids, timeout=timeout),
+              check_mock,
+          )
+
+          self.blob_store.WriteBlobWithUnknownHash(foo_blob)
+
+          # The blob store is only polled once an hour, the waiting thread can
+          # only finish in time if it is notified about the written blob.
+          thread.join(timeout=10)
+          self.assertFalse(thread.is_alive())
+          self.assertEqual(check_mock.call_count, 2)
+
+  @mock.patch.object(
+      blob_store,
+      "_BLOB_POLL_INTERVAL",
+      rdfvalue.Duration.From(1, rdfvalue.HOURS),
+  )
+  def testReadAndWaitForBlobsIsWokenUpWhenBlobsAreWritten(self):
+    foo_blob = b"foo"
+    blob_id = models_blobs.BlobID.Of(foo_blob)
+    timeout = rdfvalue.Duration.From(2, rdfvalue.HOURS)
+    results = {}
+
+    def Wait():
+      results.update(
+          self.blob_store.ReadAndWaitForBlobs([blob_id], timeout=timeout)
+      )
+
+    with test_lib.ConfigOverrider({"Blobstore.arrival_notifications": True}):
+      with mock.patch.object(
+          self.blob_store, "ReadBlobs", wraps=self.blob_store.ReadBlobs
+      ) as read_mock:
+        thread = self._StartWaiting(Wait, read_mock)
+
+        self.blob_store.WriteBlobs({blob_id: foo_blob})
+
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+
+    self.assertEqual(results, {blob_id: foo_blob})
+
+  @mock.patch.object(
+      blob_store,
+      "_BLOB_POLL_INTERVAL",
+      rdfvalue.Duration.From(1, rdfvalue.HOURS),
+  )
+  @mock.patch.object(
+      blob_store,
+      "_BLOB_ARRIVAL_CHECK_INTERVAL",
+      rdfvalue.Duration.From(10, rdfvalue.MILLISECONDS),
+  )
+  def testWaitForBlobsIsWokenUpWhenBlobsAreSignalledByOtherProcess(self):
+    foo_blob = b"foo"
+    blob_id = models_blobs.BlobID.Of(foo_blob)
+    timeout = rdfvalue.Duration.From(2, rdfvalue.HOURS)
+    generations = {}
+
+    def Signal(shards):
+      for shard in shards:
+        generations[shard] = generations.get(shard, 0) + 1
+
+    notifier = blob_store.BlobArrivalNotifier()
+    notifier.SetChannel(Signal, lambda: dict(generations))
+
+    with test_lib.ConfigOverrider({"Blobstore.arrival_notifications": True}):
+      with mock.patch.object(blob_store, "BLOB_ARRIVALS", notifier):
+        with mock.patch.object(
+            self.blob_store,
+            "CheckBlobsExist",
+            wraps=self.blob_store.CheckBlobsExist,
+        ) as check_mock:
+          thread = self._StartWaiting(
+              lambda: self.blob_store.WaitForBlobs([blob_id], timeout=timeout),
+              check_mock,
+          )
+
+          # Written by "another process": only the generation changes.
+          self.blob_store.delegate.WriteBlobs({blob_id: foo_blob})
+          Signal([blob_store.BlobArrivalShard(blob_id)])
+
+          thread.join(timeout=10)
+          self.assertFalse(thread.is_alive())
+
   def testWaitForBlobsUpdatesStats(self):
     latency = blob_store.BLOB_STORE_POLL_HIT_LATENCY
     iteration = blob_store.BLOB_STORE_POLL_HIT_ITERATION
@@ -2,6 +2,7 @@
 """Benchmark to compare different BlobStore implementations."""
 
 import io
+import random
 import time
 from typing import IO
 
@@ -9,9 +10,11 @@ from absl import app
 from absl import flags
 import numpy as np
 
+from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_server import blob_store
 from grr_response_server import server_startup
+from grr_response_server.blob_stores import compressing_blob_store
 from grr_response_server.models import blobs as models_blobs
 
 
@@ -36,6 +39,29 @@ _PER_SIZE_DURATION_SECONDS = flags.DEFINE_integer(
     help="Benchmark duration per blob size in seconds.",
 )
 
+_DATA = flags.DEFINE_enum(
+    "data",
+    default="random",
+    enum_values=["random", "text", "sparse"],
+    help=(
+        "Kind of blob data to use: incompressible random bytes, log-like "
+        "text or memory-like pages that are mostly zeroed."
+    ),
+)
+
+_CODEC = flags.DEFINE_bool(
+    "codec",
+    default=False,
+    help=(
+        "Benchmark the blob compression used by CompressingBlobStore "
+        "(configured with the Blobstore.compression.* options) in memory, "
+        "instead of writes to the --target blob stores."
+    ),
+)
+
+# Size of the (mostly zeroed) pages of the sparse blob data.
+_PAGE_SIZE = 4096
+
 
 def _MakeBlobStore(blobstore_name):
   try:
@@ -45,11 +71,55 @@ def _MakeBlobStore(blobstore_name):
   return blob_store.BlobStoreValidationWrapper(cls())
 
 
-def _MakeRandomBlob(
+def _MakeTextBlobData(size_b: int, random_fd: IO[bytes]) -> bytes:
+  """Returns syslog-like lines of text."""
+  rng = random.Random(random_fd.read(16))
+  lines = []
+  total_size = 0
+  while total_size < size_b:
+    line = (
+        "Oct %2d %02d:%02d:%02d host-%d sshd[%d]: Accepted publickey for "
+        "user%d from 10.0.%d.%d port %d ssh2\n"
+        % (
+            rng.randint(1, 31),
+            rng.randint(0, 23),
+            rng.randint(0, 59),
+            rng.randint(0, 59),
+            rng.randint(0, 9),
+            rng.randint(1000, 65535),
+            rng.randint(0, 99),
+            rng.randint(0, 255),
+            rng.randint(0, 255),
+            rng.randint(1024, 65535),
+        )
+    ).encode("ascii")
+    lines.append(line)
+    total_size += len(line)
+  return b"".join(lines)[:size_b]
+
+
+def _MakeSparseBlobData(size_b: int, random_fd: IO[bytes]) -> bytes:
+  """Returns pages of random bytes, three quarters of them zeroed."""
+  pages = []
+  for i in range(0, size_b, _PAGE_SIZE):
+    page_size = min(_PAGE_SIZE, size_b - i)
+    if random_fd.read(1)[0] < 64:
+      pages.append(random_fd.read(page_size))
+    else:
+      pages.append(b"\x00" * page_size)
+  return b"".join(pages)
+
+
+def _MakeBlob(
     size_b: rdfvalue.ByteSize,
     random_fd: IO[bytes],
 ) -> tuple[models_blobs.BlobID, bytes]:
-  blob_data = random_fd.read(int(size_b))
+  if _DATA.value == "text":
+    blob_data = _MakeTextBlobData(int(size_b), random_fd)
+  elif _DATA.value == "sparse":
+    blob_data = _MakeSparseBlobData(int(size_b), random_fd)
+  else:
+    blob_data = random_fd.read(int(size_b))
   blob_id = models_blobs.BlobID.Of(blob_data)
   return blob_id, blob_data
 
@@ -87,12 +157,64 @@ def _RunBenchmark(bs, size_b, duration_sec, random_fd):
 
   # Monotonically increasing time would be nice, but is unavailable in Py2.
   while time.time() < start_timestamp + duration_sec:
-    blob_id, blob_data = _MakeRandomBlob(size_b, random_fd)
+    blob_id, blob_data = _MakeBlob(size_b, random_fd)
     _, write_time = _Timed(bs.WriteBlobs, {blob_id: blob_data})
     durations.append(write_time)
   return durations
 
 
+def _RunCodecBenchmark(size, size_b, duration_sec, random_fd):
+  """Prints compression throughput and ratio for blobs of the given size."""
+  input_bytes = 0
+  output_bytes = 0
+  encode_s = 0
+  decode_s = 0
+  verify_s = 0
+  num = 0
+
+  start_timestamp = time.time()
+  while time.time() < start_timestamp + duration_sec:
+    _, blob_data = _MakeBlob(size_b, random_fd)
+    (_, encoded), encode_time = _Timed(
+        compressing_blob_store.EncodeBlob,
+        blob_data,
+        level=config.CONFIG["Blobstore.compression.level"],
+        min_size=config.CONFIG["Blobstore.compression.min_size"],
+        max_entropy=config.CONFIG["Blobstore.compression.max_entropy"],
+        min_savings=config.CONFIG["Blobstore.compression.min_savings"],
+    )
+    decoded, decode_time = _Timed(compressing_blob_store.DecodeBlob, encoded)
+    if decoded != blob_data:
+      raise AssertionError("Decoded blob differs from the original one.")
+    # CompressingBlobStore.ReadBlobs hashes every decoded blob to tell it
+    # apart from a header-less blob that happens to look encoded.
+    _, verify_time = _Timed(models_blobs.BlobID.Of, decoded)
+
+    input_bytes += len(blob_data)
+    output_bytes += len(encoded)
+    encode_s += encode_time
+    decode_s += decode_time
+    verify_s += verify_time
+    num += 1
+
+  print(
+      "{size}\t{num}\t{ratio:.2f}\t{enc: >7}\t{dec: >7}\t{ver: >7}".format(
+          size=size,
+          num=num,
+          ratio=input_bytes / output_bytes,
+          enc=str(rdfvalue.ByteSize(int(input_bytes / encode_s))).replace(
+              "iB", ""
+          ),
+          dec=str(rdfvalue.ByteSize(int(input_bytes / decode_s))).replace(
+              "iB", ""
+          ),
+          ver=str(rdfvalue.ByteSize(int(input_bytes / verify_s))).replace(
+              "iB", ""
+          ),
+      )
+  )
+
+
 def main(argv):
   """Main."""
   del argv  # Unused.
@@ -100,6 +222,19 @@ def main(argv):
   # Initialise flows and config_lib
   server_startup.Init()
 
+  if _CODEC.value:
+    with io.open("/dev/urandom", "rb") as random_fd:
+      print(_DATA.value)
+      print("size\tnum\tratio\t  enc/s\t  dec/s\t  ver/s")
+      for size in _SIZES.value:
+        _RunCodecBenchmark(
+            size,
+            rdfvalue.ByteSize(size),
+            _PER_SIZE_DURATION_SECONDS.value,
+            random_fd,
+        )
+    return
+
   if not _TARGET.value:
     store_names = ", ".join(sorted(blob_store.REGISTRY.keys()))
     print("Missing --target. Use one or multiple of: {}.".format(store_names))
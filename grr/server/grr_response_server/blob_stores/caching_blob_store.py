@@ -0,0 +1,503 @@
+#!/usr/bin/env python
+"""A BlobStore wrapper caching blobs read from the wrapped blob store.
+
+Blobs are content-addressed and never modified once written, so cached blob
+contents (and positive existence checks) never go stale. Negative existence
+checks do go stale once the blob is written, so they are only cached for a
+short time and are dropped as soon as this process learns that blobs might
+have been written.
+"""
+
+import collections
+from collections.abc import Iterable
+import logging
+import math
+import os
+import tempfile
+import threading
+from typing import Optional
+
+from grr_response_core import config
+from grr_response_core.lib import rdfvalue
+from grr_response_core.stats import metrics
+from grr_response_server import blob_store
+from grr_response_server.models import blobs as models_blobs
+
+BLOB_CACHE_HITS = metrics.Counter("blob_cache_hits", fields=[("cache", str)])
+BLOB_CACHE_MISSES = metrics.Counter(
+    "blob_cache_misses", fields=[("cache", str)]
+)
+BLOB_CACHE_EVICTIONS = metrics.Counter(
+    "blob_cache_evictions", fields=[("cache", str)]
+)
+
+# Values of the "cache" metric field.
+_MEMORY_CACHE = "memory"
+_DISK_CACHE = "disk"
+_NEGATIVE_CACHE = "negative"
+
+_TEMP_FILE_PREFIX = ".tmp-"
+
+
+class ConfigError(Exception):
+  """Raised when the caching blob store config is invalid."""
+
+
+class BloomFilter(object):
+  """A Bloom filter of blob identifiers.
+
+  BlobIDs are SHA-256 digests already, so the bit indices are derived from the
+  BlobID bytes directly (using double hashing) instead of hashing them again.
+  """
+
+  def __init__(self, capacity: int, error_rate: float) -> None:
+    """Initializes the filter.
+
+    Args:
+      capacity: Expected number of blob identifiers added to the filter.
+      error_rate: False positive rate of the filter once it holds `capacity`
+        blob identifiers.
+    """
+    if capacity < 1:
+      raise ValueError(f"Invalid Bloom filter capacity: {capacity}")
+    if not 0 < error_rate < 1:
+      raise ValueError(f"Invalid Bloom filter error rate: {error_rate}")
+
+    self.capacity = capacity
+    self._num_bits = max(
+        8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    )
+    self._num_hashes = max(
+        1, int(round(self._num_bits / capacity * math.log(2)))
+    )
+    self._bits = bytearray((self._num_bits + 7) // 8)
+    self.size = 0
+
+  def _Indices(self, blob_id: models_blobs.BlobID) -> Iterable[int]:
+    digest = bytes(blob_id)
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:16], "little") | 1
+    for i in range(self._num_hashes):
+      yield (h1 + i * h2) % self._num_bits
+
+  def Add(self, blob_id: models_blobs.BlobID) -> None:
+    for index in self._Indices(blob_id):
+      self._bits[index >> 3] |= 1 << (index & 7)
+    self.size += 1
+
+  def __contains__(self, blob_id: models_blobs.BlobID) -> bool:
+    return all(
+        self._bits[index >> 3] & (1 << (index & 7))
+        for index in self._Indices(blob_id)
+    )
+
+  def Clear(self) -> None:
+    self._bits = bytearray(len(self._bits))
+    self.size = 0
+
+
+class _MemoryCache(object):
+  """A size-bounded LRU cache of blob contents."""
+
+  def __init__(self, max_size: int) -> None:
+    self._max_size = max_size
+    self._blobs: collections.OrderedDict[models_blobs.BlobID, bytes] = (
+        collections.OrderedDict()
+    )
+    self._size = 0
+    self._lock = threading.Lock()
+
+  def __contains__(self, blob_id: models_blobs.BlobID) -> bool:
+    with self._lock:
+      return blob_id in self._blobs
+
+  def Get(self, blob_id: models_blobs.BlobID) -> Optional[bytes]:
+    with self._lock:
+      blob = self._blobs.get(blob_id)
+      if blob is not None:
+        self._blobs.move_to_end(blob_id)
+      return blob
+
+  def Put(self, blob_id: models_blobs.BlobID, blob: bytes) -> None:
+    if len(blob) > self._max_size:
+      return
+
+    evictions = 0
+    with self._lock:
+      if blob_id in self._blobs:
+        self._blobs.move_to_end(blob_id)
+        return
+
+      self._blobs[blob_id] = blob
+      self._size += len(blob)
+      while self._size > self._max_size:
+        _, evicted = self._blobs.popitem(last=False)
+        self._size -= len(evicted)
+        evictions += 1
+
+    if evictions:
+      BLOB_CACHE_EVICTIONS.Increment(evictions, fields=[_MEMORY_CACHE])
+
+
+class _DiskCache(object):
+  """A size-bounded LRU cache of blob contents kept in a local directory.
+
+  Blobs are kept in files named after the hex representation of their BlobID.
+  The directory can be shared by multiple processes: every process accounts
+  (and evicts) the blobs it knows about, blobs evicted by other processes are
+  simply treated as cache misses.
+  """
+
+  def __init__(self, path: str, max_size: int) -> None:
+    self._path = path
+    self._max_size = max_size
+    self._sizes: collections.OrderedDict[models_blobs.BlobID, int] = (
+        collections.OrderedDict()
+    )
+    self._size = 0
+    self._lock = threading.Lock()
+
+    os.makedirs(self._path, exist_ok=True)
+    self._LoadIndex()
+
+  def _LoadIndex(self) -> None:
+    """Loads blobs cached by previous runs, least recently used first."""
+    entries = []
+    with os.scandir(self._path) as it:
+      for entry in it:
+        if entry.name.startswith(_TEMP_FILE_PREFIX):
+          continue
+        try:
+          blob_id = models_blobs.BlobID(bytes.fromhex(entry.name))
+          stat = entry.stat()
+        except (ValueError, OSError):
+          continue
+        entries.append((stat.st_atime, blob_id, stat.st_size))
+
+    for _, blob_id, size in sorted(entries, key=lambda entry: entry[0]):
+      self._sizes[blob_id] = size
+      self._size += size
+    self._Evict()
+
+  def _GetPath(self, blob_id: models_blobs.BlobID) -> str:
+    return os.path.join(self._path, bytes(blob_id).hex())
+
+  def _Evict(self) -> None:
+    """Removes least recently used blobs until the cache fits its size."""
+    evicted = []
+    with self._lock:
+      while self._size > self._max_size:
+        blob_id, size = self._sizes.popitem(last=False)
+        self._size -= size
+        evicted.append(blob_id)
+
+    for blob_id in evicted:
+      try:
+        os.unlink(self._GetPath(blob_id))
+      except FileNotFoundError:
+        pass
+
+    if evicted:
+      BLOB_CACHE_EVICTIONS.Increment(len(evicted), fields=[_DISK_CACHE])
+
+  def _Forget(self, blob_id: models_blobs.BlobID) -> None:
+    with self._lock:
+      size = self._sizes.pop(blob_id, None)
+      if size is not None:
+        self._size -= size
+
+  def __contains__(self, blob_id: models_blobs.BlobID) -> bool:
+    with self._lock:
+      return blob_id in self._sizes
+
+  def Get(self, blob_id: models_blobs.BlobID) -> Optional[bytes]:
+    with self._lock:
+      if blob_id not in self._sizes:
+        return None
+      self._sizes.move_to_end(blob_id)
+
+    try:
+      with open(self._GetPath(blob_id), "rb") as f:
+        blob = f.read()
+    except FileNotFoundError:
+      # Evicted by another process sharing the cache directory.
+      self._Forget(blob_id)
+      return None
+
+    if len(blob) != self._sizes.get(blob_id, len(blob)):
+      logging.error("Cached blob %s is truncated, ignoring it.", blob_id)
+      self._Forget(blob_id)
+      return None
+
+    return blob
+
+  def Put(self, blob_id: models_blobs.BlobID, blob: bytes) -> None:
+    if len(blob) > self._max_size or blob_id in self:
+      return
+
+    try:
+      fd, temp_path = tempfile.mkstemp(
+          dir=self._path, prefix=_TEMP_FILE_PREFIX
+      )
+      try:
+        with os.fdopen(fd, "wb") as f:
+          f.write(blob)
+        os.replace(temp_path, self._GetPath(blob_id))
+      except BaseException:
+        os.unlink(temp_path)
+        raise
+    except OSError as e:
+      # The disk cache is best-effort: failing to fill it must not fail reads.
+      logging.warning("Failed to cache blob %s on disk: %s", blob_id, e)
+      return
+
+    with self._lock:
+      if blob_id not in self._sizes:
+        self._sizes[blob_id] = len(blob)
+        self._size += len(blob)
+    self._Evict()
+
+
+class _NegativeCache(object):
+  """Short-lived cache of blobs known to be missing, backed by a Bloom filter.
+
+  A blob may be written by another process at any time, so the whole filter
+  is dropped once it gets older than the TTL, or once blob arrivals are
+  signalled (e.g. to threads waiting for blobs, which would otherwise keep
+  getting stale answers). It is also dropped when a blob possibly in the
+  filter is found to exist by this process, since entries can not be removed
+  from a Bloom filter.
+  """
+
+  def __init__(
+      self, capacity: int, error_rate: float, ttl: rdfvalue.Duration
+  ) -> None:
+    self._filter = BloomFilter(capacity, error_rate)
+    self._ttl = ttl
+    self._created = rdfvalue.RDFDatetime.Now()
+    self._arrival_generation = blob_store.BLOB_ARRIVALS.Generation()
+    self._lock = threading.Lock()
+
+  def _ClearIfExpired(self) -> None:
+    now = rdfvalue.RDFDatetime.Now()
+    arrival_generation = blob_store.BLOB_ARRIVALS.Generation()
+    if (
+        now - self._created >= self._ttl
+        or arrival_generation != self._arrival_generation
+    ):
+      self._filter.Clear()
+      self._created = now
+      self._arrival_generation = arrival_generation
+
+  def MayContain(self, blob_id: models_blobs.BlobID) -> bool:
+    with self._lock:
+      self._ClearIfExpired()
+      return self._filter.size > 0 and blob_id in self._filter
+
+  def Add(self, blob_ids: Iterable[models_blobs.BlobID]) -> None:
+    with self._lock:
+      self._ClearIfExpired()
+      for blob_id in blob_ids:
+        # Past its capacity, the false positive rate of the filter grows
+        # quickly, so it is better to start from scratch.
+        if self._filter.size >= self._filter.capacity:
+          self._filter.Clear()
+          self._created = rdfvalue.RDFDatetime.Now()
+        self._filter.Add(blob_id)
+
+  def Invalidate(self, blob_ids: Iterable[models_blobs.BlobID]) -> None:
+    with self._lock:
+      if self._filter.size and any(b in self._filter for b in blob_ids):
+        self._filter.Clear()
+
+
+class CachingBlobStore(blob_store.BlobStore):
+  """A BlobStore wrapper adding a read-through cache to another blob store.
+
+  Blobs read from the wrapped blob store are kept in a size-bounded in-memory
+  LRU cache and, optionally, in a size-bounded on-disk cache. Blobs reported
+  missing by `CheckBlobsExist` are remembered in a Bloom filter for a short
+  time, so that repeated checks do not hit the wrapped blob store.
+  """
+
+  def __init__(
+      self,
+      delegate: Optional[blob_store.BlobStore] = None,
+      memory_cache_size: Optional[int] = None,
+      disk_cache_path: Optional[str] = None,
+      disk_cache_size: Optional[int] = None,
+      negative_cache_ttl: Optional[rdfvalue.Duration] = None,
+      bloom_filter_capacity: Optional[int] = None,
+      bloom_filter_error_rate: Optional[float] = None,
+  ) -> None:
+    """Instantiates a new CachingBlobStore.
+
+    Args:
+      delegate: The blob store to cache blobs of. Defaults to a new instance
+        of the `Blobstore.caching.delegate_implementation` blob store.
+      memory_cache_size: Max total size (in bytes) of blobs cached in memory.
+        Defaults to the `Blobstore.caching.memory_cache_size` config option.
+      disk_cache_path: Directory to cache blobs in. Defaults to the
+        `Blobstore.caching.disk_cache_path` config option. Blobs are not
+        cached on disk if empty.
+      disk_cache_size: Max total size (in bytes) of blobs cached on disk.
+        Defaults to the `Blobstore.caching.disk_cache_size` config option.
+      negative_cache_ttl: Time for which missing blobs are remembered.
+        Defaults to the `Blobstore.caching.negative_cache_ttl` config option.
+        Missing blobs are not remembered if zero.
+      bloom_filter_capacity: Number of missing blobs to remember. Defaults to
+        the `Blobstore.caching.bloom_filter_capacity` config option.
+      bloom_filter_error_rate: False positive rate of the missing blobs
+        filter. Defaults to the `Blobstore.caching.bloom_filter_error_rate`
+        config option.
+
+    Raises:
+      ConfigError: If the blob store configuration is invalid.
+    """
+    super().__init__()
+
+    if delegate is None:
+      name = config.CONFIG["Blobstore.caching.delegate_implementation"]
+      cls = blob_store.REGISTRY.get(name)
+      if cls is None:
+        raise ConfigError(f"No blob store {name!r} found")
+      if issubclass(cls, CachingBlobStore):
+        raise ConfigError(f"Blob store {name!r} can not cache itself")
+      delegate = cls()
+
+    if memory_cache_size is None:
+      memory_cache_size = config.CONFIG["Blobstore.caching.memory_cache_size"]
+    if disk_cache_path is None:
+      disk_cache_path = config.CONFIG["Blobstore.caching.disk_cache_path"]
+    if disk_cache_size is None:
+      disk_cache_size = config.CONFIG["Blobstore.caching.disk_cache_size"]
+    if negative_cache_ttl is None:
+      negative_cache_ttl = config.CONFIG[
+          "Blobstore.caching.negative_cache_ttl"
+      ]
+    if bloom_filter_capacity is None:
+      bloom_filter_capacity = config.CONFIG[
+          "Blobstore.caching.bloom_filter_capacity"
+      ]
+    if bloom_filter_error_rate is None:
+      bloom_filter_error_rate = config.CONFIG[
+          "Blobstore.caching.bloom_filter_error_rate"
+      ]
+
+    if memory_cache_size < 0:
+      raise ConfigError(f"Invalid memory cache size: {memory_cache_size}")
+    if disk_cache_path and disk_cache_size <= 0:
+      raise ConfigError(f"Invalid disk cache size: {disk_cache_size}")
+
+    self._delegate = delegate
+    self._memory_cache = _MemoryCache(memory_cache_size)
+
+    self._disk_cache = None
+    if disk_cache_path:
+      self._disk_cache = _DiskCache(disk_cache_path, disk_cache_size)
+
+    self._negative_cache = None
+    if negative_cache_ttl > rdfvalue.Duration(0):
+      try:
+        self._negative_cache = _NegativeCache(
+            bloom_filter_capacity, bloom_filter_error_rate, negative_cache_ttl
+        )
+      except ValueError as e:
+        raise ConfigError(str(e)) from e
+
+  def WriteBlobs(
+      self, blob_id_data_map: dict[models_blobs.BlobID, bytes]
+  ) -> None:
+    """Creates or overwrites blobs."""
+    self._delegate.WriteBlobs(blob_id_data_map)
+    if self._negative_cache is not None:
+      self._negative_cache.Invalidate(blob_id_data_map)
+
+  def ReadBlobs(
+      self, blob_ids: Iterable[models_blobs.BlobID]
+  ) -> dict[models_blobs.BlobID, Optional[bytes]]:
+    """Reads all blobs, specified by blob_ids, returning their contents."""
+    results = {}
+    memory_misses = []
+    for blob_id in blob_ids:
+      blob = self._memory_cache.Get(blob_id)
+      if blob is None:
+        memory_misses.append(blob_id)
+      else:
+        results[blob_id] = blob
+
+    BLOB_CACHE_HITS.Increment(len(results), fields=[_MEMORY_CACHE])
+    BLOB_CACHE_MISSES.Increment(len(memory_misses), fields=[_MEMORY_CACHE])
+
+    misses = memory_misses
+    if self._disk_cache is not None and memory_misses:
+      misses = []
+      for blob_id in memory_misses:
+        blob = self._disk_cache.Get(blob_id)
+        if blob is None:
+          misses.append(blob_id)
+        else:
+          self._memory_cache.Put(blob_id, blob)
+          results[blob_id] = blob
+
+      BLOB_CACHE_HITS.Increment(
+          len(memory_misses) - len(misses), fields=[_DISK_CACHE]
+      )
+      BLOB_CACHE_MISSES.Increment(len(misses), fields=[_DISK_CACHE])
+
+    if not misses:
+      return results
+
+    blobs = self._delegate.ReadBlobs(misses)
+    found = []
+    for blob_id, blob in blobs.items():
+      results[blob_id] = blob
+      if blob is None:
+        continue
+
+      found.append(blob_id)
+      self._memory_cache.Put(blob_id, blob)
+      if self._disk_cache is not None:
+        self._disk_cache.Put(blob_id, blob)
+
+    if self._negative_cache is not None and found:
+      self._negative_cache.Invalidate(found)
+
+    return results
+
+  def CheckBlobsExist(
+      self, blob_ids: Iterable[models_blobs.BlobID]
+  ) -> dict[models_blobs.BlobID, bool]:
+    """Checks if blobs for the given identifiers already exist."""
+    results = {}
+    unknown = []
+    negative_hits = 0
+    for blob_id in blob_ids:
+      if blob_id in self._memory_cache or (
+          self._disk_cache is not None and blob_id in self._disk_cache
+      ):
+        results[blob_id] = True
+      elif (
+          self._negative_cache is not None
+          and self._negative_cache.MayContain(blob_id)
+      ):
+        results[blob_id] = False
+        negative_hits += 1
+      else:
+        unknown.append(blob_id)
+
+    if self._negative_cache is not None:
+      BLOB_CACHE_HITS.Increment(negative_hits, fields=[_NEGATIVE_CACHE])
+      BLOB_CACHE_MISSES.Increment(len(unknown), fields=[_NEGATIVE_CACHE])
+
+    if not unknown:
+      return results
+
+    exists = self._delegate.CheckBlobsExist(unknown)
+    results.update(exists)
+    if self._negative_cache is not None:
+      self._negative_cache.Add(
+          blob_id for blob_id, blob_exists in exists.items() if not blob_exists
+      )
+
+    return results
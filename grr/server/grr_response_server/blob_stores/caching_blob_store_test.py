@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+"""Tests for the caching blob store."""
+
+import os
+from unittest import mock
+
+from absl import app
+
+from grr_response_core.lib import rdfvalue
+from grr_response_server import blob_store
+from grr_response_server import blob_store_test_mixin
+from grr_response_server.blob_stores import caching_blob_store
+from grr_response_server.blob_stores import db_blob_store
+from grr_response_server.models import blobs as models_blobs
+from grr.test_lib import stats_test_lib
+from grr.test_lib import test_lib
+
+
+class _CountingBlobStore(blob_store.BlobStore):
+  """An in-memory blob store counting the blobs it was asked about."""
+
+  def __init__(self):
+    super().__init__()
+    self.blobs = {}
+    self.read_blob_ids = []
+    self.checked_blob_ids = []
+
+  def WriteBlobs(self, blob_id_data_map):
+    self.blobs.update(blob_id_data_map)
+
+  def ReadBlobs(self, blob_ids):
+    blob_ids = list(blob_ids)
+    self.read_blob_ids.extend(blob_ids)
+    return {blob_id: self.blobs.get(blob_id) for blob_id in blob_ids}
+
+  def CheckBlobsExist(self, blob_ids):
+    blob_ids = list(blob_ids)
+    self.checked_blob_ids.extend(blob_ids)
+    return {blob_id: blob_id in self.blobs for blob_id in blob_ids}
+
+
+class CachingBlobStoreTest(
+    blob_store_test_mixin.BlobStoreTestMixin, test_lib.GRRBaseTest
+):
+
+  def CreateBlobStore(self):
+    return (
+        caching_blob_store.CachingBlobStore(
+            delegate=db_blob_store.DbBlobStore(),
+            memory_cache_size=1024 * 1024,
+            disk_cache_path=os.path.join(self.temp_dir, "cache"),
+            disk_cache_size=10 * 1024 * 1024,
+        ),
+        lambda: None,
+    )
+
+
+class CachingBlobStoreCacheTest(
+    stats_test_lib.StatsTestMixin, test_lib.GRRBaseTest
+):
+
+  def setUp(self):
+    super().setUp()
+    self.delegate = _CountingBlobStore()
+    self.cache_path = os.path.join(self.temp_dir, "cache")
+
+  def _CreateBlobStore(self, **kwargs):
+    kwargs.setdefault("memory_cache_size", 1024)
+    kwargs.setdefault("disk_cache_path", "")
+    kwargs.setdefault("disk_cache_size", 1024)
+    kwargs.setdefault(
+        "negative_cache_ttl", rdfvalue.Duration.From(1, rdfvalue.MINUTES)
+    )
+    kwargs.setdefault("bloom_filter_capacity", 1000)
+    kwargs.setdefault("bloom_filter_error_rate", 0.001)
+    return caching_blob_store.CachingBlobStore(self.delegate, **kwargs)
+
+  def testReadsAreServedFromMemory(self):
+    store = self._CreateBlobStore()
+    blob_id = store.WriteBlobWithUnknownHash(b"foo")
+
+    with self.assertStatsCounterDelta(
+        1, caching_blob_store.BLOB_CACHE_MISSES, fields=["memory"]
+    ):
+      self.assertEqual(store.ReadBlob(blob_id), b"foo")
+    with self.assertStatsCounterDelta(
+        1, caching_blob_store.BLOB_CACHE_HITS, fields=["memory"]
+    ):
+      self.assertEqual(store.ReadBlob(blob_id), b"foo")
+
+    self.assertEqual(self.delegate.read_blob_ids, [blob_id])
+
+  def testMissingBlobsAreNotCached(self):
+    store = self._CreateBlobStore()
+    blob_id = models_blobs.BlobID(b"01234567" * 4)
+
+    self.assertIsNone(store.ReadBlob(blob_id))
+    self.delegate.WriteBlobs({blob_id: b"foo"})
+    self.assertEqual(store.ReadBlob(blob_id), b"foo")
+
+  def testLeastRecentlyUsedBlobsAreEvicted(self):
+    store = self._CreateBlobStore(memory_cache_size=6)
+    foo_id = store.WriteBlobWithUnknownHash(b"foo")
+    bar_id = store.WriteBlobWithUnknownHash(b"bar")
+    baz_id = store.WriteBlobWithUnknownHash(b"baz")
+
+    store.ReadBlobs([foo_id, bar_id])
+    store.ReadBlob(foo_id)
+    with self.assertStatsCounterDelta(
+        1, caching_blob_store.BLOB_CACHE_EVICTIONS, fields=["memory"]
+    ):
+      store.ReadBlob(baz_id)
+
+    self.delegate.read_blob_ids = []
+    store.ReadBlobs([foo_id, bar_id, baz_id])
+    self.assertEqual(self.delegate.read_blob_ids, [bar_id])
+
+  def testBlobsLargerThanMemoryCacheAreNotCached(self):
+    store = self._CreateBlobStore(memory_cache_size=2)
+    blob_id = store.WriteBlobWithUnknownHash(b"foo")
+
+    store.ReadBlob(blob_id)
+    store.ReadBlob(blob_id)
+
+    self.assertEqual(self.delegate.read_blob_ids, [blob_id, blob_id])
+
+  def testReadsAreServedFromDiskCacheAfterRestart(self):
+    store = self._CreateBlobStore(disk_cache_path=self.cache_path)
+    blob_id = store.WriteBlobWithUnknownHash(b"foo")
+    store.ReadBlob(blob_id)
+
+    store = self._CreateBlobStore(disk_cache_path=self.cache_path)
+    with self.assertStatsCounterDelta(
+        1, caching_blob_store.BLOB_CACHE_HITS, fields=["disk"]
+    ):
+      self.assertEqual(store.ReadBlob(blob_id), b"foo")
+
+    self.assertEqual(self.delegate.read_blob_ids, [blob_id])
+
+  def testDiskCacheEvictsBlobs(self):
+    store = self._CreateBlobStore(
+        disk_cache_path=self.cache_path, disk_cache_size=6
+    )
+    blob_ids = store.WriteBlobsWithUnknownHashes([b"foo", b"bar", b"baz"])
+
+    with self.assertStatsCounterDelta(
+        1, caching_blob_store.BLOB_CACHE_EVICTIONS, fields=["disk"]
+    ):
+      store.ReadBlobs(blob_ids)
+
+    self.assertLen(os.listdir(self.cache_path), 2)
+
+  def testDiskCacheIgnoresBlobsRemovedByOtherProcesses(self):
+    store = self._CreateBlobStore(
+        memory_cache_size=0, disk_cache_path=self.cache_path
+    )
+    blob_id = store.WriteBlobWithUnknownHash(b"foo")
+    store.ReadBlob(blob_id)
+
+    os.unlink(os.path.join(self.cache_path, bytes(blob_id).hex()))
+
+    self.assertEqual(store.ReadBlob(blob_id), b"foo")
+    self.assertEqual(self.delegate.read_blob_ids, [blob_id, blob_id])
+
+  def testCheckBlobsExistUsesCachedBlobs(self):
+    store = self._CreateBlobStore()
+    blob_id = store.WriteBlobWithUnknownHash(b"foo")
+    store.ReadBlob(blob_id)
+
+    self.assertEqual(store.CheckBlobsExist([blob_id]), {blob_id: True})
+    self.assertEmpty(self.delegate.checked_blob_ids)
+
+  def testMissingBlobsAreRemembered(self):
+    store = self._CreateBlobStore()
+    blob_id = models_blobs.BlobID(b"01234567" * 4)
+
+    self.assertFalse(store.CheckBlobExists(blob_id))
+    with self.assertStatsCounterDelta(
+        1, caching_blob_store.BLOB_CACHE_HITS, fields=["negative"]
+    ):
+      self.assertFalse(store.CheckBlobExists(blob_id))
+
+    self.assertEqual(self.delegate.checked_blob_ids, [blob_id])
+
+  def testMissingBlobsAreForgottenWhenWritten(self):
+    store = self._CreateBlobStore()
+    blob_id = models_blobs.BlobID.Of(b"foo")
+
+    self.assertFalse(store.CheckBlobExists(blob_id))
+    store.WriteBlobs({blob_id: b"foo"})
+
+    self.assertTrue(store.CheckBlobExists(blob_id))
+
+  def testMissingBlobsAreForgottenWhenRead(self):
+    store = self._CreateBlobStore(memory_cache_size=0)
+    blob_id = models_blobs.BlobID.Of(b"foo")
+
+    self.assertFalse(store.CheckBlobExists(blob_id))
+    # Written by another process.
+    self.delegate.WriteBlobs({blob_id: b"foo"})
+    self.assertEqual(store.ReadBlob(blob_id), b"foo")
+
+    self.assertTrue(store.CheckBlobExists(blob_id))
+
+  def testMissingBlobsAreForgottenAfterTtl(self):
+    ttl = rdfvalue.Duration.From(10, rdfvalue.SECONDS)
+    blob_id = models_blobs.BlobID.Of(b"foo")
+
+    with test_lib.FakeTime(rdfvalue.RDFDatetime.FromSecondsSinceEpoch(0)) as t:
+      store = self._CreateBlobStore(negative_cache_ttl=ttl)
+      self.assertFalse(store.CheckBlobExists(blob_id))
+      # Written by another process.
+      self.delegate.WriteBlobs({blob_id: b"foo"})
+
+      t.time = 5
+      self.assertFalse(store.CheckBlobExists(blob_id))
+
+      t.time = 10
+      self.assertTrue(store.CheckBlobExists(blob_id))
+
+  @mock.patch.object(
+      blob_store,
+      "_BLOB_ARRIVAL_CHECK_INTERVAL",
+      rdfvalue.Duration.From(10, rdfvalue.MILLISECONDS),
+  )
+  def testWaitForBlobsFindsMissingBlobsSignalledByOtherProcess(self):
+    blob_id = models_blobs.BlobID.Of(b"foo")
+    generations = {}
+
+    def Signal(shards):
+      for shard in shards:
+        generations[shard] = generations.get(shard, 0) + 1
+
+    notifier = blob_store.BlobArrivalNotifier()
+    notifier.SetChannel(Signal, lambda: dict(generations))
+
+    with test_lib.ConfigOverrider({"Blobstore.arrival_notifications": True}):
+      with mock.patch.object(blob_store, "BLOB_ARRIVALS", notifier):
+        store = self._CreateBlobStore()
+        self.assertFalse(store.CheckBlobExists(blob_id))
+
+        # Written by another process.
+        self.delegate.WriteBlobs({blob_id: b"foo"})
+        Signal([blob_store.BlobArrivalShard(blob_id)])
+
+        # Blobs remembered as missing are forgotten once the waiting thread
+        # learns about blob arrivals, long before the negative cache expires.
+        store.WaitForBlobs(
+            [blob_id], timeout=rdfvalue.Duration.From(10, rdfvalue.SECONDS)
+        )
+
+  def testMissingBlobsAreForgottenWhenArrivalsArePublished(self):
+    store = self._CreateBlobStore()
+    blob_id = models_blobs.BlobID.Of(b"foo")
+
+    self.assertFalse(store.CheckBlobExists(blob_id))
+    self.delegate.WriteBlobs({blob_id: b"foo"})
+    blob_store.BLOB_ARRIVALS.Publish([blob_id])
+
+    self.assertTrue(store.CheckBlobExists(blob_id))
+
+  def testMissingBlobsAreNotRememberedIfTtlIsZero(self):
+    store = self._CreateBlobStore(negative_cache_ttl=rdfvalue.Duration(0))
+    blob_id = models_blobs.BlobID(b"01234567" * 4)
+
+    store.CheckBlobExists(blob_id)
+    store.CheckBlobExists(blob_id)
+
+    self.assertEqual(self.delegate.checked_blob_ids, [blob_id, blob_id])
+
+  @mock.patch.dict(
+      blob_store.REGISTRY, {"DbBlobStore": db_blob_store.DbBlobStore}
+  )
+  def testCreatesDelegateFromConfig(self):
+    with test_lib.ConfigOverrider({
+        "Blobstore.caching.delegate_implementation": "DbBlobStore",
+        "Blobstore.caching.disk_cache_path": "",
+    }):
+      store = caching_blob_store.CachingBlobStore()
+
+    blob_id = store.WriteBlobWithUnknownHash(b"foo")
+    self.assertEqual(store.ReadBlob(blob_id), b"foo")
+
+  @mock.patch.dict(
+      blob_store.REGISTRY,
+      {"CachingBlobStore": caching_blob_store.CachingBlobStore},
+  )
+  def testRaisesIfDelegateIsCachingBlobStore(self):
+    with test_lib.ConfigOverrider({
+        "Blobstore.caching.delegate_implementation": "CachingBlobStore"
+    }):
+      with self.assertRaises(caching_blob_store.ConfigError):
+        caching_blob_store.CachingBlobStore()
+
+  def testRaisesOnInvalidBloomFilterConfig(self):
+    with self.assertRaises(caching_blob_store.ConfigError):
+      self._CreateBlobStore(bloom_filter_error_rate=0)
+
+
+class BloomFilterTest(test_lib.GRRBaseTest):
+
+  def testContainsAddedBlobIds(self):
+    bloom_filter = caching_blob_store.BloomFilter(1000, 0.01)
+    blob_ids = [models_blobs.BlobID.Of(b"%d" % i) for i in range(1000)]
+
+    for blob_id in blob_ids:
+      bloom_filter.Add(blob_id)
+
+    for blob_id in blob_ids:
+      self.assertIn(blob_id, bloom_filter)
+
+  def testFalsePositiveRate(self):
+    bloom_filter = caching_blob_store.BloomFilter(1000, 0.01)
+    for i in range(1000):
+      bloom_filter.Add(models_blobs.BlobID.Of(b"%d" % i))
+
+    false_positives = sum(
+        models_blobs.BlobID.Of(b"other-%d" % i) in bloom_filter
+        for i in range(10000)
+    )
+    self.assertLess(false_positives, 300)
+
+  def testClear(self):
+    bloom_filter = caching_blob_store.BloomFilter(10, 0.01)
+    blob_id = models_blobs.BlobID.Of(b"foo")
+    bloom_filter.Add(blob_id)
+
+    bloom_filter.Clear()
+
+    self.assertNotIn(blob_id, bloom_filter)
+    self.assertEqual(bloom_filter.size, 0)
+
+
+if __name__ == "__main__":
+  app.run(test_lib.main)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+"""A BlobStore wrapper compressing blobs before writing them.
+
+Every blob written through the wrapper starts with a small header naming the
+codec the rest of the blob is encoded with. Blobs keep their identifiers: the
+BlobID is the hash of the uncompressed data, so compression is invisible to
+the users of the blob store (and blobs are deduplicated as before).
+"""
+
+import collections
+from collections.abc import Iterable
+import struct
+from typing import Optional
+import zlib
+
+from grr_response_core import config
+from grr_response_core.stats import metrics
+from grr_response_server import blob_store
+from grr_response_server.models import blobs as models_blobs
+
+BLOB_COMPRESSION_INPUT_BYTES = metrics.Counter(
+    "blob_compression_input_bytes", fields=[("codec", str)]
+)
+BLOB_COMPRESSION_OUTPUT_BYTES = metrics.Counter(
+    "blob_compression_output_bytes", fields=[("codec", str)]
+)
+
+# Header: magic, codec and size of the uncompressed data.
+_HEADER = struct.Struct("<4sBI")
+_MAGIC = b"GRRz"
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+
+_CODEC_NAMES = {
+    CODEC_RAW: "raw",
+    CODEC_ZLIB: "zlib",
+}
+
+# Size of the sample the entropy of a blob is estimated on.
+_ENTROPY_SAMPLE_SIZE = 4096
+
+
+class ConfigError(Exception):
+  """Raised when the compressing blob store config is invalid."""
+
+
+def EstimateEntropy(data: bytes) -> float:
+  """Estimates the entropy of the data (in bits per byte).
+
+  The entropy is estimated by compressing samples taken from the beginning,
+  the middle and the end of the data with the fastest zlib level. This is
+  much cheaper than compressing the whole blob and is enough to tell apart
+  blobs that are compressed or encrypted already.
+
+  Args:
+    data: Data to estimate the entropy of.
+
+  Returns:
+    Estimated entropy of the data, 8 (or slightly more) for random data.
+  """
+  if len(data) > 3 * _ENTROPY_SAMPLE_SIZE:
+    middle = (len(data) - _ENTROPY_SAMPLE_SIZE) // 2
+    data = b"".join([
+        data[:_ENTROPY_SAMPLE_SIZE],
+        data[middle : middle + _ENTROPY_SAMPLE_SIZE],
+        data[-_ENTROPY_SAMPLE_SIZE:],
+    ])
+  if not data:
+    return 0.0
+
+  return 8 * len(zlib.compress(data, 1)) / len(data)
+
+
+def EncodeBlob(
+    data: bytes,
+    level: int,
+    min_size: int,
+    max_entropy: float,
+    min_savings: float,
+) -> tuple[int, bytes]:
+  """Encodes the blob data with the codec expected to fit it best.
+
+  Args:
+    data: Uncompressed blob data.
+    level: Zlib compression level.
+    min_size: Blobs smaller than that are stored uncompressed.
+    max_entropy: Blobs with higher estimated entropy (in bits per byte) are
+      stored uncompressed.
+    min_savings: Blobs are stored uncompressed unless compression saves at
+      least that fraction of their size.
+
+  Returns:
+    A tuple (codec, encoded), where encoded is the blob data prefixed with
+    the header.
+  """
+  if len(data) >= min_size and EstimateEntropy(data) <= max_entropy:
+    compressed = zlib.compress(data, level)
+    if len(compressed) <= len(data) * (1 - min_savings):
+      header = _HEADER.pack(_MAGIC, CODEC_ZLIB, len(data))
+      return CODEC_ZLIB, header + compressed
+
+  return CODEC_RAW, _HEADER.pack(_MAGIC, CODEC_RAW, len(data)) + data
+
+
+def DecodeBlob(encoded: bytes) -> bytes:
+  """Decodes blob data encoded by `EncodeBlob`.
+
+  Blobs written before the compression was enabled have no header and are
+  returned as they are. A header-less blob can still happen to be a valid
+  encoding of other data, `CompressingBlobStore.ReadBlobs` tells these apart
+  with the blob ids.
+
+  Args:
+    encoded: Blob data as stored in the wrapped blob store.
+
+  Returns:
+    Uncompressed blob data.
+  """
+  if len(encoded) < _HEADER.size or not encoded.startswith(_MAGIC):
+    return encoded
+
+  _, codec, size = _HEADER.unpack_from(encoded)
+  if codec == CODEC_RAW and len(encoded) - _HEADER.size == size:
+    return encoded[_HEADER.size :]
+
+  if codec == CODEC_ZLIB:
+    try:
+      data = zlib.decompress(memoryview(encoded)[_HEADER.size :])
+    except zlib.error:
+      data = None
+    if data is not None and len(data) == size:
+      return data
+
+  return encoded
+
+
+class CompressingBlobStore(blob_store.BlobStore):
+  """A BlobStore wrapper compressing blobs written to another blob store.
+
+  Blobs are compressed with zlib, unless they are small, look incompressible
+  (e.g. are compressed or encrypted already) or do not compress well enough,
+  in which case they are stored raw. Blobs written to the wrapped blob store
+  before are still readable.
+  """
+
+  def __init__(
+      self,
+      delegate: Optional[blob_store.BlobStore] = None,
+      level: Optional[int] = None,
+      min_size: Optional[int] = None,
+      max_entropy: Optional[float] = None,
+      min_savings: Optional[float] = None,
+  ) -> None:
+    """Instantiates a new CompressingBlobStore.
+
+    Args:
+      delegate: The blob store to write compressed blobs to. Defaults to a new
+        instance of the `Blobstore.compression.delegate_implementation` blob
+        store.
+      level: Zlib compression level. Defaults to the
+        `Blobstore.compression.level` config option.
+      min_size: Blobs smaller than that (in bytes) are stored uncompressed.
+        Defaults to the `Blobstore.compression.min_size` config option.
+      max_entropy: Blobs with higher estimated entropy (in bits per byte) are
+        stored uncompressed. Defaults to the
+        `Blobstore.compression.max_entropy` config option.
+      min_savings: Blobs are stored uncompressed unless compression saves at
+        least that fraction of their size. Defaults to the
+        `Blobstore.compression.min_savings` config option.
+
+    Raises:
+      ConfigError: If the blob store configuration is invalid.
+    """
+    super().__init__()
+
+    if delegate is None:
+      name = config.CONFIG["Blobstore.compression.delegate_implementation"]
+      cls = blob_store.REGISTRY.get(name)
+      if cls is None:
+        raise ConfigError(f"No blob store {name!r} found")
+      if issubclass(cls, CompressingBlobStore):
+        raise ConfigError(f"Blob store {name!r} can not compress itself")
+      delegate = cls()
+
+    if level is None:
+      level = config.CONFIG["Blobstore.compression.level"]
+    if min_size is None:
+      min_size = config.CONFIG["Blobstore.compression.min_size"]
+    if max_entropy is None:
+      max_entropy = config.CONFIG["Blobstore.compression.max_entropy"]
+    if min_savings is None:
+      min_savings = config.CONFIG["Blobstore.compression.min_savings"]
+
+    if not 0 <= level <= 9:
+      raise ConfigError(f"Invalid compression level: {level}")
+    if not 0 <= min_savings < 1:
+      raise ConfigError(f"Invalid minimum savings: {min_savings}")
+
+    self._delegate = delegate
+    self._level = level
+    self._min_size = min_size
+    self._max_entropy = max_entropy
+    self._min_savings = min_savings
+
+  def WriteBlobs(
+      self, blob_id_data_map: dict[models_blobs.BlobID, bytes]
+  ) -> None:
+    """Creates or overwrites blobs."""
+    input_bytes = collections.Counter()
+    output_bytes = collections.Counter()
+
+    encoded_blobs = {}
+    for blob_id, blob in blob_id_data_map.items():
+      codec, encoded = EncodeBlob(
+          blob,
+          level=self._level,
+          min_size=self._min_size,
+          max_entropy=self._max_entropy,
+          min_savings=self._min_savings,
+      )
+      encoded_blobs[blob_id] = encoded
+      input_bytes[codec] += len(blob)
+      output_bytes[codec] += len(encoded)
+
+    self._delegate.WriteBlobs(encoded_blobs)
+
+    for codec, count in input_bytes.items():
+      fields = [_CODEC_NAMES[codec]]
+      BLOB_COMPRESSION_INPUT_BYTES.Increment(count, fields=fields)
+      BLOB_COMPRESSION_OUTPUT_BYTES.Increment(
+          output_bytes[codec], fields=fields
+      )
+
+  def ReadBlobs(
+      self, blob_ids: Iterable[models_blobs.BlobID]
+  ) -> dict[models_blobs.BlobID, Optional[bytes]]:
+    """Reads all blobs, specified by blob_ids, returning their contents."""
+    results = {}
+    for blob_id, encoded in self._delegate.ReadBlobs(blob_ids).items():
+      if encoded is None:
+        results[blob_id] = None
+        continue
+
+      data = DecodeBlob(encoded)
+      # A header-less blob written before the compression was enabled may be a
+      # valid encoding of other data. Blob ids are hashes of the uncompressed
+      # data, so such a blob is recognized by its id matching the raw bytes.
+      if (
+          data is not encoded
+          and models_blobs.BlobID.Of(data) != blob_id
+          and models_blobs.BlobID.Of(encoded) == blob_id
+      ):
+        data = encoded
+      results[blob_id] = data
+
+    return results
+
+  def CheckBlobsExist(
+      self, blob_ids: Iterable[models_blobs.BlobID]
+  ) -> dict[models_blobs.BlobID, bool]:
+    """Checks if blobs for the given identifiers already exist."""
+    return self._delegate.CheckBlobsExist(blob_ids)
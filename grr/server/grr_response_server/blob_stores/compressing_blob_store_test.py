@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""Tests for the compressing blob store."""
+
+import os
+from unittest import mock
+
+from absl import app
+
+from grr_response_server import blob_store
+from grr_response_server import blob_store_test_mixin
+from grr_response_server.blob_stores import compressing_blob_store
+from grr_response_server.blob_stores import db_blob_store
+from grr_response_server.models import blobs as models_blobs
+from grr.test_lib import stats_test_lib
+from grr.test_lib import test_lib
+
+
+class _DictBlobStore(blob_store.BlobStore):
+  """A blob store keeping blobs in a dict."""
+
+  def __init__(self):
+    super().__init__()
+    self.blobs = {}
+
+  def WriteBlobs(self, blob_id_data_map):
+    self.blobs.update(blob_id_data_map)
+
+  def ReadBlobs(self, blob_ids):
+    return {blob_id: self.blobs.get(blob_id) for blob_id in blob_ids}
+
+  def CheckBlobsExist(self, blob_ids):
+    return {blob_id: blob_id in self.blobs for blob_id in blob_ids}
+
+
+class CompressingBlobStoreTest(
+    blob_store_test_mixin.BlobStoreTestMixin, test_lib.GRRBaseTest
+):
+
+  def CreateBlobStore(self):
+    return (
+        compressing_blob_store.CompressingBlobStore(
+            delegate=db_blob_store.DbBlobStore()
+        ),
+        lambda: None,
+    )
+
+
+class CompressingBlobStoreCompressionTest(
+    stats_test_lib.StatsTestMixin, test_lib.GRRBaseTest
+):
+
+  def setUp(self):
+    super().setUp()
+    self.delegate = _DictBlobStore()
+    self.store = compressing_blob_store.CompressingBlobStore(
+        self.delegate,
+        level=6,
+        min_size=512,
+        max_entropy=7.5,
+        min_savings=0.1,
+    )
+
+  def testCompressibleBlobsAreCompressed(self):
+    blob_data = b"foo bar baz\n" * 1000
+
+    with self.assertStatsCounterDelta(
+        len(blob_data),
+        compressing_blob_store.BLOB_COMPRESSION_INPUT_BYTES,
+        fields=["zlib"],
+    ):
+      blob_id = self.store.WriteBlobWithUnknownHash(blob_data)
+
+    self.assertEqual(blob_id, models_blobs.BlobID.Of(blob_data))
+    self.assertLess(len(self.delegate.blobs[blob_id]), len(blob_data) // 10)
+    self.assertEqual(self.store.ReadBlob(blob_id), blob_data)
+
+  def testRandomBlobsAreStoredRaw(self):
+    blob_data = os.urandom(64 * 1024)
+
+    with self.assertStatsCounterDelta(
+        len(blob_data),
+        compressing_blob_store.BLOB_COMPRESSION_INPUT_BYTES,
+        fields=["raw"],
+    ):
+      blob_id = self.store.WriteBlobWithUnknownHash(blob_data)
+
+    self.assertTrue(self.delegate.blobs[blob_id].endswith(blob_data))
+    self.assertEqual(self.store.ReadBlob(blob_id), blob_data)
+
+  def testSmallBlobsAreStoredRaw(self):
+    blob_data = b"a" * 511
+    blob_id = self.store.WriteBlobWithUnknownHash(blob_data)
+
+    self.assertTrue(self.delegate.blobs[blob_id].endswith(blob_data))
+    self.assertEqual(self.store.ReadBlob(blob_id), blob_data)
+
+  def testEmptyBlobsAreSupported(self):
+    blob_id = self.store.WriteBlobWithUnknownHash(b"")
+    self.assertEqual(self.store.ReadBlob(blob_id), b"")
+
+  def testBlobsWrittenWithoutCompressionAreReadable(self):
+    blob_data = b"foo bar baz\n" * 1000
+    blob_id = models_blobs.BlobID.Of(blob_data)
+    self.delegate.WriteBlobs({blob_id: blob_data})
+
+    self.assertEqual(self.store.ReadBlob(blob_id), blob_data)
+
+  def testBlobsLookingLikeCompressedAreReadable(self):
+    _, encoded = compressing_blob_store.EncodeBlob(
+        b"foo" * 1000,
+        level=6,
+        min_size=0,
+        max_entropy=8,
+        min_savings=0,
+    )
+    # Written without compression, the header does not match the data.
+    blob_data = encoded[:-1]
+    blob_id = models_blobs.BlobID.Of(blob_data)
+    self.delegate.WriteBlobs({blob_id: blob_data})
+
+    self.assertEqual(self.store.ReadBlob(blob_id), blob_data)
+
+  def testBlobsThatAreValidEncodingsAreReadable(self):
+    # Written without compression, the blob happens to be a valid encoding of
+    # other data.
+    _, blob_data = compressing_blob_store.EncodeBlob(
+        b"foo" * 1000,
+        level=6,
+        min_size=0,
+        max_entropy=8,
+        min_savings=0,
+    )
+    blob_id = models_blobs.BlobID.Of(blob_data)
+    self.delegate.WriteBlobs({blob_id: blob_data})
+
+    self.assertEqual(self.store.ReadBlob(blob_id), blob_data)
+
+  def testCheckBlobsExist(self):
+    blob_id = self.store.WriteBlobWithUnknownHash(b"foo")
+    other_blob_id = models_blobs.BlobID.Of(b"bar")
+
+    self.assertEqual(
+        self.store.CheckBlobsExist([blob_id, other_blob_id]),
+        {blob_id: True, other_blob_id: False},
+    )
+
+  @mock.patch.dict(
+      blob_store.REGISTRY, {"DbBlobStore": db_blob_store.DbBlobStore}
+  )
+  def testCreatesDelegateFromConfig(self):
+    with test_lib.ConfigOverrider(
+        {"Blobstore.compression.delegate_implementation": "DbBlobStore"}
+    ):
+      store = compressing_blob_store.CompressingBlobStore()
+
+    blob_data = b"foo" * 1000
+    blob_id = store.WriteBlobWithUnknownHash(blob_data)
+    self.assertEqual(store.ReadBlob(blob_id), blob_data)
+
+  def testRaisesOnInvalidLevel(self):
+    with self.assertRaises(compressing_blob_store.ConfigError):
+      compressing_blob_store.CompressingBlobStore(self.delegate, level=10)
+
+
+class EstimateEntropyTest(test_lib.GRRBaseTest):
+
+  def testRandomData(self):
+    entropy = compressing_blob_store.EstimateEntropy(os.urandom(1024 * 1024))
+    self.assertGreater(entropy, 7.9)
+
+  def testRepetitiveData(self):
+    entropy = compressing_blob_store.EstimateEntropy(b"foo" * 100000)
+    self.assertLess(entropy, 1)
+
+  def testEmptyData(self):
+    self.assertEqual(compressing_blob_store.EstimateEntropy(b""), 0)
+
+
+if __name__ == "__main__":
+  app.run(test_lib.main)
@@ -5,6 +5,7 @@ from typing import Optional
 
 from grr_response_server import blob_store
 from grr_response_server import data_store
+from grr_response_server.databases import db_profiling
 from grr_response_server.models import blobs as models_blobs
 
 
@@ -23,9 +24,14 @@ class DbBlobStore(blob_store.BlobStore):
       # its delegate (as the validation wrapper does not implement the blobstore
       # interface).
       delegate = data_store.REL_DB.delegate  # pytype: disable=attribute-error
-      if not isinstance(delegate, blob_store.BlobStore):
+      # The profiling wrapper forwards the blobstore methods as well, so it is
+      # kept to get blob calls profiled, but the check is done on the database.
+      database = delegate
+      if isinstance(database, db_profiling.ProfilingDatabase):
+        database = database.delegate
+      if not isinstance(database, blob_store.BlobStore):
         raise TypeError(
-            f"Database blobstore delegate of '{type(delegate)}' "
+            f"Database blobstore delegate of '{type(database)}' "
             "type does not implement the blobstore interface"
         )
 
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""A BlobStore keeping blobs as files in a local directory tree."""
+
+from collections.abc import Iterable
+import errno
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from grr_response_core import config
+from grr_response_server import blob_store
+from grr_response_server.models import blobs as models_blobs
+
+# Number of hex digits of the BlobID used for every level of shard directories.
+_SHARD_NAME_LENGTH = 2
+
+_TEMP_FILE_PREFIX = ".tmp-"
+
+
+class ConfigError(Exception):
+  """Raised when the filesystem blob store config is invalid."""
+
+
+class FilesystemBlobStore(blob_store.BlobStore):
+  """A BlobStore implementation backed by a local (or mounted) filesystem.
+
+  Blobs are content-addressed: every blob is stored in a file named after the
+  hex representation of its BlobID, in a tree of shard directories named after
+  the leading digits of the BlobID (e.g. `ab/cd/abcd...` for two levels). Blobs
+  are written to a temporary file in the target directory first and atomically
+  renamed, so readers never observe partially written blobs.
+  """
+
+  def __init__(
+      self,
+      root_path: Optional[str] = None,
+      shard_levels: Optional[int] = None,
+      fsync: Optional[bool] = None,
+  ) -> None:
+    """Instantiates a new FilesystemBlobStore.
+
+    Args:
+      root_path: Directory to keep the blobs in. Defaults to the
+        `Blobstore.filesystem.root_path` config option.
+      shard_levels: Number of nested shard directories. Defaults to the
+        `Blobstore.filesystem.shard_levels` config option.
+      fsync: Whether to flush written blobs to disk before returning. Defaults
+        to the `Blobstore.filesystem.fsync` config option.
+
+    Raises:
+      ConfigError: If the blob store configuration is invalid.
+    """
+    if root_path is None:
+      root_path = config.CONFIG["Blobstore.filesystem.root_path"]
+    if shard_levels is None:
+      shard_levels = config.CONFIG["Blobstore.filesystem.shard_levels"]
+    if fsync is None:
+      fsync = config.CONFIG["Blobstore.filesystem.fsync"]
+
+    if not root_path:
+      raise ConfigError(
+          "Missing config value for Blobstore.filesystem.root_path"
+      )
+    if shard_levels < 0:
+      raise ConfigError(
+          f"Invalid number of shard levels: {shard_levels} (must be >= 0)"
+      )
+
+    self._root_path = root_path
+    self._shard_levels = shard_levels
+    self._fsync = fsync
+
+    os.makedirs(self._root_path, exist_ok=True)
+
+  def _GetDirectory(self, hex_blob_id: str) -> str:
+    shards = [
+        hex_blob_id[i * _SHARD_NAME_LENGTH : (i + 1) * _SHARD_NAME_LENGTH]
+        for i in range(self._shard_levels)
+    ]
+    return os.path.join(self._root_path, *shards)
+
+  def _GetPath(self, blob_id: models_blobs.BlobID) -> str:
+    hex_blob_id = bytes(blob_id).hex()
+    return os.path.join(self._GetDirectory(hex_blob_id), hex_blob_id)
+
+  def _WriteTempFile(self, directory: str, blob: bytes) -> str:
+    """Writes the blob to a new temporary file in the given directory."""
+    try:
+      fd, temp_path = tempfile.mkstemp(dir=directory, prefix=_TEMP_FILE_PREFIX)
+    except FileNotFoundError:
+      os.makedirs(directory, exist_ok=True)
+      fd, temp_path = tempfile.mkstemp(dir=directory, prefix=_TEMP_FILE_PREFIX)
+
+    try:
+      view = memoryview(blob)
+      while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+      if self._fsync:
+        os.fsync(fd)
+    except BaseException:
+      os.close(fd)
+      os.unlink(temp_path)
+      raise
+
+    os.close(fd)
+    return temp_path
+
+  def WriteBlobs(
+      self, blob_id_data_map: dict[models_blobs.BlobID, bytes]
+  ) -> None:
+    """Creates or overwrites blobs."""
+    # Blobs are content-addressed, so existing files do not need rewriting.
+    paths = {}
+    for blob_id in blob_id_data_map:
+      path = self._GetPath(blob_id)
+      if not os.path.exists(path):
+        paths[blob_id] = path
+
+    renames = []
+    num_renamed = 0
+    try:
+      for blob_id, path in paths.items():
+        temp_path = self._WriteTempFile(
+            os.path.dirname(path), blob_id_data_map[blob_id]
+        )
+        renames.append((temp_path, path))
+
+      for temp_path, path in renames:
+        os.replace(temp_path, path)
+        num_renamed += 1
+    except BaseException:
+      for temp_path, _ in renames[num_renamed:]:
+        os.unlink(temp_path)
+      raise
+
+    # Make the renames durable with a single fsync per touched directory
+    # instead of one per blob.
+    if self._fsync:
+      for directory in set(os.path.dirname(path) for _, path in renames):
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+          os.fsync(dir_fd)
+        finally:
+          os.close(dir_fd)
+
+  def ReadBlob(self, blob_id: models_blobs.BlobID) -> Optional[bytes]:
+    """Reads the blob contents, identified by the given BlobID."""
+    try:
+      fd = os.open(self._GetPath(blob_id), os.O_RDONLY)
+    except FileNotFoundError:
+      return None
+
+    try:
+      size = os.fstat(fd).st_size
+      chunks = []
+      offset = 0
+      while offset < size:
+        chunk = os.pread(fd, size - offset, offset)
+        if not chunk:
+          break
+        chunks.append(chunk)
+        offset += len(chunk)
+    finally:
+      os.close(fd)
+
+    if offset != size:
+      logging.error(
+          "Blob %s is truncated: read %d out of %d bytes.",
+          blob_id,
+          offset,
+          size,
+      )
+      return None
+
+    if len(chunks) == 1:
+      return chunks[0]
+    return b"".join(chunks)
+
+  def ReadBlobs(
+      self, blob_ids: Iterable[models_blobs.BlobID]
+  ) -> dict[models_blobs.BlobID, Optional[bytes]]:
+    """Reads all blobs, specified by blob_ids, returning their contents."""
+    return {blob_id: self.ReadBlob(blob_id) for blob_id in blob_ids}
+
+  def CheckBlobExists(self, blob_id: models_blobs.BlobID) -> bool:
+    """Checks if a blob with a given BlobID exists."""
+    try:
+      os.stat(self._GetPath(blob_id))
+    except OSError as e:
+      if e.errno in (errno.ENOENT, errno.ENOTDIR):
+        return False
+      raise
+
+    return True
+
+  def CheckBlobsExist(
+      self, blob_ids: Iterable[models_blobs.BlobID]
+  ) -> dict[models_blobs.BlobID, bool]:
+    """Checks if blobs for the given identifiers already exist."""
+    return {blob_id: self.CheckBlobExists(blob_id) for blob_id in blob_ids}
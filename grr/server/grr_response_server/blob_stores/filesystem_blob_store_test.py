@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""Tests for the filesystem-based blob store."""
+
+import os
+from unittest import mock
+
+from absl import app
+
+from grr_response_server import blob_store_test_mixin
+from grr_response_server.blob_stores import filesystem_blob_store
+from grr_response_server.models import blobs as models_blobs
+from grr.test_lib import test_lib
+
+
+class FilesystemBlobStoreTest(
+    blob_store_test_mixin.BlobStoreTestMixin, test_lib.GRRBaseTest
+):
+
+  def CreateBlobStore(self):
+    self.root_path = os.path.join(self.temp_dir, "blobs")
+    return (
+        filesystem_blob_store.FilesystemBlobStore(root_path=self.root_path),
+        lambda: None,
+    )
+
+  def testRaisesIfRootPathIsNotConfigured(self):
+    with test_lib.ConfigOverrider({"Blobstore.filesystem.root_path": ""}):
+      with self.assertRaises(filesystem_blob_store.ConfigError):
+        filesystem_blob_store.FilesystemBlobStore()
+
+  def testBlobsAreShardedByBlobId(self):
+    blob_id = models_blobs.BlobID(bytes.fromhex("abcd") + b"0" * 30)
+    self.blob_store.WriteBlobs({blob_id: b"foo"})
+
+    expected_path = os.path.join(
+        self.root_path, "ab", "cd", bytes(blob_id).hex()
+    )
+    with open(expected_path, "rb") as f:
+      self.assertEqual(f.read(), b"foo")
+
+  def testNoShardDirectories(self):
+    store = filesystem_blob_store.FilesystemBlobStore(
+        root_path=self.root_path, shard_levels=0
+    )
+    blob_id = models_blobs.BlobID(b"0123" * 8)
+    store.WriteBlobs({blob_id: b"foo"})
+
+    self.assertEqual(os.listdir(self.root_path), [bytes(blob_id).hex()])
+    self.assertEqual(store.ReadBlob(blob_id), b"foo")
+
+  def testDoesNotLeaveTemporaryFiles(self):
+    blob_ids = [models_blobs.BlobID(bytes([i]) * 32) for i in range(10)]
+    self.blob_store.WriteBlobs({blob_id: b"foo" for blob_id in blob_ids})
+
+    filenames = []
+    for _, _, files in os.walk(self.root_path):
+      filenames.extend(files)
+
+    self.assertCountEqual(
+        filenames, [bytes(blob_id).hex() for blob_id in blob_ids]
+    )
+
+  def testDoesNotLeaveTemporaryFilesIfRenamingFails(self):
+    blob_ids = [models_blobs.BlobID(bytes([i]) * 32) for i in range(3)]
+    replace = os.replace
+    calls = []
+
+    def FailingReplace(src, dst):
+      calls.append(src)
+      if len(calls) == 2:
+        raise OSError("Disk is full")
+      replace(src, dst)
+
+    with mock.patch.object(os, "replace", FailingReplace):
+      with self.assertRaises(OSError):
+        self.blob_store.WriteBlobs({blob_id: b"foo" for blob_id in blob_ids})
+
+    filenames = []
+    for _, _, files in os.walk(self.root_path):
+      filenames.extend(files)
+
+    # Only the blob renamed before the failure is left.
+    self.assertLen(filenames, 1)
+    self.assertFalse(
+        filenames[0].startswith(filesystem_blob_store._TEMP_FILE_PREFIX)
+    )
+
+  def testExistingBlobsAreNotRewritten(self):
+    blob_id = models_blobs.BlobID(b"0123" * 8)
+    self.blob_store.WriteBlobs({blob_id: b"foo"})
+
+    with mock.patch.object(os, "replace") as replace_mock:
+      self.blob_store.WriteBlobs({blob_id: b"foo"})
+
+    replace_mock.assert_not_called()
+
+  def testFsyncsEveryDirectoryOncePerBatch(self):
+    store = filesystem_blob_store.FilesystemBlobStore(
+        root_path=self.root_path, fsync=True
+    )
+    blob_ids = [
+        models_blobs.BlobID(b"\xab\xcd" + bytes([i]) * 30) for i in range(5)
+    ]
+
+    with mock.patch.object(os, "fsync", wraps=os.fsync) as fsync_mock:
+      store.WriteBlobs({blob_id: b"foo" for blob_id in blob_ids})
+
+    # One fsync per blob file plus a single one for the shard directory.
+    self.assertEqual(fsync_mock.call_count, len(blob_ids) + 1)
+
+
+if __name__ == "__main__":
+  app.run(test_lib.main)
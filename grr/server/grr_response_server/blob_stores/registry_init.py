@@ -2,7 +2,10 @@
 """Load all blob stores so that they are visible in the registry."""
 
 from grr_response_server import blob_store
+from grr_response_server.blob_stores import caching_blob_store
+from grr_response_server.blob_stores import compressing_blob_store
 from grr_response_server.blob_stores import db_blob_store
+from grr_response_server.blob_stores import filesystem_blob_store
 from grr_response_server.blob_stores import gcs_blob_store
 
 
@@ -14,3 +17,12 @@ def RegisterBlobStores():
   blob_store.REGISTRY[gcs_blob_store.GCSBlobStore.__name__] = (
       gcs_blob_store.GCSBlobStore
   )
+  blob_store.REGISTRY[filesystem_blob_store.FilesystemBlobStore.__name__] = (
+      filesystem_blob_store.FilesystemBlobStore
+  )
+  blob_store.REGISTRY[caching_blob_store.CachingBlobStore.__name__] = (
+      caching_blob_store.CachingBlobStore
+  )
+  blob_store.REGISTRY[compressing_blob_store.CompressingBlobStore.__name__] = (
+      compressing_blob_store.CompressingBlobStore
+  )
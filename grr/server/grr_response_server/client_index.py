@@ -4,9 +4,7 @@
 An index of client machines, associating likely identifiers to client IDs.
 """
 
-import functools
-import operator
-from typing import Collection, Iterable, Mapping, Sequence
+from typing import Collection, Iterable, Mapping, Optional, Sequence
 
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.util import precondition
@@ -75,14 +73,22 @@ class ClientIndex(object):
 
     return start_time, filtered_keywords
 
-  def LookupClients(self, keywords: Iterable[str]) -> Sequence[str]:
-    """Returns a list of client URNs associated with keywords.
+  def LookupClients(
+      self,
+      keywords: Iterable[str],
+      offset: int = 0,
+      count: Optional[int] = None,
+  ) -> Sequence[str]:
+    """Returns a sorted list of client ids associated with all keywords.
 
     Args:
       keywords: The list of keywords to search by.
+      offset: The number of matching clients to skip.
+      count: The maximum number of client ids to return. If not set, all
+        matching clients (starting at `offset`) are returned.
 
     Returns:
-      A list of client URNs.
+      A sorted list of client ids.
 
     Raises:
       ValueError: A string (single keyword) was passed instead of an iterable.
@@ -94,16 +100,13 @@ class ClientIndex(object):
 
     start_time, filtered_keywords = self._AnalyzeKeywords(keywords)
 
-    keyword_map = data_store.REL_DB.ListClientsForKeywords(
+    return data_store.REL_DB.SearchClientsForKeywords(
         list(map(self._NormalizeKeyword, filtered_keywords)),
         start_time=start_time,
+        offset=offset,
+        count=count,
     )
 
-    relevant_set = functools.reduce(
-        operator.and_, map(set, keyword_map.values())
-    )
-    return sorted(relevant_set)
-
   def ReadClientPostingLists(
       self, keywords: Iterable[str]
   ) -> Mapping[str, Sequence[str]]:
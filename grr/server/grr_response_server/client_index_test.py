@@ -140,6 +140,24 @@ class ClientIndexTest(test_lib.GRRBaseTest):
     # Universal keyword should find everything.
     self.assertCountEqual(index.LookupClients(["."]), list(clients))
 
+  def testLookupClientsPagination(self):
+    index = client_index.ClientIndex()
+
+    clients = self._SetupClients(5)
+    for client_id, client in clients.items():
+      data_store.REL_DB.WriteClientMetadata(client_id)
+      index.AddClient(client)
+
+    client_ids = sorted(clients)
+    self.assertEqual(index.LookupClients(["."], offset=1), client_ids[1:])
+    self.assertEqual(
+        index.LookupClients(["."], offset=1, count=2), client_ids[1:3]
+    )
+    self.assertEqual(
+        index.LookupClients(["192.168.0"], offset=3, count=10), client_ids[3:]
+    )
+    self.assertEmpty(index.LookupClients(["."], offset=5, count=2))
+
   def testAddTimestamp(self):
     index = client_index.ClientIndex()
 
@@ -42,6 +42,7 @@ from absl import flags
 from grr_response_core import config
 from grr_response_server import blob_store
 from grr_response_server.databases import db
+from grr_response_server.databases import db_profiling
 from grr_response_server.databases import registry_init
 
 _LIST_STORAGE = flags.DEFINE_bool(
@@ -84,7 +85,19 @@ def InitializeDataStore():
   except KeyError:
     raise ValueError("Database %s not found." % rel_db_name)
   logging.info("Using database implementation %s", rel_db_name)
-  REL_DB = db.DatabaseValidationWrapper(cls())
+  rel_db = cls()
+  if config.CONFIG["Database.profiling_enabled"]:
+    logging.info("Database call profiling is enabled.")
+    rel_db = db_profiling.ProfilingDatabase(
+        rel_db,
+        slow_call_threshold=config.CONFIG[
+            "Database.profiling_slow_call_threshold"
+        ],
+        max_stored_slow_calls=config.CONFIG[
+            "Database.profiling_max_stored_slow_calls"
+        ],
+    )
+  REL_DB = db.DatabaseValidationWrapper(rel_db)
 
   # Initialize the blobstore. This has to be done after the database has been
   # already initialized as it might be possible that users want to use the data-
@@ -95,3 +108,9 @@ def InitializeDataStore():
   except KeyError:
     raise ValueError("No blob store %s found." % blobstore_name)
   BLOBS = blob_store.BlobStoreValidationWrapper(cls())
+
+  # Blobs are mostly written by the frontends, while the workers wait for them.
+  if config.CONFIG["Blobstore.arrival_notifications"]:
+    blob_store.BLOB_ARRIVALS.SetChannel(
+        REL_DB.WriteBlobArrivalSignal, REL_DB.ReadBlobArrivalGenerations
+    )
@@ -471,6 +471,16 @@ class AtLeastOneDuplicatedSignedCommandError(Error):
     )
 
 
+class InvalidContinuationTokenError(Error):
+  """Raised when a continuation token passed to a DB call is malformed."""
+
+  def __init__(self, token, cause=None):
+    super().__init__(token, cause=cause)
+
+    self.token = token
+    self.message = "Invalid continuation token: %r" % (token,)
+
+
 class StringTooLongError(ValueError):
   """Validation error raised if a string is too long."""
 
@@ -533,6 +543,16 @@ class SearchClientsResult(NamedTuple):
   """Estimated number of remaining results."""
 
 
+class FlowResultsPage(NamedTuple):
+  """A page of flow or hunt results read using keyset pagination."""
+
+  results: Sequence[flows_pb2.FlowResult]
+  """Results sorted by timestamp in ascending order."""
+
+  continuation_token: Optional[bytes]
+  """Opaque token to read the next page with, None if there are no more."""
+
+
 class ClientPath(object):
   """An immutable class representing certain path on a given client.
 
@@ -911,6 +931,28 @@ class Database(metaclass=abc.ABCMeta):
     except KeyError:
       raise UnknownClientError(client_id)
 
+  def MultiReadClientFullInfoFromReplica(
+      self,
+      client_ids: Collection[str],
+      min_last_ping: Optional[rdfvalue.RDFDatetime] = None,
+  ) -> Mapping[str, objects_pb2.ClientFullInfo]:
+    """Reads full client information, possibly from a read replica.
+
+    Unlike `MultiReadClientFullInfo`, the result may not reflect the most
+    recent writes. Only use it for reads that can tolerate that, e.g. listing
+    clients in the UI.
+
+    Args:
+      client_ids: a collection of GRR client ids, e.g. ["C.ea3b2b71840d6fa7",
+        "C.ea3b2b71840d6fa8"]
+      min_last_ping: If not None, only the clients with last ping time bigger
+        than min_last_ping will be returned.
+
+    Returns:
+      A map from client ids to `ClientFullInfo` instance.
+    """
+    return self.MultiReadClientFullInfo(client_ids, min_last_ping=min_last_ping)
+
   def ReadAllClientIDs(
       self,
       min_last_ping=None,
@@ -1163,6 +1205,32 @@ class Database(metaclass=abc.ABCMeta):
         ids.
     """
 
+  @abc.abstractmethod
+  def SearchClientsForKeywords(
+      self,
+      keywords: Collection[str],
+      start_time: Optional[rdfvalue.RDFDatetime] = None,
+      offset: int = 0,
+      count: Optional[int] = None,
+  ) -> Sequence[str]:
+    """Lists the clients associated with all of the given keywords.
+
+    Unlike `ListClientsForKeywords`, the intersection of the keywords, the
+    ordering and the pagination are done by the database, so only the ids of
+    the requested page of clients are returned.
+
+    Args:
+      keywords: An iterable container of keyword strings to look for.
+      start_time: If set, should be an rdfvalue.RDFDatime and the function will
+        only consider keywords associated after this time.
+      offset: The number of matching clients to skip.
+      count: The maximum number of client ids to return. If not set, all
+        matching clients (starting at `offset`) are returned.
+
+    Returns:
+      A sorted list of ids of the clients associated with every keyword.
+    """
+
   @abc.abstractmethod
   def RemoveClientKeyword(
       self,
@@ -1294,6 +1362,17 @@ class Database(metaclass=abc.ABCMeta):
   def RemoveExpiredForemanRules(self) -> None:
     """Removes all expired foreman rules from the database."""
 
+  @abc.abstractmethod
+  def ReadForemanRulesGeneration(self) -> int:
+    """Reads the generation number of the stored foreman rules.
+
+    The generation changes every time foreman rules are written or removed,
+    so callers can cache the rules and only re-read them when it changes.
+
+    Returns:
+      An integer identifying the current state of the foreman rules.
+    """
+
   @abc.abstractmethod
   def WriteGRRUser(
       self,
@@ -1595,6 +1674,38 @@ class Database(metaclass=abc.ABCMeta):
 
     return histories[components]
 
+  def ReadPathInfosHistoriesFromReplica(
+      self,
+      client_id: str,
+      path_type: objects_pb2.PathInfo.PathType,
+      components_list: Iterable[Sequence[str]],
+      cutoff: Optional[rdfvalue.RDFDatetime] = None,
+  ) -> dict[tuple[str, ...], Sequence[objects_pb2.PathInfo]]:
+    """Reads hash and stat entry histories, possibly from a read replica.
+
+    Unlike `ReadPathInfosHistories`, the result may not reflect the most
+    recent writes. Only use it for reads that can tolerate that, e.g. showing
+    file versions in the UI.
+
+    Args:
+      client_id: An identifier string for a client.
+      path_type: A type of a path to retrieve path history information for.
+      components_list: An iterable of tuples of path components corresponding to
+        paths to retrieve path information for.
+      cutoff: An optional timestamp cutoff up to which the history entries are
+        collected.
+
+    Returns:
+      A dictionary mapping path components to lists of PathInfo
+      ordered by timestamp in ascending order.
+    """
+    return self.ReadPathInfosHistories(
+        client_id=client_id,
+        path_type=path_type,
+        components_list=components_list,
+        cutoff=cutoff,
+    )
+
   @abc.abstractmethod
   def ReadLatestPathInfosWithHashBlobReferences(
       self,
@@ -1724,6 +1835,36 @@ class Database(metaclass=abc.ABCMeta):
       entry: An `APIAuditEntry` instance.
     """
 
+  @abc.abstractmethod
+  def WriteSlowDatabaseCall(
+      self,
+      slow_call: objects_pb2.SlowDatabaseCall,
+      max_stored_calls: int,
+  ) -> None:
+    """Writes a slow database call sample to the database.
+
+    Samples written by all server processes are stored together. Only the
+    `max_stored_calls` most recently written samples are kept, older ones are
+    deleted.
+
+    Args:
+      slow_call: A `SlowDatabaseCall` instance.
+      max_stored_calls: Maximum number of samples to keep.
+    """
+
+  @abc.abstractmethod
+  def ReadSlowDatabaseCalls(
+      self, count: int
+  ) -> list[objects_pb2.SlowDatabaseCall]:
+    """Reads the most recently written slow database call samples.
+
+    Args:
+      count: Maximum number of samples to read.
+
+    Returns:
+      List of `SlowDatabaseCall` instances, most recently written first.
+    """
+
   @abc.abstractmethod
   def WriteMessageHandlerRequests(
       self, requests: Iterable[objects_pb2.MessageHandlerRequest]
@@ -2015,6 +2156,28 @@ class Database(metaclass=abc.ABCMeta):
       None will be used as a value instead of a list.
     """
 
+  @abc.abstractmethod
+  def WriteBlobArrivalSignal(self, shards: Collection[int]) -> None:
+    """Signals waiters in all processes that new blobs have been written.
+
+    Blobs are usually written by the frontends, while flows waiting for them
+    run on the workers. Waiters use `ReadBlobArrivalGenerations` to find out
+    that they should check the blob store again.
+
+    Args:
+      shards: Arrival signal shards (see `blob_store.BlobArrivalShard`) of the
+        written blobs.
+    """
+
+  @abc.abstractmethod
+  def ReadBlobArrivalGenerations(self) -> Mapping[int, int]:
+    """Reads numbers that change whenever blob arrivals are signalled.
+
+    Returns:
+      A mapping from arrival signal shards to their generation numbers. Shards
+      that were never signalled may be missing.
+    """
+
   # If we send a message unsuccessfully to a client five times, we just give up
   # and remove the message to avoid endless repetition of some broken action.
   CLIENT_MESSAGES_TTL = 5
@@ -2309,6 +2472,46 @@ class Database(metaclass=abc.ABCMeta):
       sorted list of responses for the request).
     """
 
+  @abc.abstractmethod
+  def ReadFlowRequestsReadyForProcessing(
+      self,
+      client_id: str,
+      flow_id: str,
+      next_needed_request: int,
+  ) -> dict[
+      int,
+      tuple[
+          flows_pb2.FlowRequest,
+          Sequence[
+              Union[
+                  flows_pb2.FlowResponse,
+                  flows_pb2.FlowStatus,
+                  flows_pb2.FlowIterator,
+              ],
+          ],
+      ],
+  ]:
+    """Reads only the requests of a flow that the worker can process now.
+
+    Unlike `ReadFlowRequests`, this method does not load requests (and their
+    responses) that are still waiting for the client. The result contains:
+
+      * The contiguous run of requests that need processing, starting at
+        `next_needed_request`, with all of their responses.
+      * Every incremental request (i.e. one with a `callback_state`) with an id
+        of at least `next_needed_request`, with only those responses that have
+        an id of at least the request's `next_response_id`.
+
+    Args:
+      client_id: The client id on which this flow is running.
+      flow_id: The id of the flow to read requests for.
+      next_needed_request: The id of the next request the flow has to process.
+
+    Returns:
+      A dict mapping flow request id to tuples (request,
+      sorted list of responses for the request).
+    """
+
   @abc.abstractmethod
   def WriteFlowProcessingRequests(
       self,
@@ -2413,6 +2616,45 @@ class Database(metaclass=abc.ABCMeta):
       A list of FlowResult values sorted by timestamp in ascending order.
     """
 
+  @abc.abstractmethod
+  def ReadFlowResultsPage(
+      self,
+      client_id: str,
+      flow_id: str,
+      count: int,
+      continuation_token: Optional[bytes] = None,
+      with_tag: Optional[str] = None,
+      with_type: Optional[str] = None,
+      with_proto_type_url: Optional[str] = None,
+      with_substring: Optional[str] = None,
+  ) -> FlowResultsPage:
+    """Reads a page of flow results continuing after a given position.
+
+    Unlike ReadFlowResults, this method does not skip over an offset, so the
+    cost of reading a page does not depend on how deep into the results it is.
+    Query options have the same meaning as in ReadFlowResults and must not
+    change between pages.
+
+    Args:
+      client_id: The client id on which this flow is running.
+      flow_id: The id of the flow to read results for.
+      count: Maximum number of results to read.
+      continuation_token: (Optional) Token returned with the previous page. If
+        not specified, the first page is read.
+      with_tag: (Optional) Only results having specified tag will be returned.
+      with_type: (Optional) Only results of a specified type will be returned.
+      with_proto_type_url: (Optional) Only results of a specified proto type url
+        will be returned.
+      with_substring: (Optional) Only results having the specified string as a
+        substring in their serialized form will be returned.
+
+    Returns:
+      A FlowResultsPage with the results and the token for the next page.
+
+    Raises:
+      InvalidContinuationTokenError: if the continuation token is malformed.
+    """
+
   @abc.abstractmethod
   def CountFlowResults(
       self,
@@ -3108,6 +3350,46 @@ class Database(metaclass=abc.ABCMeta):
       A list of FlowResult values sorted by timestamp in ascending order.
     """
 
+  @abc.abstractmethod
+  def ReadHuntResultsPage(
+      self,
+      hunt_id: str,
+      count: int,
+      continuation_token: Optional[bytes] = None,
+      with_tag: Optional[str] = None,
+      with_type: Optional[str] = None,
+      with_proto_type_url: Optional[str] = None,
+      with_substring: Optional[str] = None,
+      with_timestamp: Optional[rdfvalue.RDFDatetime] = None,
+  ) -> FlowResultsPage:
+    """Reads a page of hunt results continuing after a given position.
+
+    Unlike ReadHuntResults, this method does not skip over an offset, so the
+    cost of reading a page does not depend on how deep into the results it is.
+    Query options have the same meaning as in ReadHuntResults and must not
+    change between pages.
+
+    Args:
+      hunt_id: The id of the hunt to read results for.
+      count: Maximum number of results to read.
+      continuation_token: (Optional) Token returned with the previous page. If
+        not specified, the first page is read.
+      with_tag: (Optional) Only results having specified tag will be returned.
+      with_type: (Optional) Only results of a specified type will be returned.
+      with_proto_type_url: (Optional) Only results of a specified proto type url
+        will be returned.
+      with_substring: (Optional) Only results having the specified string as a
+        substring in their serialized form will be returned.
+      with_timestamp: (Optional) Only results with a given timestamp will be
+        returned.
+
+    Returns:
+      A FlowResultsPage with the results and the token for the next page.
+
+    Raises:
+      InvalidContinuationTokenError: if the continuation token is malformed.
+    """
+
   @abc.abstractmethod
   def CountHuntResults(
       self,
@@ -3649,6 +3931,16 @@ class DatabaseValidationWrapper(Database):
         client_ids, min_last_ping=min_last_ping
     )
 
+  def MultiReadClientFullInfoFromReplica(
+      self,
+      client_ids: Collection[str],
+      min_last_ping: Optional[rdfvalue.RDFDatetime] = None,
+  ) -> Mapping[str, objects_pb2.ClientFullInfo]:
+    _ValidateClientIds(client_ids)
+    return self.delegate.MultiReadClientFullInfoFromReplica(
+        client_ids, min_last_ping=min_last_ping
+    )
+
   def ReadClientLastPings(
       self,
       min_last_ping: Optional[rdfvalue.RDFDatetime] = None,
@@ -3797,6 +4089,31 @@ class DatabaseValidationWrapper(Database):
       precondition.AssertIterableType(value, str)
     return result
 
+  def SearchClientsForKeywords(
+      self,
+      keywords: Collection[str],
+      start_time: Optional[rdfvalue.RDFDatetime] = None,
+      offset: int = 0,
+      count: Optional[int] = None,
+  ) -> Sequence[str]:
+    precondition.AssertIterableType(keywords, str)
+    keywords = set(keywords)
+    precondition.AssertType(offset, int)
+    precondition.AssertOptionalType(count, int)
+
+    if start_time:
+      self._ValidateTimestamp(start_time)
+    if offset < 0:
+      raise ValueError(f"Negative offset: {offset}")
+    if count is not None and count < 0:
+      raise ValueError(f"Negative count: {count}")
+
+    result = self.delegate.SearchClientsForKeywords(
+        keywords, start_time=start_time, offset=offset, count=count
+    )
+    precondition.AssertIterableType(result, str)
+    return result
+
   def RemoveClientKeyword(
       self,
       client_id: str,
@@ -3875,6 +4192,9 @@ class DatabaseValidationWrapper(Database):
   def RemoveExpiredForemanRules(self) -> None:
     return self.delegate.RemoveExpiredForemanRules()
 
+  def ReadForemanRulesGeneration(self) -> int:
+    return self.delegate.ReadForemanRulesGeneration()
+
   def WriteGRRUser(
       self,
       username: str,
@@ -4096,6 +4416,27 @@ class DatabaseValidationWrapper(Database):
         cutoff=cutoff,
     )
 
+  def ReadPathInfosHistoriesFromReplica(
+      self,
+      client_id: str,
+      path_type: objects_pb2.PathInfo.PathType,
+      components_list: Iterable[Sequence[str]],
+      cutoff: Optional[rdfvalue.RDFDatetime] = None,
+  ) -> dict[tuple[str, ...], Sequence[objects_pb2.PathInfo]]:
+    precondition.ValidateClientId(client_id)
+    _ValidateProtoEnumType(path_type, objects_pb2.PathInfo.PathType)
+    precondition.AssertType(components_list, list)
+    for components in components_list:
+      _ValidatePathComponents(components)
+    precondition.AssertOptionalType(cutoff, rdfvalue.RDFDatetime)
+
+    return self.delegate.ReadPathInfosHistoriesFromReplica(
+        client_id=client_id,
+        path_type=path_type,
+        components_list=components_list,
+        cutoff=cutoff,
+    )
+
   def ReadLatestPathInfosWithHashBlobReferences(
       self,
       client_paths: Collection[ClientPath],
@@ -4149,6 +4490,23 @@ class DatabaseValidationWrapper(Database):
     precondition.AssertType(entry, objects_pb2.APIAuditEntry)
     return self.delegate.WriteAPIAuditEntry(entry)
 
+  def WriteSlowDatabaseCall(
+      self,
+      slow_call: objects_pb2.SlowDatabaseCall,
+      max_stored_calls: int,
+  ) -> None:
+    precondition.AssertType(slow_call, objects_pb2.SlowDatabaseCall)
+    precondition.AssertType(max_stored_calls, int)
+    if max_stored_calls < 1:
+      raise ValueError(f"Invalid number of stored calls: {max_stored_calls}")
+    return self.delegate.WriteSlowDatabaseCall(slow_call, max_stored_calls)
+
+  def ReadSlowDatabaseCalls(
+      self, count: int
+  ) -> list[objects_pb2.SlowDatabaseCall]:
+    precondition.AssertType(count, int)
+    return self.delegate.ReadSlowDatabaseCalls(count)
+
   def WriteMessageHandlerRequests(
       self, requests: Iterable[objects_pb2.MessageHandlerRequest]
   ) -> None:
@@ -4308,6 +4666,13 @@ class DatabaseValidationWrapper(Database):
     precondition.AssertIterableType(hashes, rdf_objects.SHA256HashID)
     return self.delegate.ReadHashBlobReferences(hashes)
 
+  def WriteBlobArrivalSignal(self, shards: Collection[int]) -> None:
+    precondition.AssertIterableType(shards, int)
+    return self.delegate.WriteBlobArrivalSignal(shards)
+
+  def ReadBlobArrivalGenerations(self) -> Mapping[int, int]:
+    return self.delegate.ReadBlobArrivalGenerations()
+
   def WriteFlowObject(
       self,
       flow_obj: flows_pb2.Flow,
@@ -4532,6 +4897,31 @@ class DatabaseValidationWrapper(Database):
     precondition.ValidateFlowId(flow_id)
     return self.delegate.ReadFlowRequests(client_id, flow_id)
 
+  def ReadFlowRequestsReadyForProcessing(
+      self,
+      client_id: str,
+      flow_id: str,
+      next_needed_request: int,
+  ) -> dict[
+      int,
+      tuple[
+          flows_pb2.FlowRequest,
+          Sequence[
+              Union[
+                  flows_pb2.FlowResponse,
+                  flows_pb2.FlowStatus,
+                  flows_pb2.FlowIterator,
+              ],
+          ],
+      ],
+  ]:
+    precondition.ValidateClientId(client_id)
+    precondition.ValidateFlowId(flow_id)
+    precondition.AssertType(next_needed_request, int)
+    return self.delegate.ReadFlowRequestsReadyForProcessing(
+        client_id, flow_id, next_needed_request
+    )
+
   def WriteFlowProcessingRequests(
       self,
       requests: Sequence[flows_pb2.FlowProcessingRequest],
@@ -4608,6 +4998,40 @@ class DatabaseValidationWrapper(Database):
         with_substring=with_substring,
     )
 
+  def ReadFlowResultsPage(
+      self,
+      client_id: str,
+      flow_id: str,
+      count: int,
+      continuation_token: Optional[bytes] = None,
+      with_tag: Optional[str] = None,
+      with_type: Optional[str] = None,
+      with_proto_type_url: Optional[str] = None,
+      with_substring: Optional[str] = None,
+  ) -> FlowResultsPage:
+    precondition.ValidateClientId(client_id)
+    precondition.ValidateFlowId(flow_id)
+    precondition.AssertOptionalType(continuation_token, bytes)
+    precondition.AssertOptionalType(with_tag, str)
+    precondition.AssertOptionalType(with_type, str)
+    precondition.AssertOptionalType(with_proto_type_url, str)
+    if with_type and with_proto_type_url:
+      raise ValueError(
+          "Only one of `with_type` and `with_proto_type_url` can be set."
+      )
+    precondition.AssertOptionalType(with_substring, str)
+
+    return self.delegate.ReadFlowResultsPage(
+        client_id,
+        flow_id,
+        count,
+        continuation_token=continuation_token,
+        with_tag=with_tag,
+        with_type=with_type,
+        with_proto_type_url=with_proto_type_url,
+        with_substring=with_substring,
+    )
+
   def CountFlowResults(
       self,
       client_id,
@@ -5117,6 +5541,39 @@ class DatabaseValidationWrapper(Database):
         with_timestamp=with_timestamp,
     )
 
+  def ReadHuntResultsPage(
+      self,
+      hunt_id: str,
+      count: int,
+      continuation_token: Optional[bytes] = None,
+      with_tag: Optional[str] = None,
+      with_type: Optional[str] = None,
+      with_proto_type_url: Optional[str] = None,
+      with_substring: Optional[str] = None,
+      with_timestamp: Optional[rdfvalue.RDFDatetime] = None,
+  ) -> FlowResultsPage:
+    _ValidateHuntId(hunt_id)
+    precondition.AssertOptionalType(continuation_token, bytes)
+    precondition.AssertOptionalType(with_tag, str)
+    precondition.AssertOptionalType(with_type, str)
+    precondition.AssertOptionalType(with_proto_type_url, str)
+    if with_type and with_proto_type_url:
+      raise ValueError(
+          "Only one of `with_type` and `with_proto_type_url` can be set."
+      )
+    precondition.AssertOptionalType(with_substring, str)
+    precondition.AssertOptionalType(with_timestamp, rdfvalue.RDFDatetime)
+    return self.delegate.ReadHuntResultsPage(
+        hunt_id,
+        count,
+        continuation_token=continuation_token,
+        with_tag=with_tag,
+        with_type=with_type,
+        with_proto_type_url=with_proto_type_url,
+        with_substring=with_substring,
+        with_timestamp=with_timestamp,
+    )
+
   def CountHuntResults(
       self,
       hunt_id: str,
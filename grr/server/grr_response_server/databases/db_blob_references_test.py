@@ -106,5 +106,23 @@ class DatabaseTestBlobReferencesMixin(object):
     read_hash_id_blob_refs = self.db.ReadHashBlobReferences(hash_ids)
     self.assertEqual(read_hash_id_blob_refs, hash_id_blob_refs)
 
+  def testBlobArrivalGenerationsChangeWhenSignalled(self):
+    generations = self.db.ReadBlobArrivalGenerations()
+    self.assertEqual(self.db.ReadBlobArrivalGenerations(), generations)
+
+    self.db.WriteBlobArrivalSignal([1, 3])
+
+    new_generations = self.db.ReadBlobArrivalGenerations()
+    self.assertNotEqual(new_generations.get(1), generations.get(1))
+    self.assertNotEqual(new_generations.get(3), generations.get(3))
+    self.assertEqual(new_generations.get(2), generations.get(2))
+
+  def testWriteBlobArrivalSignalWithoutShardsDoesNothing(self):
+    generations = self.db.ReadBlobArrivalGenerations()
+
+    self.db.WriteBlobArrivalSignal([])
+
+    self.assertEqual(self.db.ReadBlobArrivalGenerations(), generations)
+
 
 # This file is a test library and thus does not require a __main__ block.
@@ -916,6 +916,77 @@ class DatabaseTestClientsMixin(object):
     self.assertEqual(res["hostname1"], [])
     self.assertEqual(res["hostname2"], [client_id])
 
+  def testSearchClientsForKeywordsIntersectsKeywords(self):
+    client_id_1 = db_test_utils.InitializeClient(self.db)
+    client_id_2 = db_test_utils.InitializeClient(self.db)
+    client_id_3 = db_test_utils.InitializeClient(self.db)
+
+    self.db.AddClientKeywords(client_id_1, [".", "foo", "bar"])
+    self.db.AddClientKeywords(client_id_2, [".", "foo"])
+    self.db.AddClientKeywords(client_id_3, [".", "bar"])
+
+    self.assertEqual(
+        self.db.SearchClientsForKeywords(["."]),
+        sorted([client_id_1, client_id_2, client_id_3]),
+    )
+    self.assertEqual(
+        self.db.SearchClientsForKeywords([".", "foo"]),
+        sorted([client_id_1, client_id_2]),
+    )
+    self.assertEqual(
+        self.db.SearchClientsForKeywords(["foo", "bar"]), [client_id_1]
+    )
+    self.assertEmpty(self.db.SearchClientsForKeywords(["foo", "missing"]))
+    self.assertEmpty(self.db.SearchClientsForKeywords([]))
+
+  def testSearchClientsForKeywordsTimeRanges(self):
+    client_id_1 = db_test_utils.InitializeClient(self.db)
+    client_id_2 = db_test_utils.InitializeClient(self.db)
+
+    self.db.AddClientKeywords(client_id_1, [".", "foo"])
+    change_time = rdfvalue.RDFDatetime.Now()
+    self.db.AddClientKeywords(client_id_2, [".", "foo"])
+    self.db.AddClientKeywords(client_id_1, ["bar"])
+
+    self.assertEqual(
+        self.db.SearchClientsForKeywords(["."], start_time=change_time),
+        [client_id_2],
+    )
+    # Every keyword has to be associated after the start time.
+    self.assertEmpty(
+        self.db.SearchClientsForKeywords(
+            ["foo", "bar"], start_time=change_time
+        )
+    )
+
+  def testSearchClientsForKeywordsPagination(self):
+    client_ids = sorted(
+        db_test_utils.InitializeClient(self.db) for _ in range(10)
+    )
+    self.db.MultiAddClientKeywords(client_ids, [".", "foo"])
+
+    self.assertEqual(
+        self.db.SearchClientsForKeywords([".", "foo"], offset=3),
+        client_ids[3:],
+    )
+    self.assertEqual(
+        self.db.SearchClientsForKeywords([".", "foo"], count=4),
+        client_ids[:4],
+    )
+    self.assertEqual(
+        self.db.SearchClientsForKeywords([".", "foo"], offset=8, count=4),
+        client_ids[8:],
+    )
+    self.assertEmpty(
+        self.db.SearchClientsForKeywords([".", "foo"], offset=10, count=4)
+    )
+
+  def testSearchClientsForKeywordsRaisesOnNegativeOffsetOrCount(self):
+    with self.assertRaises(ValueError):
+      self.db.SearchClientsForKeywords(["."], offset=-1)
+    with self.assertRaises(ValueError):
+      self.db.SearchClientsForKeywords(["."], count=-1)
+
   def testRemoveClientKeyword(self):
     d = self.db
     client_id = db_test_utils.InitializeClient(self.db)
@@ -1563,6 +1634,16 @@ class DatabaseTestClientsMixin(object):
     full_info = d.MultiReadClientFullInfo([client_id])[client_id]
     self.assertEqual(full_info.last_snapshot.client_id, client_id)
 
+  def testMultiReadClientsFullInfoFromReplica(self):
+    client_id = "C.fc413187fefa1dcf"
+    self.db.WriteClientMetadata(client_id)
+
+    full_infos = self.db.MultiReadClientFullInfoFromReplica(
+        [client_id, "C.00413187fefa1dcf"]
+    )
+    self.assertEqual(list(full_infos.keys()), [client_id])
+    self.assertEqual(full_infos[client_id].last_snapshot.client_id, client_id)
+
   def testReadClientMetadataRaisesWhenClientIsMissing(self):
     with self.assertRaises(db.UnknownClientError):
       self.db.ReadClientMetadata("C.00413187fefa1dcf")
@@ -218,5 +218,59 @@ class DatabaseTestEventsMixin(object):
     self.assertLen(entries, 1)
     self.assertBetween(entries[0].timestamp, before, after)
 
+  def testReadSlowDatabaseCallsEmpty(self):
+    self.assertEmpty(self.db.ReadSlowDatabaseCalls(10))
+
+  def testWriteAndReadSlowDatabaseCall(self):
+    slow_call = objects_pb2.SlowDatabaseCall(
+        method="ReadThings",
+        caller_kind="flow",
+        caller_name="FileFinder",
+        hunt_id="ABCDEF",
+        timestamp=_Date("2019-02-02").AsMicrosecondsSinceEpoch(),
+        duration=1.5,
+        rows=3,
+        payload_bytes=42,
+        queries=["SELECT thing FROM things"],
+        process="foo:1234",
+    )
+    self.db.WriteSlowDatabaseCall(slow_call, max_stored_calls=10)
+
+    self.assertEqual(self.db.ReadSlowDatabaseCalls(10), [slow_call])
+
+  def testReadSlowDatabaseCallsMostRecentFirst(self):
+    for rows in range(3):
+      self.db.WriteSlowDatabaseCall(
+          objects_pb2.SlowDatabaseCall(method="Foo", rows=rows),
+          max_stored_calls=10,
+      )
+
+    slow_calls = self.db.ReadSlowDatabaseCalls(10)
+    self.assertEqual([call.rows for call in slow_calls], [2, 1, 0])
+
+    slow_calls = self.db.ReadSlowDatabaseCalls(2)
+    self.assertEqual([call.rows for call in slow_calls], [2, 1])
+
+  def testWriteSlowDatabaseCallKeepsMostRecentCalls(self):
+    for rows in range(5):
+      self.db.WriteSlowDatabaseCall(
+          objects_pb2.SlowDatabaseCall(method="Foo", rows=rows),
+          max_stored_calls=2,
+      )
+
+    slow_calls = self.db.ReadSlowDatabaseCalls(10)
+    self.assertEqual([call.rows for call in slow_calls], [4, 3])
+
+  def testWriteSlowDatabaseCallWithCommitTimestamp(self):
+    before = self.db.Now().AsMicrosecondsSinceEpoch()
+    self.db.WriteSlowDatabaseCall(
+        objects_pb2.SlowDatabaseCall(method="Foo"), max_stored_calls=10
+    )
+    after = self.db.Now().AsMicrosecondsSinceEpoch()
+
+    slow_calls = self.db.ReadSlowDatabaseCalls(10)
+    self.assertLen(slow_calls, 1)
+    self.assertBetween(slow_calls[0].timestamp, before, after)
+
 
 # This file is a test library and thus does not require a __main__ block.
@@ -1944,6 +1944,132 @@ class DatabaseTestFlowMixin(object):
     self.assertEqual(responses[0].flow_id, flow_id_1)
     self.assertEqual(responses[0].response_id, 2)
 
+  def testReadFlowRequestsReadyForProcessing_Empty(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+
+    flow_requests = self.db.ReadFlowRequestsReadyForProcessing(
+        client_id, flow_id, next_needed_request=1
+    )
+    self.assertEmpty(flow_requests)
+
+  def testReadFlowRequestsReadyForProcessing_ReadsContiguousCompletedRun(
+      self,
+  ):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(
+        self.db, client_id, next_request_to_process=2
+    )
+
+    # Request 4 is still waiting for the client, so requests after it can not
+    # be processed yet, even if they are complete.
+    requests = []
+    for request_id in [1, 2, 3, 4, 5]:
+      requests.append(
+          flows_pb2.FlowRequest(
+              client_id=client_id,
+              flow_id=flow_id,
+              request_id=request_id,
+              needs_processing=request_id != 4,
+          )
+      )
+    self.db.WriteFlowRequests(requests)
+
+    responses = []
+    for request_id in [1, 2, 3, 4, 5]:
+      for response_id in [2, 1]:
+        responses.append(
+            flows_pb2.FlowResponse(
+                client_id=client_id,
+                flow_id=flow_id,
+                request_id=request_id,
+                response_id=response_id,
+            )
+        )
+    self.db.WriteFlowResponses(responses)
+
+    flow_requests = self.db.ReadFlowRequestsReadyForProcessing(
+        client_id, flow_id, next_needed_request=2
+    )
+    self.assertCountEqual(flow_requests, [2, 3])
+
+    for request_id in [2, 3]:
+      request, request_responses = flow_requests[request_id]
+      self.assertEqual(request.request_id, request_id)
+      self.assertTrue(request.needs_processing)
+      self.assertEqual([r.response_id for r in request_responses], [1, 2])
+
+  def testReadFlowRequestsReadyForProcessing_ReadsNewIncrementalResponses(
+      self,
+  ):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(
+        self.db, client_id, next_request_to_process=1
+    )
+
+    self.db.WriteFlowRequests([
+        flows_pb2.FlowRequest(
+            client_id=client_id,
+            flow_id=flow_id,
+            request_id=1,
+        ),
+        flows_pb2.FlowRequest(
+            client_id=client_id,
+            flow_id=flow_id,
+            request_id=2,
+            next_state="Next",
+            callback_state="Callback",
+            next_response_id=3,
+        ),
+    ])
+
+    responses = []
+    for request_id in [1, 2]:
+      for response_id in [1, 2, 3, 4]:
+        responses.append(
+            flows_pb2.FlowResponse(
+                client_id=client_id,
+                flow_id=flow_id,
+                request_id=request_id,
+                response_id=response_id,
+            )
+        )
+    self.db.WriteFlowResponses(responses)
+
+    flow_requests = self.db.ReadFlowRequestsReadyForProcessing(
+        client_id, flow_id, next_needed_request=1
+    )
+    self.assertCountEqual(flow_requests, [2])
+
+    request, request_responses = flow_requests[2]
+    self.assertEqual(request.callback_state, "Callback")
+    self.assertEqual(request.next_response_id, 3)
+    self.assertEqual([r.response_id for r in request_responses], [3, 4])
+
+  def testReadFlowRequestsReadyForProcessing_IgnoresOlderRequests(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(
+        self.db, client_id, next_request_to_process=3
+    )
+
+    requests = []
+    for request_id in [1, 2]:
+      requests.append(
+          flows_pb2.FlowRequest(
+              client_id=client_id,
+              flow_id=flow_id,
+              request_id=request_id,
+              needs_processing=True,
+              callback_state="Callback",
+          )
+      )
+    self.db.WriteFlowRequests(requests)
+
+    flow_requests = self.db.ReadFlowRequestsReadyForProcessing(
+        client_id, flow_id, next_needed_request=3
+    )
+    self.assertEmpty(flow_requests)
+
   def testUpdateIncrementalFlowRequests(self):
     client_id = db_test_utils.InitializeClient(self.db)
     flow_id = db_test_utils.InitializeFlow(self.db, client_id)
@@ -2451,6 +2577,83 @@ class DatabaseTestFlowMixin(object):
             % (i, l, result_payloads, expected_payloads),
         )
 
+  def testReadFlowResultsPageReturnsAllResultsInOrder(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+
+    sample_results = self._WriteFlowResults(
+        self._SampleResults(client_id, flow_id), multiple_timestamps=True
+    )
+
+    for page_size in range(1, 12):
+      results = []
+      continuation_token = None
+      while True:
+        page = self.db.ReadFlowResultsPage(
+            client_id,
+            flow_id,
+            page_size,
+            continuation_token=continuation_token,
+        )
+        self.assertLessEqual(len(page.results), page_size)
+        results.extend(page.results)
+        if page.continuation_token is None:
+          break
+        continuation_token = page.continuation_token
+
+      self.assertEqual(
+          [r.payload for r in results], [r.payload for r in sample_results]
+      )
+
+  def testReadFlowResultsPageHandlesResultsWithSameTimestamp(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+
+    sample_results = self._WriteFlowResults(
+        self._SampleResults(client_id, flow_id), multiple_timestamps=False
+    )
+
+    results = []
+    continuation_token = None
+    while True:
+      page = self.db.ReadFlowResultsPage(
+          client_id, flow_id, 3, continuation_token=continuation_token
+      )
+      results.extend(page.results)
+      if page.continuation_token is None:
+        break
+      continuation_token = page.continuation_token
+
+    self.assertCountEqual(
+        [r.payload.SerializeToString() for r in results],
+        [r.payload.SerializeToString() for r in sample_results],
+    )
+
+  def testReadFlowResultsPageAppliesWithTagFilter(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+
+    sample_results = self._WriteFlowResults(
+        self._SampleResults(client_id, flow_id), multiple_timestamps=True
+    )
+
+    page = self.db.ReadFlowResultsPage(
+        client_id, flow_id, 100, with_tag="tag_1"
+    )
+    self.assertEqual(
+        [r.payload for r in page.results], [sample_results[1].payload]
+    )
+    self.assertIsNone(page.continuation_token)
+
+  def testReadFlowResultsPageRaisesOnInvalidContinuationToken(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(self.db, client_id)
+
+    with self.assertRaises(db.InvalidContinuationTokenError):
+      self.db.ReadFlowResultsPage(
+          client_id, flow_id, 10, continuation_token=b"foo"
+      )
+
   def testReadFlowResultsCorrectlyAppliesWithTagFilter(self):
     client_id = db_test_utils.InitializeClient(self.db)
     flow_id = db_test_utils.InitializeFlow(self.db, client_id)
@@ -4262,6 +4465,28 @@ class DatabaseLargeTestFlowMixin(object):
         [r for _, r in sorted(fetched_responses.items())], responses
     )
 
+  def testReadFlowRequestsReadyForProcessingSkips11000PendingRequests(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+    flow_id = db_test_utils.InitializeFlow(
+        self.db, client_id, next_request_to_process=1
+    )
+
+    requests = [
+        flows_pb2.FlowRequest(
+            client_id=client_id,
+            flow_id=flow_id,
+            request_id=i,
+            needs_processing=i == 1,
+        )
+        for i in range(1, 11002)
+    ]
+    self.db.WriteFlowRequests(requests)
+
+    flow_requests = self.db.ReadFlowRequestsReadyForProcessing(
+        client_id, flow_id, next_needed_request=1
+    )
+    self.assertCountEqual(flow_requests, [1])
+
   def testDeleteAllFlowRequestsAndResponsesHandles11000Responses(self):
     request, _ = self._WriteResponses(11000)
 
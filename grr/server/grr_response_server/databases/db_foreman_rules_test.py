@@ -99,5 +99,42 @@ class DatabaseTestForemanRulesMixin(object):
 
     self.assertLen(self.db.ReadAllForemanRules(), 2)
 
+  def testForemanRulesGenerationChangesOnWrite(self):
+    hunt_id = db_test_utils.InitializeHunt(self.db)
+    generation = self.db.ReadForemanRulesGeneration()
+
+    self.db.WriteForemanRule(self._GetTestRule(hunt_id))
+
+    self.assertNotEqual(self.db.ReadForemanRulesGeneration(), generation)
+
+  def testForemanRulesGenerationChangesOnRemove(self):
+    hunt_id = db_test_utils.InitializeHunt(self.db)
+    self.db.WriteForemanRule(self._GetTestRule(hunt_id))
+    generation = self.db.ReadForemanRulesGeneration()
+
+    self.db.RemoveForemanRule(hunt_id)
+
+    self.assertNotEqual(self.db.ReadForemanRulesGeneration(), generation)
+
+  def testForemanRulesGenerationChangesOnExpire(self):
+    hunt_id = db_test_utils.InitializeHunt(self.db)
+    expires = self.db.Now() - rdfvalue.Duration("1s")
+    self.db.WriteForemanRule(self._GetTestRule(hunt_id, expires=expires))
+    generation = self.db.ReadForemanRulesGeneration()
+
+    self.db.RemoveExpiredForemanRules()
+
+    self.assertNotEqual(self.db.ReadForemanRulesGeneration(), generation)
+
+  def testForemanRulesGenerationIsStableWithoutChanges(self):
+    hunt_id = db_test_utils.InitializeHunt(self.db)
+    self.db.WriteForemanRule(self._GetTestRule(hunt_id))
+    generation = self.db.ReadForemanRulesGeneration()
+
+    self.db.ReadAllForemanRules()
+    self.db.RemoveExpiredForemanRules()
+
+    self.assertEqual(self.db.ReadForemanRulesGeneration(), generation)
+
 
 # This file is a test library and thus does not require a __main__ block.
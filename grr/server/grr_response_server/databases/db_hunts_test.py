@@ -1360,6 +1360,41 @@ class DatabaseTestHuntMixin(object):
             % (i, l, result_payloads, expected_payloads),
         )
 
+  def testReadHuntResultsPageReturnsAllResultsInOrder(self):
+    hunt_id = db_test_utils.InitializeHunt(self.db)
+
+    sample_results = []
+    for _ in range(10):
+      client_id, flow_id = self._SetupHuntClientAndFlow(hunt_id=hunt_id)
+      results = self._SampleSingleTypeHuntResults(
+          client_id=client_id, flow_id=flow_id, hunt_id=hunt_id, count=1
+      )
+      sample_results.extend(results)
+      self._WriteHuntResults(results)
+
+    for page_size in range(1, 12):
+      results = []
+      continuation_token = None
+      while True:
+        page = self.db.ReadHuntResultsPage(
+            hunt_id, page_size, continuation_token=continuation_token
+        )
+        self.assertLessEqual(len(page.results), page_size)
+        results.extend(page.results)
+        if page.continuation_token is None:
+          break
+        continuation_token = page.continuation_token
+
+      self.assertEqual(
+          [r.payload for r in results], [r.payload for r in sample_results]
+      )
+
+  def testReadHuntResultsPageRaisesOnInvalidContinuationToken(self):
+    hunt_id = db_test_utils.InitializeHunt(self.db)
+
+    with self.assertRaises(db.InvalidContinuationTokenError):
+      self.db.ReadHuntResultsPage(hunt_id, 10, continuation_token=b"[1]")
+
   def testReadHuntResultsCorrectlyAppliesWithTagFilter(self):
     hunt_id = db_test_utils.InitializeHunt(self.db)
 
@@ -11,6 +11,7 @@ from grr_response_server.databases import db
 from grr_response_server.databases import db_test_utils
 from grr_response_server.rdfvalues import mig_objects
 from grr_response_server.rdfvalues import objects as rdf_objects
+from grr.test_lib import test_lib
 
 
 class DatabaseTestPathsMixin(object):
@@ -1255,6 +1256,41 @@ class DatabaseTestPathsMixin(object):
     self.assertEqual(results[2].components, ["foo", "bar", "baz"])
     self.assertEqual(results[2].stat_entry.st_size, 1337)
 
+  def testListDescendantPathInfosLatestEntriesWrittenOutOfOrder(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    path_info = objects_pb2.PathInfo(
+        path_type=objects_pb2.PathInfo.PathType.OS,
+        components=["foo", "bar"],
+    )
+
+    newer_timestamp = rdfvalue.RDFDatetime.FromSecondsSinceEpoch(2)
+    newer_sha256 = hashlib.sha256(b"newer").digest()
+    path_info.stat_entry.st_size = 2
+    path_info.hash_entry.sha256 = newer_sha256
+    with test_lib.FakeTime(newer_timestamp):
+      self.db.WritePathInfos(client_id, [path_info])
+
+    older_timestamp = rdfvalue.RDFDatetime.FromSecondsSinceEpoch(1)
+    path_info.stat_entry.st_size = 1
+    path_info.hash_entry.sha256 = hashlib.sha256(b"older").digest()
+    with test_lib.FakeTime(older_timestamp):
+      self.db.WritePathInfos(client_id, [path_info])
+
+    results = self.db.ListDescendantPathInfos(
+        client_id=client_id,
+        path_type=objects_pb2.PathInfo.PathType.OS,
+        components=("foo",),
+    )
+
+    self.assertLen(results, 1)
+    self.assertEqual(results[0].stat_entry.st_size, 2)
+    self.assertEqual(results[0].hash_entry.sha256, newer_sha256)
+    self.assertEqual(
+        results[0].last_stat_entry_timestamp,
+        newer_timestamp.AsMicrosecondsSinceEpoch(),
+    )
+
   def testListDescendantPathInfosTimestampMultiple(self):
     client_id = db_test_utils.InitializeClient(self.db)
 
@@ -2004,6 +2040,22 @@ class DatabaseTestPathsMixin(object):
     self.assertEqual(pi[0].hash_entry.sha256, b"quux")
     self.assertBetween(pi[0].timestamp, then, now)
 
+  def testReadPathInfosHistoriesFromReplica(self):
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    path_info = objects_pb2.PathInfo(
+        path_type=objects_pb2.PathInfo.PathType.OS, components=["foo"]
+    )
+    path_info.stat_entry.st_size = 42
+    self.db.WritePathInfos(client_id, [path_info])
+
+    path_infos = self.db.ReadPathInfosHistoriesFromReplica(
+        client_id, objects_pb2.PathInfo.PathType.OS, [("foo",), ("bar",)]
+    )
+    self.assertLen(path_infos[("foo",)], 1)
+    self.assertEqual(path_infos[("foo",)][0].stat_entry.st_size, 42)
+    self.assertEmpty(path_infos[("bar",)])
+
   def testReadPathInfosHistoriesWithTwoFilesWithSingleHistoryItemEach(self):
     client_id = db_test_utils.InitializeClient(self.db)
 
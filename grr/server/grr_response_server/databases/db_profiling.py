@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+"""Opt-in profiling of database calls.
+
+The profiling wrapper measures every call to the wrapped database and tags it
+with the context of the code doing the call (the flow class and hunt id for
+flows processed by the worker, the method name for API calls). Calls slower
+than a configured threshold are written to the wrapped database together with
+the SQL statements they issued. The samples of all server processes are
+stored together, so that they can be inspected through the API of any of them.
+"""
+
+from collections.abc import Iterator, Mapping, Sized
+import contextlib
+import contextvars
+import dataclasses
+import functools
+import logging
+import os
+import socket
+import time
+from typing import Any, Optional
+
+from google.protobuf import message as pb_message
+from grr_response_core.lib import rdfvalue
+from grr_response_core.stats import metrics
+from grr_response_proto import objects_pb2
+
+
+DB_PROFILED_CALL_LATENCY = metrics.Event(
+    "db_profiled_call_latency",
+    fields=[("call", str), ("caller", str)],
+    bins=[0.05 * 1.2**x for x in range(30)],
+)  # 50ms to ~10 secs
+DB_PROFILED_CALL_ROWS = metrics.Counter(
+    "db_profiled_call_rows", fields=[("call", str), ("caller", str)]
+)
+DB_PROFILED_CALL_BYTES = metrics.Counter(
+    "db_profiled_call_bytes", fields=[("call", str), ("caller", str)]
+)
+DB_SLOW_CALLS = metrics.Counter(
+    "db_slow_calls", fields=[("call", str), ("caller", str)]
+)
+
+# Limits on the SQL statements kept for a single call, so that calls issuing
+# huge numbers of queries (or huge queries) do not blow up the stored samples.
+_MAX_QUERIES_PER_CALL = 20
+_MAX_QUERY_LENGTH = 1024
+
+_UNKNOWN_CALLER_LABEL = "unknown"
+
+
+@dataclasses.dataclass(frozen=True)
+class Caller:
+  """Context of the code calling the database.
+
+  Attributes:
+    kind: Kind of the caller, e.g. "flow", "message_handler" or "api".
+    name: Name of the caller, e.g. a flow class or an API method name.
+    hunt_id: Id of the hunt the caller is working on (if any).
+  """
+
+  kind: str
+  name: str
+  hunt_id: Optional[str] = None
+
+  @property
+  def label(self) -> str:
+    """A low-cardinality metric label identifying the caller."""
+    return f"{self.kind}:{self.name}"
+
+
+_caller: contextvars.ContextVar[Optional[Caller]] = contextvars.ContextVar(
+    "db_profiling_caller", default=None
+)
+_queries: contextvars.ContextVar[Optional[list[str]]] = (
+    contextvars.ContextVar("db_profiling_queries", default=None)
+)
+
+
+@contextlib.contextmanager
+def CallerContext(
+    kind: str,
+    name: str,
+    hunt_id: Optional[str] = None,
+) -> Iterator[None]:
+  """Tags database calls done within the context with the given caller.
+
+  Args:
+    kind: Kind of the caller, e.g. "flow" or "api".
+    name: Name of the caller, e.g. a flow class or an API method name.
+    hunt_id: Id of the hunt the caller is working on (if any).
+
+  Yields:
+    Nothing.
+  """
+  token = _caller.set(Caller(kind=kind, name=name, hunt_id=hunt_id or None))
+  try:
+    yield
+  finally:
+    _caller.reset(token)
+
+
+def CurrentCaller() -> Optional[Caller]:
+  """Returns the caller set by the innermost `CallerContext` (if any)."""
+  return _caller.get()
+
+
+def RecordQuery(query: str) -> None:
+  """Records an SQL statement issued on behalf of the profiled call.
+
+  This is a no-op when no profiled call is in progress, so database
+  implementations can call it unconditionally.
+
+  Args:
+    query: An SQL statement about to be executed.
+  """
+  queries = _queries.get()
+  if queries is not None and len(queries) < _MAX_QUERIES_PER_CALL:
+    queries.append(query[:_MAX_QUERY_LENGTH])
+
+
+def _CountRows(result: Any) -> int:
+  """Returns the number of rows (items) in a database call result."""
+  if result is None or isinstance(result, Iterator):
+    return 0
+  if isinstance(result, Sized) and not isinstance(result, (bytes, str)):
+    return len(result)
+  return 1
+
+
+def _PayloadSize(value: Any) -> int:
+  """Returns the approximate size (in bytes) of a database call payload."""
+  if isinstance(value, pb_message.Message):
+    return value.ByteSize()
+  if isinstance(value, (bytes, str)):
+    return len(value)
+  if isinstance(value, Mapping):
+    return sum(_PayloadSize(k) + _PayloadSize(v) for k, v in value.items())
+  if isinstance(value, (list, tuple, set, frozenset)):
+    return sum(_PayloadSize(item) for item in value)
+  return 0
+
+
+class ProfilingDatabase(object):
+  """A database wrapper profiling calls to the wrapped database.
+
+  Only public methods (the `Database` interface) are profiled, calls done by
+  the wrapped database to itself are accounted to the outermost call. Slow
+  calls are written to the wrapped database with `WriteSlowDatabaseCall`.
+  """
+
+  def __init__(
+      self,
+      delegate: Any,
+      slow_call_threshold: float,
+      max_stored_slow_calls: int,
+  ) -> None:
+    """Initializes the wrapper.
+
+    Args:
+      delegate: The database to profile.
+      slow_call_threshold: Duration (in seconds) above which a call is
+        considered slow and written to the database.
+      max_stored_slow_calls: Number of the most recent slow calls (of all
+        server processes) to keep in the database.
+    """
+    if max_stored_slow_calls < 1:
+      raise ValueError(
+          f"Invalid number of stored slow calls: {max_stored_slow_calls}"
+      )
+
+    self.delegate = delegate
+    self._slow_call_threshold = slow_call_threshold
+    self._max_stored_slow_calls = max_stored_slow_calls
+    self._process = f"{socket.gethostname()}:{os.getpid()}"
+
+  def __getattr__(self, name: str) -> Any:
+    attr = getattr(self.delegate, name)
+    if not name[:1].isupper() or not callable(attr):
+      return attr
+
+    @functools.wraps(attr)
+    def Profiled(*args, **kwargs):
+      return self._ProfileCall(name, attr, args, kwargs)
+
+    return Profiled
+
+  def _ProfileCall(self, name, method, args, kwargs) -> Any:
+    """Calls the given method of the delegate, recording its profile."""
+    queries = []
+    token = _queries.set(queries)
+    timestamp = rdfvalue.RDFDatetime.Now()
+    start_time = time.time()
+    try:
+      result = method(*args, **kwargs)
+    finally:
+      duration = time.time() - start_time
+      _queries.reset(token)
+
+    caller = _caller.get()
+    fields = [name, caller.label if caller else _UNKNOWN_CALLER_LABEL]
+    rows = _CountRows(result)
+    payload_bytes = (
+        _PayloadSize(args) + _PayloadSize(kwargs) + _PayloadSize(result)
+    )
+
+    DB_PROFILED_CALL_LATENCY.RecordEvent(duration, fields=fields)
+    DB_PROFILED_CALL_ROWS.Increment(rows, fields=fields)
+    DB_PROFILED_CALL_BYTES.Increment(payload_bytes, fields=fields)
+
+    if duration >= self._slow_call_threshold:
+      DB_SLOW_CALLS.Increment(fields=fields)
+      slow_call = objects_pb2.SlowDatabaseCall(
+          method=name,
+          timestamp=timestamp.AsMicrosecondsSinceEpoch(),
+          duration=duration,
+          rows=rows,
+          payload_bytes=payload_bytes,
+          queries=queries,
+          process=self._process,
+      )
+      if caller is not None:
+        slow_call.caller_kind = caller.kind
+        slow_call.caller_name = caller.name
+        if caller.hunt_id:
+          slow_call.hunt_id = caller.hunt_id
+      self._WriteSlowCall(slow_call)
+
+    return result
+
+  def _WriteSlowCall(self, slow_call: objects_pb2.SlowDatabaseCall) -> None:
+    """Writes a slow call sample, without failing the profiled call."""
+    # The sample is written to the delegate directly, so that writing it is
+    # not profiled itself.
+    try:
+      self.delegate.WriteSlowDatabaseCall(
+          slow_call, self._max_stored_slow_calls
+      )
+    except Exception as e:  # pylint: disable=broad-except
+      logging.warning("Failed to write slow database call sample: %s", e)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""Tests for the database profiling wrapper."""
+
+from unittest import mock
+
+from absl import app
+
+from grr_response_proto import objects_pb2
+from grr_response_server.databases import db
+from grr_response_server.databases import db_profiling
+from grr_response_server.databases import db_test_utils
+from grr_response_server.databases import mem
+from grr.test_lib import stats_test_lib
+from grr.test_lib import test_lib
+
+
+class _FakeDatabase(object):
+  """A fake database issuing fake SQL statements."""
+
+  def __init__(self):
+    self.private_attribute = 42
+    self.slow_calls: list[objects_pb2.SlowDatabaseCall] = []
+
+  def WriteSlowDatabaseCall(self, slow_call, max_stored_calls):
+    self.slow_calls.append(slow_call)
+    del self.slow_calls[:-max_stored_calls]
+
+  def ReadThings(self, count):
+    db_profiling.RecordQuery("SELECT thing FROM things")
+    return [b"thing"] * count
+
+  def WriteThing(self, thing):
+    db_profiling.RecordQuery("INSERT INTO things VALUES (%s)")
+    del thing  # Unused.
+
+  def Fail(self):
+    db_profiling.RecordQuery("SELECT broken FROM things")
+    raise ValueError("Failed")
+
+
+class ProfilingDatabaseTest(
+    stats_test_lib.StatsTestMixin, test_lib.GRRBaseTest
+):
+
+  def testRaisesOnInvalidMaxStoredSlowCalls(self):
+    with self.assertRaises(ValueError):
+      db_profiling.ProfilingDatabase(
+          _FakeDatabase(), slow_call_threshold=0, max_stored_slow_calls=0
+      )
+
+  def testForwardsCallsAndAttributes(self):
+    profiler = db_profiling.ProfilingDatabase(
+        _FakeDatabase(), slow_call_threshold=0, max_stored_slow_calls=10
+    )
+
+    self.assertEqual(profiler.ReadThings(2), [b"thing", b"thing"])
+    self.assertEqual(profiler.private_attribute, 42)
+
+  def testWritesSlowCallsWithCallerAndQueries(self):
+    fake_db = _FakeDatabase()
+    profiler = db_profiling.ProfilingDatabase(
+        fake_db, slow_call_threshold=0, max_stored_slow_calls=10
+    )
+
+    with db_profiling.CallerContext("flow", "FileFinder", hunt_id="ABCDEF"):
+      profiler.ReadThings(3)
+
+    self.assertLen(fake_db.slow_calls, 1)
+    slow_call = fake_db.slow_calls[0]
+    self.assertEqual(slow_call.method, "ReadThings")
+    self.assertEqual(slow_call.caller_kind, "flow")
+    self.assertEqual(slow_call.caller_name, "FileFinder")
+    self.assertEqual(slow_call.hunt_id, "ABCDEF")
+    self.assertEqual(slow_call.rows, 3)
+    self.assertEqual(slow_call.payload_bytes, 3 * len(b"thing"))
+    self.assertEqual(slow_call.queries, ["SELECT thing FROM things"])
+    self.assertNotEmpty(slow_call.process)
+
+  def testDoesNotRecordFastCalls(self):
+    fake_db = _FakeDatabase()
+    profiler = db_profiling.ProfilingDatabase(
+        fake_db, slow_call_threshold=3600, max_stored_slow_calls=10
+    )
+
+    profiler.ReadThings(3)
+
+    self.assertEmpty(fake_db.slow_calls)
+
+  def testPassesMaxStoredSlowCalls(self):
+    fake_db = _FakeDatabase()
+    profiler = db_profiling.ProfilingDatabase(
+        fake_db, slow_call_threshold=0, max_stored_slow_calls=2
+    )
+
+    for count in range(3):
+      profiler.ReadThings(count)
+
+    self.assertEqual([call.rows for call in fake_db.slow_calls], [1, 2])
+
+  def testDoesNotFailCallsIfWritingSlowCallFails(self):
+    fake_db = _FakeDatabase()
+    profiler = db_profiling.ProfilingDatabase(
+        fake_db, slow_call_threshold=0, max_stored_slow_calls=10
+    )
+
+    with mock.patch.object(
+        fake_db, "WriteSlowDatabaseCall", side_effect=RuntimeError("Failed")
+    ):
+      self.assertEqual(profiler.ReadThings(1), [b"thing"])
+
+  def testAccountsRowsAndBytesPerCaller(self):
+    profiler = db_profiling.ProfilingDatabase(
+        _FakeDatabase(), slow_call_threshold=3600, max_stored_slow_calls=10
+    )
+
+    with self.assertStatsCounterDelta(
+        5,
+        db_profiling.DB_PROFILED_CALL_ROWS,
+        fields=["ReadThings", "api:ListFlows"],
+    ):
+      with self.assertStatsCounterDelta(
+          len(b"foobar"),
+          db_profiling.DB_PROFILED_CALL_BYTES,
+          fields=["WriteThing", "unknown"],
+      ):
+        with db_profiling.CallerContext("api", "ListFlows"):
+          profiler.ReadThings(5)
+        profiler.WriteThing(b"foobar")
+
+  def testDoesNotRecordFailedCalls(self):
+    fake_db = _FakeDatabase()
+    profiler = db_profiling.ProfilingDatabase(
+        fake_db, slow_call_threshold=0, max_stored_slow_calls=10
+    )
+
+    with self.assertRaises(ValueError):
+      profiler.Fail()
+
+    self.assertEmpty(fake_db.slow_calls)
+
+  def testIgnoresQueriesOutsideOfProfiledCalls(self):
+    # Must not raise and must not leak into the next profiled call.
+    db_profiling.RecordQuery("SELECT 1")
+
+    fake_db = _FakeDatabase()
+    profiler = db_profiling.ProfilingDatabase(
+        fake_db, slow_call_threshold=0, max_stored_slow_calls=10
+    )
+    profiler.WriteThing(b"foo")
+
+    self.assertEqual(
+        fake_db.slow_calls[0].queries, ["INSERT INTO things VALUES (%s)"]
+    )
+
+  def testCallerContextIsRestored(self):
+    self.assertIsNone(db_profiling.CurrentCaller())
+
+    with db_profiling.CallerContext("api", "ListHunts"):
+      with db_profiling.CallerContext("flow", "Interrogate"):
+        self.assertEqual(db_profiling.CurrentCaller().name, "Interrogate")
+      self.assertEqual(db_profiling.CurrentCaller().name, "ListHunts")
+
+    self.assertIsNone(db_profiling.CurrentCaller())
+
+  def testWrapsInMemoryDatabase(self):
+    profiler = db_profiling.ProfilingDatabase(
+        mem.InMemoryDB(), slow_call_threshold=0, max_stored_slow_calls=10
+    )
+    rel_db = db.DatabaseValidationWrapper(profiler)
+
+    client_id = db_test_utils.InitializeClient(rel_db)
+    path_info = objects_pb2.PathInfo(
+        path_type=objects_pb2.PathInfo.PathType.OS, components=["foo"]
+    )
+    with db_profiling.CallerContext("flow", "ListDirectory"):
+      rel_db.WritePathInfos(client_id, [path_info])
+
+    slow_calls = rel_db.ReadSlowDatabaseCalls(10)
+    self.assertEqual(slow_calls[0].method, "WritePathInfos")
+    self.assertEqual(slow_calls[0].caller_name, "ListDirectory")
+    self.assertGreater(slow_calls[0].payload_bytes, 0)
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)
@@ -3,14 +3,16 @@
 
 from collections.abc import Sequence
 import functools
+import json
 import logging
 import time
-from typing import Generic, TypeVar
+from typing import Generic, TypeVar, Union
 
 from google.protobuf import wrappers_pb2
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.util import precondition
 from grr_response_core.stats import metrics
+from grr_response_proto import flows_pb2
 from grr_response_server.databases import db
 
 
@@ -214,6 +216,69 @@ def MicrosToSeconds(ms):
   return ms / 1e6
 
 
+def EncodeContinuationToken(key: Sequence[Union[int, str]]) -> bytes:
+  """Encodes a keyset pagination position as an opaque continuation token."""
+  return json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+
+
+def DecodeContinuationToken(
+    token: bytes, key_types: Sequence[type[Union[int, str]]]
+) -> tuple[Union[int, str], ...]:
+  """Decodes a continuation token produced by EncodeContinuationToken.
+
+  Args:
+    token: The token to decode.
+    key_types: Expected types of the key components.
+
+  Returns:
+    A tuple with the key components.
+
+  Raises:
+    db.InvalidContinuationTokenError: if the token is malformed.
+  """
+  try:
+    key = json.loads(token.decode("utf-8"))
+  except ValueError as e:
+    raise db.InvalidContinuationTokenError(token, cause=e) from e
+
+  if (
+      not isinstance(key, list)
+      or len(key) != len(key_types)
+      or any(type(v) is not t for v, t in zip(key, key_types))
+  ):
+    raise db.InvalidContinuationTokenError(token)
+
+  return tuple(key)
+
+
+def FlowResultsPageFromKeyedResults(
+    keyed_results: Sequence[
+        tuple[Sequence[Union[int, str]], flows_pb2.FlowResult]
+    ],
+    count: int,
+) -> db.FlowResultsPage:
+  """Builds a results page out of (key, result) tuples.
+
+  Args:
+    keyed_results: Results read with a limit of `count`, each with a key
+      uniquely identifying its position in the ordering.
+    count: The limit the results were read with.
+
+  Returns:
+    A FlowResultsPage. Its continuation token is None if fewer than `count`
+    results were read, as then there are no more results to read.
+  """
+  continuation_token = None
+  if keyed_results and len(keyed_results) >= count:
+    last_key, _ = keyed_results[-1]
+    continuation_token = EncodeContinuationToken(last_key)
+
+  return db.FlowResultsPage(
+      results=[result for _, result in keyed_results],
+      continuation_token=continuation_token,
+  )
+
+
 class BatchPlanner(Generic[_T]):
   """Helper class to batch operations based on affected rows limit.
 
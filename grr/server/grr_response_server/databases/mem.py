@@ -59,6 +59,10 @@ class InMemoryDB(
 
   def __init__(self):
     super().__init__()
+    # Kept across `ClearTestDB` calls, so that callers caching foreman rules
+    # notice that the database was cleared.
+    self.foreman_rules_generation = 0
+    self.blob_arrival_generations = {}
     self._Init()
     self.lock = threading.RLock()
 
@@ -144,6 +148,7 @@ class InMemoryDB(
     self.flow_handler_stop = True
     self.flow_handler_num_being_processed = 0
     self.api_audit_entries: list[objects_pb2.APIAuditEntry] = []
+    self.slow_database_calls: list[objects_pb2.SlowDatabaseCall] = []
     self.hunts: dict[str, hunts_pb2.Hunt] = {}
     # Maps hunt_id to a list of serialized output_plugin_pb2.OutputPluginState.
     self.hunt_output_plugins_states: dict[str, list[bytes]] = {}
@@ -165,6 +170,7 @@ class InMemoryDB(
   def ClearTestDB(self):
     self.UnregisterMessageHandler()
     self._Init()
+    self.foreman_rules_generation += 1
 
   def _AllPathIDs(self):
     result = set()
@@ -18,6 +18,7 @@ class InMemoryDBBlobsMixin(blob_store.BlobStore):
       rdf_objects.SHA256HashID, list[objects_pb2.BlobReference]
   ]
   blobs: dict[models_blobs.BlobID, bytes]
+  blob_arrival_generation: int
 
   @utils.Synchronized
   def WriteBlobs(
@@ -96,3 +97,16 @@ class InMemoryDBBlobsMixin(blob_store.BlobStore):
       result[hash_id] = blob_ref_copies
 
     return result
+
+  @utils.Synchronized
+  def WriteBlobArrivalSignal(self, shards: Collection[int]) -> None:
+    """Signals waiters in all processes that new blobs have been written."""
+    for shard in shards:
+      self.blob_arrival_generations[shard] = (
+          self.blob_arrival_generations.get(shard, 0) + 1
+      )
+
+  @utils.Synchronized
+  def ReadBlobArrivalGenerations(self) -> Mapping[int, int]:
+    """Reads numbers that change whenever blob arrivals are signalled."""
+    return dict(self.blob_arrival_generations)
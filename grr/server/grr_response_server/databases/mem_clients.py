@@ -332,6 +332,39 @@ class InMemoryDBClientMixin(object):
         res[kw].append(client_id)
     return res
 
+  @utils.Synchronized
+  def SearchClientsForKeywords(
+      self,
+      keywords: Collection[str],
+      start_time: Optional[rdfvalue.RDFDatetime] = None,
+      offset: int = 0,
+      count: Optional[int] = None,
+  ) -> Sequence[str]:
+    """Lists the clients associated with all of the given keywords."""
+    if not keywords:
+      return []
+
+    # Intersect starting from the shortest posting list, looking up the others.
+    posting_lists = sorted(
+        (self.keywords.get(kw, {}) for kw in keywords), key=len
+    )
+
+    client_ids = []
+    for client_id in posting_lists[0]:
+      for posting_list in posting_lists:
+        timestamp = posting_list.get(client_id)
+        if timestamp is None:
+          break
+        if start_time is not None and timestamp < start_time:
+          break
+      else:
+        client_ids.append(client_id)
+
+    client_ids.sort()
+    if count is None:
+      return client_ids[offset:]
+    return client_ids[offset : offset + count]
+
   @utils.Synchronized
   def RemoveClientKeyword(
       self,
@@ -13,6 +13,7 @@ class InMemoryDBEventMixin(object):
   """InMemoryDB mixin for event handling."""
 
   api_audit_entries: list[objects_pb2.APIAuditEntry]
+  slow_database_calls: list[objects_pb2.SlowDatabaseCall]
 
   @utils.Synchronized
   def ReadAPIAuditEntries(
@@ -87,3 +88,31 @@ class InMemoryDBEventMixin(object):
     if not copy.HasField("timestamp"):
       copy.timestamp = rdfvalue.RDFDatetime.Now().AsMicrosecondsSinceEpoch()
     self.api_audit_entries.append(copy)
+
+  @utils.Synchronized
+  def WriteSlowDatabaseCall(
+      self,
+      slow_call: objects_pb2.SlowDatabaseCall,
+      max_stored_calls: int,
+  ) -> None:
+    """Writes a slow database call sample to the database."""
+    copy = objects_pb2.SlowDatabaseCall()
+    copy.CopyFrom(slow_call)
+    if not copy.HasField("timestamp"):
+      copy.timestamp = rdfvalue.RDFDatetime.Now().AsMicrosecondsSinceEpoch()
+    self.slow_database_calls.append(copy)
+    del self.slow_database_calls[:-max_stored_calls]
+
+  @utils.Synchronized
+  def ReadSlowDatabaseCalls(
+      self, count: int
+  ) -> list[objects_pb2.SlowDatabaseCall]:
+    """Reads the most recently written slow database call samples."""
+    results = []
+    for slow_call in reversed(self.slow_database_calls):
+      if len(results) >= count:
+        break
+      copy = objects_pb2.SlowDatabaseCall()
+      copy.CopyFrom(slow_call)
+      results.append(copy)
+    return results
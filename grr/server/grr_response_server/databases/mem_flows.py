@@ -37,6 +37,45 @@ class TimeOutWhileWaitingForFlowsToBeProcessedError(Error):
   """Raised by WaitUntilNoFlowsToProcess when waiting longer than time limit."""
 
 
+def _FlowResultOrErrorMatches(
+    item: Union[flows_pb2.FlowResult, flows_pb2.FlowError],
+    with_tag: Optional[str] = None,
+    with_type: Optional[str] = None,
+    with_proto_type_url: Optional[str] = None,
+    with_substring: Optional[str] = None,
+) -> bool:
+  """Checks whether a flow result/error matches given query options."""
+  if with_tag is not None and item.tag != with_tag:
+    return False
+
+  if with_proto_type_url is not None:
+    if item.payload.type_url != with_proto_type_url:
+      return False
+  elif with_type is not None:
+    if db_utils.TypeURLToRDFTypeName(item.payload.type_url) != with_type:
+      return False
+
+  if with_substring is not None:
+    if with_substring.encode("utf8") not in item.payload.SerializeToString():
+      return False
+
+  return True
+
+
+def _Reserialized(responses: Iterable[T]) -> list[T]:
+  """Returns copies of responses that went through serialization."""
+  # Serialize/deserialize responses to better simulate the real DB behavior
+  # (where serialization/deserialization is almost guaranteed to be done).
+  # TODO(user): change mem-db implementation to do
+  # serialization/deserialization everywhere in a generic way.
+  reserialized_responses = []
+  for r in responses:
+    response = r.__class__()
+    response.ParseFromString(r.SerializeToString())
+    reserialized_responses.append(response)
+  return reserialized_responses
+
+
 class InMemoryDBFlowMixin(object):
   """InMemoryDB mixin for flow handling."""
 
@@ -662,19 +701,70 @@ class InMemoryDBFlowMixin(object):
           key=lambda response: response.response_id,
       )
 
-      # Serialize/deserialize responses to better simulate the
-      # real DB behavior (where serialization/deserialization is almost
-      # guaranteed to be done).
-      # TODO(user): change mem-db implementation to do
-      # serialization/deserialization everywhere in a generic way.
-      reserialized_responses = []
-      for r in responses:
-        response = r.__class__()
-        response.ParseFromString(r.SerializeToString())
-        reserialized_responses.append(response)
-      responses = reserialized_responses
+      res[request_id] = (request, _Reserialized(responses))
+
+    return res
+
+  @utils.Synchronized
+  def ReadFlowRequestsReadyForProcessing(
+      self,
+      client_id: str,
+      flow_id: str,
+      next_needed_request: int,
+  ) -> dict[
+      int,
+      tuple[
+          flows_pb2.FlowRequest,
+          Sequence[
+              Union[
+                  flows_pb2.FlowResponse,
+                  flows_pb2.FlowStatus,
+                  flows_pb2.FlowIterator,
+              ],
+          ],
+      ],
+  ]:
+    """Reads only the requests of a flow that the worker can process now."""
+    request_dict: dict[int, flows_pb2.FlowRequest] = self.flow_requests.get(
+        (client_id, flow_id), {}
+    )
+    req_response_dict: dict[int, dict[int, flows_pb2.FlowResponse]] = (
+        self.flow_responses.get((client_id, flow_id), {})
+    )
 
-      res[request_id] = (request, responses)
+    res = {}
+
+    # Collect the contiguous run of completed requests.
+    request_id = next_needed_request
+    while (
+        request_id in request_dict
+        and request_dict[request_id].needs_processing
+    ):
+      responses = sorted(
+          req_response_dict.get(request_id, {}).values(),
+          key=lambda response: response.response_id,
+      )
+      res[request_id] = (request_dict[request_id], _Reserialized(responses))
+      request_id += 1
+
+    # Collect incremental requests together with their new responses.
+    for request_id, request in request_dict.items():
+      if (
+          request_id < next_needed_request
+          or request_id in res
+          or not request.callback_state
+      ):
+        continue
+
+      responses = sorted(
+          (
+              response
+              for response in req_response_dict.get(request_id, {}).values()
+              if response.response_id >= request.next_response_id
+          ),
+          key=lambda response: response.response_id,
+      )
+      res[request_id] = (request, _Reserialized(responses))
 
     return res
 
@@ -913,27 +1003,17 @@ class InMemoryDBFlowMixin(object):
       container_copy.append(x)
     results = sorted(container_copy, key=lambda r: r.timestamp)
 
-    if with_tag is not None:
-      results = [i for i in results if i.tag == with_tag]
-
-    if with_proto_type_url is not None:
-      results = [
-          i for i in results if i.payload.type_url == with_proto_type_url
-      ]
-    elif with_type is not None:
-      results = [
-          i
-          for i in results
-          if db_utils.TypeURLToRDFTypeName(i.payload.type_url) == with_type
-      ]
-
-    if with_substring is not None:
-      encoded_substring = with_substring.encode("utf8")
-      results = [
-          i
-          for i in results
-          if encoded_substring in i.payload.SerializeToString()
-      ]
+    results = [
+        i
+        for i in results
+        if _FlowResultOrErrorMatches(
+            i,
+            with_tag=with_tag,
+            with_type=with_type,
+            with_proto_type_url=with_proto_type_url,
+            with_substring=with_substring,
+        )
+    ]
 
     return results[offset : offset + count]
 
@@ -961,6 +1041,47 @@ class InMemoryDBFlowMixin(object):
         with_substring=with_substring,
     )
 
+  @utils.Synchronized
+  def ReadFlowResultsPage(
+      self,
+      client_id: str,
+      flow_id: str,
+      count: int,
+      continuation_token: Optional[bytes] = None,
+      with_tag: Optional[str] = None,
+      with_type: Optional[str] = None,
+      with_proto_type_url: Optional[str] = None,
+      with_substring: Optional[str] = None,
+  ) -> db.FlowResultsPage:
+    """Reads a page of flow results continuing after a given position."""
+    after = None
+    if continuation_token is not None:
+      after = db_utils.DecodeContinuationToken(continuation_token, (int, int))
+
+    # Results are keyed by their timestamp and their position in the list of
+    # written results, which never changes as results are only appended.
+    keyed_results = []
+    for index, r in enumerate(self.flow_results.get((client_id, flow_id), [])):
+      key = (r.timestamp, index)
+      if after is not None and key <= after:
+        continue
+
+      if _FlowResultOrErrorMatches(
+          r,
+          with_tag=with_tag,
+          with_type=with_type,
+          with_proto_type_url=with_proto_type_url,
+          with_substring=with_substring,
+      ):
+        result = flows_pb2.FlowResult()
+        result.CopyFrom(r)
+        keyed_results.append((key, result))
+
+    keyed_results.sort(key=lambda kr: kr[0])
+    return db_utils.FlowResultsPageFromKeyedResults(
+        keyed_results[:count], count
+    )
+
   @utils.Synchronized
   def CountFlowResults(
       self,
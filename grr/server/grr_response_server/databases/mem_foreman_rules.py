@@ -12,15 +12,20 @@ class InMemoryDBForemanRulesMixin(object):
   """InMemoryDB mixin for foreman rules related functions."""
 
   foreman_rules: Sequence[jobs_pb2.ForemanCondition]
+  foreman_rules_generation: int
 
   @utils.Synchronized
   def WriteForemanRule(self, rule: jobs_pb2.ForemanCondition) -> None:
     self.RemoveForemanRule(rule.hunt_id)
     self.foreman_rules.append(rule)
+    self.foreman_rules_generation += 1
 
   @utils.Synchronized
   def RemoveForemanRule(self, hunt_id: str) -> None:
-    self.foreman_rules = [r for r in self.foreman_rules if r.hunt_id != hunt_id]
+    rules = [r for r in self.foreman_rules if r.hunt_id != hunt_id]
+    if len(rules) != len(self.foreman_rules):
+      self.foreman_rules = rules
+      self.foreman_rules_generation += 1
 
   @utils.Synchronized
   def ReadAllForemanRules(self) -> Sequence[jobs_pb2.ForemanCondition]:
@@ -29,6 +34,11 @@ class InMemoryDBForemanRulesMixin(object):
   @utils.Synchronized
   def RemoveExpiredForemanRules(self) -> None:
     now = rdfvalue.RDFDatetime.Now().AsMicrosecondsSinceEpoch()
-    self.foreman_rules = [
-        r for r in self.foreman_rules if r.expiration_time >= now
-    ]
+    rules = [r for r in self.foreman_rules if r.expiration_time >= now]
+    if len(rules) != len(self.foreman_rules):
+      self.foreman_rules = rules
+      self.foreman_rules_generation += 1
+
+  @utils.Synchronized
+  def ReadForemanRulesGeneration(self) -> int:
+    return self.foreman_rules_generation
@@ -404,6 +404,67 @@ class InMemoryDBHuntMixin(object):
     all_results.sort(key=lambda x: x.timestamp)
     return all_results[offset : offset + count]
 
+  @utils.Synchronized
+  def ReadHuntResultsPage(
+      self,
+      hunt_id: str,
+      count: int,
+      continuation_token: Optional[bytes] = None,
+      with_tag: Optional[str] = None,
+      with_type: Optional[str] = None,
+      with_proto_type_url: Optional[str] = None,
+      with_substring: Optional[str] = None,
+      with_timestamp: Optional[rdfvalue.RDFDatetime] = None,
+  ) -> db.FlowResultsPage:
+    """Reads a page of hunt results continuing after a given position."""
+    after = None
+    if continuation_token is not None:
+      after = db_utils.DecodeContinuationToken(
+          continuation_token, (int, str, int)
+      )
+
+    keyed_results = []
+    for flow_obj in self._GetHuntFlows(hunt_id):
+      # Results are keyed by their timestamp, client id and position among the
+      # flow's matching results. Results are only ever appended with newer
+      # timestamps, so positions of already returned results never change.
+      # pytype: disable=attribute-error
+      entries = self.ReadFlowResults(
+          flow_obj.client_id,
+          flow_obj.flow_id,
+          0,
+          sys.maxsize,
+          with_tag=with_tag,
+          with_type=with_type,
+          with_proto_type_url=with_proto_type_url,
+          with_substring=with_substring,
+      )
+      # pytype: enable=attribute-error
+      for index, entry in enumerate(entries):
+        if with_timestamp and entry.timestamp != with_timestamp:
+          continue
+
+        key = (entry.timestamp, flow_obj.client_id, index)
+        if after is not None and key <= after:
+          continue
+
+        keyed_results.append((
+            key,
+            flows_pb2.FlowResult(
+                hunt_id=hunt_id,
+                client_id=flow_obj.client_id,
+                flow_id=flow_obj.flow_id,
+                timestamp=entry.timestamp,
+                tag=entry.tag,
+                payload=entry.payload,
+            ),
+        ))
+
+    keyed_results.sort(key=lambda kr: kr[0])
+    return db_utils.FlowResultsPageFromKeyedResults(
+        keyed_results[:count], count
+    )
+
   @utils.Synchronized
   def CountHuntResults(
       self,
@@ -316,10 +316,13 @@ class InMemoryDBPathMixin(object):
     if client_id not in self.metadatas:
       raise db.UnknownClientError(client_id)
 
+    ancestors_trie = models_paths.AncestorPathInfoTrie()
     for path_info in path_infos:
       self._WritePathInfo(client_id, path_info)
-      for ancestor_path_info in models_paths.GetAncestorPathInfos(path_info):
-        self._WritePathInfo(client_id, ancestor_path_info)
+      ancestors_trie.Add(path_info)
+
+    for ancestor_path_info in ancestors_trie.ancestor_path_infos:
+      self._WritePathInfo(client_id, ancestor_path_info)
 
   @utils.Synchronized
   def ReadPathInfosHistories(
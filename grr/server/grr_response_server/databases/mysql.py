@@ -9,8 +9,9 @@ import contextlib
 import logging
 import math
 import random
+import threading
 import time
-from typing import Union
+from typing import Optional, Union
 import warnings
 
 # Note: Please refer to server/setup.py for the MySQLdb version that is used.
@@ -21,6 +22,7 @@ from MySQLdb.constants import ER as mysql_errors
 
 from grr_response_core import config
 from grr_response_core.lib import rdfvalue
+from grr_response_core.stats import metrics
 from grr_response_server import threadpool
 from grr_response_server.databases import db as db_module
 from grr_response_server.databases import db_utils
@@ -48,6 +50,17 @@ MAX_PACKET_SIZE = 20 << 21
 # Maximum retry count:
 _MAX_RETRY_COUNT = 5
 
+MYSQL_TRANSACTIONS = metrics.Counter(
+    "mysql_transactions", fields=[("pool", str)]
+)
+MYSQL_REPLICA_FALLBACKS = metrics.Counter(
+    "mysql_replica_fallbacks", fields=[("reason", str)]
+)
+MYSQL_REPLICA_LAG = metrics.Gauge("mysql_replica_lag", float)
+
+_PRIMARY_POOL = "primary"
+_REPLICA_POOL = "replica"
+
 # MySQL error codes:
 _RETRYABLE_ERRORS = frozenset([
     mysql_conn_errors.SERVER_GONE_ERROR,
@@ -404,6 +417,74 @@ def _GetConnectionArgs(
   return connection_args
 
 
+def _ConnectToReplica(
+    host=None,
+    port=None,
+    user=None,
+    password=None,
+    database=None,
+    client_key_path=None,
+    client_cert_path=None,
+    ca_cert_path=None,
+):
+  """Connect to a MySQL read replica.
+
+  Unlike `_Connect`, this does not try to change global settings of the server,
+  since a replica is expected to be configured the same way as the primary.
+  """
+  connection_args = _GetConnectionArgs(
+      host=host,
+      port=port,
+      user=user,
+      password=password,
+      database=database,
+      client_key_path=client_key_path,
+      client_cert_path=client_cert_path,
+      ca_cert_path=ca_cert_path,
+  )
+
+  conn = MySQLdb.Connect(**connection_args)
+  with contextlib.closing(conn.cursor()) as cursor:
+    _CheckForSSL(cursor)
+    _SetMariaDBMode(cursor)
+    _SetEncoding(cursor)
+    _CheckConnectionEncoding(cursor)
+    _SetSqlMode(cursor)
+
+  return conn
+
+
+def _ReadReplicationLag(cursor) -> Optional[float]:
+  """Reads the replication lag of the server, in seconds.
+
+  Args:
+    cursor: A cursor of a connection to the server.
+
+  Returns:
+    The replication lag or None if the replication is stopped or broken. If the
+    server does not replicate from a primary server (e.g. it is a node of a
+    synchronously replicated cluster), the lag is 0.
+  """
+  # `SHOW REPLICA STATUS` is only supported by MySQL 8.0.22+ and MariaDB
+  # 10.5.1+, while `SHOW SLAVE STATUS` is removed in recent MySQL versions.
+  try:
+    cursor.execute("SHOW REPLICA STATUS")
+  except MySQLdb.ProgrammingError:
+    cursor.execute("SHOW SLAVE STATUS")
+
+  row = cursor.fetchone()
+  if row is None:
+    return 0.0
+
+  columns = [column[0] for column in cursor.description]
+  for column in ["Seconds_Behind_Source", "Seconds_Behind_Master"]:
+    if column in columns:
+      lag = row[columns.index(column)]
+      return None if lag is None else float(lag)
+
+  raise Error("Unable to read the replication lag.")
+
+
 def _Connect(
     host=None,
     port=None,
@@ -488,7 +569,14 @@ class MysqlDB(
   _DELETE_ROWS_BATCH_SIZE = 5000
 
   def __init__(
-      self, host=None, port=None, user=None, password=None, database=None
+      self,
+      host=None,
+      port=None,
+      user=None,
+      password=None,
+      database=None,
+      replica_host=None,
+      replica_port=None,
   ):
     """Creates a datastore implementation.
 
@@ -498,6 +586,9 @@ class MysqlDB(
       user: Passed to MySQLdb.Connect when creating a new connection.
       password: Passed to MySQLdb.Connect when creating a new connection.
       database: Passed to MySQLdb.Connect when creating a new connection.
+      replica_host: Host of a read replica of the database. If neither this nor
+        `Mysql.replica_host` is set, all transactions use the primary server.
+      replica_port: Port of the read replica of the database.
     """
 
     # Turn all SQL warnings not mentioned below into exceptions.
@@ -542,11 +633,39 @@ class MysqlDB(
     self._max_pool_size = config.CONFIG["Mysql.conn_pool_max"]
     self.pool = mysql_pool.Pool(self._Connect, max_size=self._max_pool_size)
 
+    # Readonly transactions that do not need to observe the latest writes can
+    # be served by a read replica, as long as its replication lag is low.
+    self.replica_pool = None
+    replica_host = replica_host or config.CONFIG["Mysql.replica_host"]
+    if replica_host:
+      self._replica_connect_args = dict(
+          self._connect_args,
+          host=replica_host,
+          port=replica_port
+          or config.CONFIG["Mysql.replica_port"]
+          or self._connect_args["port"],
+      )
+      self._replica_max_pool_size = config.CONFIG["Mysql.replica_conn_pool_max"]
+      self.replica_pool = mysql_pool.Pool(
+          self._ConnectToReplica, max_size=self._replica_max_pool_size
+      )
+
+    self._replica_max_lag = config.CONFIG["Mysql.replica_max_lag"]
+    self._replica_lag_check_interval = config.CONFIG[
+        "Mysql.replica_lag_check_interval"
+    ]
+    self._replica_lag: Optional[float] = None
+    self._replica_lag_check_time: Optional[float] = None
+    self._replica_lag_checking = False
+    self._replica_lag_lock = threading.Lock()
+
     self.handler_thread = None
     self.handler_stop = True
+    self.message_handler_request_notifier = mysql_flows.QueueNotifier()
 
     self.flow_processing_request_handler_thread = None
     self.flow_processing_request_handler_stop = None
+    self.flow_processing_request_notifier = mysql_flows.QueueNotifier()
     self.flow_processing_request_handler_pool = threadpool.ThreadPool.Factory(
         "flow_processing_pool",
         min_threads=config.CONFIG["Mysql.flow_processing_threads_min"],
@@ -556,8 +675,72 @@ class MysqlDB(
   def _Connect(self):
     return _Connect(**self._connect_args)
 
+  def _ConnectToReplica(self):
+    return _ConnectToReplica(**self._replica_connect_args)
+
   def Close(self):
     self.pool.close()
+    if self.replica_pool is not None:
+      self.replica_pool.close()
+
+  def _CheckReplicaLag(self) -> Optional[float]:
+    """Reads the replication lag of the replica, None if it is unavailable."""
+    try:
+      with contextlib.closing(self.replica_pool.get()) as connection:
+        with contextlib.closing(connection.cursor()) as cursor:
+          lag = _ReadReplicationLag(cursor)
+    except MySQLdb.Error as e:
+      logging.warning("Failed to read the replication lag: %s", e)
+      return None
+
+    if lag is not None:
+      MYSQL_REPLICA_LAG.SetValue(lag)
+    return lag
+
+  def _IsReplicaUsable(self) -> bool:
+    """Checks whether a transaction can be served by the read replica."""
+    if self.replica_pool is None:
+      return False
+
+    # Only one thread checks the lag (which may take as long as the connect
+    # timeout if the replica is down), others use the last known value.
+    with self._replica_lag_lock:
+      now = time.monotonic()
+      check = not self._replica_lag_checking and (
+          self._replica_lag_check_time is None
+          or now - self._replica_lag_check_time
+          >= self._replica_lag_check_interval
+      )
+      if check:
+        self._replica_lag_checking = True
+      lag = self._replica_lag
+
+    if check:
+      lag = None
+      try:
+        lag = self._CheckReplicaLag()
+      finally:
+        with self._replica_lag_lock:
+          self._replica_lag = lag
+          self._replica_lag_check_time = time.monotonic()
+          self._replica_lag_checking = False
+
+    if lag is None:
+      MYSQL_REPLICA_FALLBACKS.Increment(fields=["unavailable"])
+      return False
+    if lag > self._replica_max_lag:
+      MYSQL_REPLICA_FALLBACKS.Increment(fields=["lag"])
+      return False
+    return True
+
+  def _MarkReplicaUnavailable(self, error: MySQLdb.Error) -> None:
+    """Routes transactions to the primary until the next replica check."""
+    logging.warning("MySQL replica is unavailable: %s", error)
+    MYSQL_REPLICA_FALLBACKS.Increment(fields=["unavailable"])
+
+    with self._replica_lag_lock:
+      self._replica_lag = None
+      self._replica_lag_check_time = time.monotonic()
 
   def _RunInTransaction(
       self,
@@ -566,6 +749,7 @@ class MysqlDB(
           None,
       ],
       readonly: bool = False,
+      replica: bool = False,
   ) -> None:
     """Runs function within a transaction.
 
@@ -581,6 +765,9 @@ class MysqlDB(
       function: A function to be run.
       readonly: Indicates that only a readonly (snapshot) transaction is
         required.
+      replica: Indicates that the transaction can be served by a read replica.
+        The primary server is used if no replica is configured or if the
+        replication lag exceeds `Mysql.replica_max_lag`.
 
     Returns:
       The value returned by the last call to function.
@@ -591,49 +778,86 @@ class MysqlDB(
     if readonly:
       start_query = "START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY"
 
-    broken_connections_seen = 0
-    txn_execution_attempts = 0
-    while True:
-      with contextlib.closing(self.pool.get()) as connection:
+    use_replica = replica and readonly and self._IsReplicaUsable()
+
+    try:
+      broken_connections_seen = 0
+      txn_execution_attempts = 0
+      while True:
+        if use_replica:
+          pool, max_pool_size = self.replica_pool, self._replica_max_pool_size
+        else:
+          pool, max_pool_size = self.pool, self._max_pool_size
+
         try:
-          with contextlib.closing(connection.cursor()) as cursor:
-            cursor.execute(start_query)
-
-          result = function(connection)
-
-          if not readonly:
-            connection.commit()
-          return result
-        except mysql_utils.RetryableError:
-          connection.rollback()
-          if txn_execution_attempts < _MAX_RETRY_COUNT:
-            _SleepWithBackoff(txn_execution_attempts)
-            txn_execution_attempts += 1
-          else:
-            raise
+          connection = pool.get()
         except MySQLdb.OperationalError as e:
-          if e.args[0] in [
-              mysql_conn_errors.SERVER_GONE_ERROR,
-              mysql_conn_errors.SERVER_LOST,
-          ]:
-            # The connection to the MySQL server is broken. That might be
-            # the case with other existing connections in the pool. We will
-            # retry with all connections in the pool, expecting that they
-            # will get removed from the pool when they error out. Eventually,
-            # the pool will create new connections.
-            broken_connections_seen += 1
-            if broken_connections_seen > self._max_pool_size:
-              # All existing connections in the pool have been exhausted, and
-              # we have tried to create at least one new connection.
-              raise
-            # Retry immediately.
-          else:
+          if not use_replica:
+            raise
+          # The replica is not reachable, retry on the primary server.
+          self._MarkReplicaUnavailable(e)
+          use_replica = False
+          continue
+
+        with contextlib.closing(connection):
+          try:
+            with contextlib.closing(connection.cursor()) as cursor:
+              cursor.execute(start_query)
+
+            with mysql_utils.CollectPostCommitCallbacks() as callbacks:
+              result = function(connection)
+
+            if not readonly:
+              connection.commit()
+            for callback in callbacks:
+              callback()
+            return result
+          except mysql_utils.RetryableError:
             connection.rollback()
-            if _IsRetryable(e) and txn_execution_attempts < _MAX_RETRY_COUNT:
+            if txn_execution_attempts < _MAX_RETRY_COUNT:
               _SleepWithBackoff(txn_execution_attempts)
               txn_execution_attempts += 1
             else:
               raise
+          except MySQLdb.OperationalError as e:
+            if e.args[0] in [
+                mysql_conn_errors.SERVER_GONE_ERROR,
+                mysql_conn_errors.SERVER_LOST,
+            ]:
+              # The connection to the MySQL server is broken. That might be
+              # the case with other existing connections in the pool. We
+              # will retry with all connections in the pool, expecting that
+              # they will get removed from the pool when they error out.
+              # Eventually, the pool will create new connections.
+              broken_connections_seen += 1
+              if broken_connections_seen > max_pool_size:
+                # All existing connections in the pool have been exhausted,
+                # and we have tried to create at least one new connection.
+                if not use_replica:
+                  raise
+
+                # The replica is gone, retry on the primary server.
+                self._MarkReplicaUnavailable(e)
+                use_replica = False
+                broken_connections_seen = 0
+              # Retry immediately.
+            else:
+              connection.rollback()
+              if (
+                  _IsRetryable(e)
+                  and txn_execution_attempts < _MAX_RETRY_COUNT
+              ):
+                _SleepWithBackoff(txn_execution_attempts)
+                txn_execution_attempts += 1
+              else:
+                raise
+    finally:
+      # Transactions falling back to the primary server are only accounted
+      # for the pool they were eventually run on.
+      if use_replica:
+        MYSQL_TRANSACTIONS.Increment(fields=[_REPLICA_POOL])
+      else:
+        MYSQL_TRANSACTIONS.Increment(fields=[_PRIMARY_POOL])
 
   @db_utils.CallLogged
   @db_utils.CallAccounted
@@ -20,6 +20,9 @@ BLOB_CHUNK_SIZE = 2**24  # MySQL MEDIUMBLOB, 16 MiB
 
 CHUNKS_PER_INSERT = 100
 
+# Name of the `queue_notifications` counter signalling blob arrivals.
+_BLOB_ARRIVALS_QUEUE = "blob_arrivals"
+
 
 def _Insert(cursor, table, values):
   """Inserts one or multiple rows into the given table.
@@ -212,3 +215,43 @@ class MySQLDBBlobsMixin(blob_store.BlobStore):
       refs.ParseFromString(blob_references)
       results[sha_hash_id] = list(refs.items)
     return results
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  @mysql_utils.WithTransaction()
+  def WriteBlobArrivalSignal(
+      self,
+      shards: Collection[int],
+      cursor: Optional[MySQLdb.cursors.Cursor] = None,
+  ) -> None:
+    """Signals waiters in all processes that new blobs have been written."""
+    assert cursor is not None
+    if not shards:
+      return
+
+    # Sorted, so that concurrent signals lock the rows in the same order.
+    shards = sorted(set(shards))
+    query = (
+        "INSERT INTO queue_notifications (queue, shard, generation) "
+        "VALUES {} "
+        "ON DUPLICATE KEY UPDATE generation = generation + 1"
+    ).format(", ".join(["(%s, %s, 1)"] * len(shards)))
+    args = []
+    for shard in shards:
+      args.extend([_BLOB_ARRIVALS_QUEUE, shard])
+    cursor.execute(query, args)
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  @mysql_utils.WithTransaction(readonly=True)
+  def ReadBlobArrivalGenerations(
+      self,
+      cursor: Optional[MySQLdb.cursors.Cursor] = None,
+  ) -> Mapping[int, int]:
+    """Reads numbers that change whenever blob arrivals are signalled."""
+    assert cursor is not None
+    cursor.execute(
+        "SELECT shard, generation FROM queue_notifications WHERE queue = %s",
+        (_BLOB_ARRIVALS_QUEUE,),
+    )
+    return {shard: generation for shard, generation in cursor.fetchall()}
@@ -610,6 +610,28 @@ class MySQLDBClientMixin(object):
   ) -> Mapping[str, objects_pb2.ClientFullInfo]:
     """Reads full client information for a list of clients."""
     assert cursor is not None
+    return self._MultiReadClientFullInfo(cursor, client_ids, min_last_ping)
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  @mysql_utils.WithTransaction(readonly=True, replica=True)
+  def MultiReadClientFullInfoFromReplica(
+      self,
+      client_ids: Collection[str],
+      min_last_ping: Optional[rdfvalue.RDFDatetime] = None,
+      cursor: Optional[MySQLdb.cursors.Cursor] = None,
+  ) -> Mapping[str, objects_pb2.ClientFullInfo]:
+    """Reads full client information, possibly from a read replica."""
+    assert cursor is not None
+    return self._MultiReadClientFullInfo(cursor, client_ids, min_last_ping)
+
+  def _MultiReadClientFullInfo(
+      self,
+      cursor: MySQLdb.cursors.Cursor,
+      client_ids: Collection[str],
+      min_last_ping: Optional[rdfvalue.RDFDatetime],
+  ) -> Mapping[str, objects_pb2.ClientFullInfo]:
+    """Reads full client information for a list of clients."""
     if not client_ids:
       return {}
 
@@ -795,6 +817,59 @@ class MySQLDBClientMixin(object):
       result[hash_to_kw[kw_hash]].append(db_utils.IntToClientID(cid))
     return result
 
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  @mysql_utils.WithTransaction(readonly=True)
+  def SearchClientsForKeywords(
+      self,
+      keywords: Collection[str],
+      start_time: Optional[rdfvalue.RDFDatetime] = None,
+      offset: int = 0,
+      count: Optional[int] = None,
+      cursor: Optional[MySQLdb.cursors.Cursor] = None,
+  ) -> Sequence[str]:
+    """Lists the clients associated with all of the given keywords."""
+    assert cursor is not None
+    if not keywords:
+      return []
+
+    # The universal keyword matches every client, so it should not be the one
+    # driving the query if there are more selective keywords.
+    keywords = sorted(set(keywords), key=lambda kw: kw == ".")
+
+    timestamp_condition = ""
+    timestamp_args = []
+    if start_time:
+      timestamp_condition = " AND k{i}.timestamp >= FROM_UNIXTIME(%s)"
+      timestamp_args = [mysql_utils.RDFDatetimeToTimestamp(start_time)]
+
+    # Clients matching the first keyword are walked in client id order using
+    # the index, every other keyword is checked with a primary key lookup.
+    query = """
+      SELECT k0.client_id
+      FROM client_keywords AS k0
+      FORCE INDEX (client_keywords_by_keyword_hash_client_id_timestamp)
+    """
+    args = []
+    for i, kw in enumerate(keywords[1:], start=1):
+      query += (
+          f"JOIN client_keywords AS k{i} "
+          f"ON k{i}.client_id = k0.client_id AND k{i}.keyword_hash = %s"
+      ) + timestamp_condition.format(i=i) + " "
+      args.append(mysql_utils.Hash(kw))
+      args.extend(timestamp_args)
+
+    query += "WHERE k0.keyword_hash = %s" + timestamp_condition.format(i=0)
+    args.append(mysql_utils.Hash(keywords[0]))
+    args.extend(timestamp_args)
+
+    query += " ORDER BY k0.client_id LIMIT %s OFFSET %s"
+    args.append(count if count is not None else db.MAX_COUNT)
+    args.append(offset)
+
+    cursor.execute(query, args)
+    return [db_utils.IntToClientID(cid) for (cid,) in cursor.fetchall()]
+
   @db_utils.CallLogged
   @db_utils.CallAccounted
   @mysql_utils.WithTransaction()
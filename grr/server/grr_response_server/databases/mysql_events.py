@@ -11,6 +11,15 @@ from grr_response_server.databases import db_utils
 from grr_response_server.databases import mysql_utils
 
 
+def _SlowDatabaseCallFromRow(
+    details: bytes, timestamp: float
+) -> objects_pb2.SlowDatabaseCall:
+  slow_call = objects_pb2.SlowDatabaseCall()
+  slow_call.ParseFromString(details)
+  slow_call.timestamp = mysql_utils.TimestampToMicrosecondsSinceEpoch(timestamp)
+  return slow_call
+
+
 def _AuditEntryFromRow(
     details: bytes, timestamp: float
 ) -> objects_pb2.APIAuditEntry:
@@ -154,3 +163,64 @@ class MySQLDBEventMixin(object):
         FROM_UNIXTIME(%(timestamp)s))
     """
     cursor.execute(query, args)
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  @mysql_utils.WithTransaction()
+  def WriteSlowDatabaseCall(
+      self,
+      slow_call: objects_pb2.SlowDatabaseCall,
+      max_stored_calls: int,
+      cursor: Optional[MySQLdb.cursors.Cursor] = None,
+  ) -> None:
+    """Writes a slow database call sample to the database."""
+    assert cursor is not None
+
+    if not slow_call.HasField("timestamp"):
+      datetime = rdfvalue.RDFDatetime.Now().AsMicrosecondsSinceEpoch()
+    else:
+      datetime = slow_call.timestamp
+
+    query = """
+    INSERT INTO slow_database_calls (timestamp, details)
+    VALUES (FROM_UNIXTIME(%s), %s)
+    """
+    cursor.execute(
+        query,
+        [
+            mysql_utils.MicrosecondsSinceEpochToTimestamp(datetime),
+            slow_call.SerializeToString(),
+        ],
+    )
+
+    # Call ids are assigned in insertion order, so everything below the
+    # `max_stored_calls` most recent ids is older than the retained samples.
+    query = """
+    DELETE FROM slow_database_calls
+     WHERE call_id <= %s
+    """
+    cursor.execute(query, [cursor.lastrowid - max_stored_calls])
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  @mysql_utils.WithTransaction(readonly=True)
+  def ReadSlowDatabaseCalls(
+      self,
+      count: int,
+      cursor: Optional[MySQLdb.cursors.Cursor] = None,
+  ) -> list[objects_pb2.SlowDatabaseCall]:
+    """Reads the most recently written slow database call samples."""
+    assert cursor is not None
+
+    query = """
+    SELECT details, UNIX_TIMESTAMP(timestamp)
+      FROM slow_database_calls
+     ORDER BY call_id DESC
+     LIMIT %s
+    """
+    cursor.execute(query, [count])
+
+    return [
+        _SlowDatabaseCallFromRow(details, timestamp)
+        for details, timestamp in cursor.fetchall()
+    ]
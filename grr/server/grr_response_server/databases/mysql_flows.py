@@ -5,7 +5,7 @@ from collections.abc import Callable, Collection, Iterable, Mapping, Sequence
 import logging
 import threading
 import time
-from typing import Optional, Union
+from typing import Any, Optional, Union
 
 import MySQLdb
 from MySQLdb import cursors
@@ -16,6 +16,7 @@ from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.util import collection
 from grr_response_core.lib.util import random
+from grr_response_core.stats import metrics
 from grr_response_proto import flows_pb2
 from grr_response_proto import jobs_pb2
 from grr_response_proto import objects_pb2
@@ -27,12 +28,218 @@ from grr_response_server.models import hunts as models_hunts
 from grr_response_proto import rrg_pb2
 
 
+QUEUE_WAKEUP_LATENCY = metrics.Event(
+    "mysql_queue_wakeup_latency",
+    fields=[("queue", str), ("trigger", str)],
+    bins=[0.01 * 1.5**x for x in range(20)],
+)  # 10ms to ~22 secs
+
+_FLOW_PROCESSING_QUEUE = "flow_processing_requests"
+_MESSAGE_HANDLER_QUEUE = "message_handler_requests"
+
+# Number of rows each queue's notification counter is spread over. Writers bump
+# a random shard so that concurrent transactions rarely contend for the same
+# row lock.
+_QUEUE_NOTIFICATION_SHARDS = 64
+
+
+class QueueNotifier:
+  """In-process wakeup channel for a queue handler loop.
+
+  Writers call `Notify` whenever they add entries to the queue. Handler loops
+  block in `WaitForChange` instead of sleeping, so that entries written by the
+  same process are picked up immediately.
+  """
+
+  def __init__(self):
+    self._condition = threading.Condition()
+    self._generation = 0
+
+  @property
+  def generation(self) -> int:
+    with self._condition:
+      return self._generation
+
+  def Notify(self) -> None:
+    with self._condition:
+      self._generation += 1
+      self._condition.notify_all()
+
+  def WaitForChange(self, generation: int, timeout: float) -> int:
+    """Waits until the generation differs from the given one.
+
+    Args:
+      generation: The last generation seen by the caller.
+      timeout: Maximum number of seconds to wait.
+
+    Returns:
+      The current generation (equal to `generation` on timeout).
+    """
+    with self._condition:
+      self._condition.wait_for(
+          lambda: self._generation != generation, timeout=timeout
+      )
+      return self._generation
+
+
+class _QueueWaiter:
+  """Waits for new entries of a queue, falling back to periodic polling.
+
+  Entries written by the current process are signalled through a
+  `QueueNotifier`. Entries written by other frontends and workers are
+  signalled through the `queue_notifications` table: every write bumps a
+  counter there in the same transaction, so a change of the counter's sum
+  guarantees that new entries are visible. Checking the counter is a cheap
+  primary key range read, as opposed to the leasing UPDATE.
+  """
+
+  def __init__(
+      self,
+      queue: str,
+      notifier: QueueNotifier,
+      read_generation: Callable[[str], int],
+      check_interval: float,
+      poll_time: float,
+  ):
+    self._queue = queue
+    self._notifier = notifier
+    self._read_generation = read_generation
+    self._check_interval = check_interval
+    self._poll_time = poll_time
+
+    self._local_generation = notifier.generation
+    self._db_generation = read_generation(queue)
+
+  def Wait(self, should_stop: Callable[[], bool]) -> str:
+    """Blocks until the queue is signalled or the poll time has passed.
+
+    Args:
+      should_stop: Callable returning True if the handler loop is stopping.
+
+    Returns:
+      A trigger name: "notification" if the queue was signalled, "poll" if
+      the wait timed out. Entries leased right after a non-empty lease are
+      accounted with the "backlog" trigger by the handler loops.
+    """
+    deadline = time.monotonic() + self._poll_time
+    while not should_stop():
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        break
+
+      generation = self._notifier.WaitForChange(
+          self._local_generation, min(self._check_interval, remaining)
+      )
+      if generation != self._local_generation:
+        self._local_generation = generation
+        return "notification"
+
+      generation = self._read_generation(self._queue)
+      if generation != self._db_generation:
+        self._db_generation = generation
+        return "notification"
+
+    return "poll"
+
+
+def NotifyQueue(cursor: cursors.Cursor, queue: str) -> None:
+  """Signals handler loops on other hosts that the queue has new entries.
+
+  Must be called in the transaction writing the entries, so that the signal
+  becomes visible together with them.
+
+  Args:
+    cursor: Cursor of the writing transaction.
+    queue: Name of the queue that was written to.
+  """
+  cursor.execute(
+      "INSERT INTO queue_notifications (queue, shard, generation) "
+      "VALUES (%s, %s, 1) "
+      "ON DUPLICATE KEY UPDATE generation = generation + 1",
+      (queue, random.UInt16() % _QUEUE_NOTIFICATION_SHARDS),
+  )
+
+
+def ReadQueueNotificationGeneration(cursor: cursors.Cursor, queue: str) -> int:
+  """Returns a number that changes whenever the queue gets new entries."""
+  cursor.execute(
+      "SELECT SUM(generation) FROM queue_notifications WHERE queue = %s",
+      (queue,),
+  )
+  [(generation,)] = cursor.fetchall()
+  return int(generation or 0)
+
+
+def _RecordQueueWakeupLatency(
+    queue: str, trigger: str, enqueue_time_micros: int
+) -> None:
+  now = rdfvalue.RDFDatetime.Now().AsMicrosecondsSinceEpoch()
+  latency = max(0, now - enqueue_time_micros) / 1e6
+  QUEUE_WAKEUP_LATENCY.RecordEvent(latency, fields=[queue, trigger])
+
+
+_ROW_ID_COLUMN_BY_TABLE_NAME = {
+    "flow_results": "result_id",
+    "flow_errors": "error_id",
+}
+
+_FLOW_REQUEST_COLUMNS = (
+    "request, needs_processing, responses_expected, "
+    "callback_state, next_response_id, "
+    "UNIX_TIMESTAMP(timestamp)"
+)
+
+
+def _FlowRequestFromRow(
+    req: bytes,
+    needs_processing: bool,
+    responses_expected: Optional[int],
+    callback_state: Optional[str],
+    next_response_id: Optional[int],
+    ts: Any,
+) -> flows_pb2.FlowRequest:
+  """Builds a flow request from a `_FLOW_REQUEST_COLUMNS` row."""
+  request = flows_pb2.FlowRequest()
+  request.ParseFromString(req)
+  request.needs_processing = needs_processing
+  if responses_expected is not None:
+    request.nr_responses_expected = responses_expected
+  request.callback_state = callback_state
+  request.next_response_id = next_response_id
+  request.timestamp = int(mysql_utils.TimestampToRDFDatetime(ts))
+  return request
+
+
+def _FlowResponseFromRow(
+    res: Optional[bytes],
+    status: Optional[bytes],
+    iterator: Optional[bytes],
+    ts: Any,
+) -> Union[
+    flows_pb2.FlowResponse, flows_pb2.FlowStatus, flows_pb2.FlowIterator
+]:
+  """Builds a flow response, status or iterator from a `flow_responses` row."""
+  if status:
+    response = flows_pb2.FlowStatus()
+    response.ParseFromString(status)
+  elif iterator:
+    response = flows_pb2.FlowIterator()
+    response.ParseFromString(iterator)
+  else:
+    response = flows_pb2.FlowResponse()
+    response.ParseFromString(res)
+  response.timestamp = int(mysql_utils.TimestampToRDFDatetime(ts))
+  return response
+
+
 class MySQLDBFlowMixin:
   """MySQLDB mixin for flow handling."""
 
   flow_processing_request_handler_pool: threadpool.ThreadPool
   flow_processing_request_handler_thread: threading.Thread
+  flow_processing_request_notifier: QueueNotifier
   handler_thread: threading.Thread
+  message_handler_request_notifier: QueueNotifier
   _WRITE_ROWS_BATCH_SIZE: int
   _DELETE_ROWS_BATCH_SIZE: int
 
@@ -61,6 +268,9 @@ class MySQLDBFlowMixin:
     query += ",".join(value_templates)
     cursor.execute(query, args)
 
+    NotifyQueue(cursor, _MESSAGE_HANDLER_QUEUE)
+    mysql_utils.CallAfterCommit(self.message_handler_request_notifier.Notify)
+
   @db_utils.CallLogged
   @db_utils.CallAccounted
   @mysql_utils.WithTransaction(readonly=True)
@@ -142,6 +352,10 @@ class MySQLDBFlowMixin:
 
   _MESSAGE_HANDLER_POLL_TIME_SECS = 5
 
+  # How often idle handler loops check the queue_notifications table for
+  # entries written by other processes.
+  _QUEUE_NOTIFICATION_CHECK_INTERVAL_SECS = 0.25
+
   def _MessageHandlerLoop(
       self,
       handler: Callable[[Iterable[objects_pb2.MessageHandlerRequest]], None],
@@ -149,15 +363,32 @@ class MySQLDBFlowMixin:
       limit: int = 1000,
   ) -> None:
     """Loop to handle outstanding requests."""
+    waiter = None
+    trigger = "poll"
     while not self.handler_stop:
       try:
+        if waiter is None:
+          waiter = _QueueWaiter(
+              _MESSAGE_HANDLER_QUEUE,
+              self.message_handler_request_notifier,
+              self._ReadQueueNotificationGeneration,
+              self._QUEUE_NOTIFICATION_CHECK_INTERVAL_SECS,
+              self._MESSAGE_HANDLER_POLL_TIME_SECS,
+          )
+
         msgs = self._LeaseMessageHandlerRequests(lease_time, limit)
         if msgs:
+          for msg in msgs:
+            _RecordQueueWakeupLatency(
+                _MESSAGE_HANDLER_QUEUE, trigger, msg.timestamp
+            )
           handler(msgs)
+          trigger = "backlog"
         else:
-          time.sleep(self._MESSAGE_HANDLER_POLL_TIME_SECS)
+          trigger = waiter.Wait(lambda: self.handler_stop)
       except Exception as e:  # pylint: disable=broad-except
         logging.exception("_LeaseMessageHandlerRequests raised %s.", e)
+        time.sleep(self._MESSAGE_HANDLER_POLL_TIME_SECS)
 
   @db_utils.CallAccounted
   @mysql_utils.WithTransaction()
@@ -640,6 +871,19 @@ class MySQLDBFlowMixin:
     query += ", ".join(templates)
     cursor.execute(query, args)
 
+    NotifyQueue(cursor, _FLOW_PROCESSING_QUEUE)
+    mysql_utils.CallAfterCommit(self.flow_processing_request_notifier.Notify)
+
+  @mysql_utils.WithTransaction(readonly=True)
+  def _ReadQueueNotificationGeneration(
+      self,
+      queue: str,
+      cursor: Optional[cursors.Cursor] = None,
+  ) -> int:
+    """Returns a number that changes whenever the queue gets new entries."""
+    assert cursor is not None
+    return ReadQueueNotificationGeneration(cursor, queue)
+
   @db_utils.CallLogged
   @db_utils.CallAccounted
   @mysql_utils.WithTransaction()
@@ -1249,45 +1493,132 @@ class MySQLDBFlowMixin:
     cursor.execute(query, args)
 
     responses = {}
-    for res, status, iterator, ts in cursor.fetchall():
-      if status:
-        response = flows_pb2.FlowStatus()
-        response.ParseFromString(status)
-      elif iterator:
-        response = flows_pb2.FlowIterator()
-        response.ParseFromString(iterator)
-      else:
-        response = flows_pb2.FlowResponse()
-        response.ParseFromString(res)
-      response.timestamp = int(mysql_utils.TimestampToRDFDatetime(ts))
+    for row in cursor.fetchall():
+      response = _FlowResponseFromRow(*row)
       responses.setdefault(response.request_id, []).append(response)
 
     query = (
-        "SELECT request, needs_processing, responses_expected, "
-        "callback_state, next_response_id, "
-        "UNIX_TIMESTAMP(timestamp) "
+        f"SELECT {_FLOW_REQUEST_COLUMNS} "
         "FROM flow_requests "
         "WHERE client_id=%s AND flow_id=%s"
     )
     cursor.execute(query, args)
 
     requests = {}
+    for row in cursor.fetchall():
+      request = _FlowRequestFromRow(*row)
+      requests[request.request_id] = (
+          request,
+          sorted(
+              responses.get(request.request_id, []), key=lambda r: r.response_id
+          ),
+      )
+
+    return requests
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  @mysql_utils.WithTransaction(readonly=True)
+  def ReadFlowRequestsReadyForProcessing(
+      self,
+      client_id: str,
+      flow_id: str,
+      next_needed_request: int,
+      cursor: Optional[cursors.Cursor] = None,
+  ) -> dict[
+      int,
+      tuple[
+          flows_pb2.FlowRequest,
+          Sequence[
+              Union[
+                  flows_pb2.FlowResponse,
+                  flows_pb2.FlowStatus,
+                  flows_pb2.FlowIterator,
+              ],
+          ],
+      ],
+  ]:
+    """Reads only the requests of a flow that the worker can process now."""
+    assert cursor is not None
+
+    args = [db_utils.ClientIDToInt(client_id), db_utils.FlowIDToInt(flow_id)]
+
+    # Decide which requests are processable by looking at the small columns
+    # only, without fetching any of the serialized requests or responses.
+    query = (
+        "SELECT request_id, needs_processing, callback_state, "
+        "next_response_id "
+        "FROM flow_requests "
+        "WHERE client_id=%s AND flow_id=%s AND request_id>=%s"
+    )
+    cursor.execute(query, args + [next_needed_request])
+
+    needs_processing_by_id = {}
+    next_response_id_by_id = {}
     for (
-        req,
+        request_id,
         needs_processing,
-        responses_expected,
         callback_state,
         next_response_id,
-        ts,
     ) in cursor.fetchall():
-      request = flows_pb2.FlowRequest()
-      request.ParseFromString(req)
-      request.needs_processing = needs_processing
-      if responses_expected is not None:
-        request.nr_responses_expected = responses_expected
-      request.callback_state = callback_state
-      request.next_response_id = next_response_id
-      request.timestamp = int(mysql_utils.TimestampToRDFDatetime(ts))
+      needs_processing_by_id[request_id] = needs_processing
+      if callback_state:
+        next_response_id_by_id[request_id] = next_response_id or 0
+
+    # Completed requests form the `[next_needed_request, completed_end)` range.
+    completed_end = next_needed_request
+    while needs_processing_by_id.get(completed_end):
+      completed_end += 1
+
+    incremental_ids = sorted(
+        request_id
+        for request_id in next_response_id_by_id
+        if request_id >= completed_end
+    )
+
+    request_conditions = []
+    request_args = []
+    response_conditions = []
+    response_args = []
+    if completed_end > next_needed_request:
+      request_conditions.append("(request_id>=%s AND request_id<%s)")
+      request_args.extend([next_needed_request, completed_end])
+      response_conditions.append("(request_id>=%s AND request_id<%s)")
+      response_args.extend([next_needed_request, completed_end])
+    if incremental_ids:
+      request_conditions.append(
+          "request_id IN ({})".format(",".join(["%s"] * len(incremental_ids)))
+      )
+      request_args.extend(incremental_ids)
+      for request_id in incremental_ids:
+        response_conditions.append("(request_id=%s AND response_id>=%s)")
+        response_args.extend([request_id, next_response_id_by_id[request_id]])
+
+    if not request_conditions:
+      return {}
+
+    query = (
+        "SELECT response, status, iterator, UNIX_TIMESTAMP(timestamp) "
+        "FROM flow_responses "
+        "WHERE client_id=%s AND flow_id=%s AND ({})"
+    ).format(" OR ".join(response_conditions))
+    cursor.execute(query, args + response_args)
+
+    responses = {}
+    for row in cursor.fetchall():
+      response = _FlowResponseFromRow(*row)
+      responses.setdefault(response.request_id, []).append(response)
+
+    query = (
+        f"SELECT {_FLOW_REQUEST_COLUMNS} "
+        "FROM flow_requests "
+        "WHERE client_id=%s AND flow_id=%s AND ({})"
+    ).format(" OR ".join(request_conditions))
+    cursor.execute(query, args + request_args)
+
+    requests = {}
+    for row in cursor.fetchall():
+      request = _FlowRequestFromRow(*row)
       requests[request.request_id] = (
           request,
           sorted(
@@ -1514,21 +1845,40 @@ class MySQLDBFlowMixin:
     """The main loop for the flow processing request queue."""
     self.flow_processing_request_handler_pool.Start()
 
+    waiter = None
+    trigger = "poll"
     while not self.flow_processing_request_handler_stop:
       thread_pool = self.flow_processing_request_handler_pool
       free_threads = thread_pool.max_threads - thread_pool.busy_threads
       if free_threads == 0:
-        time.sleep(self._FLOW_REQUEST_POLL_TIME_SECS)
+        time.sleep(self._QUEUE_NOTIFICATION_CHECK_INTERVAL_SECS)
         continue
       try:
+        if waiter is None:
+          waiter = _QueueWaiter(
+              _FLOW_PROCESSING_QUEUE,
+              self.flow_processing_request_notifier,
+              self._ReadQueueNotificationGeneration,
+              self._QUEUE_NOTIFICATION_CHECK_INTERVAL_SECS,
+              self._FLOW_REQUEST_POLL_TIME_SECS,
+          )
+
         msgs = self._LeaseFlowProcessingRequests(free_threads)
         if msgs:
           for m in msgs:
+            _RecordQueueWakeupLatency(
+                _FLOW_PROCESSING_QUEUE,
+                trigger,
+                max(m.creation_time, m.delivery_time),
+            )
             self.flow_processing_request_handler_pool.AddTask(
                 target=handler, args=(m,)
             )
+          trigger = "backlog"
         else:
-          time.sleep(self._FLOW_REQUEST_POLL_TIME_SECS)
+          trigger = waiter.Wait(
+              lambda: self.flow_processing_request_handler_stop
+          )
 
       except Exception as e:  # pylint: disable=broad-except
         logging.exception("_FlowProcessingRequestHandlerLoop raised %s.", e)
@@ -1628,16 +1978,42 @@ class MySQLDBFlowMixin:
       with_tag: Optional[str] = None,
       with_type: Optional[str] = None,
       with_substring: Optional[str] = None,
+      after: Optional[tuple[int, int]] = None,
       cursor: Optional[cursors.Cursor] = None,
-  ) -> Union[Sequence[flows_pb2.FlowResult], Sequence[flows_pb2.FlowError]]:
-    """Reads flow results/errors of a given flow using given query options."""
+  ) -> Union[
+      Sequence[tuple[tuple[int, int], flows_pb2.FlowResult]],
+      Sequence[tuple[tuple[int, int], flows_pb2.FlowError]],
+  ]:
+    """Reads flow results/errors of a given flow using given query options.
+
+    Args:
+      table_name: Either "flow_results" or "flow_errors".
+      result_cls: Proto class of the returned items.
+      client_id: The client id on which the flow is running.
+      flow_id: The id of the flow to read results/errors for.
+      offset: Number of matching rows to skip.
+      count: Maximum number of rows to return.
+      with_tag: Only rows having the specified tag will be returned.
+      with_type: Only rows of the specified type will be returned.
+      with_substring: Only rows with payloads containing the substring will be
+        returned.
+      after: (timestamp, row id) position to continue reading after. Used for
+        keyset pagination instead of a (potentially large) offset.
+      cursor: MySQL cursor.
+
+    Returns:
+      A sequence of ((timestamp, row id), result/error) tuples sorted by
+      timestamp.
+    """
     assert cursor is not None
 
     client_id_int = db_utils.ClientIDToInt(client_id)
     flow_id_int = db_utils.FlowIDToInt(flow_id)
+    id_column = _ROW_ID_COLUMN_BY_TABLE_NAME[table_name]
 
     query = f"""
-        SELECT payload, payload_any, type, UNIX_TIMESTAMP(timestamp), tag, hunt_id
+        SELECT {id_column}, payload, payload_any, type,
+               UNIX_TIMESTAMP(timestamp), tag, hunt_id
         FROM {table_name}
         FORCE INDEX ({table_name}_by_client_id_flow_id_timestamp)
         WHERE client_id = %s AND flow_id = %s """
@@ -1655,7 +2031,17 @@ class MySQLDBFlowMixin:
       query += "AND payload LIKE %s "
       args.append("%{}%".format(with_substring))
 
-    query += "ORDER BY timestamp ASC LIMIT %s OFFSET %s"
+    if after is not None:
+      after_timestamp, after_id = after
+      after_timestamp = mysql_utils.MicrosecondsSinceEpochToTimestamp(
+          after_timestamp
+      )
+      query += f"""
+          AND (timestamp > FROM_UNIXTIME(%s) OR
+               (timestamp = FROM_UNIXTIME(%s) AND {id_column} > %s)) """
+      args.extend([after_timestamp, after_timestamp, after_id])
+
+    query += f"ORDER BY timestamp ASC, {id_column} ASC LIMIT %s OFFSET %s"
     args.append(count)
     args.append(offset)
 
@@ -1663,6 +2049,7 @@ class MySQLDBFlowMixin:
 
     ret = []
     for (
+        row_id,
         serialized_payload,
         payload_any,
         payload_type,
@@ -1698,7 +2085,7 @@ class MySQLDBFlowMixin:
       if tag:
         result.tag = tag
 
-      ret.append(result)
+      ret.append(((timestamp, row_id), result))
 
     return ret
 
@@ -1717,7 +2104,7 @@ class MySQLDBFlowMixin:
     if with_proto_type_url is not None:
       with_type = db_utils.TypeURLToRDFTypeName(with_proto_type_url)
 
-    return self._ReadFlowResultsOrErrors(
+    rows = self._ReadFlowResultsOrErrors(
         "flow_results",
         flows_pb2.FlowResult,
         client_id,
@@ -1728,6 +2115,42 @@ class MySQLDBFlowMixin:
         with_type=with_type,
         with_substring=with_substring,
     )
+    return [result for _, result in rows]
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  def ReadFlowResultsPage(
+      self,
+      client_id: str,
+      flow_id: str,
+      count: int,
+      continuation_token: Optional[bytes] = None,
+      with_tag: Optional[str] = None,
+      with_type: Optional[str] = None,
+      with_proto_type_url: Optional[str] = None,
+      with_substring: Optional[str] = None,
+  ) -> db.FlowResultsPage:
+    """Reads a page of flow results continuing after a given position."""
+    if with_proto_type_url is not None:
+      with_type = db_utils.TypeURLToRDFTypeName(with_proto_type_url)
+
+    after = None
+    if continuation_token is not None:
+      after = db_utils.DecodeContinuationToken(continuation_token, (int, int))
+
+    rows = self._ReadFlowResultsOrErrors(
+        "flow_results",
+        flows_pb2.FlowResult,
+        client_id,
+        flow_id,
+        0,
+        count,
+        with_tag=with_tag,
+        with_type=with_type,
+        with_substring=with_substring,
+        after=after,
+    )
+    return db_utils.FlowResultsPageFromKeyedResults(rows, count)
 
   @db_utils.CallLogged
   @db_utils.CallAccounted
@@ -1847,7 +2270,7 @@ class MySQLDBFlowMixin:
     # concept. Error is a kind of a negative result. Given the structural
     # similarity, we can share large chunks of implementation between
     # errors and results DB code.
-    return self._ReadFlowResultsOrErrors(
+    rows = self._ReadFlowResultsOrErrors(
         "flow_errors",
         flows_pb2.FlowError,
         client_id,
@@ -1857,6 +2280,7 @@ class MySQLDBFlowMixin:
         with_tag=with_tag,
         with_type=with_type,
     )
+    return [error for _, error in rows]
 
   def CountFlowErrors(
       self,
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""Benchmarks for reading requests of large flows from the MySQL database."""
+
+from absl import app
+
+from grr_response_proto import flows_pb2
+from grr_response_server.databases import db_test_utils
+from grr_response_server.databases import mysql_test
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+
+class MysqlFlowRequestsBenchmark(
+    mysql_test.MysqlTestBase,
+    benchmark_test_lib.AverageMicroBenchmarks,
+):
+  """Compares reading all flow requests with reading processable ones only."""
+
+  REPEATS = 10
+
+  # The flow has `_NUM_PENDING_REQUESTS` requests that are still waiting for
+  # the client, every one of them with `_NUM_RESPONSES` responses, and a single
+  # completed request that the worker can process.
+  _NUM_PENDING_REQUESTS = 10000
+  _NUM_RESPONSES = 5
+
+  def setUp(self):
+    super().setUp()
+
+    self.client_id = db_test_utils.InitializeClient(self.db)
+    self.flow_id = db_test_utils.InitializeFlow(
+        self.db, self.client_id, next_request_to_process=1
+    )
+
+    requests = []
+    responses = []
+    for request_id in range(1, self._NUM_PENDING_REQUESTS + 2):
+      requests.append(
+          flows_pb2.FlowRequest(
+              client_id=self.client_id,
+              flow_id=self.flow_id,
+              request_id=request_id,
+              needs_processing=request_id == 1,
+          )
+      )
+      for response_id in range(1, self._NUM_RESPONSES + 1):
+        responses.append(
+            flows_pb2.FlowResponse(
+                client_id=self.client_id,
+                flow_id=self.flow_id,
+                request_id=request_id,
+                response_id=response_id,
+            )
+        )
+
+    self.db.WriteFlowRequests(requests)
+    self.db.WriteFlowResponses(responses)
+
+  def testReadFlowRequests(self):
+    """Reads requests of a flow with many outstanding requests."""
+
+    def ReadAll():
+      return len(self.db.ReadFlowRequests(self.client_id, self.flow_id))
+
+    def ReadReadyForProcessing():
+      return len(
+          self.db.ReadFlowRequestsReadyForProcessing(
+              self.client_id, self.flow_id, next_needed_request=1
+          )
+      )
+
+    self.TimeIt(ReadAll, "ReadFlowRequests")
+    self.TimeIt(ReadReadyForProcessing, "ReadFlowRequestsReadyForProcessing")
+
+
+if __name__ == "__main__":
+  app.run(test_lib.main)
@@ -1,8 +1,11 @@
 #!/usr/bin/env python
+import threading
+
 from absl import app
 from absl.testing import absltest
 
 from grr_response_server.databases import db_flows_test
+from grr_response_server.databases import mysql_flows
 from grr_response_server.databases import mysql_test
 from grr.test_lib import test_lib
 
@@ -15,5 +18,47 @@ class MysqlFlowTest(
   pass
 
 
+class QueueWaiterTest(absltest.TestCase):
+
+  def _Waiter(self, notifier, generations, poll_time=10.0):
+    return mysql_flows._QueueWaiter(
+        "foo",
+        notifier,
+        lambda queue: generations[queue],
+        check_interval=0.01,
+        poll_time=poll_time,
+    )
+
+  def testReturnsPollOnTimeout(self):
+    waiter = self._Waiter(mysql_flows.QueueNotifier(), {"foo": 0}, 0.05)
+    self.assertEqual(waiter.Wait(lambda: False), "poll")
+
+  def testWakesUpOnLocalNotification(self):
+    notifier = mysql_flows.QueueNotifier()
+    waiter = self._Waiter(notifier, {"foo": 0})
+
+    timer = threading.Timer(0.05, notifier.Notify)
+    timer.start()
+    try:
+      self.assertEqual(waiter.Wait(lambda: False), "notification")
+    finally:
+      timer.join()
+
+  def testWakesUpOnRemoteNotification(self):
+    generations = {"foo": 0}
+    waiter = self._Waiter(mysql_flows.QueueNotifier(), generations)
+
+    generations["foo"] = 1
+    self.assertEqual(waiter.Wait(lambda: False), "notification")
+
+  def testDoesNotWakeUpTwiceForSameNotification(self):
+    notifier = mysql_flows.QueueNotifier()
+    waiter = self._Waiter(notifier, {"foo": 0}, 0.05)
+
+    notifier.Notify()
+    self.assertEqual(waiter.Wait(lambda: False), "notification")
+    self.assertEqual(waiter.Wait(lambda: False), "poll")
+
+
 if __name__ == "__main__":
   app.run(test_lib.main)
@@ -12,6 +12,13 @@ from grr_response_server.databases import db_utils
 from grr_response_server.databases import mysql_utils
 
 
+def _BumpForemanRulesGeneration(cursor: MySQLdb.cursors.Cursor) -> None:
+  cursor.execute(
+      "INSERT INTO foreman_rules_generation (id, generation) VALUES (0, 1) "
+      "ON DUPLICATE KEY UPDATE generation = generation + 1"
+  )
+
+
 class MySQLDBForemanRulesMixin(object):
   """MySQLDB mixin for foreman rules related functions."""
 
@@ -43,6 +50,7 @@ class MySQLDBForemanRulesMixin(object):
             "rule_bytes": rule.SerializeToString(),
         },
     )
+    _BumpForemanRulesGeneration(cursor)
 
   @db_utils.CallLogged
   @db_utils.CallAccounted
@@ -53,6 +61,8 @@ class MySQLDBForemanRulesMixin(object):
     assert cursor is not None
     query = "DELETE FROM foreman_rules WHERE hunt_id=%s"
     cursor.execute(query, [hunt_id])
+    if cursor.rowcount:
+      _BumpForemanRulesGeneration(cursor)
 
   @db_utils.CallLogged
   @db_utils.CallAccounted
@@ -81,3 +91,18 @@ class MySQLDBForemanRulesMixin(object):
         "DELETE FROM foreman_rules WHERE expiration_time < FROM_UNIXTIME(%s)",
         [mysql_utils.MicrosecondsSinceEpochToTimestamp(now)],
     )
+    if cursor.rowcount:
+      _BumpForemanRulesGeneration(cursor)
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  @mysql_utils.WithTransaction(readonly=True)
+  def ReadForemanRulesGeneration(
+      self, cursor: Optional[MySQLdb.cursors.Cursor] = None
+  ) -> int:
+    assert cursor is not None
+    cursor.execute(
+        "SELECT generation FROM foreman_rules_generation WHERE id = 0"
+    )
+    row = cursor.fetchone()
+    return row[0] if row else 0
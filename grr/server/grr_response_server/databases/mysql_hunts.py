@@ -704,7 +704,6 @@ class MySQLDBHuntMixin(object):
 
   @db_utils.CallLogged
   @db_utils.CallAccounted
-  @mysql_utils.WithTransaction(readonly=True)
   def ReadHuntResults(
       self,
       hunt_id: str,
@@ -715,17 +714,75 @@ class MySQLDBHuntMixin(object):
       with_proto_type_url: Optional[str] = None,
       with_substring: Optional[str] = None,
       with_timestamp: Optional[rdfvalue.RDFDatetime] = None,
-      cursor: Optional[cursors.Cursor] = None,
   ) -> Sequence[flows_pb2.FlowResult]:
     """Reads hunt results of a given hunt using given query options."""
+    rows = self._ReadHuntResults(
+        hunt_id,
+        offset,
+        count,
+        with_tag=with_tag,
+        with_type=with_type,
+        with_proto_type_url=with_proto_type_url,
+        with_substring=with_substring,
+        with_timestamp=with_timestamp,
+    )
+    return [result for _, result in rows]
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  def ReadHuntResultsPage(
+      self,
+      hunt_id: str,
+      count: int,
+      continuation_token: Optional[bytes] = None,
+      with_tag: Optional[str] = None,
+      with_type: Optional[str] = None,
+      with_proto_type_url: Optional[str] = None,
+      with_substring: Optional[str] = None,
+      with_timestamp: Optional[rdfvalue.RDFDatetime] = None,
+  ) -> db.FlowResultsPage:
+    """Reads a page of hunt results continuing after a given position."""
+    after = None
+    if continuation_token is not None:
+      after = db_utils.DecodeContinuationToken(continuation_token, (int, int))
+
+    rows = self._ReadHuntResults(
+        hunt_id,
+        0,
+        count,
+        with_tag=with_tag,
+        with_type=with_type,
+        with_proto_type_url=with_proto_type_url,
+        with_substring=with_substring,
+        with_timestamp=with_timestamp,
+        after=after,
+    )
+
+    return db_utils.FlowResultsPageFromKeyedResults(rows, count)
+
+  @mysql_utils.WithTransaction(readonly=True, replica=True)
+  def _ReadHuntResults(
+      self,
+      hunt_id: str,
+      offset: int,
+      count: int,
+      with_tag: Optional[str] = None,
+      with_type: Optional[str] = None,
+      with_proto_type_url: Optional[str] = None,
+      with_substring: Optional[str] = None,
+      with_timestamp: Optional[rdfvalue.RDFDatetime] = None,
+      after: Optional[tuple[int, int]] = None,
+      cursor: Optional[cursors.Cursor] = None,
+  ) -> Sequence[tuple[tuple[int, int], flows_pb2.FlowResult]]:
+    """Reads ((timestamp, result id), result) tuples sorted by timestamp."""
     assert cursor is not None
     hunt_id_int = db_utils.HuntIDToInt(hunt_id)
 
     query = """
-    SELECT client_id, flow_id, payload, type,
+    SELECT result_id, client_id, flow_id, payload, type,
            UNIX_TIMESTAMP(timestamp), tag
       FROM flow_results
-           FORCE INDEX(flow_results_hunt_id_flow_id_timestamp)
+           FORCE INDEX(flow_results_hunt_id_timestamp_result_id)
      WHERE hunt_id = %s AND flow_id = %s
     """
 
@@ -749,7 +806,15 @@ class MySQLDBHuntMixin(object):
       query += "AND timestamp = FROM_UNIXTIME(%s) "
       args.append(mysql_utils.RDFDatetimeToTimestamp(with_timestamp))
 
-    query += "ORDER BY timestamp ASC LIMIT %s OFFSET %s"
+    if after is not None:
+      after_timestamp = mysql_utils.MicrosecondsSinceEpochToTimestamp(after[0])
+      query += """
+      AND (timestamp > FROM_UNIXTIME(%s) OR
+           (timestamp = FROM_UNIXTIME(%s) AND result_id > %s))
+      """
+      args.extend([after_timestamp, after_timestamp, after[1]])
+
+    query += "ORDER BY timestamp ASC, result_id ASC LIMIT %s OFFSET %s"
     args.append(count)
     args.append(offset)
 
@@ -757,6 +822,7 @@ class MySQLDBHuntMixin(object):
 
     ret = []
     for (
+        result_id,
         client_id_int,
         flow_id_int,
         serialized_payload,
@@ -787,13 +853,13 @@ class MySQLDBHuntMixin(object):
       if tag is not None:
         result.tag = tag
 
-      ret.append(result)
+      ret.append(((result.timestamp, result_id), result))
 
     return ret
 
   @db_utils.CallLogged
   @db_utils.CallAccounted
-  @mysql_utils.WithTransaction(readonly=True)
+  @mysql_utils.WithTransaction(readonly=True, replica=True)
   def CountHuntResults(
       self,
       hunt_id: str,
@@ -831,7 +897,7 @@ class MySQLDBHuntMixin(object):
 
   @db_utils.CallLogged
   @db_utils.CallAccounted
-  @mysql_utils.WithTransaction(readonly=True)
+  @mysql_utils.WithTransaction(readonly=True, replica=True)
   def CountHuntResultsByType(
       self,
       hunt_id: str,
@@ -0,0 +1,6 @@
+CREATE TABLE queue_notifications(
+    queue VARCHAR(64) NOT NULL,
+    shard SMALLINT UNSIGNED NOT NULL,
+    generation BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (queue, shard)
+);
@@ -0,0 +1,5 @@
+CREATE TABLE foreman_rules_generation(
+    id TINYINT UNSIGNED NOT NULL,
+    generation BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (id)
+);
@@ -0,0 +1,4 @@
+-- Lets keyword searches walk the clients of a keyword in client id order and
+-- check the keyword timestamp without reading the table rows.
+CREATE INDEX client_keywords_by_keyword_hash_client_id_timestamp
+    ON client_keywords(keyword_hash, client_id, timestamp);
@@ -0,0 +1,23 @@
+-- Materialize pointers to the latest stat and hash entries of every path, so
+-- that reading and listing paths does not need a correlated subquery (sorting
+-- all the entries of the path) for every returned row. The pointers are
+-- maintained by `WritePathInfos`.
+ALTER TABLE client_paths
+  ADD COLUMN last_stat_entry_id BIGINT NULL DEFAULT NULL,
+  ADD COLUMN last_hash_entry_id BIGINT NULL DEFAULT NULL;
+
+UPDATE client_paths AS p
+   SET p.last_stat_entry_id = (
+         SELECT s.id
+           FROM client_path_stat_entries AS s
+          WHERE (s.client_id, s.path_type, s.path_id) =
+                (p.client_id, p.path_type, p.path_id)
+       ORDER BY s.timestamp DESC, s.id DESC
+          LIMIT 1),
+       p.last_hash_entry_id = (
+         SELECT h.id
+           FROM client_path_hash_entries AS h
+          WHERE (h.client_id, h.path_type, h.path_id) =
+                (p.client_id, p.path_type, p.path_id)
+       ORDER BY h.timestamp DESC, h.id DESC
+          LIMIT 1);
@@ -0,0 +1,6 @@
+-- Lets hunt result pages seek to the (timestamp, result_id) keyset position of
+-- the previous page and read the results in page order, instead of reading and
+-- sorting all results of the hunt for every page. `flow_id` is included so
+-- that the `flow_id = hunt_id` filter is evaluated without reading the rows.
+CREATE INDEX flow_results_hunt_id_timestamp_result_id
+    ON flow_results(hunt_id, timestamp, result_id, flow_id);
@@ -0,0 +1,9 @@
+-- Slow database call samples recorded by the database call profiling of all
+-- server processes (`Database.profiling_enabled`). Only the most recent
+-- samples are kept.
+CREATE TABLE slow_database_calls(
+    call_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    timestamp TIMESTAMP(6) NOT NULL DEFAULT NOW(6),
+    details MEDIUMBLOB NOT NULL,
+    PRIMARY KEY (call_id)
+);
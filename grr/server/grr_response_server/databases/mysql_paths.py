@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """The MySQL database methods for path handling."""
 from collections.abc import Collection, Iterable, Sequence
-from typing import Optional
+from typing import Any, Optional
 
 import MySQLdb
 
@@ -14,6 +14,97 @@ from grr_response_server.models import paths as models_paths
 from grr_response_server.rdfvalues import objects as rdf_objects
 
 
+# Maximum size of a single multi-row upsert statement. It is kept well below
+# `mysql.MAX_PACKET_SIZE` (the minimal `max_allowed_packet` GRR requires) to
+# leave room for escaping of the values.
+_MAX_UPSERT_QUERY_SIZE = 16 << 20
+
+
+def _EstimateRowSize(row: Sequence[Any]) -> int:
+  """Estimates the size of a row of values in an SQL statement."""
+  size = 0
+  for value in row:
+    if isinstance(value, (bytes, str)):
+      # Binary values can double in size when escaped.
+      size += 2 * len(value) + 4
+    else:
+      size += 24
+  return size
+
+
+def _ExecuteMultiRowQuery(
+    cursor: MySQLdb.cursors.Cursor,
+    query: str,
+    row_template: str,
+    rows: Sequence[Sequence[Any]],
+) -> None:
+  """Executes a query inserting given rows in as few statements as possible.
+
+  Args:
+    cursor: The MySQL cursor to execute the query with.
+    query: The query to execute, with a `{values}` placeholder for the rows.
+    row_template: A template with value placeholders for a single row.
+    rows: Rows of values to insert.
+  """
+  chunk = []
+  chunk_size = 0
+
+  def Flush():
+    values = ", ".join([row_template] * len(chunk))
+    cursor.execute(
+        query.format(values=values), [value for row in chunk for value in row]
+    )
+
+  for row in rows:
+    row_size = _EstimateRowSize(row) + len(row_template)
+    if chunk and chunk_size + row_size > _MAX_UPSERT_QUERY_SIZE:
+      Flush()
+      chunk = []
+      chunk_size = 0
+
+    chunk.append(row)
+    chunk_size += row_size
+
+  if chunk:
+    Flush()
+
+
+def _UpdateLastEntryIds(
+    cursor: MySQLdb.cursors.Cursor,
+    entries_table: str,
+    last_entry_id_column: str,
+    keys: Sequence[tuple[int, int, bytes]],
+) -> None:
+  """Points given paths to their latest stat or hash entries.
+
+  `client_paths` keeps the ids of the latest stat and hash entries of every
+  path, so that reading and listing paths does not need to look them up.
+
+  Args:
+    cursor: The MySQL cursor to execute the query with.
+    entries_table: Either `client_path_stat_entries` or
+      `client_path_hash_entries`.
+    last_entry_id_column: The `client_paths` column pointing to the latest entry
+      in `entries_table`.
+    keys: Keys (client id, path type and path id) of paths to update.
+  """
+  # Entries are not guaranteed to be written in timestamp order, so the latest
+  # entry is looked up instead of taking the one that has just been inserted.
+  query = f"""
+    UPDATE client_paths AS p
+       SET p.{last_entry_id_column} = (
+             SELECT e.id
+               FROM {entries_table} AS e
+              WHERE (e.client_id, e.path_type, e.path_id) =
+                    (p.client_id, p.path_type, p.path_id)
+           ORDER BY e.timestamp DESC, e.id DESC
+              LIMIT 1)
+     WHERE (p.client_id, p.path_type, p.path_id) IN ({{values}})
+  """
+  unique_keys = list(dict.fromkeys(keys))
+  _ExecuteMultiRowQuery(cursor, query, "(%s, %s, %s)", unique_keys)
+
+
 class MySQLDBPathMixin(object):
   """MySQLDB mixin for path related functions."""
 
@@ -72,13 +163,8 @@ class MySQLDBPathMixin(object):
           ORDER BY timestamp DESC
              LIMIT 1) AS s
         ON TRUE
- LEFT JOIN (SELECT timestamp
-              FROM client_path_stat_entries
-             WHERE (client_id, path_type, path_id) =
-                   (%(client_id)s, %(path_type)s, %(path_id)s)
-          ORDER BY timestamp DESC
-             LIMIT 1) AS ls
-        ON TRUE
+ LEFT JOIN client_path_stat_entries AS ls
+        ON ls.id = p.last_stat_entry_id
  LEFT JOIN (SELECT hash_entry
               FROM client_path_hash_entries
              WHERE (client_id, path_type, path_id) =
@@ -87,13 +173,8 @@ class MySQLDBPathMixin(object):
           ORDER BY timestamp DESC
              LIMIT 1) AS h
         ON TRUE
- LEFT JOIN (SELECT timestamp
-              FROM client_path_hash_entries
-             WHERE (client_id, path_type, path_id) =
-                   (%(client_id)s, %(path_type)s, %(path_id)s)
-          ORDER BY timestamp DESC
-             LIMIT 1) AS lh
-        ON TRUE
+ LEFT JOIN client_path_hash_entries AS lh
+        ON lh.id = p.last_hash_entry_id
      WHERE (p.client_id, p.path_type, p.path_id) =
            (%(client_id)s, %(path_type)s, %(path_id)s)
     """
@@ -164,19 +245,9 @@ class MySQLDBPathMixin(object):
            lh.hash_entry, UNIX_TIMESTAMP(lh.timestamp)
       FROM client_paths AS p
  LEFT JOIN client_path_stat_entries AS ls
-        ON ls.id = (SELECT id
-                      FROM client_path_stat_entries
-                     WHERE (client_id, path_type, path_id) =
-                           (p.client_id, p.path_type, p.path_id)
-                  ORDER BY timestamp DESC
-                     LIMIT 1)
+        ON ls.id = p.last_stat_entry_id
  LEFT JOIN client_path_hash_entries AS lh
-        ON lh.id = (SELECT id
-                      FROM client_path_hash_entries
-                     WHERE (client_id, path_type, path_id) =
-                           (p.client_id, p.path_type, p.path_id)
-                  ORDER BY timestamp DESC
-                     LIMIT 1)
+        ON lh.id = p.last_hash_entry_id
      WHERE p.client_id = %s
        AND p.path_type = %s
        AND p.path_id IN ({})
@@ -258,6 +329,8 @@ class MySQLDBPathMixin(object):
     hash_entry_keys = []
     hash_entry_values = []
 
+    ancestors_trie = models_paths.AncestorPathInfoTrie()
+
     for path_info in path_infos:
       path = mysql_utils.ComponentsToPath(path_info.components)
 
@@ -275,12 +348,12 @@ class MySQLDBPathMixin(object):
       path_info_values.append(key + details)
 
       if path_info.HasField("stat_entry"):
-        stat_entry_keys.extend(key)
+        stat_entry_keys.append(key)
         details = (now, path_info.stat_entry.SerializeToString())
         stat_entry_values.append(key + details)
 
       if path_info.HasField("hash_entry"):
-        hash_entry_keys.extend(key)
+        hash_entry_keys.append(key)
         details = (
             now,
             path_info.hash_entry.SerializeToString(),
@@ -288,36 +361,37 @@ class MySQLDBPathMixin(object):
         )
         hash_entry_values.append(key + details)
 
-      # TODO(hanuszczak): Implement a trie in order to avoid inserting
-      # duplicated records.
-      for parent_path_info in models_paths.GetAncestorPathInfos(path_info):
-        path = mysql_utils.ComponentsToPath(parent_path_info.components)
-        parent_key = (
-            int_client_id,
-            int(parent_path_info.path_type),
-            rdf_objects.PathID.FromComponents(
-                parent_path_info.components
-            ).AsBytes(),
-        )
-        parent_details = (
-            path,
-            len(parent_path_info.components),
-        )
-        parent_path_info_values.append(parent_key + parent_details)
+      ancestors_trie.Add(path_info)
+
+    for parent_path_info in ancestors_trie.ancestor_path_infos:
+      path = mysql_utils.ComponentsToPath(parent_path_info.components)
+      parent_key = (
+          int_client_id,
+          int(parent_path_info.path_type),
+          rdf_objects.PathID.FromComponents(
+              parent_path_info.components
+          ).AsBytes(),
+      )
+      parent_details = (
+          path,
+          len(parent_path_info.components),
+      )
+      parent_path_info_values.append(parent_key + parent_details)
 
     if path_info_values:
       query = """
         INSERT INTO client_paths(client_id, path_type, path_id,
                                  timestamp,
                                  path, directory, depth)
-        VALUES (%s, %s, %s, FROM_UNIXTIME(%s), %s, %s, %s)
+        VALUES {values}
         ON DUPLICATE KEY UPDATE
           timestamp = VALUES(timestamp),
           directory = directory OR VALUES(directory)
       """
+      row_template = "(%s, %s, %s, FROM_UNIXTIME(%s), %s, %s, %s)"
 
       try:
-        cursor.executemany(query, path_info_values)
+        _ExecuteMultiRowQuery(cursor, query, row_template, path_info_values)
       except MySQLdb.IntegrityError as error:
         raise db.UnknownClientError(client_id=client_id, cause=error)
 
@@ -325,30 +399,47 @@ class MySQLDBPathMixin(object):
       query = """
         INSERT INTO client_paths(client_id, path_type, path_id, path,
                                  directory, depth)
-        VALUES (%s, %s, %s, %s, TRUE, %s)
+        VALUES {values}
         ON DUPLICATE KEY UPDATE
           directory = TRUE,
           timestamp = NOW(6)
       """
-      cursor.executemany(query, parent_path_info_values)
+      row_template = "(%s, %s, %s, %s, TRUE, %s)"
+      _ExecuteMultiRowQuery(
+          cursor, query, row_template, parent_path_info_values
+      )
 
     if stat_entry_values:
       query = """
         INSERT INTO client_path_stat_entries(client_id, path_type, path_id,
                                              timestamp,
                                              stat_entry)
-        VALUES (%s, %s, %s, FROM_UNIXTIME(%s), %s)
+        VALUES {values}
       """
-      cursor.executemany(query, stat_entry_values)
+      row_template = "(%s, %s, %s, FROM_UNIXTIME(%s), %s)"
+      _ExecuteMultiRowQuery(cursor, query, row_template, stat_entry_values)
+      _UpdateLastEntryIds(
+          cursor,
+          "client_path_stat_entries",
+          "last_stat_entry_id",
+          stat_entry_keys,
+      )
 
     if hash_entry_values:
       query = """
         INSERT INTO client_path_hash_entries(client_id, path_type, path_id,
                                              timestamp,
                                              hash_entry, sha256)
-        VALUES (%s, %s, %s, FROM_UNIXTIME(%s), %s, %s)
+        VALUES {values}
       """
-      cursor.executemany(query, hash_entry_values)
+      row_template = "(%s, %s, %s, FROM_UNIXTIME(%s), %s, %s)"
+      _ExecuteMultiRowQuery(cursor, query, row_template, hash_entry_values)
+      _UpdateLastEntryIds(
+          cursor,
+          "client_path_hash_entries",
+          "last_hash_entry_id",
+          hash_entry_keys,
+      )
 
   @db_utils.CallLogged
   @db_utils.CallAccounted
@@ -389,19 +480,9 @@ class MySQLDBPathMixin(object):
              lh.hash_entry, UNIX_TIMESTAMP(lh.timestamp)
         FROM client_paths AS p
    LEFT JOIN client_path_stat_entries AS ls
-          ON ls.id = (SELECT id
-                       FROM client_path_stat_entries
-                      WHERE (client_id, path_type, path_id) =
-                            (p.client_id, p.path_type, p.path_id)
-                   ORDER BY timestamp DESC
-                      LIMIT 1)
+          ON ls.id = p.last_stat_entry_id
    LEFT JOIN client_path_hash_entries AS lh
-          ON lh.id = (SELECT id
-                       FROM client_path_hash_entries
-                      WHERE (client_id, path_type, path_id) =
-                            (p.client_id, p.path_type, p.path_id)
-                   ORDER BY timestamp DESC
-                      LIMIT 1)
+          ON lh.id = p.last_hash_entry_id
       """
       only_explicit = False
     else:
@@ -411,19 +492,9 @@ class MySQLDBPathMixin(object):
              h.hash_entry, UNIX_TIMESTAMP(lh.timestamp)
         FROM client_paths AS p
    LEFT JOIN client_path_stat_entries AS ls
-          ON ls.id = (SELECT id
-                       FROM client_path_stat_entries
-                      WHERE (client_id, path_type, path_id) =
-                            (p.client_id, p.path_type, p.path_id)
-                   ORDER BY timestamp DESC
-                      LIMIT 1)
+          ON ls.id = p.last_stat_entry_id
    LEFT JOIN client_path_hash_entries AS lh
-          ON lh.id = (SELECT id
-                       FROM client_path_hash_entries
-                      WHERE (client_id, path_type, path_id) =
-                            (p.client_id, p.path_type, p.path_id)
-                   ORDER BY timestamp DESC
-                      LIMIT 1)
+          ON lh.id = p.last_hash_entry_id
    LEFT JOIN client_path_stat_entries AS s
           ON s.id = (SELECT id
                        FROM client_path_stat_entries
@@ -542,7 +613,36 @@ class MySQLDBPathMixin(object):
   ) -> dict[tuple[str, ...], Sequence[objects_pb2.PathInfo]]:
     """Reads a collection of hash and stat entries for given paths."""
     assert cursor is not None
+    return self._ReadPathInfosHistories(
+        cursor, client_id, path_type, components_list, cutoff
+    )
+
+  @db_utils.CallLogged
+  @db_utils.CallAccounted
+  @mysql_utils.WithTransaction(readonly=True, replica=True)
+  def ReadPathInfosHistoriesFromReplica(
+      self,
+      client_id: str,
+      path_type: objects_pb2.PathInfo.PathType,
+      components_list: Iterable[Sequence[str]],
+      cutoff: Optional[rdfvalue.RDFDatetime] = None,
+      cursor: Optional[MySQLdb.cursors.Cursor] = None,
+  ) -> dict[tuple[str, ...], Sequence[objects_pb2.PathInfo]]:
+    """Reads path histories, possibly from a read replica."""
+    assert cursor is not None
+    return self._ReadPathInfosHistories(
+        cursor, client_id, path_type, components_list, cutoff
+    )
 
+  def _ReadPathInfosHistories(
+      self,
+      cursor: MySQLdb.cursors.Cursor,
+      client_id: str,
+      path_type: objects_pb2.PathInfo.PathType,
+      components_list: Iterable[Sequence[str]],
+      cutoff: Optional[rdfvalue.RDFDatetime],
+  ) -> dict[tuple[str, ...], Sequence[objects_pb2.PathInfo]]:
+    """Reads a collection of hash and stat entries for given paths."""
     # MySQL does not handle well empty `IN` clauses so we guard against that.
     if not components_list:
       return {}
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Benchmarks for writing and listing large sets of paths in MySQL."""
+
+from absl import app
+
+from grr_response_proto import objects_pb2
+from grr_response_server.databases import db_test_utils
+from grr_response_server.databases import mysql_test
+from grr.test_lib import benchmark_test_lib
+from grr.test_lib import test_lib
+
+
+class MysqlPathInfosBenchmark(
+    mysql_test.MysqlTestBase,
+    benchmark_test_lib.AverageMicroBenchmarks,
+):
+  """Benchmarks writing and listing wide and deep directory sets."""
+
+  REPEATS = 3
+
+  def _WritePathInfos(self, path_infos):
+    client_id = db_test_utils.InitializeClient(self.db)
+    self.db.WritePathInfos(client_id, path_infos)
+    return len(path_infos)
+
+  def testWideDirectorySet(self):
+    """Writes many files in a few directories sharing deep ancestors."""
+    components = ["usr", "lib", "x86_64-linux-gnu"]
+
+    path_infos = []
+    for i in range(10):
+      for j in range(10000):
+        path_infos.append(
+            objects_pb2.PathInfo(
+                path_type=objects_pb2.PathInfo.PathType.OS,
+                components=components + [f"dir{i}", f"file{j}"],
+            )
+        )
+
+    self.TimeIt(
+        lambda: self._WritePathInfos(path_infos), "100000 files in 10 dirs"
+    )
+
+  def testDeepDirectorySet(self):
+    """Writes files on every level of a deeply nested directory tree."""
+    path_infos = []
+    components = []
+    for i in range(200):
+      components.append(f"dir{i}")
+      for j in range(50):
+        path_infos.append(
+            objects_pb2.PathInfo(
+                path_type=objects_pb2.PathInfo.PathType.OS,
+                components=components + [f"file{j}"],
+            )
+        )
+
+    self.TimeIt(
+        lambda: self._WritePathInfos(path_infos), "10000 files in 200 levels"
+    )
+
+  def testListDescendantPathInfos(self):
+    """Lists a directory with many files having stat and hash entries."""
+    client_id = db_test_utils.InitializeClient(self.db)
+
+    path_infos = []
+    for i in range(10000):
+      path_info = objects_pb2.PathInfo(
+          path_type=objects_pb2.PathInfo.PathType.OS,
+          components=["home", "user", f"file{i}"],
+      )
+      path_info.stat_entry.st_size = i
+      path_info.hash_entry.sha256 = i.to_bytes(32, "big")
+      path_infos.append(path_info)
+
+    # Every file has a few historical entries.
+    for _ in range(3):
+      self.db.WritePathInfos(client_id, path_infos)
+
+    def ListDescendantPathInfos():
+      return len(
+          self.db.ListDescendantPathInfos(
+              client_id, objects_pb2.PathInfo.PathType.OS, components=["home"]
+          )
+      )
+
+    self.TimeIt(ListDescendantPathInfos, "10000 files with 3 entries each")
+
+
+if __name__ == "__main__":
+  app.run(test_lib.main)
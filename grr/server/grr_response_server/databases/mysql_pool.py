@@ -7,6 +7,8 @@ import warnings
 
 import MySQLdb
 
+from grr_response_server.databases import db_profiling
+
 
 class Error(Exception):
   pass
@@ -201,6 +203,8 @@ class _CursorProxy(object):
           "cursor.execute() can execute a single SQL statement only"
       )
 
+    db_profiling.RecordQuery(query)
+
     try:
       result = self._forward(self.cursor.execute, query, args=args)
       if MySQLdb.version_info >= (1, 4, 0) and self.con.warning_count():
@@ -251,6 +255,7 @@ class _CursorProxy(object):
       raise
 
   def executemany(self, query, args):
+    db_profiling.RecordQuery(query)
     return self._forward(self.cursor.executemany, query, args)
 
   def fetchone(self):
@@ -18,6 +18,7 @@ from grr_response_server.databases import db as abstract_db
 from grr_response_server.databases import db_test_mixin
 from grr_response_server.databases import db_utils
 from grr_response_server.databases import mysql
+from grr_response_server.databases import mysql_pool
 from grr_response_server.databases import mysql_utils
 from grr.test_lib import stats_test_lib
 from grr.test_lib import test_lib
@@ -220,6 +221,35 @@ class TestMysqlDB(
     users = self.delegate._RunInTransaction(self.ListUsers, readonly=True)
     self.assertEqual(users, (("AzureDiamond", b"hunter2"),))
 
+  def testRunInTransactionCallsPostCommitCallbacksAfterCommit(self):
+    seen_users = []
+
+    def Callback():
+      seen_users.extend(
+          self.delegate._RunInTransaction(self.ListUsers, readonly=True)
+      )
+
+    def AddUserFn(con):
+      mysql_utils.CallAfterCommit(Callback)
+      self.AddUser(con, "AzureDiamond", "hunter2")
+
+    self.delegate._RunInTransaction(AddUserFn)
+
+    self.assertEqual(seen_users, [("AzureDiamond", b"hunter2")])
+
+  def testRunInTransactionDoesNotCallPostCommitCallbacksOnError(self):
+    callback = mock.Mock()
+
+    def FailingFn(con):
+      del con  # Unused.
+      mysql_utils.CallAfterCommit(callback)
+      raise ValueError("Failed")
+
+    with self.assertRaises(ValueError):
+      self.delegate._RunInTransaction(FailingFn)
+
+    callback.assert_not_called()
+
   @mock.patch.object(mysql, "_SleepWithBackoff")
   def testRunInTransactionDeadlock(self, sleep_with_backoff_fn):
     """A deadlock error should be retried."""
@@ -424,6 +454,107 @@ class TestMysqlDB(
     self.assertTrue(connections[0].rollback.called)
     self.assertTrue(connections[0].close.called)
 
+  @contextlib.contextmanager
+  def _FakeReplica(self, lag):
+    # The replica is a second pool of connections to the test database.
+    replica_pool = mysql_pool.Pool(self.delegate._Connect)
+    with contextlib.ExitStack() as stack:
+      stack.callback(replica_pool.close)
+      stack.enter_context(
+          mock.patch.object(self.delegate, "replica_pool", replica_pool)
+      )
+      stack.enter_context(
+          mock.patch.object(
+              self.delegate, "_replica_max_pool_size", 10, create=True
+          )
+      )
+      stack.enter_context(
+          mock.patch.object(self.delegate, "_replica_lag_check_time", None)
+      )
+      stack.enter_context(
+          mock.patch.object(
+              self.delegate, "_CheckReplicaLag", return_value=lag
+          )
+      )
+      yield
+
+  def testReplicaTransactionUsesReplica(self):
+    with self._FakeReplica(lag=0.0):
+      with self.assertStatsCounterDelta(
+          1, mysql.MYSQL_TRANSACTIONS, fields=["replica"]
+      ):
+        self.delegate._RunInTransaction(
+            self.ListUsers, readonly=True, replica=True
+        )
+
+  def testNonReplicaTransactionUsesPrimary(self):
+    with self._FakeReplica(lag=0.0):
+      with self.assertStatsCounterDelta(
+          1, mysql.MYSQL_TRANSACTIONS, fields=["primary"]
+      ):
+        self.delegate._RunInTransaction(self.ListUsers, readonly=True)
+
+  def testReplicaTransactionFallsBackToPrimaryOnLag(self):
+    with self._FakeReplica(lag=3600.0):
+      with self.assertStatsCounterDelta(
+          1, mysql.MYSQL_TRANSACTIONS, fields=["primary"]
+      ):
+        with self.assertStatsCounterDelta(
+            1, mysql.MYSQL_REPLICA_FALLBACKS, fields=["lag"]
+        ):
+          self.delegate._RunInTransaction(
+              self.ListUsers, readonly=True, replica=True
+          )
+
+  def testReplicaTransactionFallsBackToPrimaryOnUnavailableReplica(self):
+    with self._FakeReplica(lag=None):
+      with self.assertStatsCounterDelta(
+          1, mysql.MYSQL_TRANSACTIONS, fields=["primary"]
+      ):
+        self.delegate._RunInTransaction(
+            self.ListUsers, readonly=True, replica=True
+        )
+
+  def testReplicaTransactionFallingBackToPrimaryIsAccountedOnce(self):
+    with self._FakeReplica(lag=0.0):
+      with mock.patch.object(
+          self.delegate.replica_pool,
+          "get",
+          side_effect=MySQLdb.OperationalError(
+              mysql_conn_errors.CONN_HOST_ERROR, "Unreachable"
+          ),
+      ):
+        with self.assertStatsCounterDelta(
+            0, mysql.MYSQL_TRANSACTIONS, fields=["replica"]
+        ):
+          with self.assertStatsCounterDelta(
+              1, mysql.MYSQL_TRANSACTIONS, fields=["primary"]
+          ):
+            self.delegate._RunInTransaction(
+                self.ListUsers, readonly=True, replica=True
+            )
+
+  def testReplicaLagIsNotCheckedConcurrently(self):
+    with self._FakeReplica(lag=0.0):
+      with mock.patch.object(self.delegate, "_replica_lag_checking", True):
+        with self.assertStatsCounterDelta(
+            1, mysql.MYSQL_TRANSACTIONS, fields=["primary"]
+        ):
+          self.delegate._RunInTransaction(
+              self.ListUsers, readonly=True, replica=True
+          )
+
+      self.delegate._CheckReplicaLag.assert_not_called()
+
+  def testReplicaLagIsCheckedPeriodically(self):
+    with self._FakeReplica(lag=0.0):
+      for _ in range(3):
+        self.delegate._RunInTransaction(
+            self.ListUsers, readonly=True, replica=True
+        )
+
+      self.delegate._CheckReplicaLag.assert_called_once()
+
 
 if __name__ == "__main__":
   app.run(test_lib.main)
@@ -1,8 +1,9 @@
 #!/usr/bin/env python
 """Utilities used by the MySQL database."""
 
-from collections.abc import Iterable, Sequence
+from collections.abc import Callable, Iterable, Iterator, Sequence
 import contextlib
+import contextvars
 import functools
 import hashlib
 from typing import Optional, overload
@@ -195,6 +196,49 @@ def PathToComponents(path: str) -> tuple[str, ...]:
     return ()
 
 
+# Callbacks to run once the transaction being executed by the current thread is
+# committed (None outside of transactions).
+_post_commit_callbacks: contextvars.ContextVar[
+    Optional[list[Callable[[], None]]]
+] = contextvars.ContextVar("mysql_post_commit_callbacks", default=None)
+
+
+@contextlib.contextmanager
+def CollectPostCommitCallbacks() -> Iterator[list[Callable[[], None]]]:
+  """Collects callbacks registered with `CallAfterCommit` within the context.
+
+  Used by the code running transactions: the yielded list has to be called
+  after the transaction is committed and discarded if it is rolled back.
+
+  Yields:
+    A list the callbacks are added to.
+  """
+  callbacks = []
+  token = _post_commit_callbacks.set(callbacks)
+  try:
+    yield callbacks
+  finally:
+    _post_commit_callbacks.reset(token)
+
+
+def CallAfterCommit(callback: Callable[[], None]) -> None:
+  """Calls a callback once the current transaction is committed.
+
+  Side effects that other threads act on (e.g. waking up a handler loop that
+  will read the written rows) must not happen before the rows are visible.
+  The callback is not called if the transaction is rolled back. Outside of a
+  transaction the callback is called immediately.
+
+  Args:
+    callback: A function to call.
+  """
+  callbacks = _post_commit_callbacks.get()
+  if callbacks is None:
+    callback()
+  else:
+    callbacks.append(callback)
+
+
 class WithTransaction(object):
   """Decorator that provides a connection or cursor with transaction management.
 
@@ -212,17 +256,28 @@ class WithTransaction(object):
   process, the decorated function may be called again after a short delay.
   """
 
-  def __init__(self, readonly=False):
+  def __init__(self, readonly=False, replica=False):
     """Constructs a decorator.
 
     Args:
       readonly: Whether the decorated function only requires a readonly
         transaction. Has no effect when a connection is provided.
+      replica: Whether the decorated function can be served by a read replica,
+        i.e. it does not need to observe writes made right before the call.
+        Requires `readonly`. Has no effect when a connection is provided.
+
+    Raises:
+      ValueError: If `replica` is set for a non-readonly transaction.
     """
+    if replica and not readonly:
+      raise ValueError("Only readonly transactions can use a replica.")
+
     self.readonly = readonly
+    self.replica = replica
 
   def __call__(self, func):
     readonly = self.readonly
+    replica = self.replica
 
     @functools.wraps(func)
     def Decorated(self, *args, **kw):  # pylint: disable=function-redefined
@@ -237,7 +292,7 @@ class WithTransaction(object):
           new_kw["cursor"] = cursor
           return func(self, *args, **new_kw)
 
-      return self._RunInTransaction(Closure, readonly)
+      return self._RunInTransaction(Closure, readonly, replica=replica)
 
     return Decorated
 
@@ -106,6 +106,55 @@ class MicrosecondsSinceEpochToTimestampTest(absltest.TestCase):
     self.assertEqual(want_timestamp, got_timestamp)
 
 
+class WithTransactionTest(absltest.TestCase):
+
+  def testPassesReplicaFlag(self):
+
+    class FakeDB:
+
+      def _RunInTransaction(self, function, readonly, replica=False):
+        del function  # Unused.
+        return readonly, replica
+
+      @mysql_utils.WithTransaction(readonly=True, replica=True)
+      def Read(self, cursor=None):
+        del cursor  # Unused.
+
+    self.assertEqual(FakeDB().Read(), (True, True))
+
+  def testRaisesOnReplicaWithoutReadonly(self):
+    with self.assertRaises(ValueError):
+      mysql_utils.WithTransaction(replica=True)
+
+
+class CallAfterCommitTest(absltest.TestCase):
+
+  def testCallsImmediatelyOutsideOfTransaction(self):
+    calls = []
+    mysql_utils.CallAfterCommit(lambda: calls.append("foo"))
+    self.assertEqual(calls, ["foo"])
+
+  def testCollectsCallbacksWithinTransaction(self):
+    calls = []
+    with mysql_utils.CollectPostCommitCallbacks() as callbacks:
+      mysql_utils.CallAfterCommit(lambda: calls.append("foo"))
+      mysql_utils.CallAfterCommit(lambda: calls.append("bar"))
+
+    self.assertEmpty(calls)
+    for callback in callbacks:
+      callback()
+    self.assertEqual(calls, ["foo", "bar"])
+
+  def testRestoresOuterCollection(self):
+    with mysql_utils.CollectPostCommitCallbacks() as outer:
+      with mysql_utils.CollectPostCommitCallbacks() as inner:
+        mysql_utils.CallAfterCommit(lambda: None)
+      mysql_utils.CallAfterCommit(lambda: None)
+
+    self.assertLen(inner, 1)
+    self.assertLen(outer, 1)
+
+
 def main(argv):
   test_lib.main(argv)
 
@@ -8,11 +8,14 @@ ExportConverters convert various complex RDFValues to simple RDFValues
 easily be written to a relational database or just to a set of files.
 """
 
+from concurrent import futures
 import logging
+import threading
 from typing import Iterable, Iterator, Optional
 
 from google.protobuf import any_pb2
 from google.protobuf import message
+from grr_response_core import config
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.util import collection
@@ -25,6 +28,10 @@ from grr_response_server import export_converters_registry
 from grr_response_server.export_converters import base
 
 
+# Number of flow results grouped together for reading and conversion.
+_FLOW_RESULTS_BATCH_SIZE = 5000
+
+
 class Error(Exception):
   """Errors generated by export converters."""
 
@@ -229,30 +236,121 @@ def ConvertValuesWithMetadata(metadata_value_pairs, options=None):
     raise NoConverterFound(no_converter_found_error)
 
 
+def _TryUnpackingPayload(
+    payload: any_pb2.Any, proto_type: type[message.Message]
+) -> message.Message:
+  """Tries to unpack payload into a proto of the given type."""
+  res = proto_type()
+  if not payload.Is(proto_type.DESCRIPTOR):
+    raise TypeError(
+        "There's a mismatch between the flow result payload type"
+        f" {payload.type_url} and the selected export converter's input type:"
+        f" {proto_type.DESCRIPTOR.full_name}"
+    )
+  res.ParseFromString(payload.value)
+  return res
+
+
+# A group of flow results with the same payload type, together with the
+# classes of converters applicable to it.
+_ConversionGroup = tuple[
+    list[flows_pb2.FlowResult], list[type[base.ExportConverterProto]]
+]
+
+
+def _ConvertFlowResultsBatch(
+    options: export_pb2.ExportOptions,
+    groups: list[_ConversionGroup],
+    metadata_by_client_id: dict[str, export_pb2.ExportedMetadata],
+) -> list[message.Message]:
+  """Unpacks and converts a single batch of flow results.
+
+  This function does not touch the client metadata cache, so it is safe to
+  call it from a worker thread.
+
+  Args:
+    options: ExportOptions instance.
+    groups: Flow results of the batch grouped by payload type.
+    metadata_by_client_id: Metadata of all clients the flow results come from.
+
+  Returns:
+    A list of converted messages.
+  """
+  converted = []
+  for results, converter_classes in groups:
+    metadata = [metadata_by_client_id[result.client_id] for result in results]
+    for converter_cls in converter_classes:
+      converter = converter_cls(options=options)
+      unpacked_payloads = [
+          _TryUnpackingPayload(result.payload, converter.input_proto_type)
+          for result in results
+      ]
+      converted.extend(
+          converter.BatchConvert(zip(metadata, unpacked_payloads))
+      )
+
+  return converted
+
+
+_convert_executor: Optional[futures.ThreadPoolExecutor] = None
+_convert_executor_lock = threading.Lock()
+
+
+def _GetConvertExecutor() -> futures.ThreadPoolExecutor:
+  """Returns the process-wide executor used for converting flow results."""
+  global _convert_executor
+
+  with _convert_executor_lock:
+    if _convert_executor is None:
+      _convert_executor = futures.ThreadPoolExecutor(
+          max_workers=config.CONFIG["Export.conversion_threads"],
+          thread_name_prefix="ExportConverter",
+      )
+    return _convert_executor
+
+
 def FetchMetadataAndConvertFlowResults(
     source_urn: rdfvalue.RDFURN,
     options: export_pb2.ExportOptions,
     flow_results: Iterable[flows_pb2.FlowResult],
     cached_metadata: Optional[dict[str, export_pb2.ExportedMetadata]] = None,
+    max_in_flight_batches: Optional[int] = None,
+    ordered: bool = True,
 ) -> Iterator[message.Message]:
   """Fetches client metadata and converts FlowResults to export-friendly protos.
 
+  Flow results are processed in batches. Unless `Export.conversion_threads` is
+  0, batches are converted on a thread pool: the next batch of flow results is
+  read while the previous ones are being converted and at most
+  `max_in_flight_batches` converted batches are kept in memory at any time.
+
   Args:
     source_urn: URN identifying the source of the data (hunt or flow).
     options: ExportOptions instance.
     flow_results: Iterable of FlowResult protos.
     cached_metadata: Optional dict for caching metadata.
+    max_in_flight_batches: Maximum number of batches converted concurrently.
+      Defaults to the `Export.max_in_flight_batches` config option.
+    ordered: If True, converted messages are yielded in the order of the flow
+      results they come from. Otherwise, batches are yielded as soon as their
+      conversion is done.
 
   Yields:
     Converted messages.
   """
   if cached_metadata is None:
     cached_metadata = {}
+  if max_in_flight_batches is None:
+    max_in_flight_batches = config.CONFIG["Export.max_in_flight_batches"]
+  if max_in_flight_batches < 1:
+    raise ValueError(
+        f"Invalid number of in-flight batches: {max_in_flight_batches}"
+    )
 
   def _GetMetadataForClients(
-      client_ids: list[str],
-  ) -> list[export_pb2.ExportedMetadata]:
-    """Fetches metadata for a given list of clients."""
+      client_ids: set[str],
+  ) -> dict[str, export_pb2.ExportedMetadata]:
+    """Fetches metadata for a given set of clients."""
 
     # Maps client_id to ExportedMetadata.
     result: dict[str, export_pb2.ExportedMetadata] = {}
@@ -301,26 +399,20 @@ def FetchMetadataAndConvertFlowResults(
         result[client_id] = default_mdata
         cached_metadata[client_id] = default_mdata
 
-    return [result[client_id] for client_id in client_ids]
-
-  def _TryUnpackingPayload(
-      payload: any_pb2.Any, proto_type: type[message.Message]
-  ) -> message.Message:
-    """Tries to unpack payload into a proto of the given type."""
-    res = proto_type()
-    if not payload.Is(proto_type.DESCRIPTOR):
-      raise TypeError(
-          "There's a mismatch between the flow result payload type"
-          f" {payload.type_url} and the selected export converter's input type:"
-          f" {proto_type.DESCRIPTOR.full_name}"
-      )
-    res.ParseFromString(payload.value)
-    return res
+    return result
 
-  for batch in collection.Batch(flow_results, 5000):
-    # Group results by type URL
-    results_by_type = collection.Group(batch, lambda r: r.payload.type_url)
+  def _PrepareBatch(
+      batch: list[flows_pb2.FlowResult],
+  ) -> tuple[
+      list[_ConversionGroup], dict[str, export_pb2.ExportedMetadata]
+  ]:
+    """Groups a batch by payload type and fetches the needed metadata."""
+    # Metadata is fetched here and not in the worker threads, as fetching it
+    # reads and updates the metadata cache.
+    groups = []
+    client_ids = set()
 
+    results_by_type = collection.Group(batch, lambda r: r.payload.type_url)
     for type_url, results in results_by_type.items():
       converter_classes = export_converters_registry.GetConvertersByTypeUrl(
           type_url
@@ -329,21 +421,55 @@ def FetchMetadataAndConvertFlowResults(
         logging.warning("No export converters found for type url: %s", type_url)
         continue
 
-      for converter_cls in converter_classes:
-        converter = converter_cls(options=options)
-        unpacked_payloads = [
-            _TryUnpackingPayload(result.payload, converter.input_proto_type)
-            for result in results
-        ]
-        current_metadata_items = _GetMetadataForClients(
-            [result.client_id for result in results]
-        )
-        batch_with_metadata = zip(
-            current_metadata_items,
-            unpacked_payloads,
-        )
+      groups.append((results, list(converter_classes)))
+      client_ids.update(result.client_id for result in results)
+
+    return groups, _GetMetadataForClients(client_ids)
+
+  batches = collection.Batch(flow_results, _FLOW_RESULTS_BATCH_SIZE)
 
-        yield from converter.BatchConvert(batch_with_metadata)
+  if not config.CONFIG["Export.conversion_threads"]:
+    for batch in batches:
+      yield from _ConvertFlowResultsBatch(options, *_PrepareBatch(batch))
+    return
+
+  executor = _GetConvertExecutor()
+  in_flight: list[futures.Future[list[message.Message]]] = []
+
+  def _PopConverted() -> list[message.Message]:
+    if ordered:
+      future = in_flight[0]
+    else:
+      done, _ = futures.wait(in_flight, return_when=futures.FIRST_COMPLETED)
+      future = min(done, key=in_flight.index)
+    in_flight.remove(future)
+    return future.result()
+
+  next_batch = executor.submit(next, batches, None)
+  try:
+    while True:
+      batch = next_batch.result()
+      if batch is None:
+        break
+      # Read the next batch while the current one is being converted.
+      next_batch = executor.submit(next, batches, None)
+
+      in_flight.append(
+          executor.submit(
+              _ConvertFlowResultsBatch, options, *_PrepareBatch(batch)
+          )
+      )
+      while len(in_flight) >= max_in_flight_batches:
+        yield from _PopConverted()
+
+    while in_flight:
+      yield from _PopConverted()
+  finally:
+    for future in in_flight:
+      future.cancel()
+    # The underlying iterator must not be left running in another thread.
+    next_batch.cancel()
+    futures.wait([next_batch])
 
 
 def ConvertValues(default_metadata, values, options=None):
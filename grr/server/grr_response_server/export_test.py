@@ -744,6 +744,59 @@ class FetchMetadataAndConvertFlowResultsTest(export_test_lib.ExportTestBase):
       self.assertLen(results2, 1)
       mock_read.assert_not_called()
 
+  def _ConvertStringsInBatches(self, values, **kwargs):
+    client_id = self.SetupClient(0)
+    flow_results = [
+        self._GetPackedFlowResult(wrappers_pb2.StringValue(value=v), client_id)
+        for v in values
+    ]
+
+    with mock.patch.object(export, "_FLOW_RESULTS_BATCH_SIZE", 2):
+      results = list(
+          export.FetchMetadataAndConvertFlowResults(
+              source_urn=rdfvalue.RDFURN("aff4:/hunts/H:123456"),
+              options=export_pb2.ExportOptions(),
+              flow_results=flow_results,
+              **kwargs,
+          )
+      )
+
+    return [result.data for result in results]
+
+  @export_test_lib.WithExportConverterProto(
+      proto_wrappers.StringValueToExportedStringConverter
+  )
+  def testMultipleBatchesOrdered(self):
+    values = [f"foo{i}" for i in range(11)]
+
+    data = self._ConvertStringsInBatches(values, max_in_flight_batches=2)
+    self.assertEqual(data, values)
+
+  @export_test_lib.WithExportConverterProto(
+      proto_wrappers.StringValueToExportedStringConverter
+  )
+  def testMultipleBatchesUnordered(self):
+    values = [f"foo{i}" for i in range(11)]
+
+    data = self._ConvertStringsInBatches(
+        values, max_in_flight_batches=3, ordered=False
+    )
+    self.assertCountEqual(data, values)
+
+  @export_test_lib.WithExportConverterProto(
+      proto_wrappers.StringValueToExportedStringConverter
+  )
+  def testMultipleBatchesWithoutConversionThreads(self):
+    values = [f"foo{i}" for i in range(11)]
+
+    with test_lib.ConfigOverrider({"Export.conversion_threads": 0}):
+      data = self._ConvertStringsInBatches(values)
+    self.assertEqual(data, values)
+
+  def testRaisesOnInvalidMaxInFlightBatches(self):
+    with self.assertRaises(ValueError):
+      self._ConvertStringsInBatches(["foo"], max_in_flight_batches=0)
+
 
 def main(argv):
   test_lib.main(argv)
@@ -2,11 +2,14 @@
 """REL_DB-based file store implementation."""
 
 import abc
+import bisect
 import collections
 from collections.abc import Sequence
+from concurrent import futures
 import hashlib
 import io
 import os
+import threading
 from typing import Collection, Dict, Iterable, NamedTuple, Optional
 
 from grr_response_core import config
@@ -14,6 +17,8 @@ from grr_response_core.lib import rdfvalue
 from grr_response_core.lib import utils
 from grr_response_core.lib.util import collection
 from grr_response_core.lib.util import precondition
+from grr_response_proto import objects_pb2
+from grr_response_server import blob_store
 from grr_response_server import data_store
 from grr_response_server.databases import db
 from grr_response_server.models import blobs as models_blob
@@ -129,57 +134,177 @@ class CompositeExternalFileStore(ExternalFileStore):
 EXTERNAL_FILE_STORE = CompositeExternalFileStore()
 
 
-# TODO(user): this is a naive implementation as it reads one chunk
-# per REL_DB call. It has to be optimized.
+# Number of blobs fetched by the first BLOBS.ReadBlobs call issued by
+# BlobStream and after every non-sequential seek.
+BLOB_STREAM_INITIAL_READ_AHEAD = 2
+# Maximum number of blobs fetched by a single BLOBS.ReadBlobs call issued by
+# BlobStream. The batch size doubles on every sequential read up to this value.
+BLOB_STREAM_READ_AHEAD = 64
+# Maximum number of fetched batches kept in memory by a single BlobStream.
+BLOB_STREAM_MAX_CACHED_BATCHES = 3
+# Number of threads shared by all BlobStreams to prefetch blob batches.
+_BLOB_STREAM_PREFETCH_THREADS = 8
+
+_blob_stream_executor: Optional[futures.ThreadPoolExecutor] = None
+_blob_stream_executor_lock = threading.Lock()
+
+
+def _GetBlobStreamExecutor() -> futures.ThreadPoolExecutor:
+  """Returns a lazily created executor used to prefetch BlobStream batches."""
+  global _blob_stream_executor
+
+  with _blob_stream_executor_lock:
+    if _blob_stream_executor is None:
+      _blob_stream_executor = futures.ThreadPoolExecutor(
+          max_workers=_BLOB_STREAM_PREFETCH_THREADS,
+          thread_name_prefix="BlobStreamPrefetch",
+      )
+    return _blob_stream_executor
+
+
+def _ReadBlobsBatch(
+    blob_ids: Sequence[models_blob.BlobID],
+) -> Dict[models_blob.BlobID, Optional[bytes]]:
+  return data_store.BLOBS.ReadBlobs(blob_ids)
+
+
 class BlobStream:
-  """File-like object for reading from blobs."""
+  """File-like object for reading from blobs.
+
+  Blobs are fetched in batches with a single `BLOBS.ReadBlobs` call. The first
+  batch has `initial_read_ahead` blobs and every batch reached by reading
+  sequentially past the previous one is twice as large, up to `read_ahead`
+  blobs. Once reads are sequential, the next batch is requested in the
+  background, so that they are not bound by the blob store latency. At most
+  `max_cached_batches` batches are kept in memory.
+  """
 
   def __init__(
       self,
       client_path: db.ClientPath,
       blob_refs: Sequence[rdf_objects.BlobReference],
       hash_id: Optional[rdf_objects.HashID],
+      read_ahead: int = BLOB_STREAM_READ_AHEAD,
+      max_cached_batches: int = BLOB_STREAM_MAX_CACHED_BATCHES,
+      initial_read_ahead: int = BLOB_STREAM_INITIAL_READ_AHEAD,
   ) -> None:
+    precondition.AssertType(read_ahead, int)
+    precondition.AssertType(max_cached_batches, int)
+    precondition.AssertType(initial_read_ahead, int)
+    if read_ahead < 1:
+      raise ValueError("read_ahead must be positive: %d" % read_ahead)
+    if initial_read_ahead < 1:
+      raise ValueError(
+          "initial_read_ahead must be positive: %d" % initial_read_ahead
+      )
+    if max_cached_batches < 2:
+      raise ValueError(
+          "max_cached_batches must be at least 2: %d" % max_cached_batches
+      )
+
     self._client_path = client_path
     self._blob_refs = blob_refs
     self._hash_id = hash_id
+    self._max_read_ahead = read_ahead
+    self._initial_read_ahead = min(initial_read_ahead, read_ahead)
+    self._read_ahead = self._initial_read_ahead
+    self._max_cached_batches = max_cached_batches
 
     self._max_unbound_read = config.CONFIG["Server.max_unbound_read_size"]
 
+    self._offsets = [ref.offset for ref in self._blob_refs]
+
     self._offset = 0
     self._length = 0
     if self._blob_refs:
       self._length = self._blob_refs[-1].offset + self._blob_refs[-1].size
 
-    self._current_ref = None
-    self._current_chunk = None
+    # Index of the first blob ref of a batch to the index following its last
+    # blob ref and a future with the result of the batch's ReadBlobs call,
+    # ordered from the least to the most recently used batch.
+    self._batches: collections.OrderedDict[
+        int,
+        tuple[int, futures.Future[Dict[models_blob.BlobID, Optional[bytes]]]],
+    ] = collections.OrderedDict()
+    # Start of the batch that was read last.
+    self._current_batch: Optional[int] = None
+
+  def _FindRefIndex(self) -> Optional[int]:
+    """Returns an index of the blob ref covering the current offset."""
+    index = bisect.bisect_right(self._offsets, self._offset) - 1
+    if index < 0:
+      return None
+
+    ref = self._blob_refs[index]
+    if self._offset >= ref.offset + ref.size:
+      return None
+
+    return index
+
+  def _FindBatch(self, index: int) -> Optional[int]:
+    """Returns the start of a cached batch covering a given blob ref index."""
+    for start, (end, _) in self._batches.items():
+      if start <= index < end:
+        return start
+
+    return None
+
+  def _ScheduleBatch(self, start: int) -> None:
+    """Starts reading a batch of blobs beginning at a given blob ref index."""
+    end = min(start + self._read_ahead, len(self._blob_refs))
+    blob_ids = [
+        models_blob.BlobID(ref.blob_id) for ref in self._blob_refs[start:end]
+    ]
+    batch = _GetBlobStreamExecutor().submit(_ReadBlobsBatch, blob_ids)
+    self._batches[start] = (end, batch)
+
+    while len(self._batches) > self._max_cached_batches:
+      _, (_, evicted) = self._batches.popitem(last=False)
+      evicted.cancel()
 
   def _GetChunk(
       self,
   ) -> tuple[Optional[bytes], Optional[rdf_objects.BlobReference]]:
     """Fetches a chunk corresponding to the current offset."""
 
-    found_ref = None
-    for ref in self._blob_refs:
-      if self._offset >= ref.offset and self._offset < (ref.offset + ref.size):
-        found_ref = ref
-        break
-
-    if not found_ref:
+    index = self._FindRefIndex()
+    if index is None:
       return None, None
 
-    # If self._current_ref == found_ref, then simply return previously found
-    # chunk. Otherwise, update self._current_chunk value.
-    if self._current_ref != found_ref:
-      self._current_ref = found_ref
-
-      blob_id = models_blob.BlobID(found_ref.blob_id)
-      data = data_store.BLOBS.ReadBlobs([blob_id])
-      if data[blob_id] is None:
-        raise BlobNotFoundError(blob_id)
-      self._current_chunk = data[blob_id]
-
-    return self._current_chunk, self._current_ref
+    sequential = False
+    start = self._FindBatch(index)
+    if start != self._current_batch:
+      if self._current_batch is not None:
+        current_end, _ = self._batches.get(self._current_batch, (None, None))
+        sequential = index == current_end
+
+      if sequential:
+        self._read_ahead = min(2 * self._read_ahead, self._max_read_ahead)
+      else:
+        self._read_ahead = self._initial_read_ahead
+
+      if start is None:
+        start = index
+        self._ScheduleBatch(start)
+      self._current_batch = start
+
+    end, batch = self._batches[start]
+    # Prefetching must not evict the batch that is being read.
+    self._batches.move_to_end(start)
+    if (
+        sequential
+        and end < len(self._blob_refs)
+        and self._FindBatch(end) is None
+    ):
+      self._ScheduleBatch(end)
+
+    ref = self._blob_refs[index]
+    blob_id = models_blob.BlobID(ref.blob_id)
+    blobs = batch.result()
+    if blobs.get(blob_id) is None:
+      raise BlobNotFoundError(blob_id)
+
+    return blobs[blob_id], ref
 
   def Read(self, length: Optional[int] = None) -> bytes:
     """Reads data."""
@@ -204,8 +329,9 @@ class BlobStream:
       if not part:
         break
 
+      part = part[: length - result.tell()]
       result.write(part)
-      self._offset += min(length, len(part))
+      self._offset += len(part)
 
     return result.getvalue()[:length]
 
@@ -249,19 +375,91 @@ _BLOBS_READ_BATCH_SIZE = 200
 BLOBS_READ_TIMEOUT = rdfvalue.Duration.From(120, rdfvalue.SECONDS)
 
 
+def _WaitForBlobReferences(
+    client_path_blob_refs: Dict[
+        db.ClientPath, Sequence[objects_pb2.BlobReference]
+    ],
+) -> None:
+  """Verifies blob references using blob store metadata only.
+
+  Blob identifiers are digests of the blob contents, so a blob that exists in
+  the blob store is known to have the referenced contents without reading it.
+
+  Args:
+    client_path_blob_refs: A dictionary mapping `db.ClientPath` instances to
+      lists of blob references.
+
+  Raises:
+    BlobNotFoundError: If one of the referenced blobs cannot be found.
+    InvalidBlobOffsetError: if reference's blob offset is different from an
+        offset implied by sizes of the preceding blobs.
+  """
+  blob_ids = set()
+  for blob_refs in client_path_blob_refs.values():
+    offset = 0
+    for blob_ref in blob_refs:
+      if blob_ref.offset != offset:
+        raise InvalidBlobOffsetError(
+            "Got conflicting offset information for blob %s: %d vs %d."
+            % (blob_ref.blob_id, blob_ref.offset, offset)
+        )
+      offset += blob_ref.size
+      blob_ids.add(models_blob.BlobID(blob_ref.blob_id))
+
+  for blob_id_batch in collection.Batch(blob_ids, _BLOBS_READ_BATCH_SIZE):
+    try:
+      data_store.BLOBS.WaitForBlobs(blob_id_batch, timeout=BLOBS_READ_TIMEOUT)
+    except blob_store.BlobStoreTimeoutError:
+      blobs_exist = data_store.BLOBS.CheckBlobsExist(blob_id_batch)
+      for blob_id, exists in blobs_exist.items():
+        if not exists:
+          raise BlobNotFoundError(blob_id)
+
+
+def _BlobReferencesMatch(
+    blob_refs: Sequence[objects_pb2.BlobReference],
+    other_blob_refs: Sequence[objects_pb2.BlobReference],
+) -> bool:
+  """Checks if two lists of blob references describe the same contents."""
+  if len(blob_refs) != len(other_blob_refs):
+    return False
+
+  for blob_ref, other_blob_ref in zip(blob_refs, other_blob_refs):
+    if (
+        blob_ref.blob_id != other_blob_ref.blob_id
+        or blob_ref.offset != other_blob_ref.offset
+        or blob_ref.size != other_blob_ref.size
+    ):
+      return False
+
+  return True
+
+
 def AddFilesWithUnknownHashes(
     client_path_blob_refs: Dict[
         db.ClientPath, Iterable[rdf_objects.BlobReference]
     ],
     use_external_stores: bool = True,
+    client_path_sha256: Optional[Dict[db.ClientPath, bytes]] = None,
 ) -> Dict[db.ClientPath, rdf_objects.SHA256HashID]:
   """Adds new files consisting of given blob references.
 
+  Hashes of files are computed by reading all their blobs back from the blob
+  store. SHA-256 digests reported by the client are not trusted, they are only
+  used to look up contents that are already known: if the file store has the
+  reported hash with exactly the same blob references, the file is finalized
+  using blob store metadata only (blob identifiers are digests of the blob
+  contents). The `Server.verify_uploaded_file_contents` option disables this
+  shortcut.
+
   Args:
     client_path_blob_refs: A dictionary mapping `db.ClientPath` instances to
       lists of blob references.
     use_external_stores: A flag indicating if the files should also be added to
       external file stores.
+    client_path_sha256: A dictionary mapping `db.ClientPath` instances to
+      SHA-256 digests of the files, computed by the client over the uploaded
+      contents.
 
   Returns:
     A dictionary mapping `db.ClientPath` to hash ids of the file.
@@ -273,16 +471,26 @@ def AddFilesWithUnknownHashes(
     InvalidBlobOffsetError: if reference's blob offset is different from an
         actual blob offset.
   """
+  if (
+      client_path_sha256 is None
+      or config.CONFIG["Server.verify_uploaded_file_contents"]
+  ):
+    client_path_sha256 = {}
+
   hash_id_blob_refs = dict()
   client_path_hash_id = dict()
   metadatas = dict()
 
   all_client_path_blob_refs = list()
+  reported_client_path_blob_refs = dict()
   for client_path, blob_refs in client_path_blob_refs.items():
     if blob_refs:
-      for blob_ref in blob_refs:
-        blob_ref = mig_objects.ToProtoBlobReference(blob_ref)
-        all_client_path_blob_refs.append((client_path, blob_ref))
+      blob_refs = list(map(mig_objects.ToProtoBlobReference, blob_refs))
+      if client_path in client_path_sha256:
+        reported_client_path_blob_refs[client_path] = blob_refs
+      else:
+        for blob_ref in blob_refs:
+          all_client_path_blob_refs.append((client_path, blob_ref))
     else:
       # Make sure empty files (without blobs) are correctly handled.
       hash_id = rdf_objects.SHA256HashID.FromData(b"")
@@ -290,10 +498,44 @@ def AddFilesWithUnknownHashes(
       hash_id_blob_refs[hash_id] = []
       metadatas[hash_id] = FileMetadata(client_path=client_path, blob_refs=[])
 
-  client_path_offset = collections.defaultdict(lambda: 0)
-  client_path_sha256 = collections.defaultdict(hashlib.sha256)
   verified_client_path_blob_refs = collections.defaultdict(list)
 
+  if reported_client_path_blob_refs:
+    client_path_reported_hash_id = {
+        client_path: rdf_objects.SHA256HashID.FromSerializedBytes(
+            client_path_sha256[client_path]
+        )
+        for client_path in reported_client_path_blob_refs
+    }
+    known_hash_id_blob_refs = data_store.REL_DB.ReadHashBlobReferences(
+        set(client_path_reported_hash_id.values())
+    )
+
+    # Reported digests are not verified, so they are never written to the
+    # hash to blob references mapping shared by all clients. Files whose
+    # contents are not known yet are hashed like any other file.
+    known_client_path_blob_refs = dict()
+    for client_path, blob_refs in reported_client_path_blob_refs.items():
+      hash_id = client_path_reported_hash_id[client_path]
+      known_blob_refs = known_hash_id_blob_refs.get(hash_id)
+      if known_blob_refs is not None and _BlobReferencesMatch(
+          blob_refs, list(known_blob_refs)
+      ):
+        known_client_path_blob_refs[client_path] = blob_refs
+      else:
+        for blob_ref in blob_refs:
+          all_client_path_blob_refs.append((client_path, blob_ref))
+
+    _WaitForBlobReferences(known_client_path_blob_refs)
+    for client_path, blob_refs in known_client_path_blob_refs.items():
+      client_path_hash_id[client_path] = client_path_reported_hash_id[
+          client_path
+      ]
+      verified_client_path_blob_refs[client_path] = blob_refs
+
+  client_path_offset = collections.defaultdict(lambda: 0)
+  client_path_hasher = collections.defaultdict(hashlib.sha256)
+
   client_path_blob_ref_batches = collection.Batch(
       items=all_client_path_blob_refs, size=_BLOBS_READ_BATCH_SIZE
   )
@@ -326,10 +568,10 @@ def AddFilesWithUnknownHashes(
 
       verified_client_path_blob_refs[client_path].append(blob_ref)
       client_path_offset[client_path] = offset + len(blob)
-      client_path_sha256[client_path].update(blob)
+      client_path_hasher[client_path].update(blob)
 
-  for client_path in client_path_sha256.keys():
-    sha256 = client_path_sha256[client_path].digest()
+  for client_path in client_path_hasher.keys():
+    sha256 = client_path_hasher[client_path].digest()
     hash_id = rdf_objects.SHA256HashID.FromSerializedBytes(sha256)
 
     client_path_hash_id[client_path] = hash_id
@@ -358,12 +600,18 @@ def AddFileWithUnknownHash(
     client_path: db.ClientPath,
     blob_refs: Sequence[rdf_objects.BlobReference],
     use_external_stores: bool = True,
+    sha256: Optional[bytes] = None,
 ) -> rdf_objects.SHA256HashID:
   """Add a new file consisting of given blob IDs."""
   precondition.AssertType(client_path, db.ClientPath)
   precondition.AssertIterableType(blob_refs, rdf_objects.BlobReference)
+  client_path_sha256 = None
+  if sha256 is not None:
+    client_path_sha256 = {client_path: sha256}
   return AddFilesWithUnknownHashes(
-      {client_path: blob_refs}, use_external_stores=use_external_stores
+      {client_path: blob_refs},
+      use_external_stores=use_external_stores,
+      client_path_sha256=client_path_sha256,
   )[client_path]
 
 
@@ -94,6 +94,67 @@ class BlobStreamTest(test_lib.GRRBaseTest):
       self.blob_stream = file_store.BlobStream(None, self.blob_refs, None)
       self.blob_stream.read(self.blob_size)
 
+  def testConsecutiveReadsCrossingChunkBoundaries(self):
+    self.assertEqual(self.blob_stream.read(self.blob_size + 1), b"a" * 10 + b"b")
+    self.assertEqual(self.blob_stream.read(2), b"bb")
+    self.assertEqual(self.blob_stream.tell(), self.blob_size + 3)
+
+  def testReadsBlobsInBatches(self):
+    blob_stream = file_store.BlobStream(
+        None, self.blob_refs, None, read_ahead=4
+    )
+    with mock.patch.object(
+        data_store.BLOBS, "ReadBlobs", wraps=data_store.BLOBS.ReadBlobs
+    ) as read_blobs_mock:
+      self.assertEqual(blob_stream.read(), b"".join(self.blob_data))
+
+    self.assertEqual(read_blobs_mock.call_count, 3)
+    self.assertCountEqual(
+        [len(call.args[0]) for call in read_blobs_mock.call_args_list],
+        [2, 4, 4],
+    )
+
+  def testSmallReadDoesNotReadAhead(self):
+    blob_stream = file_store.BlobStream(
+        None, self.blob_refs, None, read_ahead=4
+    )
+    with mock.patch.object(
+        data_store.BLOBS, "ReadBlobs", wraps=data_store.BLOBS.ReadBlobs
+    ) as read_blobs_mock:
+      self.assertEqual(blob_stream.read(1), b"a")
+
+    read_blobs_mock.assert_called_once()
+    self.assertLen(read_blobs_mock.call_args.args[0], 2)
+
+  def testSeekingResetsReadAhead(self):
+    blob_stream = file_store.BlobStream(
+        None, self.blob_refs, None, read_ahead=4, max_cached_batches=2
+    )
+    self.assertEqual(blob_stream.read(), b"".join(self.blob_data))
+
+    blob_stream.seek(0)
+    with mock.patch.object(
+        data_store.BLOBS, "ReadBlobs", wraps=data_store.BLOBS.ReadBlobs
+    ) as read_blobs_mock:
+      self.assertEqual(blob_stream.read(1), b"a")
+
+    read_blobs_mock.assert_called_once()
+    self.assertLen(read_blobs_mock.call_args.args[0], 2)
+
+  def testReadsCorrectlyAfterSeekingBackwards(self):
+    blob_stream = file_store.BlobStream(
+        None, self.blob_refs, None, read_ahead=2, max_cached_batches=2
+    )
+    blob_stream.seek(-1, 2)
+    self.assertEqual(blob_stream.read(1), b"5")
+
+    blob_stream.seek(0)
+    self.assertEqual(blob_stream.read(), b"".join(self.blob_data))
+
+  def testRaisesOnInvalidReadAhead(self):
+    with self.assertRaises(ValueError):
+      file_store.BlobStream(None, self.blob_refs, None, read_ahead=0)
+
 
 class AddFileWithUnknownHashTest(test_lib.GRRBaseTest):
   """Tests for AddFileWithUnknownHash."""
@@ -354,6 +415,198 @@ class AddFilesWithUnknownHashesTest(test_lib.GRRBaseTest):
     self.assertEqual(hash_ids[foo_path], foo_hash_id)
     self.assertEqual(hash_ids[bar_path], bar_hash_id)
 
+  def testUsesReportedHashWithoutReadingBlobs(self):
+    blobs = [b"foo", b"bar", b"baz"]
+    blob_refs = _BlobRefsFromByteArray(blobs)
+    blob_ids = [models_blobs.BlobID(ref.blob_id) for ref in blob_refs]
+    data_store.BLOBS.WriteBlobs(dict(zip(blob_ids, blobs)))
+    hash_id = rdf_objects.SHA256HashID.FromData(b"foobarbaz")
+
+    client_id = self.SetupClient(0)
+    path = db.ClientPath.OS(client_id=client_id, components=("foo",))
+    other_path = db.ClientPath.OS(client_id=client_id, components=("bar",))
+    file_store.AddFilesWithUnknownHashes({other_path: blob_refs})
+
+    with mock.patch.object(
+        data_store.BLOBS, "ReadBlobs", wraps=data_store.BLOBS.ReadBlobs
+    ) as read_blobs:
+      hash_ids = file_store.AddFilesWithUnknownHashes(
+          {path: blob_refs}, client_path_sha256={path: hash_id.AsBytes()}
+      )
+      read_blobs.assert_not_called()
+
+    self.assertEqual(hash_ids[path], hash_id)
+    hash_blob_refs = data_store.REL_DB.ReadHashBlobReferences([hash_id])
+    self.assertEqual(
+        [ref.blob_id for ref in hash_blob_refs[hash_id]],
+        [bytes(blob_id) for blob_id in blob_ids],
+    )
+
+  def testReadsBlobsIfReportedHashIsNotKnown(self):
+    blobs = [b"foo", b"bar"]
+    blob_refs = _BlobRefsFromByteArray(blobs)
+    blob_ids = [models_blobs.BlobID(ref.blob_id) for ref in blob_refs]
+    data_store.BLOBS.WriteBlobs(dict(zip(blob_ids, blobs)))
+    hash_id = rdf_objects.SHA256HashID.FromData(b"foobar")
+
+    client_id = self.SetupClient(0)
+    path = db.ClientPath.OS(client_id=client_id, components=("foo",))
+
+    with mock.patch.object(
+        data_store.BLOBS, "ReadBlobs", wraps=data_store.BLOBS.ReadBlobs
+    ) as read_blobs:
+      hash_ids = file_store.AddFilesWithUnknownHashes(
+          {path: blob_refs}, client_path_sha256={path: hash_id.AsBytes()}
+      )
+      read_blobs.assert_called()
+
+    self.assertEqual(hash_ids[path], hash_id)
+
+  def testDoesNotStoreUnknownReportedHash(self):
+    blobs = [b"foo", b"bar"]
+    blob_refs = _BlobRefsFromByteArray(blobs)
+    blob_ids = [models_blobs.BlobID(ref.blob_id) for ref in blob_refs]
+    data_store.BLOBS.WriteBlobs(dict(zip(blob_ids, blobs)))
+    reported_hash_id = rdf_objects.SHA256HashID.FromData(b"quux")
+
+    client_id = self.SetupClient(0)
+    path = db.ClientPath.OS(client_id=client_id, components=("foo",))
+
+    # The reported hash does not match the uploaded contents.
+    hash_ids = file_store.AddFilesWithUnknownHashes(
+        {path: blob_refs},
+        client_path_sha256={path: reported_hash_id.AsBytes()},
+    )
+
+    self.assertEqual(
+        hash_ids[path], rdf_objects.SHA256HashID.FromData(b"foobar")
+    )
+    hash_blob_refs = data_store.REL_DB.ReadHashBlobReferences(
+        [reported_hash_id]
+    )
+    self.assertIsNone(hash_blob_refs[reported_hash_id])
+
+  def testReadsBlobsIfReportedHashHasDifferentBlobs(self):
+    blobs = [b"foo", b"bar"]
+    blob_refs = _BlobRefsFromByteArray(blobs)
+    blob_ids = [models_blobs.BlobID(ref.blob_id) for ref in blob_refs]
+    data_store.BLOBS.WriteBlobs(dict(zip(blob_ids, blobs)))
+    hash_id = rdf_objects.SHA256HashID.FromData(b"foobar")
+
+    other_blobs = [b"foob", b"ar"]
+    other_blob_refs = _BlobRefsFromByteArray(other_blobs)
+    other_blob_ids = [
+        models_blobs.BlobID(ref.blob_id) for ref in other_blob_refs
+    ]
+    data_store.BLOBS.WriteBlobs(dict(zip(other_blob_ids, other_blobs)))
+
+    client_id = self.SetupClient(0)
+    path = db.ClientPath.OS(client_id=client_id, components=("foo",))
+    other_path = db.ClientPath.OS(client_id=client_id, components=("bar",))
+    file_store.AddFilesWithUnknownHashes({path: blob_refs})
+
+    with mock.patch.object(
+        data_store.BLOBS, "ReadBlobs", wraps=data_store.BLOBS.ReadBlobs
+    ) as read_blobs:
+      hash_ids = file_store.AddFilesWithUnknownHashes(
+          {other_path: other_blob_refs},
+          client_path_sha256={other_path: hash_id.AsBytes()},
+      )
+      read_blobs.assert_called()
+
+    self.assertEqual(hash_ids[other_path], hash_id)
+
+  def testReadsBlobsWithReportedHashIfVerificationIsEnabled(self):
+    blobs = [b"foo", b"bar"]
+    blob_refs = _BlobRefsFromByteArray(blobs)
+    blob_ids = [models_blobs.BlobID(ref.blob_id) for ref in blob_refs]
+    data_store.BLOBS.WriteBlobs(dict(zip(blob_ids, blobs)))
+
+    client_id = self.SetupClient(0)
+    path = db.ClientPath.OS(client_id=client_id, components=("foo",))
+
+    with test_lib.ConfigOverrider(
+        {"Server.verify_uploaded_file_contents": True}
+    ):
+      hash_ids = file_store.AddFilesWithUnknownHashes(
+          {path: blob_refs}, client_path_sha256={path: b"\x00" * 32}
+      )
+
+    self.assertEqual(
+        hash_ids[path], rdf_objects.SHA256HashID.FromData(b"foobar")
+    )
+
+  @mock.patch.object(
+      file_store,
+      "BLOBS_READ_TIMEOUT",
+      rdfvalue.Duration.From(1, rdfvalue.MICROSECONDS),
+  )
+  def testRaisesIfBlobOfFileWithReportedHashIsNotFound(self):
+    blob_refs = _BlobRefsFromByteArray([b"foo"])
+
+    client_id = self.SetupClient(0)
+    path = db.ClientPath.OS(client_id=client_id, components=("foo",))
+
+    with self.assertRaises(file_store.BlobNotFoundError):
+      file_store.AddFilesWithUnknownHashes(
+          {path: blob_refs},
+          client_path_sha256={
+              path: rdf_objects.SHA256HashID.FromData(b"foo").AsBytes()
+          },
+      )
+
+  def testRaisesOnInvalidOffsetOfFileWithReportedHash(self):
+    blobs = [b"foo", b"bar"]
+    blob_refs = _BlobRefsFromByteArray(blobs)
+    blob_ids = [models_blobs.BlobID(ref.blob_id) for ref in blob_refs]
+    data_store.BLOBS.WriteBlobs(dict(zip(blob_ids, blobs)))
+    blob_refs[1].offset = 42
+
+    client_id = self.SetupClient(0)
+    path = db.ClientPath.OS(client_id=client_id, components=("foo",))
+
+    with self.assertRaises(file_store.InvalidBlobOffsetError):
+      file_store.AddFilesWithUnknownHashes(
+          {path: blob_refs},
+          client_path_sha256={
+              path: rdf_objects.SHA256HashID.FromData(b"foobar").AsBytes()
+          },
+      )
+
+  def testDoesNotReplaceContentsOfKnownHashWithReportedHash(self):
+    blobs = [b"foo", b"bar"]
+    blob_refs = _BlobRefsFromByteArray(blobs)
+    blob_ids = [models_blobs.BlobID(ref.blob_id) for ref in blob_refs]
+    data_store.BLOBS.WriteBlobs(dict(zip(blob_ids, blobs)))
+    hash_id = rdf_objects.SHA256HashID.FromData(b"foobar")
+
+    other_blobs = [b"quux"]
+    other_blob_refs = _BlobRefsFromByteArray(other_blobs)
+    other_blob_ids = [
+        models_blobs.BlobID(ref.blob_id) for ref in other_blob_refs
+    ]
+    data_store.BLOBS.WriteBlobs(dict(zip(other_blob_ids, other_blobs)))
+
+    client_id = self.SetupClient(0)
+    path = db.ClientPath.OS(client_id=client_id, components=("foo",))
+    other_path = db.ClientPath.OS(client_id=client_id, components=("bar",))
+
+    file_store.AddFilesWithUnknownHashes({path: blob_refs})
+    # The reported hash does not match the uploaded contents.
+    hash_ids = file_store.AddFilesWithUnknownHashes(
+        {other_path: other_blob_refs},
+        client_path_sha256={other_path: hash_id.AsBytes()},
+    )
+
+    self.assertEqual(
+        hash_ids[other_path], rdf_objects.SHA256HashID.FromData(b"quux")
+    )
+    hash_blob_refs = data_store.REL_DB.ReadHashBlobReferences([hash_id])
+    self.assertEqual(
+        [ref.blob_id for ref in hash_blob_refs[hash_id]],
+        [bytes(blob_id) for blob_id in blob_ids],
+    )
+
 
 class OpenFileTest(test_lib.GRRBaseTest):
   """Tests for OpenFile."""
@@ -2,8 +2,11 @@
 """FS GRR server side integration utility functions."""
 
 import binascii
+from concurrent import futures
 import datetime
-from typing import Collection, List
+import threading
+import time
+from typing import Collection, List, Optional
 
 from google.protobuf import timestamp_pb2
 from grr_response_core import config
@@ -41,27 +44,60 @@ RRG_REQUEST_COUNT = metrics.Counter(
 )
 
 
+FLEETSPEAK_SEND_BATCH_SIZE = metrics.Event(
+    "fleetspeak_send_batch_size",
+    bins=[1, 2, 5, 10, 20, 50, 100, 200, 500, 1000],
+)
+
+FLEETSPEAK_SEND_BATCH_LATENCY = metrics.Event(
+    "fleetspeak_send_batch_latency",
+    bins=[0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50],
+)
+
+FLEETSPEAK_SEND_BATCH_FAILURES = metrics.Counter(
+    "fleetspeak_send_batch_failures"
+)
+
+_send_executor: Optional[futures.ThreadPoolExecutor] = None
+_send_executor_lock = threading.Lock()
+
+
+def _GetSendExecutor() -> futures.ThreadPoolExecutor:
+  """Returns the process-wide executor used for sending message batches."""
+  global _send_executor
+
+  with _send_executor_lock:
+    if _send_executor is None:
+      _send_executor = futures.ThreadPoolExecutor(
+          max_workers=config.CONFIG["Server.fleetspeak_send_parallelism"],
+          thread_name_prefix="FleetspeakSender",
+      )
+    return _send_executor
+
+
 @FLEETSPEAK_CALL_LATENCY.Timed(fields=["InsertMessage"])
-def SendGrrMessageThroughFleetspeak(
-    grr_id: str,
-    grr_msg: rdf_flows.GrrMessage,
-    labels: Collection[str],  # TODO: Remove once RRG rollout done.
-) -> None:
-  """Sends the given GrrMessage through FS with retrying.
+def _InsertMessage(fs_msg: fs_common_pb2.Message) -> None:
+  fleetspeak_connector.CONN.outgoing.InsertMessage(
+      fs_msg,
+      single_try_timeout=WRITE_SINGLE_TRY_TIMEOUT,
+      timeout=WRITE_TOTAL_TIMEOUT,
+  )
 
-  The send operation is retried if a `grpc.RpcError` occurs.
 
-  The maximum number of retries corresponds to the config value
-  `Server.fleetspeak_send_retry_attempts`.
+def _TryInsertMessage(fs_msg: fs_common_pb2.Message) -> Optional[Exception]:
+  """Sends the message, returning the error instead of raising it."""
+  try:
+    _InsertMessage(fs_msg)
+  except Exception as e:  # pylint: disable=broad-except
+    return e
+  return None
 
-  A retry is delayed by the number of seconds specified in the config value
-  `Server.fleetspeak_send_retry_sleep_time_secs`.
 
-  Args:
-    grr_id: ID of grr client to send message to.
-    grr_msg: GRR message to send.
-    labels: Labels of the endpoint to send the message to.
-  """
+def _GrrMessageToFleetspeak(
+    grr_id: str,
+    grr_msg: rdf_flows.GrrMessage,
+) -> fs_common_pb2.Message:
+  """Wraps the given GrrMessage into a Fleetspeak message."""
   fs_msg = fs_common_pb2.Message(
       message_type="GrrMessage",
       destination=fs_common_pb2.Address(
@@ -75,41 +111,14 @@ def SendGrrMessageThroughFleetspeak(
   if grr_msg.request_id is not None:
     annotation = fs_msg.annotations.entries.add()
     annotation.key, annotation.value = "request_id", str(grr_msg.request_id)
-  fleetspeak_connector.CONN.outgoing.InsertMessage(
-      fs_msg,
-      single_try_timeout=WRITE_SINGLE_TRY_TIMEOUT,
-      timeout=WRITE_TOTAL_TIMEOUT,
-  )
+  return fs_msg
 
-  GRR_REQUEST_COUNT.Increment(
-      fields=[
-          grr_msg.name,
-          ",".join(sorted(labels)),
-      ]
-  )
 
-
-@FLEETSPEAK_CALL_LATENCY.Timed(fields=["InsertMessage"])
-def SendGrrMessageProtoThroughFleetspeak(
+def _GrrMessageProtoToFleetspeak(
     grr_id: str,
     grr_msg: jobs_pb2.GrrMessage,
-    labels: Collection[str],  # TODO: Remove once RRG rollout done.
-) -> None:
-  """Sends the given GrrMessage through FS with retrying.
-
-  The send operation is retried if a `grpc.RpcError` occurs.
-
-  The maximum number of retries corresponds to the config value
-  `Server.fleetspeak_send_retry_attempts`.
-
-  A retry is delayed by the number of seconds specified in the config value
-  `Server.fleetspeak_send_retry_sleep_time_secs`.
-
-  Args:
-    grr_id: ID of grr client to send message to.
-    grr_msg: GRR message to send.
-    labels: Labels of the endpoint to send the message to.
-  """
+) -> fs_common_pb2.Message:
+  """Wraps the given GrrMessage proto into a Fleetspeak message."""
   fs_msg = fs_common_pb2.Message(
       message_type="GrrMessage",
       destination=fs_common_pb2.Address(
@@ -125,33 +134,14 @@ def SendGrrMessageProtoThroughFleetspeak(
     annotation = fs_msg.annotations.entries.add()
     annotation.key = "request_id"
     annotation.value = str(grr_msg.request_id)
-  fleetspeak_connector.CONN.outgoing.InsertMessage(
-      fs_msg,
-      single_try_timeout=WRITE_SINGLE_TRY_TIMEOUT,
-      timeout=WRITE_TOTAL_TIMEOUT,
-  )
-
-  GRR_REQUEST_COUNT.Increment(
-      fields=[
-          grr_msg.name,
-          ",".join(sorted(labels)),
-      ]
-  )
+  return fs_msg
 
 
-@FLEETSPEAK_CALL_LATENCY.Timed(fields=["InsertMessage"])
-def SendRrgRequest(
+def _RrgRequestToFleetspeak(
     client_id: str,
     request: rrg_pb2.Request,
-    labels: Collection[str],  # TODO: Remove once RRG rollout done.
-) -> None:
-  """Sends a RRG action request to the specified endpoint.
-
-  Args:
-    client_id: A unique endpoint identifier as recognized by GRR.
-    request: A request to send to the endpoint.
-    labels: Labels of the endpoint to send the message to.
-  """
+) -> fs_common_pb2.Message:
+  """Wraps the given RRG request into a Fleetspeak message."""
   message = fs_common_pb2.Message()
   message.message_type = "rrg.Request"
   message.destination.service_name = "RRG"
@@ -168,19 +158,170 @@ def SendRrgRequest(
       key="request_id",
       value=str(request.request_id),
   )
+  return message
 
-  fleetspeak_connector.CONN.outgoing.InsertMessage(
-      message,
-      single_try_timeout=WRITE_SINGLE_TRY_TIMEOUT,
-      timeout=WRITE_TOTAL_TIMEOUT,
-  )
 
-  RRG_REQUEST_COUNT.Increment(
-      fields=[
-          rrg_pb2.Action.Name(request.action),
-          ",".join(sorted(labels)),
-      ]
-  )
+class OutgoingMessageBatch:
+  """A batch of messages to be sent to Fleetspeak agents.
+
+  Messages are only sent when `Send` is called. Batches of more than one
+  message are sent concurrently through an executor shared by all batches of
+  the process, so the number of in-flight `InsertMessage` calls stays bounded
+  by `Server.fleetspeak_send_parallelism` regardless of how many flows flush
+  their messages at the same time.
+
+  Messages of a batch may reach Fleetspeak in any order.
+  """
+
+  def __init__(self) -> None:
+    # Fleetspeak messages with the request counter and fields to increment
+    # once the message has been sent.
+    self._messages: list[
+        tuple[fs_common_pb2.Message, metrics.Counter, list[str]]
+    ] = []
+
+  def __len__(self) -> int:
+    return len(self._messages)
+
+  def AddGrrMessage(
+      self,
+      grr_id: str,
+      grr_msg: rdf_flows.GrrMessage,
+      labels: Collection[str],  # TODO: Remove once RRG rollout done.
+  ) -> None:
+    """Adds a GrrMessage to be sent to the given client."""
+    self._messages.append((
+        _GrrMessageToFleetspeak(grr_id, grr_msg),
+        GRR_REQUEST_COUNT,
+        [grr_msg.name, ",".join(sorted(labels))],
+    ))
+
+  def AddGrrMessageProto(
+      self,
+      grr_id: str,
+      grr_msg: jobs_pb2.GrrMessage,
+      labels: Collection[str],  # TODO: Remove once RRG rollout done.
+  ) -> None:
+    """Adds a GrrMessage proto to be sent to the given client."""
+    self._messages.append((
+        _GrrMessageProtoToFleetspeak(grr_id, grr_msg),
+        GRR_REQUEST_COUNT,
+        [grr_msg.name, ",".join(sorted(labels))],
+    ))
+
+  def AddRrgRequest(
+      self,
+      client_id: str,
+      request: rrg_pb2.Request,
+      labels: Collection[str],  # TODO: Remove once RRG rollout done.
+  ) -> None:
+    """Adds a RRG action request to be sent to the given endpoint."""
+    self._messages.append((
+        _RrgRequestToFleetspeak(client_id, request),
+        RRG_REQUEST_COUNT,
+        [rrg_pb2.Action.Name(request.action), ",".join(sorted(labels))],
+    ))
+
+  def Send(self) -> None:
+    """Sends all messages of the batch and empties it.
+
+    Every message is attempted even if some of them fail, the first error is
+    re-raised once all sends have finished.
+
+    Raises:
+      Exception: Any error raised by sending one of the messages.
+    """
+    messages = self._messages
+    self._messages = []
+    if not messages:
+      return
+
+    start_time = time.monotonic()
+
+    fs_msgs = [fs_msg for fs_msg, _, _ in messages]
+    if len(fs_msgs) == 1:
+      errors = [_TryInsertMessage(fs_msgs[0])]
+    else:
+      errors = list(_GetSendExecutor().map(_TryInsertMessage, fs_msgs))
+
+    FLEETSPEAK_SEND_BATCH_SIZE.RecordEvent(len(messages))
+    FLEETSPEAK_SEND_BATCH_LATENCY.RecordEvent(time.monotonic() - start_time)
+
+    for (_, counter, fields), error in zip(messages, errors):
+      if error is None:
+        counter.Increment(fields=fields)
+
+    for error in errors:
+      if error is not None:
+        FLEETSPEAK_SEND_BATCH_FAILURES.Increment()
+        raise error
+
+
+def SendGrrMessageThroughFleetspeak(
+    grr_id: str,
+    grr_msg: rdf_flows.GrrMessage,
+    labels: Collection[str],  # TODO: Remove once RRG rollout done.
+) -> None:
+  """Sends the given GrrMessage through FS with retrying.
+
+  The send operation is retried if a `grpc.RpcError` occurs.
+
+  The maximum number of retries corresponds to the config value
+  `Server.fleetspeak_send_retry_attempts`.
+
+  A retry is delayed by the number of seconds specified in the config value
+  `Server.fleetspeak_send_retry_sleep_time_secs`.
+
+  Args:
+    grr_id: ID of grr client to send message to.
+    grr_msg: GRR message to send.
+    labels: Labels of the endpoint to send the message to.
+  """
+  batch = OutgoingMessageBatch()
+  batch.AddGrrMessage(grr_id, grr_msg, labels)
+  batch.Send()
+
+
+def SendGrrMessageProtoThroughFleetspeak(
+    grr_id: str,
+    grr_msg: jobs_pb2.GrrMessage,
+    labels: Collection[str],  # TODO: Remove once RRG rollout done.
+) -> None:
+  """Sends the given GrrMessage through FS with retrying.
+
+  The send operation is retried if a `grpc.RpcError` occurs.
+
+  The maximum number of retries corresponds to the config value
+  `Server.fleetspeak_send_retry_attempts`.
+
+  A retry is delayed by the number of seconds specified in the config value
+  `Server.fleetspeak_send_retry_sleep_time_secs`.
+
+  Args:
+    grr_id: ID of grr client to send message to.
+    grr_msg: GRR message to send.
+    labels: Labels of the endpoint to send the message to.
+  """
+  batch = OutgoingMessageBatch()
+  batch.AddGrrMessageProto(grr_id, grr_msg, labels)
+  batch.Send()
+
+
+def SendRrgRequest(
+    client_id: str,
+    request: rrg_pb2.Request,
+    labels: Collection[str],  # TODO: Remove once RRG rollout done.
+) -> None:
+  """Sends a RRG action request to the specified endpoint.
+
+  Args:
+    client_id: A unique endpoint identifier as recognized by GRR.
+    request: A request to send to the endpoint.
+    labels: Labels of the endpoint to send the message to.
+  """
+  batch = OutgoingMessageBatch()
+  batch.AddRrgRequest(client_id, request, labels)
+  batch.Send()
 
 
 @FLEETSPEAK_CALL_LATENCY.Timed(fields=["InsertMessage"])
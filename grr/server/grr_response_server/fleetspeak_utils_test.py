@@ -8,6 +8,7 @@ from absl import app
 from google.protobuf import timestamp_pb2
 from grr_response_core.lib.rdfvalues import flows as rdf_flows
 from grr_response_proto import jobs_pb2
+from grr_response_proto import rrg_pb2
 from grr_response_server import fleetspeak_connector
 from grr_response_server import fleetspeak_utils
 from grr.test_lib import test_lib
@@ -146,6 +147,74 @@ class FleetspeakUtilsTest(test_lib.GRRBaseTest):
     self.assertEqual(fs_message.annotations, expected_annotations)
     self.assertEqual(grr_message, unpacked_message)
 
+  @mock.patch.object(fleetspeak_connector, "CONN")
+  def testOutgoingMessageBatchSendsAllMessages(self, mock_conn):
+    client_id = "C.0123456789abcdef"
+    batch = fleetspeak_utils.OutgoingMessageBatch()
+    for i in range(10):
+      batch.AddGrrMessageProto(
+          client_id,
+          jobs_pb2.GrrMessage(
+              session_id=f"{client_id}/01234567",
+              name="TestClientAction",
+              request_id=i,
+          ),
+          [],
+      )
+    batch.AddRrgRequest(
+        client_id,
+        rrg_pb2.Request(flow_id=0x01234567, request_id=10),
+        [],
+    )
+    self.assertLen(batch, 11)
+
+    batch.Send()
+
+    self.assertEmpty(batch)
+    self.assertEqual(mock_conn.outgoing.InsertMessage.call_count, 11)
+    request_ids = set()
+    for insert_args, _ in mock_conn.outgoing.InsertMessage.call_args_list:
+      annotations = {
+          entry.key: entry.value
+          for entry in insert_args[0].annotations.entries
+      }
+      request_ids.add(annotations["request_id"])
+    self.assertEqual(request_ids, set(str(i) for i in range(11)))
+
+  @mock.patch.object(fleetspeak_connector, "CONN")
+  def testOutgoingMessageBatchAttemptsAllMessagesOnError(self, mock_conn):
+    client_id = "C.0123456789abcdef"
+
+    def InsertMessage(fs_msg, **_):
+      grr_msg = jobs_pb2.GrrMessage()
+      fs_msg.data.Unpack(grr_msg)
+      if grr_msg.request_id == 3:
+        raise RuntimeError("Fleetspeak is down")
+
+    mock_conn.outgoing.InsertMessage.side_effect = InsertMessage
+
+    batch = fleetspeak_utils.OutgoingMessageBatch()
+    for i in range(5):
+      batch.AddGrrMessageProto(
+          client_id,
+          jobs_pb2.GrrMessage(
+              session_id=f"{client_id}/01234567",
+              name="TestClientAction",
+              request_id=i,
+          ),
+          [],
+      )
+
+    with self.assertRaisesRegex(RuntimeError, "Fleetspeak is down"):
+      batch.Send()
+
+    self.assertEqual(mock_conn.outgoing.InsertMessage.call_count, 5)
+
+  @mock.patch.object(fleetspeak_connector, "CONN")
+  def testOutgoingMessageBatchSendsNothingWhenEmpty(self, mock_conn):
+    fleetspeak_utils.OutgoingMessageBatch().Send()
+    mock_conn.outgoing.InsertMessage.assert_not_called()
+
   @mock.patch.object(fleetspeak_connector, "CONN")
   def testKillFleetspeak(self, mock_conn):
     fleetspeak_utils.KillFleetspeak("C.1000000000000000", True)
@@ -275,6 +275,11 @@ class FlowBase(
     self._rrg_startup: Optional[rrg_startup_pb2.Startup] = None
 
     self._num_replies_per_type_tag = collections.Counter()
+
+    # Resource usage not yet reported to the parent hunt's limits evaluator.
+    self._unreported_hunt_cpu_seconds = 0.0
+    self._unreported_hunt_network_bytes_sent = 0
+
     if rdf_flow.HasField("result_metadata"):
       self._result_metadata = rdf_flow.result_metadata.AsPrimitiveProto()
     else:
@@ -1145,6 +1150,10 @@ class FlowBase(
 
     self.rdf_flow.network_bytes_sent += status.network_bytes_sent
 
+    if self.rdf_flow.parent_hunt_id:
+      self._unreported_hunt_cpu_seconds += user_cpu + system_cpu
+      self._unreported_hunt_network_bytes_sent += status.network_bytes_sent
+
     if not self.rdf_flow.runtime_us:
       self.rdf_flow.runtime_us = rdfvalue.Duration(0)
 
@@ -1251,7 +1260,7 @@ class FlowBase(
       if self.rdf_flow.parent_flow_id:
         self.flow_responses.append(status_msg)
       elif self.rdf_flow.parent_hunt_id:
-        hunt.StopHuntIfCPUOrNetworkLimitsExceeded(self.rdf_flow.parent_hunt_id)
+        self._StopParentHuntIfLimitsExceeded()
 
     self.rdf_flow.flow_state = self.rdf_flow.FlowState.ERROR
     if backtrace is not None:
@@ -1319,6 +1328,17 @@ class FlowBase(
         ),
     )
 
+  def _StopParentHuntIfLimitsExceeded(self, num_results: int = 0) -> None:
+    """Reports resource usage to the parent hunt and enforces its limits."""
+    hunt.StopHuntIfCPUOrNetworkLimitsExceeded(
+        self.rdf_flow.parent_hunt_id,
+        num_results=num_results,
+        cpu_seconds=self._unreported_hunt_cpu_seconds,
+        network_bytes_sent=self._unreported_hunt_network_bytes_sent,
+    )
+    self._unreported_hunt_cpu_seconds = 0.0
+    self._unreported_hunt_network_bytes_sent = 0
+
   def MarkDone(self, status=None):
     """Marks this flow as done."""
     FLOW_COMPLETIONS.Increment(fields=[self.__class__.__name__])
@@ -1339,7 +1359,7 @@ class FlowBase(
       if self.rdf_flow.parent_flow_id:
         self.flow_responses.append(status)
       elif self.rdf_flow.parent_hunt_id:
-        hunt.StopHuntIfCPUOrNetworkLimitsExceeded(self.rdf_flow.parent_hunt_id)
+        self._StopParentHuntIfLimitsExceeded()
 
     self.rdf_flow.flow_state = self.rdf_flow.FlowState.FINISHED
 
@@ -1506,9 +1526,12 @@ class FlowBase(
       (processed, incrementally_processed) The number of completed processed
       requests and the number of incrementally processed ones.
     """
-    request_dict = data_store.REL_DB.ReadFlowRequests(
+    # Only requests that can be processed right now are read, so that requests
+    # still waiting for responses from the client do not slow processing down.
+    request_dict = data_store.REL_DB.ReadFlowRequestsReadyForProcessing(
         self.rdf_flow.client_id,
         self.rdf_flow.flow_id,
+        next_needed_request=self.rdf_flow.next_request_to_process,
     )
 
     completed_requests = FindCompletedRequestsToProcess(
@@ -1678,34 +1701,22 @@ class FlowBase(
       data_store.REL_DB.WriteFlowResponses(self.proto_flow_responses)
       self.proto_flow_responses = []
 
-    if self.client_action_requests:
-      client_id = self.rdf_flow.client_id
-      for request in self.client_action_requests:
-        fleetspeak_utils.SendGrrMessageThroughFleetspeak(
-            client_id,
-            request,
-            self.client_labels,
-        )
-
-      self.client_action_requests = []
-
-    if self.proto_client_action_requests:
-      client_id = self.rdf_flow.client_id
-      for request in self.proto_client_action_requests:
-        fleetspeak_utils.SendGrrMessageProtoThroughFleetspeak(
-            client_id,
-            request,
-            self.client_labels,
-        )
-      self.proto_client_action_requests = []
-
-    for request in self.rrg_requests:
-      fleetspeak_utils.SendRrgRequest(
-          self.rdf_flow.client_id,
-          request,
-          self.client_labels,
+    # All messages to the client are sent as a single batch, so that their
+    # Fleetspeak calls don't serialize on each other's latency.
+    outgoing_messages = fleetspeak_utils.OutgoingMessageBatch()
+    client_id = self.rdf_flow.client_id
+    for request in self.client_action_requests:
+      outgoing_messages.AddGrrMessage(client_id, request, self.client_labels)
+    for request in self.proto_client_action_requests:
+      outgoing_messages.AddGrrMessageProto(
+          client_id, request, self.client_labels
       )
+    for request in self.rrg_requests:
+      outgoing_messages.AddRrgRequest(client_id, request, self.client_labels)
+    outgoing_messages.Send()
 
+    self.client_action_requests = []
+    self.proto_client_action_requests = []
     self.rrg_requests = []
 
     if self.completed_requests:
@@ -1719,7 +1730,7 @@ class FlowBase(
       # Write flow results to REL_DB, even if the flow is a nested flow.
       data_store.REL_DB.WriteFlowResults(all_results)
       if self.rdf_flow.parent_hunt_id:
-        hunt.StopHuntIfCPUOrNetworkLimitsExceeded(self.rdf_flow.parent_hunt_id)
+        self._StopParentHuntIfLimitsExceeded(num_results=len(all_results))
       self.proto_replies_to_write = []
       self.replies_to_write = []
 
@@ -435,6 +435,10 @@ class ArtifactCollectorFlow(
       file_store.AddFilesWithUnknownHashes(
           {client_path: [empty_blob_ref] for client_path in empty_client_paths},
           use_external_stores=False,
+          client_path_sha256={
+              client_path: hashlib.sha256(b"").digest()
+              for client_path in empty_client_paths
+          },
       )
 
       for path_info in empty_path_infos:
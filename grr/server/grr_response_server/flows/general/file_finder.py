@@ -11,11 +11,13 @@ from typing import Optional, cast
 from google.protobuf import any_pb2
 from google.protobuf import timestamp_pb2
 from grr_response_core.lib import artifact_utils
+from grr_response_core.lib import constants
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import file_finder as rdf_file_finder
 from grr_response_core.lib.rdfvalues import mig_client_fs
 from grr_response_core.lib.rdfvalues import mig_file_finder
 from grr_response_core.lib.rdfvalues import mig_paths
+from grr_response_core.stats import metrics
 from grr_response_proto import flows_pb2
 from grr_response_proto import jobs_pb2
 from grr_response_proto import knowledge_base_pb2
@@ -39,6 +41,13 @@ from grr_response_proto.rrg import os_pb2 as rrg_os_pb2
 from grr_response_proto.rrg.action import get_file_contents_pb2 as rrg_get_file_contents_pb2
 from grr_response_proto.rrg.action import get_file_metadata_pb2 as rrg_get_file_metadata_pb2
 
+FILE_FINDER_DEDUP_BYTES_SKIPPED = metrics.Counter(
+    "file_finder_dedup_bytes_skipped"
+)
+FILE_FINDER_DEDUP_BYTES_UPLOADED = metrics.Counter(
+    "file_finder_dedup_bytes_uploaded"
+)
+
 
 def _GetPendingBlobIDs(
     responses: Sequence[flows_pb2.FileFinderResult],
@@ -183,6 +192,16 @@ class ClientFileFinder(
       # TODO: Replace with `clear()` once upgraded.
       del interpolated_args.paths[:]
       interpolated_args.paths.extend(paths)
+
+      download = interpolated_args.action.download
+      if download.dedup_chunks and not self._DedupChunks():
+        self.Log(
+            "Chunk size %d is too big for chunk deduplication, uploading "
+            "all chunks.",
+            download.chunk_size,
+        )
+        download.dedup_chunks = False
+
       self.CallClientProto(
           stub,
           action_args=interpolated_args,
@@ -190,6 +209,16 @@ class ClientFileFinder(
       )
     self.store.num_blob_waits = 0
 
+  def _DedupChunks(self) -> bool:
+    """Returns whether the client is asked to deduplicate file chunks."""
+    download = self.proto_args.action.download
+    # Missing chunks are fetched with `TransferBuffer`, which has a limit on
+    # the size of buffers it reads.
+    return (
+        download.dedup_chunks
+        and download.chunk_size <= constants.CLIENT_MAX_BUFFER_SIZE
+    )
+
   def _StartRRG(self) -> None:
     paths = self._InterpolatePaths(self.proto_args.paths)
     if not paths:
@@ -675,12 +704,134 @@ class ClientFileFinder(
     for r in stat_entry_responses:
       self.SendReplyProto(r)
 
-    if transferred_file_responses:
+    if not transferred_file_responses:
+      return
+
+    if self._DedupChunks():
+      self._UploadMissingChunks(transferred_file_responses)
+    else:
       self.CallStateInlineProto(
           next_state=self.StoreResultsWithBlobs.__name__,
           messages=transferred_file_responses,
       )
 
+  def _UploadMissingChunks(
+      self,
+      responses: Sequence[flows_pb2.FileFinderResult],
+  ) -> None:
+    """Requests chunks missing from the blob store from the client.
+
+    With chunk deduplication enabled, the client only reports digests of the
+    file chunks. Chunks that the blob store already has are not transferred
+    at all, the missing ones are requested with `TransferBuffer`.
+
+    Args:
+      responses: File finder results with chunk digests.
+    """
+    chunks_by_blob_id = {}
+    for response in responses:
+      for chunk in response.transferred_file.chunks:
+        blob_id = models_blobs.BlobID(chunk.digest)
+        # The same chunk can be present in multiple files (or multiple times
+        # in the same one), but it has to be uploaded only once.
+        chunks_by_blob_id.setdefault(blob_id, []).append(
+            (response.stat_entry.pathspec, chunk)
+        )
+
+    blobs_present = data_store.BLOBS.CheckBlobsExist(chunks_by_blob_id)
+
+    bytes_skipped = 0
+    bytes_uploaded = 0
+    for blob_id, chunks in chunks_by_blob_id.items():
+      if blobs_present[blob_id]:
+        bytes_skipped += sum(chunk.length for _, chunk in chunks)
+        continue
+
+      pathspec, chunk = chunks[0]
+      bytes_uploaded += chunk.length
+      bytes_skipped += sum(chunk.length for _, chunk in chunks[1:])
+      self.CallClientProto(
+          server_stubs.TransferBuffer,
+          jobs_pb2.BufferReference(
+              pathspec=pathspec,
+              offset=chunk.offset,
+              length=chunk.length,
+          ),
+          next_state=self._ReceiveMissingChunk.__name__,
+          request_data={"digest": chunk.digest.hex()},
+      )
+
+    progress = self.GetProgressProto()
+    progress.dedup_bytes_skipped += bytes_skipped
+    progress.dedup_bytes_uploaded += bytes_uploaded
+    FILE_FINDER_DEDUP_BYTES_SKIPPED.Increment(bytes_skipped)
+    FILE_FINDER_DEDUP_BYTES_UPLOADED.Increment(bytes_uploaded)
+
+    self.Log(
+        "Chunk deduplication: %d bytes already stored, %d bytes to upload.",
+        bytes_skipped,
+        bytes_uploaded,
+    )
+
+    # Flow requests are processed in order, so this state runs only after all
+    # the chunk uploads above have completed.
+    self.CallStateProto(
+        next_state=self._StoreDeduplicatedResults.__name__,
+        responses=list(responses),
+    )
+
+  @flow_base.UseProto2AnyResponses
+  def _ReceiveMissingChunk(
+      self,
+      responses: flow_responses.Responses[any_pb2.Any],
+  ) -> None:
+    """Checks that a chunk uploaded by the client is the one it reported."""
+    expected_digest = bytes.fromhex(responses.request_data["digest"])
+
+    if not responses.success:
+      error = responses.status.error_message
+    else:
+      response = jobs_pb2.BufferReference()
+      responses.First().Unpack(response)
+      if response.data == expected_digest:
+        return
+      # Most likely the file has changed since its chunks were hashed.
+      error = "digest mismatch"
+
+    self.Log("Failed to upload chunk %s: %s", expected_digest.hex(), error)
+    self.store.failed_chunk_digests.append(expected_digest)
+
+  @flow_base.UseProto2AnyResponses
+  def _StoreDeduplicatedResults(
+      self,
+      responses: flow_responses.Responses[any_pb2.Any],
+  ) -> None:
+    """Stores results whose missing chunks have been uploaded."""
+    failed_digests = set(self.store.failed_chunk_digests)
+
+    results = []
+    for response_any in responses:
+      result = flows_pb2.FileFinderResult()
+      response_any.Unpack(result)
+
+      if any(
+          chunk.digest in failed_digests
+          for chunk in result.transferred_file.chunks
+      ):
+        self.Log(
+            "Not storing %s as some of its chunks failed to upload.",
+            result.stat_entry.pathspec.path,
+        )
+        continue
+
+      results.append(result)
+
+    if results:
+      self.CallStateInlineProto(
+          next_state=self.StoreResultsWithBlobs.__name__,
+          messages=results,
+      )
+
   @flow_base.UseProto2AnyResponses
   def StoreResultsWithBlobs(
       self,
@@ -774,6 +925,7 @@ class ClientFileFinder(
     client_path_path_info = dict()
     client_path_hash_id = dict()
     client_path_sizes = dict()
+    client_path_sha256 = dict()
 
     for response in complete_responses:
       stat_entry = mig_client_fs.ToRDFStatEntry(response.stat_entry)
@@ -796,11 +948,15 @@ class ClientFileFinder(
       client_path_path_info[client_path] = path_info
       client_path_blob_refs[client_path] = blob_refs
       client_path_sizes[client_path] = file_size
+      if response.transferred_file.HasField("sha256"):
+        client_path_sha256[client_path] = response.transferred_file.sha256
 
     if client_path_blob_refs:
       use_external_stores = self.args.action.download.use_external_stores
       client_path_hash_id = file_store.AddFilesWithUnknownHashes(
-          client_path_blob_refs, use_external_stores=use_external_stores
+          client_path_blob_refs,
+          use_external_stores=use_external_stores,
+          client_path_sha256=client_path_sha256,
       )
       for client_path, hash_id in client_path_hash_id.items():
         path_info = client_path_path_info[client_path]
@@ -17,6 +17,7 @@ from absl import app
 
 from google.protobuf import any_pb2
 from grr_response_client import vfs
+from grr_response_client.client_actions import standard
 from grr_response_client.client_actions.file_finder_utils import uploading
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import client_fs as rdf_client_fs
@@ -1383,6 +1384,56 @@ class TestClientFileFinderFlow(flow_test_lib.FlowTestsBaseclass):
 
     self._VerifyDownloadedFiles(results)
 
+  def _RunDedupDownload(self, path, chunk_size):
+    flow_id = flow_test_lib.StartAndRunFlow(
+        file_finder.ClientFileFinder,
+        action_mocks.FileFinderClientMock(),
+        client_id=self.client_id,
+        flow_args=rdf_file_finder.FileFinderArgs(
+            paths=[path],
+            pathtype=rdf_paths.PathSpec.PathType.OS,
+            action=rdf_file_finder.FileFinderAction.Download(
+                chunk_size=chunk_size, dedup_chunks=True
+            ),
+            process_non_regular_files=True,
+        ),
+        creator=self.test_username,
+    )
+
+    flow_obj = data_store.REL_DB.ReadFlowObject(self.client_id, flow_id)
+    progress = flows_pb2.FileFinderProgress()
+    self.assertTrue(flow_obj.progress.Unpack(progress))
+
+    results = flow_test_lib.GetFlowResults(self.client_id, flow_id)
+    return results, progress
+
+  def testDownloadWithChunkDedupUploadsMissingChunks(self):
+    path = os.path.join(self.base_path, "History.plist")
+    size = os.stat(path).st_size
+
+    results, progress = self._RunDedupDownload(path, size // 4)
+
+    self.assertLen(results, 1)
+    self._VerifyDownloadedFiles(results)
+    self.assertEqual(progress.dedup_bytes_uploaded, size)
+    self.assertEqual(progress.dedup_bytes_skipped, 0)
+
+  def testDownloadWithChunkDedupSkipsStoredChunks(self):
+    path = os.path.join(self.base_path, "History.plist")
+    size = os.stat(path).st_size
+    self._RunDedupDownload(path, size // 4)
+
+    with mock.patch.object(
+        standard.TransferBuffer, "Run", autospec=True
+    ) as transfer_buffer_mock:
+      results, progress = self._RunDedupDownload(path, size // 4)
+
+    transfer_buffer_mock.assert_not_called()
+    self.assertLen(results, 1)
+    self._VerifyDownloadedFiles(results)
+    self.assertEqual(progress.dedup_bytes_uploaded, 0)
+    self.assertEqual(progress.dedup_bytes_skipped, size)
+
   def testFileWithExactlyThanOneChunk(self):
     path = os.path.join(self.base_path, "History.plist")
     s = os.stat(path).st_size
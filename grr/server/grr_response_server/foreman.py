@@ -2,10 +2,13 @@
 """The GRR Foreman."""
 
 import logging
+import threading
+from typing import Optional
 
 from grr_response_core.lib import rdfvalue
 from grr_response_server import data_store
 from grr_response_server import flow
+from grr_response_server import foreman_rules
 from grr_response_server import hunt
 from grr_response_server import message_handlers
 from grr_response_server import mig_foreman_rules
@@ -21,6 +24,196 @@ class UnknownHuntTypeError(Error):
   pass
 
 
+_OS_PREFIXES = {
+    "os_windows": "Windows",
+    "os_linux": "Linux",
+    "os_darwin": "Darwin",
+}
+
+
+def _GetLabelKeys(
+    client_rule: foreman_rules.ForemanClientRule,
+) -> Optional[frozenset[str]]:
+  """Returns labels one of which a client needs to match the given rule."""
+  if client_rule.rule_type != foreman_rules.ForemanClientRule.Type.LABEL:
+    return None
+
+  label_rule = client_rule.label
+  match_mode = foreman_rules.ForemanLabelClientRule.MatchMode
+  if label_rule.match_mode == match_mode.MATCH_ANY:
+    return frozenset(label_rule.label_names)
+  # An empty MATCH_ALL rule matches every client.
+  if label_rule.match_mode == match_mode.MATCH_ALL and label_rule.label_names:
+    return frozenset(label_rule.label_names)
+  return None
+
+
+def _GetOsKeys(
+    client_rule: foreman_rules.ForemanClientRule,
+) -> Optional[frozenset[str]]:
+  """Returns OS prefixes one of which a client needs to match the rule."""
+  if client_rule.rule_type != foreman_rules.ForemanClientRule.Type.OS:
+    return None
+
+  os_rule = client_rule.os
+  return frozenset(
+      prefix for attr, prefix in _OS_PREFIXES.items() if getattr(os_rule, attr)
+  )
+
+
+def _IsClientIdRegexRule(
+    client_rule: foreman_rules.ForemanClientRule,
+) -> bool:
+  string_field = foreman_rules.ForemanRegexClientRule.ForemanStringField
+  return (
+      client_rule.rule_type == foreman_rules.ForemanClientRule.Type.REGEX
+      and client_rule.regex.field == string_field.CLIENT_ID
+  )
+
+
+def _GetKeys(rule_set, get_keys_fn) -> Optional[frozenset[str]]:
+  """Returns keys one of which a client needs to match the whole rule set."""
+  keys = [get_keys_fn(rule) for rule in rule_set.rules]
+
+  match_mode = foreman_rules.ForemanClientRuleSet.MatchMode
+  if rule_set.match_mode == match_mode.MATCH_ALL:
+    # Every rule has to match, so any single rule's keys are necessary.
+    for rule_keys in keys:
+      if rule_keys is not None:
+        return rule_keys
+    return None
+
+  # In the MATCH_ANY mode, the keys are only usable if every rule has them.
+  if keys and all(rule_keys is not None for rule_keys in keys):
+    return frozenset().union(*keys)
+  return None
+
+
+class CompiledForemanRule(object):
+  """A foreman rule with precomputed necessary conditions for matching.
+
+  The keys only narrow down the set of candidate rules: a rule that passes
+  them is still evaluated against the full client information.
+
+  Attributes:
+    condition: The `foreman_rules.ForemanCondition` of the rule.
+    label_keys: If set, labels one of which a client must have to match.
+    os_keys: If set, OS name prefixes one of which a client must match.
+    client_id_regexes: Regexes the client id must match before anything is
+      read from the database.
+  """
+
+  def __init__(self, condition: foreman_rules.ForemanCondition):
+    self.condition = condition
+
+    rule_set = condition.client_rule_set
+    self.label_keys = _GetKeys(rule_set, _GetLabelKeys)
+    self.os_keys = _GetKeys(rule_set, _GetOsKeys)
+
+    self.client_id_regexes = []
+    match_mode = foreman_rules.ForemanClientRuleSet.MatchMode
+    if rule_set.match_mode == match_mode.MATCH_ALL:
+      for rule in rule_set.rules:
+        if _IsClientIdRegexRule(rule):
+          self.client_id_regexes.append(rule.regex.attribute_regex)
+
+  def MatchesClientId(self, client_id: str) -> bool:
+    return all(regex.Search(client_id) for regex in self.client_id_regexes)
+
+
+class CompiledForemanRules(object):
+  """An indexed set of compiled foreman rules."""
+
+  def __init__(self, conditions: list[foreman_rules.ForemanCondition]):
+    self.rules = [CompiledForemanRule(cond) for cond in conditions]
+    if self.rules:
+      self.latest_creation_time = max(
+          rule.condition.creation_time for rule in self.rules
+      )
+    else:
+      self.latest_creation_time = None
+
+    self._by_label: dict[str, set[str]] = {}
+    self._by_os: dict[str, set[str]] = {}
+    for rule in self.rules:
+      hunt_id = rule.condition.hunt_id
+      for label in rule.label_keys or []:
+        self._by_label.setdefault(label, set()).add(hunt_id)
+      for os_prefix in rule.os_keys or []:
+        self._by_os.setdefault(os_prefix, set()).add(hunt_id)
+
+  def FilterByLabels(
+      self, rules: list[CompiledForemanRule], labels: list[str]
+  ) -> list[CompiledForemanRule]:
+    """Drops rules that can't match a client with the given labels."""
+    hunt_ids = set()
+    for label in labels:
+      hunt_ids.update(self._by_label.get(label, ()))
+
+    return [
+        rule
+        for rule in rules
+        if rule.label_keys is None or rule.condition.hunt_id in hunt_ids
+    ]
+
+  def FilterByOs(
+      self, rules: list[CompiledForemanRule], os_name: str
+  ) -> list[CompiledForemanRule]:
+    """Drops rules that can't match a client with the given OS."""
+    hunt_ids = set()
+    if os_name:
+      for os_prefix, prefix_hunt_ids in self._by_os.items():
+        if os_name.startswith(os_prefix):
+          hunt_ids.update(prefix_hunt_ids)
+
+    return [
+        rule
+        for rule in rules
+        if rule.os_keys is None or rule.condition.hunt_id in hunt_ids
+    ]
+
+
+class ForemanRulesCache(object):
+  """A process-level cache of compiled foreman rules.
+
+  Rules are only re-read and re-compiled when the database reports a new
+  foreman rules generation, i.e. after rules were written or removed.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._db = None
+    self._generation = None
+    self._rules = None
+
+  def Get(self) -> CompiledForemanRules:
+    """Returns compiled rules that are current as of the call."""
+    db_obj = data_store.REL_DB
+    # The generation has to be read before the rules: if the rules change in
+    # between, the next call sees a new generation and reloads them.
+    generation = db_obj.ReadForemanRulesGeneration()
+
+    with self._lock:
+      if self._db is db_obj and self._generation == generation:
+        return self._rules
+
+    conditions = [
+        mig_foreman_rules.ToRDFForemanCondition(cond)
+        for cond in db_obj.ReadAllForemanRules()
+    ]
+    rules = CompiledForemanRules(conditions)
+
+    with self._lock:
+      self._db = db_obj
+      self._generation = generation
+      self._rules = rules
+
+    return rules
+
+
+_RULES_CACHE = ForemanRulesCache()
+
+
 # TODO(amoser): Now that Foreman rules are directly stored in the db,
 # consider removing this class altogether once the AFF4 Foreman has
 # been removed.
@@ -97,16 +290,13 @@ class Foreman(object):
     Returns:
       Number of assigned tasks.
     """
-    proto_rules = data_store.REL_DB.ReadAllForemanRules()
-    rules = [
-        mig_foreman_rules.ToRDFForemanCondition(cond) for cond in proto_rules
-    ]
-    if not rules:
+    compiled_rules = _RULES_CACHE.Get()
+    if not compiled_rules.rules:
       return 0
 
     last_foreman_run = self._GetLastForemanRunTime(client_id)
 
-    latest_rule_creation_time = max(rule.creation_time for rule in rules)
+    latest_rule_creation_time = compiled_rules.latest_creation_time
 
     if latest_rule_creation_time > last_foreman_run:
       # Update the latest checked rule on the client.
@@ -117,11 +307,22 @@ class Foreman(object):
 
     now = rdfvalue.RDFDatetime.Now()
 
-    for rule in rules:
-      if rule.expiration_time < now:
-        expired_rules.append(rule)
-      elif rule.creation_time > last_foreman_run:
-        relevant_rules.append(rule)
+    for rule in compiled_rules.rules:
+      if rule.condition.expiration_time < now:
+        expired_rules.append(rule.condition)
+      elif rule.condition.creation_time > last_foreman_run:
+        if rule.MatchesClientId(client_id):
+          relevant_rules.append(rule)
+
+    # If every candidate rule requires a label, the labels alone decide
+    # whether the full client information has to be read at all.
+    if relevant_rules and all(
+        r.label_keys is not None for r in relevant_rules
+    ):
+      labels = data_store.REL_DB.ReadClientLabels(client_id)
+      relevant_rules = compiled_rules.FilterByLabels(
+          relevant_rules, [label.name for label in labels]
+      )
 
     actions_count = 0
     if relevant_rules:
@@ -130,9 +331,15 @@ class Foreman(object):
         return
 
       client_data = mig_objects.ToRDFClientFullInfo(client_data)
+      relevant_rules = compiled_rules.FilterByLabels(
+          relevant_rules, [label.name for label in client_data.labels]
+      )
+      relevant_rules = compiled_rules.FilterByOs(
+          relevant_rules, client_data.last_snapshot.knowledge_base.os
+      )
       for rule in relevant_rules:
-        if rule.Evaluate(client_data):
-          actions_count += self._RunAction(rule, client_id)
+        if rule.condition.Evaluate(client_data):
+          actions_count += self._RunAction(rule.condition, client_id)
 
     if expired_rules:
       for rule in expired_rules:
@@ -148,10 +355,6 @@ class ForemanMessageHandler(message_handlers.MessageHandler):
   handler_name = "ForemanHandler"
 
   def ProcessMessages(self, msgs):
-    # TODO(amoser): The foreman reads the rules from the database for each
-    # client. In the old implementation we used to have a cache. If this is a
-    # performance hit, lets consider putting the cache back.
-
     foreman_obj = Foreman()
     for msg in msgs:
       foreman_obj.AssignTasksToClient(msg.client_id)
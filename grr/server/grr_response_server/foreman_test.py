@@ -300,6 +300,112 @@ class ForemanTests(test_lib.GRRBaseTest):
         rules = data_store.REL_DB.ReadAllForemanRules()
         self.assertLen(rules, num_rules)
 
+  def _WriteLabelRule(self, hunt_id, label_name):
+    now = rdfvalue.RDFDatetime.Now()
+    rule = foreman_rules.ForemanCondition(
+        creation_time=now,
+        expiration_time=now + rdfvalue.Duration.From(1, rdfvalue.HOURS),
+        description="Test rule",
+        hunt_id=hunt_id,
+    )
+    rule.client_rule_set = foreman_rules.ForemanClientRuleSet(
+        rules=[
+            foreman_rules.ForemanClientRule(
+                rule_type=foreman_rules.ForemanClientRule.Type.LABEL,
+                label=foreman_rules.ForemanLabelClientRule(
+                    label_names=[label_name],
+                ),
+            )
+        ]
+    )
+    data_store.REL_DB.WriteForemanRule(
+        mig_foreman_rules.ToProtoForemanCondition(rule)
+    )
+
+  def testLabelRulesSkipFullInfoReadForUnlabeledClients(self):
+    client_id = self.SetupClient(0)
+    self._WriteLabelRule("11111111", "foo")
+
+    with mock.patch.object(
+        hunt, "StartHuntFlowOnClient", self.StartHuntFlowOnClient
+    ):
+      with mock.patch.object(
+          data_store.REL_DB,
+          "ReadClientFullInfo",
+          wraps=data_store.REL_DB.ReadClientFullInfo,
+      ) as read_mock:
+        self.clients_started = []
+        foreman.Foreman().AssignTasksToClient(client_id)
+
+    read_mock.assert_not_called()
+    self.assertEmpty(self.clients_started)
+
+  def testLabelRulesStartHuntsOnLabeledClients(self):
+    client_id = self.SetupClient(0)
+    self.AddClientLabel(client_id, "owner", "foo")
+    self._WriteLabelRule("11111111", "foo")
+    self._WriteLabelRule("22222222", "bar")
+
+    with mock.patch.object(
+        hunt, "StartHuntFlowOnClient", self.StartHuntFlowOnClient
+    ):
+      self.clients_started = []
+      foreman.Foreman().AssignTasksToClient(client_id)
+
+    self.assertEqual(self.clients_started, [("11111111", client_id)])
+
+  def testRulesAreOnlyReadWhenChanged(self):
+    client_ids = [self.SetupClient(i) for i in range(3)]
+    self._WriteLabelRule("11111111", "foo")
+
+    with mock.patch.object(
+        data_store.REL_DB,
+        "ReadAllForemanRules",
+        wraps=data_store.REL_DB.ReadAllForemanRules,
+    ) as read_mock:
+      foreman_obj = foreman.Foreman()
+      for client_id in client_ids:
+        foreman_obj.AssignTasksToClient(client_id)
+      self.assertEqual(read_mock.call_count, 1)
+
+      self._WriteLabelRule("22222222", "foo")
+      foreman_obj.AssignTasksToClient(client_ids[0])
+      self.assertEqual(read_mock.call_count, 2)
+
+  def testCompiledRuleIndexKeys(self):
+    rule = foreman_rules.ForemanCondition(
+        hunt_id="11111111",
+        client_rule_set=foreman_rules.ForemanClientRuleSet(
+            match_mode="MATCH_ALL",
+            rules=[
+                foreman_rules.ForemanClientRule(
+                    rule_type=foreman_rules.ForemanClientRule.Type.OS,
+                    os=foreman_rules.ForemanOsClientRule(
+                        os_windows=True, os_darwin=True
+                    ),
+                ),
+                foreman_rules.ForemanClientRule(
+                    rule_type=foreman_rules.ForemanClientRule.Type.REGEX,
+                    regex=foreman_rules.ForemanRegexClientRule(
+                        field="CLIENT_ID",
+                        attribute_regex="^C\\.1",
+                    ),
+                ),
+            ],
+        ),
+    )
+
+    compiled = foreman.CompiledForemanRule(rule)
+
+    self.assertIsNone(compiled.label_keys)
+    self.assertEqual(compiled.os_keys, {"Windows", "Darwin"})
+    self.assertTrue(compiled.MatchesClientId("C.1000000000000000"))
+    self.assertFalse(compiled.MatchesClientId("C.2000000000000000"))
+
+    rules = foreman.CompiledForemanRules([rule])
+    self.assertLen(rules.FilterByOs(rules.rules, "Windows 7"), 1)
+    self.assertEmpty(rules.FilterByOs(rules.rules, "Linux"))
+
 
 def main(argv):
   # Run the full test suite
@@ -1,8 +1,11 @@
 #!/usr/bin/env python
 """This file contains utility functions used in ApiCallHandler classes."""
 
+import base64
+import binascii
 import re
 import sys
+from typing import Optional
 
 from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
@@ -91,3 +94,22 @@ def FilterList(l, offset, count=0, filter_value=None):
         break
 
   return items
+
+
+def EncodeContinuationToken(token: Optional[bytes]) -> Optional[str]:
+  """Converts a DB continuation token into an API (URL-safe string) token."""
+  if token is None:
+    return None
+
+  return base64.urlsafe_b64encode(token).decode("ascii")
+
+
+def DecodeContinuationToken(token: str) -> Optional[bytes]:
+  """Converts an API continuation token back into a DB continuation token."""
+  if not token:
+    return None
+
+  try:
+    return base64.urlsafe_b64decode(token.encode("ascii"))
+  except (UnicodeEncodeError, binascii.Error) as e:
+    raise ValueError(f"Invalid continuation token: {token!r}") from e
@@ -129,10 +129,12 @@ class ApiSearchClientsHandler(api_call_handler_base.ApiCallHandler):
 
     index = client_index.ClientIndex()
 
-    # LookupClients returns a sorted list of client ids.
-    clients = index.LookupClients(keywords)[args.offset : args.offset + end]
+    # LookupClients returns a sorted page of client ids.
+    clients = index.LookupClients(keywords, offset=args.offset, count=end)
 
-    client_infos = data_store.REL_DB.MultiReadClientFullInfo(clients)
+    client_infos = data_store.REL_DB.MultiReadClientFullInfoFromReplica(
+        clients
+    )
     for client_id, client_info in client_infos.items():
       api_clients.append(
           models_clients.ApiClientFromClientFullInfo(client_id, client_info)
@@ -190,7 +192,9 @@ class ApiLabelsRestrictedSearchClientsHandler(
 
     index = 0
     for cid_batch in collection.Batch(sorted(all_client_ids), batch_size):
-      client_infos = data_store.REL_DB.MultiReadClientFullInfo(cid_batch)
+      client_infos = data_store.REL_DB.MultiReadClientFullInfoFromReplica(
+          cid_batch
+      )
 
       for client_id, client_info in sorted(client_infos.items()):
         if not self._VerifyLabels(client_info.labels):
@@ -230,9 +234,11 @@ class ApiGetClientHandler(api_call_handler_base.ApiCallHandler):
       context: Optional[api_call_context.ApiCallContext] = None,
   ) -> client_pb2.ApiClient:
     client_id = args.client_id
-    info = data_store.REL_DB.ReadClientFullInfo(client_id)
+    infos = data_store.REL_DB.MultiReadClientFullInfoFromReplica([client_id])
+    info = infos.get(client_id)
     if info is None:
-      raise api_call_handler_base.ResourceNotFoundError()
+      # The client may have just enrolled and not be replicated yet.
+      info = data_store.REL_DB.ReadClientFullInfo(client_id)
 
     if args.HasField("timestamp"):
       # Assume that a snapshot for this particular timestamp exists.
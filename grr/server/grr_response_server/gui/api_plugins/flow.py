@@ -539,15 +539,39 @@ class ApiListFlowResultsHandler(api_call_handler_base.ApiCallHandler):
       args: flow_pb2.ApiListFlowResultsArgs,
       context: Optional[api_call_context.ApiCallContext] = None,
   ) -> flow_pb2.ApiListFlowResultsResult:
-    results = data_store.REL_DB.ReadFlowResults(
-        args.client_id,
-        args.flow_id,
-        args.offset,
-        args.count or db.MAX_COUNT,
-        with_substring=args.filter or None,
-        with_tag=args.with_tag or None,
-        with_type=args.with_type or None,
-    )
+    continuation_token = None
+    # The first page and pages following a continuation token are read using
+    # keyset pagination, so that reading deep pages stays cheap. Explicit
+    # offsets are still supported for backwards compatibility.
+    if args.HasField("continuation_token") or not args.offset:
+      try:
+        page = data_store.REL_DB.ReadFlowResultsPage(
+            args.client_id,
+            args.flow_id,
+            args.count or db.MAX_COUNT,
+            continuation_token=api_call_handler_utils.DecodeContinuationToken(
+                args.continuation_token
+            ),
+            with_substring=args.filter or None,
+            with_tag=args.with_tag or None,
+            with_type=args.with_type or None,
+        )
+      except db.InvalidContinuationTokenError as e:
+        raise ValueError(str(e)) from e
+      results = page.results
+      continuation_token = api_call_handler_utils.EncodeContinuationToken(
+          page.continuation_token
+      )
+    else:
+      results = data_store.REL_DB.ReadFlowResults(
+          args.client_id,
+          args.flow_id,
+          args.offset,
+          args.count or db.MAX_COUNT,
+          with_substring=args.filter or None,
+          with_tag=args.with_tag or None,
+          with_type=args.with_type or None,
+      )
 
     if args.filter:
       # TODO: with_substring is implemented in a hacky way,
@@ -568,7 +592,9 @@ class ApiListFlowResultsHandler(api_call_handler_base.ApiCallHandler):
     wrapped_items = [InitApiFlowResultFromFlowResult(r) for r in results]
 
     return flow_pb2.ApiListFlowResultsResult(
-        items=wrapped_items, total_count=total_count
+        items=wrapped_items,
+        total_count=total_count,
+        continuation_token=continuation_token,
     )
 
 
@@ -34,6 +34,7 @@ from grr_response_server.databases import db
 from grr_response_server.flows.general import export
 from grr_response_server.gui import api_call_context
 from grr_response_server.gui import api_call_handler_base
+from grr_response_server.gui import api_call_handler_utils
 from grr_response_server.gui import archive_generator
 from grr_response_server.gui.api_plugins import flow as api_flow
 from grr_response_server.gui.api_plugins import vfs as api_vfs
@@ -700,13 +701,35 @@ class ApiListHuntResultsHandler(api_call_handler_base.ApiCallHandler):
       args: api_hunt_pb2.ApiListHuntResultsArgs,
       context: Optional[api_call_context.ApiCallContext] = None,
   ) -> api_hunt_pb2.ApiListHuntResultsResult:
-    results = data_store.REL_DB.ReadHuntResults(
-        args.hunt_id,
-        args.offset,
-        args.count or db.MAX_COUNT,
-        with_substring=args.filter or None,
-        with_type=args.with_type or None,
-    )
+    continuation_token = None
+    # The first page and pages following a continuation token are read using
+    # keyset pagination, so that reading deep pages stays cheap. Explicit
+    # offsets are still supported for backwards compatibility.
+    if args.HasField("continuation_token") or not args.offset:
+      try:
+        page = data_store.REL_DB.ReadHuntResultsPage(
+            args.hunt_id,
+            args.count or db.MAX_COUNT,
+            continuation_token=api_call_handler_utils.DecodeContinuationToken(
+                args.continuation_token
+            ),
+            with_substring=args.filter or None,
+            with_type=args.with_type or None,
+        )
+      except db.InvalidContinuationTokenError as e:
+        raise ValueError(str(e)) from e
+      results = page.results
+      continuation_token = api_call_handler_utils.EncodeContinuationToken(
+          page.continuation_token
+      )
+    else:
+      results = data_store.REL_DB.ReadHuntResults(
+          args.hunt_id,
+          args.offset,
+          args.count or db.MAX_COUNT,
+          with_substring=args.filter or None,
+          with_type=args.with_type or None,
+      )
 
     total_count = data_store.REL_DB.CountHuntResults(
         args.hunt_id, with_type=args.with_type or None
@@ -715,6 +738,7 @@ class ApiListHuntResultsHandler(api_call_handler_base.ApiCallHandler):
     return api_hunt_pb2.ApiListHuntResultsResult(
         items=[InitApiHuntResultFromFlowResult(r) for r in results],
         total_count=total_count,
+        continuation_token=continuation_token,
     )
 
 
@@ -885,6 +885,44 @@ class ApiListHuntResultsHandlerTest(
     self.assertLen(result.items, 3)
     self.assertEqual(result.total_count, 10)
 
+  def testPagesThroughResultsWithContinuationToken(self):
+    hunt_id = self._RunHuntWithResults(
+        client_count=5,
+        results=[
+            rdf_file_finder.CollectFilesByKnownPathResult(),
+            rdf_file_finder.FileFinderResult(),
+        ],
+    )
+
+    items = []
+    args = api_hunt_pb2.ApiListHuntResultsArgs(hunt_id=hunt_id, count=3)
+    while True:
+      result = self.handler.Handle(args, context=self.context)
+      self.assertLessEqual(len(result.items), 3)
+      items.extend(result.items)
+      if not result.HasField("continuation_token"):
+        break
+      args.continuation_token = result.continuation_token
+
+    self.assertLen(items, 10)
+    self.assertCountEqual(
+        [r.client_id for r in items],
+        [client_id for client_id in self.client_ids for _ in range(2)],
+    )
+
+  def testRaisesOnInvalidContinuationToken(self):
+    hunt_id = self._RunHuntWithResults(
+        client_count=1, results=[rdf_file_finder.FileFinderResult()]
+    )
+
+    with self.assertRaises(ValueError):
+      self.handler.Handle(
+          api_hunt_pb2.ApiListHuntResultsArgs(
+              hunt_id=hunt_id, continuation_token="Zm9v"
+          ),
+          context=self.context,
+      )
+
   def testReturnsAllResultsOfFilteredType(self):
     hunt_id = self._RunHuntWithResults(
         client_count=5,
@@ -842,9 +842,9 @@ class ApiGetFileVersionTimesHandler(api_call_handler_base.ApiCallHandler):
       # empty response.
       return vfs_pb2.ApiGetFileVersionTimesResult()
 
-    history = data_store.REL_DB.ReadPathInfoHistory(
-        str(args.client_id), path_type, components
-    )
+    history = data_store.REL_DB.ReadPathInfosHistoriesFromReplica(
+        str(args.client_id), path_type, [components]
+    )[components]
     times = reversed([pi.timestamp for pi in history])
 
     return vfs_pb2.ApiGetFileVersionTimesResult(times=times)
@@ -1060,7 +1060,7 @@ def _GetTimelineStatEntries(
       yield categorized_path, stat_entry, hash_entry
 
   if with_history:
-    hist_path_infos = data_store.REL_DB.ReadPathInfosHistories(
+    hist_path_infos = data_store.REL_DB.ReadPathInfosHistoriesFromReplica(
         client_id, path_type, [tuple(pi.components) for pi in path_infos]
     )
     for path_info in itertools.chain.from_iterable(hist_path_infos.values()):
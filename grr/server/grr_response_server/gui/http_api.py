@@ -23,6 +23,7 @@ from grr_response_core.lib.util import precondition
 from grr_response_core.stats import metrics
 from grr_response_server import access_control
 from grr_response_server import data_store
+from grr_response_server.databases import db_profiling
 from grr_response_server.gui import api_auth_manager
 from grr_response_server.gui import api_call_context
 from grr_response_server.gui import api_call_handler_base
@@ -459,6 +460,19 @@ class HttpRequestHandler:
           dict(message=str(e), traceBack=traceback.format_exc()),
       )
 
+    with db_profiling.CallerContext("api", method_metadata.name):
+      return self._HandleMatchedRequest(
+          request, router, method_metadata, proto_args
+      )
+
+  def _HandleMatchedRequest(
+      self,
+      request: http_request.HttpRequest,
+      router: api_call_router.ApiCallRouter,
+      method_metadata: api_call_router.RouterMethodMetadata,
+      proto_args: Optional[message.Message],
+  ) -> http_response.HttpResponse:
+    """Handles HTTP request matched to a router method."""
     request.parsed_args = proto_args
 
     context = self._BuildContext(request)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""Root-access-level API handlers for database profiling."""
+
+from typing import Optional
+
+from grr_response_core import config
+from grr_response_proto import objects_pb2
+from grr_response_proto.api.root import database_profiling_pb2
+from grr_response_server import data_store
+from grr_response_server.gui import api_call_context
+from grr_response_server.gui import api_call_handler_base
+
+# Number of slow calls returned if the number is not specified in the request.
+_DEFAULT_COUNT = 100
+
+
+def ToApiSlowDatabaseCall(
+    slow_call: objects_pb2.SlowDatabaseCall,
+) -> database_profiling_pb2.ApiSlowDatabaseCall:
+  """Converts a slow database call to its API representation."""
+  result = database_profiling_pb2.ApiSlowDatabaseCall(
+      method=slow_call.method,
+      timestamp=slow_call.timestamp,
+      duration=slow_call.duration,
+      rows=slow_call.rows,
+      payload_bytes=slow_call.payload_bytes,
+      queries=slow_call.queries,
+      process=slow_call.process,
+  )
+  if slow_call.HasField("caller_kind"):
+    result.caller_kind = slow_call.caller_kind
+    result.caller_name = slow_call.caller_name
+  if slow_call.HasField("hunt_id"):
+    result.hunt_id = slow_call.hunt_id
+  return result
+
+
+class ApiListSlowDatabaseCallsHandler(api_call_handler_base.ApiCallHandler):
+  """Lists the most recent slow database calls of all server processes."""
+
+  proto_args_type = database_profiling_pb2.ApiListSlowDatabaseCallsArgs
+  proto_result_type = database_profiling_pb2.ApiListSlowDatabaseCallsResult
+
+  def Handle(
+      self,
+      args: database_profiling_pb2.ApiListSlowDatabaseCallsArgs,
+      context: Optional[api_call_context.ApiCallContext] = None,
+  ) -> database_profiling_pb2.ApiListSlowDatabaseCallsResult:
+    # Samples written by other processes (or while profiling was enabled) are
+    # listed even if profiling is disabled in this process.
+    slow_calls = data_store.REL_DB.ReadSlowDatabaseCalls(
+        args.count or _DEFAULT_COUNT
+    )
+    return database_profiling_pb2.ApiListSlowDatabaseCallsResult(
+        profiling_enabled=config.CONFIG["Database.profiling_enabled"],
+        items=[ToApiSlowDatabaseCall(slow_call) for slow_call in slow_calls],
+    )
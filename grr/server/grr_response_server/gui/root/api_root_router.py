@@ -13,6 +13,7 @@ from grr_response_proto.api import reflection_pb2 as api_reflection_pb2
 from grr_response_proto.api import signed_commands_pb2 as api_signed_commands_pb2
 from grr_response_proto.api import user_pb2 as api_user_pb2
 from grr_response_proto.api.root import binary_management_pb2
+from grr_response_proto.api.root import database_profiling_pb2
 from grr_response_proto.api.root import user_management_pb2
 from grr_response_server.gui import api_call_context
 from grr_response_server.gui import api_call_router
@@ -20,6 +21,7 @@ from grr_response_server.gui.api_plugins import metadata as api_metadata
 from grr_response_server.gui.api_plugins import reflection as api_reflection
 from grr_response_server.gui.api_plugins import signed_commands as api_signed_commands
 from grr_response_server.gui.root.api_plugins import binary_management as api_binary_management
+from grr_response_server.gui.root.api_plugins import database_profiling as api_database_profiling
 from grr_response_server.gui.root.api_plugins import user_management as api_user_management
 
 
@@ -108,6 +110,24 @@ class ApiRootRouter(api_call_router.ApiCallRouter):
   ) -> api_binary_management.ApiDeleteGrrBinaryHandler:
     return api_binary_management.ApiDeleteGrrBinaryHandler()
 
+  # Database profiling.
+  # ===================
+  #
+  @api_call_router.Category("Database profiling")
+  @api_call_router.ProtoArgsType(
+      database_profiling_pb2.ApiListSlowDatabaseCallsArgs
+  )
+  @api_call_router.ProtoResultType(
+      database_profiling_pb2.ApiListSlowDatabaseCallsResult
+  )
+  @api_call_router.Http("GET", "/api/v2/root/database/slow-calls")
+  def ListSlowDatabaseCalls(
+      self,
+      args: database_profiling_pb2.ApiListSlowDatabaseCallsArgs,
+      context: Optional[api_call_context.ApiCallContext] = None,
+  ) -> api_database_profiling.ApiListSlowDatabaseCallsHandler:
+    return api_database_profiling.ApiListSlowDatabaseCallsHandler()
+
   # Signed commands methods.
   # ========================
   #
@@ -1427,12 +1427,14 @@ export declare interface ApiListFlowResultsArgs {
   readonly filter?: string;
   readonly withTag?: string;
   readonly withType?: string;
+  readonly continuationToken?: string;
 }
 
 /** ApiListFlowResultsResult proto mapping. */
 export declare interface ApiListFlowResultsResult {
   readonly items?: readonly ApiFlowResult[];
   readonly totalCount?: ProtoInt64;
+  readonly continuationToken?: string;
 }
 
 /** ApiListFlowsArgs proto mapping. */
@@ -1581,12 +1583,14 @@ export declare interface ApiListHuntResultsArgs {
   readonly count?: ProtoInt64;
   readonly filter?: string;
   readonly withType?: string;
+  readonly continuationToken?: string;
 }
 
 /** ApiListHuntResultsResult proto mapping. */
 export declare interface ApiListHuntResultsResult {
   readonly items?: readonly ApiHuntResult[];
   readonly totalCount?: ProtoInt64;
+  readonly continuationToken?: string;
 }
 
 /** ApiListHuntsArgs proto mapping. */
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """REL_DB implementation of models_hunts."""
 
+import threading
 from typing import Optional
 
 from grr_response_core.lib import rdfvalue
@@ -17,6 +18,7 @@ from grr_response_server import foreman_rules
 from grr_response_server import mig_foreman_rules
 from grr_response_server import notification
 from grr_response_server import output_plugin_registry
+from grr_response_server.databases import db
 from grr_response_server.models import hunts as models_hunts
 from grr_response_server.rdfvalues import hunt_objects as rdf_hunt_objects
 from grr_response_server.rdfvalues import mig_flow_runner
@@ -136,18 +138,11 @@ def StopHuntIfCrashLimitExceeded(hunt_id):
 _TIME_BETWEEN_STOP_CHECKS = rdfvalue.Duration.From(30, rdfvalue.SECONDS)
 
 
-@cache.WithLimitedCallFrequency(_TIME_BETWEEN_STOP_CHECKS)
-def StopHuntIfCPUOrNetworkLimitsExceeded(hunt_id):
-  """Stops the hunt if average limites are exceeded."""
-  hunt_obj = data_store.REL_DB.ReadHuntObject(hunt_id)
-  hunt_obj = mig_hunt_objects.ToRDFHunt(hunt_obj)
-
-  # Do nothing if the hunt is already stopped.
-  if hunt_obj.hunt_state == rdf_hunt_objects.Hunt.HuntState.STOPPED:
-    return hunt_obj
-
-  hunt_counters = data_store.REL_DB.ReadHuntCounters(hunt_id)
-
+def _GetExceededCPUOrNetworkLimit(
+    hunt_obj: rdf_hunt_objects.Hunt,
+    hunt_counters: db.HuntCounters,
+) -> Optional[tuple[hunts_pb2.Hunt.HuntStateReason.ValueType, str]]:
+  """Returns the reason and a comment if any of the hunt limits is exceeded."""
   # Check global hunt network bytes limit first.
   if (
       hunt_obj.total_network_bytes_limit
@@ -158,16 +153,11 @@ def StopHuntIfCPUOrNetworkLimitsExceeded(hunt_id):
         f"Hunt {hunt_obj.hunt_id} reached the total network bytes sent limit of"
         f" {hunt_obj.total_network_bytes_limit} and was stopped."
     )
-    hunt_state_reason = hunts_pb2.Hunt.HuntStateReason.TOTAL_NETWORK_EXCEEDED
-    StopHunt(
-        hunt_obj.hunt_id,
-        hunt_state_reason=hunt_state_reason,
-        reason_comment=reason,
-    )
+    return hunts_pb2.Hunt.HuntStateReason.TOTAL_NETWORK_EXCEEDED, reason
 
   # Check that we have enough clients to apply average limits.
   if hunt_counters.num_clients < MIN_CLIENTS_FOR_AVERAGE_THRESHOLDS:
-    return hunt_obj
+    return None
 
   # Check average per-client results count limit.
   if hunt_obj.avg_results_per_client_limit:
@@ -180,12 +170,7 @@ def StopHuntIfCPUOrNetworkLimitsExceeded(hunt_id):
           f"Hunt {hunt_obj.hunt_id} reached the average results per client "
           f"limit of {hunt_obj.avg_results_per_client_limit} and was stopped."
       )
-      hunt_state_reason = hunts_pb2.Hunt.HuntStateReason.AVG_RESULTS_EXCEEDED
-      StopHunt(
-          hunt_obj.hunt_id,
-          hunt_state_reason=hunt_state_reason,
-          reason_comment=reason,
-      )
+      return hunts_pb2.Hunt.HuntStateReason.AVG_RESULTS_EXCEEDED, reason
 
   # Check average per-client CPU seconds limit.
   if hunt_obj.avg_cpu_seconds_per_client_limit:
@@ -199,12 +184,7 @@ def StopHuntIfCPUOrNetworkLimitsExceeded(hunt_id):
           f" limit of {hunt_obj.avg_cpu_seconds_per_client_limit} and was"
           " stopped."
       )
-      hunt_state_reason = hunts_pb2.Hunt.HuntStateReason.AVG_CPU_EXCEEDED
-      StopHunt(
-          hunt_obj.hunt_id,
-          hunt_state_reason=hunt_state_reason,
-          reason_comment=reason,
-      )
+      return hunts_pb2.Hunt.HuntStateReason.AVG_CPU_EXCEEDED, reason
 
   # Check average per-client network bytes limit.
   if hunt_obj.avg_network_bytes_per_client_limit:
@@ -222,14 +202,192 @@ def StopHuntIfCPUOrNetworkLimitsExceeded(hunt_id):
           f" client limit of {hunt_obj.avg_network_bytes_per_client_limit} and"
           " was stopped."
       )
-      hunt_state_reason = hunts_pb2.Hunt.HuntStateReason.AVG_NETWORK_EXCEEDED
-      StopHunt(
+      return hunts_pb2.Hunt.HuntStateReason.AVG_NETWORK_EXCEEDED, reason
+
+  return None
+
+
+class _HuntUsage:
+  """Resource usage of a single hunt as known to the current process."""
+
+  def __init__(self) -> None:
+    self.lock = threading.Lock()
+
+    self.hunt_obj: Optional[rdf_hunt_objects.Hunt] = None
+    self.counters: Optional[db.HuntCounters] = None
+    self.read_time: Optional[rdfvalue.RDFDatetime] = None
+    self.access_time = rdfvalue.RDFDatetime.Now()
+
+    # Usage reported by this process since the counters were read.
+    self.num_results = 0
+    self.cpu_seconds = 0.0
+    self.network_bytes_sent = 0
+
+
+class HuntLimitsEvaluator:
+  """Enforces hunt CPU, network and results limits using running totals.
+
+  Hunt counters are an aggregate over all of the hunt's flows, so they are read
+  at most once per `min_time_between_reads` for every hunt. In between, limits
+  are checked against the last read counters increased by the usage reported
+  by flows processed in this process since then.
+  """
+
+  def __init__(self, min_time_between_reads: rdfvalue.Duration) -> None:
+    self._min_time_between_reads = min_time_between_reads
+
+    self._lock = threading.Lock()
+    self._usages: dict[str, _HuntUsage] = {}
+    self._cleanup_time = rdfvalue.RDFDatetime.Now()
+
+  def _GetUsage(self, hunt_id: str) -> _HuntUsage:
+    """Returns usage of a given hunt, dropping entries not used recently."""
+    now = rdfvalue.RDFDatetime.Now()
+
+    with self._lock:
+      if now - self._cleanup_time >= self._min_time_between_reads:
+        max_idle_time = self._min_time_between_reads * 2
+        for other_hunt_id, usage in list(self._usages.items()):
+          if now - usage.access_time >= max_idle_time:
+            del self._usages[other_hunt_id]
+        self._cleanup_time = now
+
+      usage = self._usages.get(hunt_id)
+      if usage is None:
+        usage = _HuntUsage()
+        self._usages[hunt_id] = usage
+
+      usage.access_time = now
+      return usage
+
+  def _ShouldRead(self, usage: _HuntUsage, now: rdfvalue.RDFDatetime) -> bool:
+    if cache.WITH_LIMITED_CALL_FREQUENCY_PASS_THROUGH:
+      return True
+
+    if usage.read_time is None or now < usage.read_time:
+      return True
+
+    return now - usage.read_time >= self._min_time_between_reads
+
+  def StopHuntIfLimitsExceeded(
+      self,
+      hunt_id: str,
+      num_results: int = 0,
+      cpu_seconds: float = 0.0,
+      network_bytes_sent: int = 0,
+  ) -> rdf_hunt_objects.Hunt:
+    """Records hunt resource usage and stops the hunt if limits are exceeded.
+
+    Args:
+      hunt_id: An id of the hunt.
+      num_results: Number of results written by the hunt's flows since the
+        last call.
+      cpu_seconds: CPU seconds used by the hunt's flows since the last call.
+      network_bytes_sent: Network bytes sent by the hunt's flows since the last
+        call.
+
+    Returns:
+      The (possibly cached) hunt object.
+    """
+    usage = self._GetUsage(hunt_id)
+
+    with usage.lock:
+      now = rdfvalue.RDFDatetime.Now()
+      if self._ShouldRead(usage, now):
+        # The cached values are only replaced once all of them are read, so
+        # that a failed read is retried by the next call.
+        hunt_obj = mig_hunt_objects.ToRDFHunt(
+            data_store.REL_DB.ReadHuntObject(hunt_id)
+        )
+        # Do nothing if the hunt is already stopped.
+        if hunt_obj.hunt_state == rdf_hunt_objects.Hunt.HuntState.STOPPED:
+          usage.read_time = now
+          usage.hunt_obj = hunt_obj
+          return hunt_obj
+
+        counters = data_store.REL_DB.ReadHuntCounters(hunt_id)
+        usage.read_time = now
+        usage.hunt_obj = hunt_obj
+        usage.counters = counters
+        # Results are written before they are reported, so the counters already
+        # include them. Resource usage reported now belongs to a flow that is
+        # not persisted yet. Usage reported earlier might or might not be
+        # included, it is dropped to never count anything twice.
+        usage.num_results = 0
+        usage.cpu_seconds = cpu_seconds
+        usage.network_bytes_sent = network_bytes_sent
+        hunt_obj_is_fresh = True
+      else:
+        # Do nothing if the hunt is already stopped.
+        if usage.hunt_obj.hunt_state == rdf_hunt_objects.Hunt.HuntState.STOPPED:
+          return usage.hunt_obj
+
+        usage.num_results += num_results
+        usage.cpu_seconds += cpu_seconds
+        usage.network_bytes_sent += network_bytes_sent
+        hunt_obj_is_fresh = False
+
+      estimated_counters = usage.counters._replace(
+          num_results=usage.counters.num_results + usage.num_results,
+          total_cpu_seconds=(
+              usage.counters.total_cpu_seconds + usage.cpu_seconds
+          ),
+          total_network_bytes_sent=(
+              usage.counters.total_network_bytes_sent + usage.network_bytes_sent
+          ),
+      )
+      exceeded = _GetExceededCPUOrNetworkLimit(
+          usage.hunt_obj, estimated_counters
+      )
+      if exceeded is None:
+        return usage.hunt_obj
+
+      if not hunt_obj_is_fresh:
+        # The hunt might have been stopped since the hunt object was read.
+        usage.hunt_obj = mig_hunt_objects.ToRDFHunt(
+            data_store.REL_DB.ReadHuntObject(hunt_id)
+        )
+        if usage.hunt_obj.hunt_state == rdf_hunt_objects.Hunt.HuntState.STOPPED:
+          return usage.hunt_obj
+
+      hunt_obj = usage.hunt_obj
+      hunt_state_reason, reason = exceeded
+      usage.hunt_obj = StopHunt(
           hunt_obj.hunt_id,
           hunt_state_reason=hunt_state_reason,
           reason_comment=reason,
       )
+      return hunt_obj
 
-  return hunt_obj
+
+_LIMITS_EVALUATOR = HuntLimitsEvaluator(_TIME_BETWEEN_STOP_CHECKS)
+
+
+def StopHuntIfCPUOrNetworkLimitsExceeded(
+    hunt_id: str,
+    num_results: int = 0,
+    cpu_seconds: float = 0.0,
+    network_bytes_sent: int = 0,
+) -> rdf_hunt_objects.Hunt:
+  """Stops the hunt if average limites are exceeded.
+
+  Args:
+    hunt_id: An id of the hunt.
+    num_results: Number of results written by the hunt's flows since the last
+      call.
+    cpu_seconds: CPU seconds used by the hunt's flows since the last call.
+    network_bytes_sent: Network bytes sent by the hunt's flows since the last
+      call.
+
+  Returns:
+    The hunt object.
+  """
+  return _LIMITS_EVALUATOR.StopHuntIfLimitsExceeded(
+      hunt_id,
+      num_results=num_results,
+      cpu_seconds=cpu_seconds,
+      network_bytes_sent=network_bytes_sent,
+  )
 
 
 def CompleteHuntIfExpirationTimeReached(hunt_id: str) -> rdf_hunt_objects.Hunt:
@@ -15,6 +15,7 @@ from grr_response_core.lib import rdfvalue
 from grr_response_core.lib.rdfvalues import client as rdf_client
 from grr_response_core.lib.rdfvalues import file_finder as rdf_file_finder
 from grr_response_core.lib.rdfvalues import structs as rdf_structs
+from grr_response_core.lib.util import cache
 from grr_response_proto import flows_pb2
 from grr_response_proto import hunts_pb2
 from grr_response_proto import jobs_pb2
@@ -889,14 +890,12 @@ class HuntTest(
           ),
       )
 
-      # TODO: Re-enable the checks after the test is reworked to
-      # run with approximate limits (flow not persisted in the DB every time).
+      # Hunt should be terminated: the average is exceeded.
+      CheckState(hunts_pb2.Hunt.HuntState.STOPPED, 6, 12)
 
-      # # Hunt should be terminated: the average is exceeded.
-      # CheckState(rdf_hunt_objects.Hunt.HuntState.STOPPED, 6, 12)
-
-      # self._CheckHuntStoppedNotification(
-      #     "reached the average CPU seconds per client")
+      self._CheckHuntStoppedNotification(
+          "reached the average CPU seconds per client"
+      )
 
   def testHuntIsStoppedIfAveragePerClientNetworkUsageTooHigh(self):
     client_ids = self.SetupClients(5)
@@ -959,14 +958,12 @@ class HuntTest(
           ),
       )
 
-      # TODO: Re-enable the checks after the test is reworked to
-      # run with approximate limits (flow not persisted in the DB every time).
-
-      # # Hunt should be terminated: the limit is exceeded.
-      # CheckState(rdf_hunt_objects.Hunt.HuntState.STOPPED, 6)
+      # Hunt should be terminated: the limit is exceeded.
+      CheckState(hunts_pb2.Hunt.HuntState.STOPPED, 6)
 
-      # self._CheckHuntStoppedNotification(
-      #     "reached the average network bytes per client")
+      self._CheckHuntStoppedNotification(
+          "reached the average network bytes per client"
+      )
 
   def testHuntIsStoppedIfTotalNetworkUsageIsTooHigh(self):
     client_ids = self.SetupClients(5)
@@ -1008,18 +1005,108 @@ class HuntTest(
         client_mock=hunt_test_lib.SampleHuntMock(network_bytes_sent=1),
     )
 
-    # TODO: Re-enable the checks after the test is reworked to
-    # run with approximate limits (flow not persisted in the DB every time).
+    # 6 is greater than the total limit. The hunt should be stopped now.
+    CheckState(hunts_pb2.Hunt.HuntState.STOPPED, 6)
+
+    self._RunHunt(
+        [client_ids[4]],
+        client_mock=hunt_test_lib.SampleHuntMock(
+            network_bytes_sent=2, failrate=-1
+        ),
+    )
+
+    self._CheckHuntStoppedNotification(
+        "reached the total network bytes sent limit"
+    )
+
+  def testLimitsEvaluatorReadsHuntCountersAtBoundedRate(self):
+    hunt_id = self._CreateHunt(
+        client_rule_set=foreman_rules.ForemanClientRuleSet(),
+        total_network_bytes_limit=100,
+        args=self.ClientFileFinderHuntArgs(),
+    )
+    evaluator = hunt.HuntLimitsEvaluator(
+        rdfvalue.Duration.From(30, rdfvalue.SECONDS)
+    )
 
-    # # 6 is greater than the total limit. The hunt should be stopped now.
-    # CheckState(hunts_pb2.Hunt.HuntState.STOPPED, 6)
+    with mock.patch.object(
+        cache, "WITH_LIMITED_CALL_FREQUENCY_PASS_THROUGH", False
+    ):
+      with mock.patch.object(
+          data_store.REL_DB,
+          "ReadHuntCounters",
+          wraps=data_store.REL_DB.ReadHuntCounters,
+      ) as read_hunt_counters_mock:
+        now = rdfvalue.RDFDatetime.Now()
+        with test_lib.FakeTime(now):
+          for _ in range(10):
+            evaluator.StopHuntIfLimitsExceeded(hunt_id, network_bytes_sent=1)
+        self.assertEqual(read_hunt_counters_mock.call_count, 1)
+
+        later = now + rdfvalue.Duration.From(31, rdfvalue.SECONDS)
+        with test_lib.FakeTime(later):
+          evaluator.StopHuntIfLimitsExceeded(hunt_id, network_bytes_sent=1)
+        self.assertEqual(read_hunt_counters_mock.call_count, 2)
 
-    # self._RunHunt([client_ids[4]],
-    #               client_mock=hunt_test_lib.SampleHuntMock(
-    #                   network_bytes_sent=2, failrate=-1))
+    hunt_obj = data_store.REL_DB.ReadHuntObject(hunt_id)
+    self.assertEqual(hunt_obj.hunt_state, hunts_pb2.Hunt.HuntState.STARTED)
 
-    # self._CheckHuntStoppedNotification(
-    #     "reached the total network bytes sent limit")
+  def testLimitsEvaluatorRetriesFailedReads(self):
+    hunt_id = self._CreateHunt(
+        client_rule_set=foreman_rules.ForemanClientRuleSet(),
+        total_network_bytes_limit=5,
+        args=self.ClientFileFinderHuntArgs(),
+    )
+    evaluator = hunt.HuntLimitsEvaluator(
+        rdfvalue.Duration.From(30, rdfvalue.SECONDS)
+    )
+
+    with mock.patch.object(
+        cache, "WITH_LIMITED_CALL_FREQUENCY_PASS_THROUGH", False
+    ):
+      with test_lib.FakeTime(rdfvalue.RDFDatetime.Now()):
+        with mock.patch.object(
+            data_store.REL_DB,
+            "ReadHuntObject",
+            side_effect=RuntimeError("Database is down"),
+        ):
+          with self.assertRaises(RuntimeError):
+            evaluator.StopHuntIfLimitsExceeded(hunt_id, network_bytes_sent=3)
+
+        # The failed read is not cached, the hunt is read again.
+        evaluator.StopHuntIfLimitsExceeded(hunt_id, network_bytes_sent=3)
+        hunt_obj = data_store.REL_DB.ReadHuntObject(hunt_id)
+        self.assertEqual(hunt_obj.hunt_state, hunts_pb2.Hunt.HuntState.STARTED)
+
+        evaluator.StopHuntIfLimitsExceeded(hunt_id, network_bytes_sent=3)
+        hunt_obj = data_store.REL_DB.ReadHuntObject(hunt_id)
+        self.assertEqual(hunt_obj.hunt_state, hunts_pb2.Hunt.HuntState.STOPPED)
+
+  def testLimitsEvaluatorStopsHuntUsingReportedUsage(self):
+    hunt_id = self._CreateHunt(
+        client_rule_set=foreman_rules.ForemanClientRuleSet(),
+        total_network_bytes_limit=5,
+        args=self.ClientFileFinderHuntArgs(),
+    )
+    evaluator = hunt.HuntLimitsEvaluator(
+        rdfvalue.Duration.From(30, rdfvalue.SECONDS)
+    )
+
+    with mock.patch.object(
+        cache, "WITH_LIMITED_CALL_FREQUENCY_PASS_THROUGH", False
+    ):
+      with test_lib.FakeTime(rdfvalue.RDFDatetime.Now()):
+        evaluator.StopHuntIfLimitsExceeded(hunt_id, network_bytes_sent=3)
+        hunt_obj = data_store.REL_DB.ReadHuntObject(hunt_id)
+        self.assertEqual(hunt_obj.hunt_state, hunts_pb2.Hunt.HuntState.STARTED)
+
+        evaluator.StopHuntIfLimitsExceeded(hunt_id, network_bytes_sent=3)
+        hunt_obj = data_store.REL_DB.ReadHuntObject(hunt_id)
+        self.assertEqual(hunt_obj.hunt_state, hunts_pb2.Hunt.HuntState.STOPPED)
+
+    self._CheckHuntStoppedNotification(
+        "reached the total network bytes sent limit"
+    )
 
   def testHuntIsStoppedWhenExpirationTimeIsReached(self):
     client_ids = self.SetupClients(3)
@@ -5,7 +5,9 @@ import abc
 import functools
 import logging
 import re
-from typing import Callable, Iterable, Iterator, Optional, Sequence
+import struct
+import tempfile
+from typing import IO, Callable, Iterable, Iterator, Optional, Sequence
 
 from google.protobuf import message
 from grr_response_core.lib import rdfvalue
@@ -15,6 +17,9 @@ from grr_response_server import export
 from grr_response_server import export_converters_registry
 from grr_response_server.databases import db_utils
 
+# Size prefix of every exported value written to a spool.
+_SPOOLED_VALUE_SIZE = struct.Struct("<I")
+
 
 class InstantOutputPluginProto:
   """The base class for instant output plugins.
@@ -98,6 +103,10 @@ class InstantOutputPluginWithExportConversionProto(InstantOutputPluginProto):
 
   BATCH_SIZE = 5000
 
+  # Exported values of secondary types are kept in memory up to this size and
+  # spooled to a temporary file after that.
+  SPOOL_MAX_MEMORY_SIZE = 16 << 20
+
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self._cached_metadata = {}
@@ -143,78 +152,79 @@ class InstantOutputPluginWithExportConversionProto(InstantOutputPluginProto):
       return
 
     original_rdf_type_name = db_utils.TypeURLToRDFTypeName(type_url)
-    next_types = set()
-    processed_types = set()
-    while True:
-      converted_responses = export.FetchMetadataAndConvertFlowResults(
-          source_urn=self.source_urn,
-          options=export_pb2.ExportOptions(),
-          flow_results=type_url_results_generator_fn(),
-          cached_metadata=self._cached_metadata,
-      )
-
-      generator = self._GenerateSingleExportedTypeIteration(
-          next_types, processed_types, converted_responses
-      )
 
+    # Results are read and converted only once. Values of the first exported
+    # type are passed to the plugin directly, values of all other types are
+    # spooled (in the order of their first appearance) and passed to the plugin
+    # afterwards, so that all values of a type are processed together.
+    converted_responses = export.FetchMetadataAndConvertFlowResults(
+        source_urn=self.source_urn,
+        options=export_pb2.ExportOptions(),
+        flow_results=type_url_results_generator_fn(),
+        cached_metadata=self._cached_metadata,
+    )
+    spools: dict[type[message.Message], IO[bytes]] = {}
+
+    def FirstTypeValues() -> Iterator[message.Message]:
+      first_type = None
+      for converted_response in converted_responses:
+        value_type = converted_response.__class__
+        if first_type is None:
+          first_type = value_type
+
+        if value_type is first_type:
+          yield converted_response
+          continue
+
+        spool = spools.get(value_type)
+        if spool is None:
+          spool = tempfile.SpooledTemporaryFile(
+              max_size=self.SPOOL_MAX_MEMORY_SIZE
+          )
+          spools[value_type] = spool
+        _WriteSpooledValue(spool, converted_response)
+
+    try:
+      first_type_values = FirstTypeValues()
       for chunk in self.ProcessUniqueOriginalExportedTypePair(
-          original_rdf_type_name, generator
+          original_rdf_type_name, first_type_values
       ):
         yield chunk
+      # Make sure all the values got spooled even if the plugin did not consume
+      # all values of the first type.
+      for _ in first_type_values:
+        pass
+
+      for value_type, spool in spools.items():
+        spool.seek(0)
+        for chunk in self.ProcessUniqueOriginalExportedTypePair(
+            original_rdf_type_name, _ReadSpooledValues(spool, value_type)
+        ):
+          yield chunk
+    finally:
+      for spool in spools.values():
+        spool.close()
+
+
+def _WriteSpooledValue(spool: IO[bytes], value: message.Message) -> None:
+  serialized_value = value.SerializeToString()
+  spool.write(_SPOOLED_VALUE_SIZE.pack(len(serialized_value)))
+  spool.write(serialized_value)
+
+
+def _ReadSpooledValues(
+    spool: IO[bytes], value_type: type[message.Message]
+) -> Iterator[message.Message]:
+  """Yields values written to the spool with `_WriteSpooledValue`."""
+  while True:
+    size_bytes = spool.read(_SPOOLED_VALUE_SIZE.size)
+    if not size_bytes:
+      return
 
-      if not next_types:
-        break
-
-  def _GenerateSingleExportedTypeIteration(
-      self,
-      next_types: set[type[message.Message]],
-      processed_types: set[type[message.Message]],
-      converted_responses: Iterable[message.Message],
-  ):
-    """Yields responses of a given type only.
-
-    _GenerateSingleExportedTypeIteration iterates through converted_responses
-    and only yields responses of the same type. The type is either popped from
-    next_types or inferred from the first item of converted_responses.
-    The type is added to a set of processed_types.
-
-    Along the way _GenerateSingleExportedTypeIteration updates next_types set.
-    All newly encountered and not previously processed types are added to
-    next_types set.
-
-    Calling _GenerateSingleExportedTypeIteration multiple times allows doing
-    multiple passes on converted responses and emitting converted responses
-    of the same type continuously (so that they can be written into
-    the same file by the plugin).
-
-    Args:
-      next_types: List of value type classes that will be used in further
-        iterations.
-      processed_types: List of value type classes that have been used already.
-      converted_responses: Iterable with values to iterate over.
-
-    Yields:
-      Values from converted_response with the same type. Type is either
-      popped from the next_types set or inferred from the first
-      converted_responses value.
-    """
-    if not next_types:
-      current_type = None
-    else:
-      current_type = next_types.pop()
-      processed_types.add(current_type)
-
-    for converted_response in converted_responses:
-      if not current_type:
-        current_type = converted_response.__class__
-        processed_types.add(current_type)
-
-      if converted_response.__class__ != current_type:
-        if converted_response.__class__ not in processed_types:
-          next_types.add(converted_response.__class__)
-        continue
-
-      yield converted_response
+    (size,) = _SPOOLED_VALUE_SIZE.unpack(size_bytes)
+    value = value_type()
+    value.ParseFromString(spool.read(size))
+    yield value
 
 
 def GetExportedFlowResults(
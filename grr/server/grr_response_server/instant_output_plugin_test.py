@@ -170,6 +170,47 @@ class InstantOutputPluginWithExportConversionProtoTest(
         ],
     )
 
+  @export_test_lib.WithAllExportConverters
+  @export_test_lib.WithExportConverterProto(TestConverterProto1)
+  @export_test_lib.WithExportConverterProto(TestConverterProto2)
+  def testReadsResultsOnceWithTwoExportedValues(self):
+    values = [
+        tests_pb2.DummySrcValueProto2(value="foo"),
+        tests_pb2.DummySrcValueProto2(value="bar"),
+    ]
+    flow_results = []
+    for value in values:
+      flow_result = flows_pb2.FlowResult(client_id=self.client_id)
+      flow_result.payload.Pack(value)
+      flow_results.append(flow_result)
+
+    num_reads = 0
+
+    def ReadResults():
+      nonlocal num_reads
+      num_reads += 1
+      return iter(flow_results)
+
+    chunks = list(
+        self.plugin.ProcessValuesOfType(
+            flow_results[0].payload.type_url, ReadResults
+        )
+    )
+
+    self.assertEqual(num_reads, 1)
+    self.assertEqual(
+        b"".join(chunks).decode("utf-8").split("\n"),
+        [
+            "Original: DummySrcValueProto2",
+            "Exported value: exp1-foo",
+            "Exported value: exp1-bar",
+            "Original: DummySrcValueProto2",
+            "Exported value: exp2-foo",
+            "Exported value: exp2-bar",
+            "",
+        ],
+    )
+
 
 class GetExportedFlowResultsTest(test_lib.GRRBaseTest):
 
@@ -1,9 +1,12 @@
 #!/usr/bin/env python
-"""Plugin that exports results as SQLite db scripts."""
+"""Plugin that exports results as SQLite databases."""
 
-import io
+from collections.abc import Iterable
+import itertools
+import operator
 import os
 import sqlite3
+import tempfile
 from typing import Any, Callable, Iterator
 import zipfile
 
@@ -61,20 +64,90 @@ PROTO_SQLITE_CONVERTERS = {
 }
 
 
+class RowExtractor:
+  """Extracts SQLite rows from messages of a single type.
+
+  Column getters are compiled once per message type, so extracting a row does
+  not need to walk the message descriptors.
+
+  Attributes:
+    schema: A mapping of SQLite column names to Converter objects.
+  """
+
+  def __init__(self, message_descriptor: descriptor.Descriptor):
+    self.schema: dict[str, Converter] = {}
+    self._getters: list[Callable[[message.Message], Any]] = []
+
+    for column, converter, getter in _GetColumns(message_descriptor):
+      self.schema[column] = converter
+      self._getters.append(getter)
+
+  def Extract(self, msg: message.Message) -> tuple[Any, ...]:
+    """Returns the SQLite row for the given message."""
+    return tuple(getter(msg) for getter in self._getters)
+
+
+def _ComposeGetter(
+    convert_fn: Callable[[Any], Any],
+    attr_getter: Callable[[message.Message], Any],
+) -> Callable[[message.Message], Any]:
+  return lambda msg: convert_fn(attr_getter(msg))
+
+
+def _EnumNameGetter(
+    enum_descriptor: descriptor.EnumDescriptor,
+) -> Callable[[int], str]:
+  # Unknown enum numbers raise instead of being exported as NULL.
+  values_by_number = enum_descriptor.values_by_number
+  return lambda number: values_by_number[number].name
+
+
+def _GetColumns(
+    message_descriptor: descriptor.Descriptor,
+    prefix: str = "",
+) -> Iterator[tuple[str, Converter, Callable[[message.Message], Any]]]:
+  """Yields column names, converters and value getters of all leaf fields."""
+  for field_name, field_descriptor in message_descriptor.fields_by_name.items():
+    column = prefix + field_name
+    if field_descriptor.type == descriptor.FieldDescriptor.TYPE_MESSAGE:
+      yield from _GetColumns(field_descriptor.message_type, column + ".")
+      continue
+
+    if field_descriptor.label == descriptor.FieldDescriptor.LABEL_REPEATED:
+      converter = Converter("TEXT", str)
+      convert_fn = lambda value: str(list(value))
+    elif field_descriptor.type == descriptor.FieldDescriptor.TYPE_ENUM:
+      converter = PROTO_SQLITE_CONVERTERS[field_descriptor.type]
+      convert_fn = _EnumNameGetter(field_descriptor.enum_type)
+    else:
+      converter = PROTO_SQLITE_CONVERTERS[field_descriptor.type]
+      convert_fn = converter.convert_fn
+
+    getter = _ComposeGetter(convert_fn, operator.attrgetter(column))
+    yield column, converter, getter
+
+
 class SqliteInstantOutputPluginProto(
     instant_output_plugin.InstantOutputPluginWithExportConversionProto
 ):
-  """Instant output plugin that converts results into SQLite db commands."""
+  """Instant output plugin that converts results into SQLite databases."""
 
   plugin_name = "sqlite-zip"
-  friendly_name = "SQLite scripts (zipped)"
-  description = "Output ZIP archive containing SQLite scripts."
+  friendly_name = "SQLite databases (zipped)"
+  description = "Output ZIP archive containing SQLite databases."
   output_file_extension = ".zip"
 
   archive_generator: utils.StreamingZipGenerator
   export_counts: dict[str, dict[str, int]]
 
-  ROW_BATCH = 100
+  ROW_BATCH = 1000
+
+  # Size of chunks the database files are read in when added to the archive.
+  FILE_CHUNK_SIZE = 1 << 20
+
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self._row_extractors: dict[str, RowExtractor] = {}
 
   @property
   def path_prefix(self):
@@ -98,137 +171,92 @@ class SqliteInstantOutputPluginProto(
       return
 
     exported_value_class_name = first_value.__class__.__name__
-    yield self.archive_generator.WriteFileHeader(
-        "%s/%s_from_%s.sql"
-        % (
-            self.path_prefix,
-            exported_value_class_name,
-            original_rdf_type_name,
-        )
-    )
     table_name = "%s.from_%s" % (
         exported_value_class_name,
         original_rdf_type_name,
     )
-    schema = self._GetSqliteSchema(first_value.DESCRIPTOR)
-
-    # We will buffer the sql statements into an in-memory sql database before
-    # dumping them to the zip archive. We rely on the PySQLite library for
-    # string escaping.
-    db_connection = sqlite3.connect(":memory:")
-    db_cursor = db_connection.cursor()
-
-    yield self.archive_generator.WriteFileChunk(
-        "BEGIN TRANSACTION;\n".encode("utf-8")
-    )
-
-    with db_connection:
-      buf = io.StringIO()
-      buf.write('CREATE TABLE "%s" (\n  ' % table_name)
-      column_types = [(k, v.sqlite_type) for k, v in schema.items()]
-      buf.write(",\n  ".join(['"%s" %s' % (k, v) for k, v in column_types]))
-      buf.write("\n);")
-      db_cursor.execute(buf.getvalue())
-
-      chunk = (buf.getvalue() + "\n").encode("utf-8")
-      yield self.archive_generator.WriteFileChunk(chunk)
-
-      self._InsertValueIntoDb(table_name, schema, first_value, db_cursor)
-
-    for sql in self._FlushAllRows(db_connection, table_name):
-      yield sql
-    counter = 1
-    for batch in collection.Batch(exported_values, self.ROW_BATCH):
-      counter += len(batch)
-      with db_connection:
-        for value in batch:
-          self._InsertValueIntoDb(table_name, schema, value, db_cursor)
-      for sql in self._FlushAllRows(db_connection, table_name):
-        yield sql
-
-    db_connection.close()
-    yield self.archive_generator.WriteFileChunk("COMMIT;\n".encode("utf-8"))
-    yield self.archive_generator.WriteFileFooter()
+    row_extractor = self._GetRowExtractor(first_value.DESCRIPTOR)
+
+    # The rows are bulk-loaded into a database in a temporary file, which is
+    # then copied into the archive as is.
+    with tempfile.TemporaryDirectory() as temp_dir:
+      db_path = os.path.join(temp_dir, "export.sqlite")
+      counter = self._WriteDatabase(
+          db_path,
+          table_name,
+          row_extractor,
+          itertools.chain([first_value], exported_values),
+      )
+
+      yield self.archive_generator.WriteFileHeader(
+          "%s/%s_from_%s.sqlite"
+          % (
+              self.path_prefix,
+              exported_value_class_name,
+              original_rdf_type_name,
+          )
+      )
+      with open(db_path, "rb") as db_file:
+        while chunk := db_file.read(self.FILE_CHUNK_SIZE):
+          yield self.archive_generator.WriteFileChunk(chunk)
+      yield self.archive_generator.WriteFileFooter()
 
     counts_for_original_type = self.export_counts.setdefault(
         original_rdf_type_name, dict()
     )
     counts_for_original_type[exported_value_class_name] = counter
 
-  def _GetSqliteSchema(self, message_descriptor, prefix=""):
-    """Returns a mapping of SQLite column names to Converter objects."""
-    schema = dict()
-    for (
-        field_name,
-        field_descriptor,
-    ) in message_descriptor.fields_by_name.items():
-      if field_descriptor.type == descriptor.FieldDescriptor.TYPE_MESSAGE:
-        schema.update(
-            self._GetSqliteSchema(
-                field_descriptor.message_type,
-                prefix="%s%s." % (prefix, field_name),
-            )
-        )
-      else:
-        field_name = prefix + field_name
-        if field_descriptor.label == descriptor.FieldDescriptor.LABEL_REPEATED:
-          schema[field_name] = Converter("TEXT", str)
-        else:
-          schema[field_name] = PROTO_SQLITE_CONVERTERS[field_descriptor.type]
-    return schema
-
-  def _InsertValueIntoDb(self, table_name, schema, value, db_cursor):
-    sql_dict = self._ConvertToCanonicalSqlDict(schema, value)
-    buf = io.StringIO()
-    buf.write('INSERT INTO "%s" (\n  ' % table_name)
-    buf.write(",\n  ".join(['"%s"' % k for k in sql_dict.keys()]))
-    buf.write("\n)")
-    buf.write("VALUES (%s);" % ",".join(["?"] * len(sql_dict)))
-    db_cursor.execute(buf.getvalue(), list(sql_dict.values()))
-
-  def _ConvertToCanonicalSqlDict(self, schema, msg, prefix=""):
-    """Converts a proto message into a SQL-ready form."""
-    flattened_dict = {}
-    for (
-        field_name,
-        field_descriptor,
-    ) in msg.DESCRIPTOR.fields_by_name.items():
-      if field_descriptor.type == descriptor.FieldDescriptor.TYPE_MESSAGE:
-        flattened_dict.update(
-            self._ConvertToCanonicalSqlDict(
-                schema,
-                getattr(msg, field_name),
-                prefix="%s%s." % (prefix, field_name),
-            )
-        )
-      else:
-        key = prefix + field_name
-        converter = schema[key]
-
-        val = getattr(msg, field_name)
-        if field_descriptor.label == descriptor.FieldDescriptor.LABEL_REPEATED:
-          val = list(val)
-        elif field_descriptor.type == descriptor.FieldDescriptor.TYPE_ENUM:
-          val = field_descriptor.enum_type.values_by_number[val].name
-
-        flattened_dict[key] = converter.convert_fn(val)
-    return flattened_dict
-
-  def _FlushAllRows(self, db_connection, table_name):
-    """Copies rows from the given db into the output file then deletes them."""
-    for sql in db_connection.iterdump():
-      if (
-          sql.startswith("CREATE TABLE")
-          or sql.startswith("BEGIN TRANSACTION")
-          or sql.startswith("COMMIT")
-      ):
-        # These statements only need to be written once.
-        continue
-      # The archive generator expects strings (not Unicode objects returned by
-      # the pysqlite library).
-      yield self.archive_generator.WriteFileChunk((sql + "\n").encode("utf-8"))
-    with db_connection:
-      db_connection.cursor().execute('DELETE FROM "%s";' % table_name)
+  def _GetRowExtractor(
+      self, message_descriptor: descriptor.Descriptor
+  ) -> RowExtractor:
+    """Returns a (cached) row extractor for messages of the given type."""
+    try:
+      return self._row_extractors[message_descriptor.full_name]
+    except KeyError:
+      row_extractor = RowExtractor(message_descriptor)
+      self._row_extractors[message_descriptor.full_name] = row_extractor
+      return row_extractor
+
+  def _WriteDatabase(
+      self,
+      db_path: str,
+      table_name: str,
+      row_extractor: RowExtractor,
+      values: Iterable[message.Message],
+  ) -> int:
+    """Writes values into a new SQLite database, returns the number of rows."""
+    db_connection = sqlite3.connect(db_path)
+    try:
+      # The database file is temporary until it is copied into the archive, so
+      # there is no need for a rollback journal or for syncing to disk.
+      db_connection.execute("PRAGMA journal_mode = OFF;")
+      db_connection.execute("PRAGMA synchronous = OFF;")
+
+      column_types = [
+          '"%s" %s' % (column, converter.sqlite_type)
+          for column, converter in row_extractor.schema.items()
+      ]
+      db_connection.execute(
+          'CREATE TABLE "%s" (\n  %s\n);'
+          % (table_name, ",\n  ".join(column_types))
+      )
+
+      query = 'INSERT INTO "%s" VALUES (%s);' % (
+          table_name,
+          ",".join(["?"] * len(column_types)),
+      )
+      counter = 0
+      # All rows are inserted in a single transaction.
+      with db_connection:
+        for batch in collection.Batch(values, self.ROW_BATCH):
+          db_connection.executemany(
+              query, [row_extractor.Extract(value) for value in batch]
+          )
+          counter += len(batch)
+    finally:
+      db_connection.close()
+
+    return counter
 
   def Finish(self):
     manifest = {"export_stats": self.export_counts}
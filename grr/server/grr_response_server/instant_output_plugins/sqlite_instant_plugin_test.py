@@ -29,14 +29,14 @@ class SqliteInstantOutputPluginProtoTest(
     file_basename, _ = os.path.splitext(os.path.basename(fd_path))
     return zipfile.ZipFile(fd_path), file_basename
 
-  def setUp(self):
-    super().setUp()
-    # We use an in-memory db for testing generated SQL scripts.
-    self.db_connection = sqlite3.connect(":memory:")
-    self.db_cursor = self.db_connection.cursor()
-    self.addCleanup(self.db_connection.close)
-
-  def testConversionToCanonicalSqlDictWithVariousTypes(self):
+  def OpenDatabase(self, zip_fd, path):
+    """Extracts a database from the archive and returns a cursor for it."""
+    db_path = zip_fd.extract(path, self.temp_dir)
+    db_connection = sqlite3.connect(db_path)
+    self.addCleanup(db_connection.close)
+    return db_connection.cursor()
+
+  def testRowExtractionWithVariousTypes(self):
     plugin = sqlite_instant_plugin.SqliteInstantOutputPluginProto(
         source_urn="aff4:/C.1000000000000000"
     )
@@ -56,11 +56,11 @@ class SqliteInstantOutputPluginProtoTest(
         ),
     )
 
-    schema = plugin._GetSqliteSchema(input_proto.DESCRIPTOR)
-    sql_dict = plugin._ConvertToCanonicalSqlDict(schema, input_proto)
+    row_extractor = plugin._GetRowExtractor(input_proto.DESCRIPTOR)
+    row = row_extractor.Extract(input_proto)
 
     self.assertEqual(
-        sql_dict,
+        dict(zip(row_extractor.schema, row)),
         {
             "path": "foo",
             "foo": "bar",
@@ -72,7 +72,7 @@ class SqliteInstantOutputPluginProtoTest(
         },
     )
 
-  def testConversionToCanonicalSqlDictWithCyclicalStructures(self):
+  def testRowExtractionWithCyclicalStructures(self):
     plugin = sqlite_instant_plugin.SqliteInstantOutputPluginProto(
         source_urn="aff4:/C.1000000000000000"
     )
@@ -88,8 +88,8 @@ class SqliteInstantOutputPluginProtoTest(
     input_proto.child_1.root.child_1.root.child_2.field_string = "a"
 
     with self.assertRaises(RecursionError):
-      schema = plugin._GetSqliteSchema(input_proto.DESCRIPTOR)
-      plugin._ConvertToCanonicalSqlDict(schema, input_proto)
+      row_extractor = plugin._GetRowExtractor(input_proto.DESCRIPTOR)
+      row_extractor.Extract(input_proto)
 
   @export_test_lib.WithAllExportConverters
   def testExportedFilenamesAndManifestForValuesOfSameType(self):
@@ -117,7 +117,7 @@ class SqliteInstantOutputPluginProtoTest(
     self.assertEqual(
         set(zip_fd.namelist()),
         {f"{prefix}/MANIFEST",
-         f"{prefix}/ExportedFile_from_StatEntry.sql"},
+         f"{prefix}/ExportedFile_from_StatEntry.sqlite"},
     )
     parsed_manifest = yaml.safe_load(zip_fd.read(f"{prefix}/MANIFEST"))
     self.assertEqual(
@@ -148,22 +148,19 @@ class SqliteInstantOutputPluginProtoTest(
         {jobs_pb2.StatEntry: responses}
     )
 
-    sqlite_dump_path = f"{prefix}/ExportedFile_from_StatEntry.sql"
-    sqlite_dump = zip_fd.read(sqlite_dump_path).decode("utf-8")
-
-    # Import the sql dump into an in-memory db.
-    with self.db_connection:
-      self.db_cursor.executescript(sqlite_dump)
+    db_cursor = self.OpenDatabase(
+        zip_fd, f"{prefix}/ExportedFile_from_StatEntry.sqlite"
+    )
 
     # See what tables were written to the db.
-    self.db_cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = self.db_cursor.fetchall()
+    db_cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = db_cursor.fetchall()
     self.assertLen(tables, 1)
     self.assertEqual(tables[0][0], "ExportedFile.from_StatEntry")
 
     # Ensure all columns in the schema exist in the in-memory table.
-    self.db_cursor.execute("PRAGMA table_info('ExportedFile.from_StatEntry');")
-    columns = [row[1] for row in self.db_cursor.fetchall()]
+    db_cursor.execute("PRAGMA table_info('ExportedFile.from_StatEntry');")
+    columns = [row[1] for row in db_cursor.fetchall()]
     expected_columns = [
         "metadata.client_urn",
         "metadata.client_id",
@@ -254,12 +251,9 @@ class SqliteInstantOutputPluginProtoTest(
         {jobs_pb2.StatEntry: responses}
     )
 
-    sqlite_dump_path = "%s/ExportedFile_from_StatEntry.sql" % prefix
-    sqlite_dump = zip_fd.read(sqlite_dump_path).decode("utf-8")
-
-    # Import the sql dump into an in-memory db.
-    with self.db_connection:
-      self.db_cursor.executescript(sqlite_dump)
+    db_cursor = self.OpenDatabase(
+        zip_fd, f"{prefix}/ExportedFile_from_StatEntry.sqlite"
+    )
 
     select_columns = [
         "metadata.client_urn",
@@ -280,11 +274,11 @@ class SqliteInstantOutputPluginProtoTest(
         "symlink",
     ]
     escaped_column_names = ['"%s"' % c for c in select_columns]
-    self.db_cursor.execute(
+    db_cursor.execute(
         'SELECT %s FROM "ExportedFile.from_StatEntry";'
         % ",".join(escaped_column_names)
     )
-    rows = self.db_cursor.fetchall()
+    rows = db_cursor.fetchall()
     self.assertLen(rows, 10)
     for i, row in enumerate(rows):
       results = {k: row[j] for j, k in enumerate(select_columns)}
@@ -322,8 +316,8 @@ class SqliteInstantOutputPluginProtoTest(
         set(zip_fd.namelist()),
         {
             f"{prefix}/MANIFEST",
-            f"{prefix}/ExportedFile_from_StatEntry.sql",
-            f"{prefix}/ExportedProcess_from_Process.sql",
+            f"{prefix}/ExportedFile_from_StatEntry.sqlite",
+            f"{prefix}/ExportedProcess_from_Process.sqlite",
         },
     )
 
@@ -348,21 +342,18 @@ class SqliteInstantOutputPluginProtoTest(
         ],
         sysinfo_pb2.Process: [sysinfo_pb2.Process(pid=42)],
     })
-    with self.db_connection:
-      stat_entry_script_path = "%s/ExportedFile_from_StatEntry.sql" % prefix
-      stat_entry_script = zip_fd.read(stat_entry_script_path).decode("utf-8")
-
-      process_script_path = "%s/ExportedProcess_from_Process.sql" % prefix
-      process_script = zip_fd.read(process_script_path).decode("utf-8")
-
-      self.db_cursor.executescript(stat_entry_script)
-      self.db_cursor.executescript(process_script)
+    stat_entry_cursor = self.OpenDatabase(
+        zip_fd, f"{prefix}/ExportedFile_from_StatEntry.sqlite"
+    )
+    process_cursor = self.OpenDatabase(
+        zip_fd, f"{prefix}/ExportedProcess_from_Process.sqlite"
+    )
 
-    self.db_cursor.execute(
+    stat_entry_cursor.execute(
         'SELECT "metadata.client_urn", "metadata.source_urn", urn '
         'FROM "ExportedFile.from_StatEntry";'
     )
-    stat_entry_results = self.db_cursor.fetchall()
+    stat_entry_results = stat_entry_cursor.fetchall()
     self.assertLen(stat_entry_results, 1)
     # Client URN
     self.assertEqual(stat_entry_results[0][0], f"aff4:/{self.client_id}")
@@ -373,11 +364,11 @@ class SqliteInstantOutputPluginProtoTest(
         stat_entry_results[0][2], f"aff4:/{self.client_id}/fs/os/foo/bar"
     )
 
-    self.db_cursor.execute(
+    process_cursor.execute(
         'SELECT "metadata.client_urn", "metadata.source_urn", pid '
         'FROM "ExportedProcess.from_Process";'
     )
-    process_results = self.db_cursor.fetchall()
+    process_results = process_cursor.fetchall()
     self.assertLen(process_results, 1)
     # Client URN
     self.assertEqual(stat_entry_results[0][0], f"aff4:/{self.client_id}")
@@ -399,16 +390,15 @@ class SqliteInstantOutputPluginProtoTest(
     })
     self.assertEqual(
         set(zip_fd.namelist()),
-        {f"{prefix}/MANIFEST", f"{prefix}/ExportedFile_from_StatEntry.sql"},
+        {f"{prefix}/MANIFEST", f"{prefix}/ExportedFile_from_StatEntry.sqlite"},
     )
 
-    with self.db_connection:
-      sqlite_dump_path = "%s/ExportedFile_from_StatEntry.sql" % prefix
-      sqlite_dump = zip_fd.read(sqlite_dump_path).decode("utf-8")
-      self.db_cursor.executescript(sqlite_dump)
+    db_cursor = self.OpenDatabase(
+        zip_fd, f"{prefix}/ExportedFile_from_StatEntry.sqlite"
+    )
 
-    self.db_cursor.execute('SELECT urn FROM "ExportedFile.from_StatEntry";')
-    results = self.db_cursor.fetchall()
+    db_cursor.execute('SELECT urn FROM "ExportedFile.from_StatEntry";')
+    results = db_cursor.fetchall()
     self.assertLen(results, 1)
     self.assertEqual(
         results[0][0], f"aff4:/{self.client_id}/fs/os/中国新闻网新闻中"
@@ -429,12 +419,11 @@ class SqliteInstantOutputPluginProtoTest(
     zip_fd, prefix = self.ProcessValuesToZip(
         {jobs_pb2.StatEntry: responses}
     )
-    with self.db_connection:
-      sqlite_dump_path = f"{prefix}/ExportedFile_from_StatEntry.sql"
-      sqlite_dump = zip_fd.read(sqlite_dump_path).decode("utf-8")
-      self.db_cursor.executescript(sqlite_dump)
-    self.db_cursor.execute('SELECT urn FROM "ExportedFile.from_StatEntry";')
-    results = self.db_cursor.fetchall()
+    db_cursor = self.OpenDatabase(
+        zip_fd, f"{prefix}/ExportedFile_from_StatEntry.sqlite"
+    )
+    db_cursor.execute('SELECT urn FROM "ExportedFile.from_StatEntry";')
+    results = db_cursor.fetchall()
     self.assertLen(results, num_rows)
     for i in range(num_rows):
       self.assertEqual(
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """Provides path-related data models and helpers."""
 
-from collections.abc import Iterable
+from collections.abc import Iterable, Sequence
 from typing import Optional
 from grr_response_proto import objects_pb2
 
@@ -53,3 +53,51 @@ def GetAncestorPathInfos(
     if current is None:
       return
     yield current
+
+
+class AncestorPathInfoTrie:
+  """A trie of paths that collects the unique ancestors of written paths.
+
+  Paths written in bulk usually share most of their ancestors (e.g. all the
+  files found under `/usr/lib`). Instead of generating all ancestors for every
+  path, the trie walks down the path components and creates a path info only
+  for ancestors that it has not seen before.
+  """
+
+  def __init__(self) -> None:
+    # Nodes of the trie are dictionaries mapping a component to a child node.
+    self._roots: dict[int, dict[str, dict]] = {}
+    self._ancestors: list[objects_pb2.PathInfo] = []
+
+  def _AddAncestor(self, path_type: int, components: Sequence[str]) -> None:
+    self._ancestors.append(
+        objects_pb2.PathInfo(
+            components=components,
+            path_type=path_type,
+            directory=True,
+        )
+    )
+
+  def Add(self, path_info: objects_pb2.PathInfo) -> None:
+    """Adds ancestors of the given path to the trie."""
+    components = path_info.components
+    if not components:
+      return
+
+    node = self._roots.get(path_info.path_type)
+    if node is None:
+      node = self._roots[path_info.path_type] = {}
+      self._AddAncestor(path_info.path_type, [])
+
+    for depth in range(1, len(components)):
+      child = node.get(components[depth - 1])
+      if child is None:
+        child = node[components[depth - 1]] = {}
+        self._AddAncestor(path_info.path_type, components[:depth])
+      node = child
+
+  @property
+  def ancestor_path_infos(self) -> Sequence[objects_pb2.PathInfo]:
+    """Unique ancestors of all the added paths, each before its descendants."""
+    return self._ancestors
+
@@ -135,5 +135,73 @@ class GetAncestorPathInfosTest(absltest.TestCase):
       self.assertEqual(results[i].path_type, rdf_results[i].path_type)
 
 
+def _AncestorPathInfos(path_infos):
+  trie = models_paths.AncestorPathInfoTrie()
+  for path_info in path_infos:
+    trie.Add(path_info)
+  return trie.ancestor_path_infos
+
+
+class AncestorPathInfoTrieTest(absltest.TestCase):
+
+  def testEmpty(self):
+    self.assertEmpty(_AncestorPathInfos([]))
+
+  def testRoot(self):
+    path_info = objects_pb2.PathInfo(components=[])
+
+    self.assertEmpty(_AncestorPathInfos([path_info]))
+
+  def testSinglePath(self):
+    path_info = objects_pb2.PathInfo(
+        path_type=objects_pb2.PathInfo.PathType.OS,
+        components=["foo", "bar", "baz"],
+    )
+
+    results = _AncestorPathInfos([path_info])
+    self.assertCountEqual(
+        results, list(models_paths.GetAncestorPathInfos(path_info))
+    )
+
+  def testSharedAncestors(self):
+    path_infos = [
+        objects_pb2.PathInfo(components=["usr", "lib", "foo"]),
+        objects_pb2.PathInfo(components=["usr", "lib", "bar"]),
+        objects_pb2.PathInfo(components=["usr", "lib", "baz", "quux"]),
+        objects_pb2.PathInfo(components=["usr", "lib"]),
+    ]
+
+    results = _AncestorPathInfos(path_infos)
+    self.assertEqual(
+        [result.components for result in results],
+        [[], ["usr"], ["usr", "lib"], ["usr", "lib", "baz"]],
+    )
+    for result in results:
+      self.assertTrue(result.directory)
+
+  def testPathTypesAreSeparate(self):
+    path_infos = [
+        objects_pb2.PathInfo(
+            path_type=objects_pb2.PathInfo.PathType.OS,
+            components=["foo", "bar"],
+        ),
+        objects_pb2.PathInfo(
+            path_type=objects_pb2.PathInfo.PathType.TSK,
+            components=["foo", "bar"],
+        ),
+    ]
+
+    results = _AncestorPathInfos(path_infos)
+    self.assertCountEqual(
+        [(result.path_type, tuple(result.components)) for result in results],
+        [
+            (objects_pb2.PathInfo.PathType.OS, ()),
+            (objects_pb2.PathInfo.PathType.OS, ("foo",)),
+            (objects_pb2.PathInfo.PathType.TSK, ()),
+            (objects_pb2.PathInfo.PathType.TSK, ("foo",)),
+        ],
+    )
+
+
 if __name__ == "__main__":
   absltest.main()
@@ -14,9 +14,7 @@ def ToProtoFlowRequest(
 def ToRDFFlowRequest(
     proto: flows_pb2.FlowRequest,
 ) -> rdf_flow_objects.FlowRequest:
-  return rdf_flow_objects.FlowRequest.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowRequest.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowResponse(
@@ -28,9 +26,7 @@ def ToProtoFlowResponse(
 def ToRDFFlowResponse(
     proto: flows_pb2.FlowResponse,
 ) -> rdf_flow_objects.FlowResponse:
-  return rdf_flow_objects.FlowResponse.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowResponse.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowIterator(
@@ -42,9 +38,7 @@ def ToProtoFlowIterator(
 def ToRDFFlowIterator(
     proto: flows_pb2.FlowIterator,
 ) -> rdf_flow_objects.FlowIterator:
-  return rdf_flow_objects.FlowIterator.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowIterator.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowStatus(rdf: rdf_flow_objects.FlowStatus) -> flows_pb2.FlowStatus:
@@ -52,9 +46,7 @@ def ToProtoFlowStatus(rdf: rdf_flow_objects.FlowStatus) -> flows_pb2.FlowStatus:
 
 
 def ToRDFFlowStatus(proto: flows_pb2.FlowStatus) -> rdf_flow_objects.FlowStatus:
-  return rdf_flow_objects.FlowStatus.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowStatus.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowResult(rdf: rdf_flow_objects.FlowResult) -> flows_pb2.FlowResult:
@@ -62,9 +54,7 @@ def ToProtoFlowResult(rdf: rdf_flow_objects.FlowResult) -> flows_pb2.FlowResult:
 
 
 def ToRDFFlowResult(proto: flows_pb2.FlowResult) -> rdf_flow_objects.FlowResult:
-  return rdf_flow_objects.FlowResult.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowResult.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowError(rdf: rdf_flow_objects.FlowError) -> flows_pb2.FlowError:
@@ -72,9 +62,7 @@ def ToProtoFlowError(rdf: rdf_flow_objects.FlowError) -> flows_pb2.FlowError:
 
 
 def ToRDFFlowError(proto: flows_pb2.FlowError) -> rdf_flow_objects.FlowError:
-  return rdf_flow_objects.FlowError.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowError.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowLogEntry(
@@ -86,9 +74,7 @@ def ToProtoFlowLogEntry(
 def ToRDFFlowLogEntry(
     proto: flows_pb2.FlowLogEntry,
 ) -> rdf_flow_objects.FlowLogEntry:
-  return rdf_flow_objects.FlowLogEntry.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowLogEntry.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowOutputPluginLogEntry(
@@ -100,9 +86,7 @@ def ToProtoFlowOutputPluginLogEntry(
 def ToRDFFlowOutputPluginLogEntry(
     proto: flows_pb2.FlowOutputPluginLogEntry,
 ) -> rdf_flow_objects.FlowOutputPluginLogEntry:
-  return rdf_flow_objects.FlowOutputPluginLogEntry.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowOutputPluginLogEntry.FromPrimitiveProto(proto)
 
 
 def ToProtoFlow(rdf: rdf_flow_objects.Flow) -> flows_pb2.Flow:
@@ -110,7 +94,7 @@ def ToProtoFlow(rdf: rdf_flow_objects.Flow) -> flows_pb2.Flow:
 
 
 def ToRDFFlow(proto: flows_pb2.Flow) -> rdf_flow_objects.Flow:
-  return rdf_flow_objects.Flow.FromSerializedBytes(proto.SerializeToString())
+  return rdf_flow_objects.Flow.FromPrimitiveProto(proto)
 
 
 def ToProtoScheduledFlow(
@@ -122,9 +106,7 @@ def ToProtoScheduledFlow(
 def ToRDFScheduledFlow(
     proto: flows_pb2.ScheduledFlow,
 ) -> rdf_flow_objects.ScheduledFlow:
-  return rdf_flow_objects.ScheduledFlow.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.ScheduledFlow.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowResultCount(
@@ -136,9 +118,7 @@ def ToProtoFlowResultCount(
 def ToRDFFlowResultCount(
     proto: flows_pb2.FlowResultCount,
 ) -> rdf_flow_objects.FlowResultCount:
-  return rdf_flow_objects.FlowResultCount.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowResultCount.FromPrimitiveProto(proto)
 
 
 def ToProtoFlowResultMetadata(
@@ -150,9 +130,7 @@ def ToProtoFlowResultMetadata(
 def ToRDFFlowResultMetadata(
     proto: flows_pb2.FlowResultMetadata,
 ) -> rdf_flow_objects.FlowResultMetadata:
-  return rdf_flow_objects.FlowResultMetadata.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.FlowResultMetadata.FromPrimitiveProto(proto)
 
 
 def ToProtoDefaultFlowProgress(
@@ -164,6 +142,4 @@ def ToProtoDefaultFlowProgress(
 def ToRDFDefaultFlowProgress(
     proto: flows_pb2.DefaultFlowProgress,
 ) -> rdf_flow_objects.DefaultFlowProgress:
-  return rdf_flow_objects.DefaultFlowProgress.FromSerializedBytes(
-      proto.SerializeToString()
-  )
+  return rdf_flow_objects.DefaultFlowProgress.FromPrimitiveProto(proto)
@@ -18,6 +18,7 @@ from grr_response_server import handler_registry
 from grr_response_server import server_stubs
 # pylint: enable=unused-import
 from grr_response_server.databases import db
+from grr_response_server.databases import db_profiling
 from grr_response_server.rdfvalues import flow_objects as rdf_flow_objects
 from grr_response_server.rdfvalues import mig_flow_objects
 from grr_response_server.rdfvalues import mig_objects
@@ -63,7 +64,8 @@ def ProcessMessageHandlerRequests(
       logging.debug(
           "Running %d messages for handler %s", num_requests, handler_name
       )
-      handler_cls().ProcessMessages(requests_for_handler)
+      with db_profiling.CallerContext("message_handler", handler_name):
+        handler_cls().ProcessMessages(requests_for_handler)
     except Exception as e:  # pylint: disable=broad-except
       logging.exception(
           "Exception while processing message handler %s: %s", handler_name, e
@@ -145,6 +147,16 @@ class GRRWorker(object):
 
     rdf_flow = mig_flow_objects.ToRDFFlow(flow)
 
+    with db_profiling.CallerContext(
+        "flow", rdf_flow.flow_class_name, hunt_id=rdf_flow.parent_hunt_id
+    ):
+      self._ProcessLeasedFlow(rdf_flow)
+
+  def _ProcessLeasedFlow(self, rdf_flow: rdf_flow_objects.Flow) -> None:
+    """Processes all ready requests of a flow leased for processing."""
+    client_id = rdf_flow.client_id
+    flow_id = rdf_flow.flow_id
+
     first_request_to_process = rdf_flow.next_request_to_process
     logging.info(
         "Processing Flow %s/%s/%d (%s).",
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Supervisor running the GRR worker in multiple processes."""
+
+from collections.abc import Callable, Sequence
+import logging
+import subprocess
+import time
+from typing import Optional
+
+from grr_response_core.stats import metrics
+
+
+WORKER_PROCESSES = metrics.Gauge("worker_processes", int)
+WORKER_PROCESS_EXITS = metrics.Counter("worker_process_exits")
+
+
+class WorkerSupervisor(object):
+  """Runs a number of worker processes, restarting them when they exit.
+
+  Every worker process is a separate GRR worker with its own database
+  connections and flow processing threads, so flow processing on a single host
+  is not limited by one Python interpreter lock.
+
+  Worker processes are started in their own sessions, so that signals sent to
+  the terminal are not delivered to them directly. Instead, the supervisor
+  drains them when it is interrupted: every process gets a SIGTERM and is
+  killed if it does not exit within the drain timeout.
+  """
+
+  def __init__(
+      self,
+      command_fn: Callable[[int], Sequence[str]],
+      num_processes: int,
+      drain_timeout: float,
+      poll_interval: float = 1.0,
+      restart_delay: float = 5.0,
+  ) -> None:
+    """Initializes the supervisor.
+
+    Args:
+      command_fn: A function returning the command line of the worker process
+        with the given index.
+      num_processes: Number of worker processes to run.
+      drain_timeout: Time (in seconds) worker processes have to finish their
+        work after being asked to stop.
+      poll_interval: How often (in seconds) worker processes are checked.
+      restart_delay: Time (in seconds) to wait before restarting a worker
+        process that exited.
+    """
+    if num_processes < 1:
+      raise ValueError(f"Invalid number of worker processes: {num_processes}")
+
+    self._command_fn = command_fn
+    self._drain_timeout = drain_timeout
+    self._poll_interval = poll_interval
+    self._restart_delay = restart_delay
+
+    self._processes: list[Optional[subprocess.Popen]] = [None] * num_processes
+    self._start_times: list[float] = [0.0] * num_processes
+
+  @property
+  def pids(self) -> list[int]:
+    """Process ids of the running worker processes."""
+    return [
+        process.pid
+        for process in self._processes
+        if process is not None and process.poll() is None
+    ]
+
+  def _Start(self, index: int) -> None:
+    command = list(self._command_fn(index))
+    self._processes[index] = subprocess.Popen(command, start_new_session=True)
+    logging.info(
+        "Started worker process %d (pid %d).",
+        index,
+        self._processes[index].pid,
+    )
+
+  def CheckProcesses(self) -> None:
+    """Starts worker processes that are not running."""
+    now = time.monotonic()
+
+    for index, process in enumerate(self._processes):
+      if process is not None:
+        if process.poll() is None:
+          continue
+
+        logging.error(
+            "Worker process %d (pid %d) exited with code %d.",
+            index,
+            process.pid,
+            process.returncode,
+        )
+        WORKER_PROCESS_EXITS.Increment()
+        self._processes[index] = None
+        # Do not restart processes failing on startup in a tight loop.
+        self._start_times[index] = now + self._restart_delay
+
+      if now >= self._start_times[index]:
+        self._Start(index)
+
+    WORKER_PROCESSES.SetValue(len(self.pids))
+
+  def Drain(self) -> None:
+    """Stops all worker processes, letting them finish their work first."""
+    processes = [
+        process
+        for process in self._processes
+        if process is not None and process.poll() is None
+    ]
+
+    for process in processes:
+      process.terminate()
+
+    deadline = time.monotonic() + self._drain_timeout
+    for process in processes:
+      try:
+        process.wait(timeout=max(deadline - time.monotonic(), 0))
+      except subprocess.TimeoutExpired:
+        logging.warning(
+            "Worker process (pid %d) did not exit in time, killing it.",
+            process.pid,
+        )
+        process.kill()
+        process.wait()
+
+    self._processes = [None] * len(self._processes)
+    WORKER_PROCESSES.SetValue(0)
+
+  def Run(self) -> None:
+    """Runs the worker processes until interrupted."""
+    try:
+      while True:
+        self.CheckProcesses()
+        time.sleep(self._poll_interval)
+    except KeyboardInterrupt:
+      logging.info("Caught interrupt, draining worker processes.")
+    finally:
+      self.Drain()
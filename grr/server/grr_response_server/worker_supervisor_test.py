@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Tests for the worker supervisor."""
+
+import os
+import sys
+import time
+
+from absl import app
+
+from grr_response_server import worker_supervisor
+from grr.test_lib import stats_test_lib
+from grr.test_lib import test_lib
+
+
+def _PythonCommand(code: str) -> list[str]:
+  return [sys.executable, "-c", code]
+
+
+class WorkerSupervisorTest(
+    stats_test_lib.StatsTestMixin, test_lib.GRRBaseTest
+):
+
+  def _WaitForExits(
+      self, supervisor: worker_supervisor.WorkerSupervisor
+  ) -> None:
+    deadline = time.monotonic() + 10
+    while supervisor.pids:
+      self.assertLess(time.monotonic(), deadline)
+      time.sleep(0.1)
+
+  def testRaisesOnInvalidNumberOfProcesses(self):
+    with self.assertRaises(ValueError):
+      worker_supervisor.WorkerSupervisor(
+          lambda _: _PythonCommand("pass"), num_processes=0, drain_timeout=1
+      )
+
+  def testStartsAndDrainsProcesses(self):
+    supervisor = worker_supervisor.WorkerSupervisor(
+        lambda _: _PythonCommand("import time; time.sleep(60)"),
+        num_processes=3,
+        drain_timeout=10,
+    )
+
+    supervisor.CheckProcesses()
+    pids = supervisor.pids
+    self.assertLen(pids, 3)
+
+    # Running processes are not restarted.
+    supervisor.CheckProcesses()
+    self.assertCountEqual(supervisor.pids, pids)
+
+    supervisor.Drain()
+    self.assertEmpty(supervisor.pids)
+
+  def testPassesProcessIndex(self):
+    output_dir = self.temp_dir
+
+    def Command(index):
+      path = os.path.join(output_dir, str(index))
+      return _PythonCommand(f"open({path!r}, 'w').close()")
+
+    supervisor = worker_supervisor.WorkerSupervisor(
+        Command, num_processes=2, drain_timeout=10
+    )
+    supervisor.CheckProcesses()
+    self._WaitForExits(supervisor)
+    supervisor.Drain()
+
+    self.assertTrue(os.path.exists(os.path.join(output_dir, "0")))
+    self.assertTrue(os.path.exists(os.path.join(output_dir, "1")))
+
+  def testRestartsExitedProcesses(self):
+    supervisor = worker_supervisor.WorkerSupervisor(
+        lambda _: _PythonCommand("pass"),
+        num_processes=1,
+        drain_timeout=10,
+        restart_delay=0,
+    )
+
+    supervisor.CheckProcesses()
+    self._WaitForExits(supervisor)
+
+    with self.assertStatsCounterDelta(
+        1, worker_supervisor.WORKER_PROCESS_EXITS
+    ):
+      supervisor.CheckProcesses()
+
+    supervisor.Drain()
+
+  def testDrainKillsProcessesIgnoringTermination(self):
+    ready_path = os.path.join(self.temp_dir, "ready")
+    code = (
+        "import signal, time\n"
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+        f"open({ready_path!r}, 'w').close()\n"
+        "time.sleep(60)\n"
+    )
+    supervisor = worker_supervisor.WorkerSupervisor(
+        lambda _: _PythonCommand(code), num_processes=1, drain_timeout=0.5
+    )
+
+    supervisor.CheckProcesses()
+    deadline = time.monotonic() + 10
+    while not os.path.exists(ready_path):
+      self.assertLess(time.monotonic(), deadline)
+      time.sleep(0.1)
+
+    start_time = time.monotonic()
+    supervisor.Drain()
+    self.assertLess(time.monotonic() - start_time, 10)
+    self.assertEmpty(supervisor.pids)
+
+
+def main(argv):
+  test_lib.main(argv)
+
+
+if __name__ == "__main__":
+  app.run(main)